@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+# ============================================
+# SMART SAVE ACTION EXECUTOR
+# ============================================
+# Menu bar actions (start, stop, restart) run here
+# instead of on the rumps main thread:
+# - One worker thread, one job at a time, so a
+#   double-click can't start two servers
+# - Jobs report progress through a callback the
+#   menu bar shows
+# - The Terminal/Chrome/Safari cleanups run at once
+# - CommandRunner stubs the macOS-only commands off
+#   macOS, so everything runs on Linux too:
+#     python3 action_executor.py
+# ============================================
+
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class CommandRunner:
+    """Runs external commands; stubbed ones are only recorded"""
+
+    MACOS_COMMANDS = ('osascript', 'open', 'pbcopy', 'pkill')
+
+    def __init__(self, stub=None):
+        # Default: stub the macOS commands everywhere but macOS
+        self.stub = sys.platform != 'darwin' if stub is None else stub
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def stubbed(self, args):
+        return self.stub and args[0] in self.MACOS_COMMANDS
+
+    def run(self, args, **kwargs):
+        if self.stubbed(args):
+            with self.lock:
+                self.calls.append(list(args))
+            return subprocess.CompletedProcess(args, 0)
+        kwargs.setdefault('stderr', subprocess.DEVNULL)
+        return subprocess.run(args, **kwargs)
+
+    def popen(self, args, **kwargs):
+        if self.stubbed(args):
+            with self.lock:
+                self.calls.append(list(args))
+            return None
+        return subprocess.Popen(args, **kwargs)
+
+
+class Job:
+    def __init__(self, name, fn, args):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.state = QUEUED
+        self.progress = ''
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = threading.Event()
+
+    def wait(self, timeout=None):
+        self.finished.wait(timeout)
+        return self.result
+
+
+class ActionExecutor:
+    """Serialized background job queue"""
+
+    def __init__(self, on_progress=None, on_done=None):
+        self.on_progress = on_progress or (lambda job, text: None)
+        self.on_done = on_done or (lambda job: None)
+        self.jobs = queue.Queue()
+        self.active = {}            # name -> queued or running Job
+        self.current = None
+        self.lock = threading.Lock()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def submit(self, name, fn, *args):
+        """Queue fn(progress, *args); a same-named job already waiting or running is returned instead"""
+        with self.lock:
+            existing = self.active.get(name)
+            if existing is not None:
+                return existing
+            job = Job(name, fn, args)
+            self.active[name] = job
+        self.jobs.put(job)
+        return job
+
+    def busy(self):
+        with self.lock:
+            return len(self.active) > 0
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            self.current = job
+            job.state = RUNNING
+
+            def progress(text, job=job):
+                job.progress = text
+                self.on_progress(job, text)
+
+            try:
+                job.result = job.fn(progress, *job.args)
+                job.state = DONE
+            except Exception as e:
+                job.error = e
+                job.state = FAILED
+                print(f"[EXECUTOR] {job.name} failed: {e}")
+            finally:
+                with self.lock:
+                    self.active.pop(job.name, None)
+                self.current = None
+                job.finished.set()
+                self.on_done(job)
+
+    def shutdown(self):
+        self.jobs.put(None)
+
+
+def run_concurrently(tasks):
+    """Run callables side by side; returns their results (errors included) in order"""
+    if not tasks:
+        return []
+    with ThreadPoolExecutor(max_workers=len(tasks)) as pool:
+        futures = [pool.submit(task) for task in tasks]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+# ============================================
+# WINDOW CLEANUP (AppleScript)
+# ============================================
+
+# Close Terminal windows running Smart Save
+APPLE_SCRIPT_TERMINAL = '''
+tell application "Terminal"
+    set windowList to windows
+    repeat with aWindow in windowList
+        try
+            if name of aWindow contains "Smart Save" or name of aWindow contains "START.command" then
+                close aWindow
+            end if
+        end try
+    end repeat
+end tell
+'''
+
+# Close dashboard tabs in Chrome (Smart Save specific)
+APPLE_SCRIPT_CHROME = '''
+tell application "Google Chrome"
+    if (count of windows) > 0 then
+        set windowList to windows
+        repeat with aWindow in windowList
+            set tabList to tabs of aWindow
+            repeat with i from (count of tabList) to 1 by -1
+                try
+                    set tabURL to URL of tab i of aWindow
+                    if tabURL contains "localhost:3737" then
+                        close tab i of aWindow
+                    end if
+                end try
+            end repeat
+        end repeat
+    end if
+end tell
+'''
+
+# Close dashboard in Safari too
+APPLE_SCRIPT_SAFARI = '''
+tell application "Safari"
+    if (count of windows) > 0 then
+        repeat with aWindow in windows
+            set tabList to tabs of aWindow
+            repeat with i from (count of tabList) to 1 by -1
+                try
+                    set tabURL to URL of tab i of aWindow
+                    if tabURL contains "localhost:3737" then
+                        close tab i of aWindow
+                    end if
+                end try
+            end repeat
+        end repeat
+    end if
+end tell
+'''
+
+CLEANUP_SCRIPTS = (APPLE_SCRIPT_TERMINAL, APPLE_SCRIPT_CHROME, APPLE_SCRIPT_SAFARI)
+
+
+def close_smart_save_windows(runner):
+    """The three cleanups are independent apps - run them at once"""
+    return run_concurrently([
+        (lambda script=script: runner.run(["osascript", "-e", script]))
+        for script in CLEANUP_SCRIPTS
+    ])
+
+
+if __name__ == "__main__":
+    # Dry run with the macOS commands stubbed: two quick clicks on Stop
+    # queue one job, and the cleanups overlap
+    runner = CommandRunner(stub=True)
+    executor = ActionExecutor(on_progress=lambda job, text: print(f"  [{job.name}] {text}"))
+
+    def stop(progress):
+        progress("Stopping server...")
+        runner.run(["pkill", "-f", "claude-server-v5.js"])
+        progress("Closing windows...")
+        started = time.time()
+        close_smart_save_windows(runner)
+        return round(time.time() - started, 3)
+
+    first = executor.submit('stop', stop)
+    second = executor.submit('stop', stop)
+    first.wait(10)
+    print(f"Same job for both clicks: {first is second}")
+    print(f"Commands run: {len(runner.calls)} (stubbed)")
+    print(f"Cleanup took {first.result}s")
@@ -0,0 +1,389 @@
+// ============================================
+// APPEND LOG - Sequenced write-ahead log of
+// accepted saves
+// ============================================
+// Every change to the conversation tree is written
+// here, with the next sequence number, before it
+// touches a .md file:
+//   create  - a new chat file and its header
+//   append  - text for a chat (after dedup), with
+//             the segment it goes to and that
+//             segment's size before the write
+//   compact / migrate - a chat was rewritten
+//   abort   - the write of record `aborts` failed
+//             and was undone
+// Records live in numbered JSONL segments under
+// .append-log/. A checkpoint holds the highest seq
+// whose file write is known to have finished; after
+// a crash the records past it are redone, using the
+// segment size to tell whether each one landed -
+// except aborted ones, and records of a chat that
+// was rewritten after them.
+//
+// The same log is what standbys replicate from
+// (replication.js): they read it from any seq still
+// on disk, up to the checkpoint (never a write whose
+// outcome isn't known yet), and write the records
+// into their own log under the same numbers. An
+// aborted record reaches them as an abort.
+// ============================================
+
+const EventEmitter = require('events');
+const fs = require('fs');
+const path = require('path');
+const { createIo, writeJsonAtomic, writeJsonAtomicSync } = require('./async-io.js');
+const { parseSegmentName } = require('./chat-segments.js');
+
+const CHECKPOINT_VERSION = 1;
+const SEGMENT_PATTERN = /^(\d{8})\.jsonl$/;
+const DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024;
+const DEFAULT_RETAIN_BYTES = 256 * 1024 * 1024;   // Older segments are deleted past this
+const RECENT_RECORDS = 2000;                        // Kept in memory for followers that are caught up
+const CHECKPOINT_DELAY = 2000;                      // Batch checkpoint writes (ms)
+const READ_BYTES = 1024 * 1024;
+
+const REWRITE_OPS = new Set(['compact', 'migrate']);
+
+const segmentName = (number) => `${String(number).padStart(8, '0')}.jsonl`;
+const chatKey = (record) => `${record.project}/${parseSegmentName(record.file || '').chat}`;
+
+// Records of one segment file, in order; unreadable (torn) lines are left out
+function parseSegment(content) {
+    const records = [];
+    content.split('\n').forEach(line => {
+        if (!line.trim()) return;
+        try {
+            records.push(JSON.parse(line));
+        } catch (error) {
+            // Torn line from a crash
+        }
+    });
+    return { records, torn: content.length > 0 && !content.endsWith('\n') };
+}
+
+class AppendLog extends EventEmitter {
+    constructor({
+        dir,
+        io = createIo(),
+        segmentBytes = DEFAULT_SEGMENT_BYTES,
+        retainBytes = DEFAULT_RETAIN_BYTES
+    }) {
+        super();
+        this.setMaxListeners(0);            // One waiter per long-polling follower
+        this.dir = dir;
+        this.io = io;
+        this.segmentBytes = segmentBytes;
+        this.retainBytes = retainBytes;
+        this.checkpointPath = path.join(dir, 'checkpoint.json');
+
+        this.segments = new Map();          // segment number -> { size, firstSeq }
+        this.writeSegment = 1;
+        this.lastSeq = 0;
+        this.checkpointSeq = 0;
+        this.unapplied = new Set();         // Logged seqs whose file write hasn't finished
+        this.aborted = new Set();           // Seqs whose write failed and was undone
+        this.recent = [];                   // Newest records, oldest first
+        this.appendChain = Promise.resolve();
+        this.checkpointTimer = null;
+        this.counters = {
+            records: 0,
+            bytes: 0,
+            redone: 0,
+            prunedSegments: 0
+        };
+    }
+
+    segmentPath(number) {
+        return path.join(this.dir, segmentName(number));
+    }
+
+    // Find the segments, the last seq and the saved checkpoint
+    open() {
+        fs.mkdirSync(this.dir, { recursive: true });
+        const numbers = fs.readdirSync(this.dir)
+            .map(file => file.match(SEGMENT_PATTERN))
+            .filter(Boolean)
+            .map(match => parseInt(match[1], 10))
+            .sort((a, b) => a - b);
+
+        numbers.forEach((number, index) => {
+            const size = fs.statSync(this.segmentPath(number)).size;
+            const last = index === numbers.length - 1;
+            // The first line gives a segment's first seq; the last segment is read whole
+            const { records, torn } = last
+                ? parseSegment(fs.readFileSync(this.segmentPath(number), 'utf8'))
+                : parseSegment(this.readHead(number));
+            this.segments.set(number, { size, firstSeq: records.length > 0 ? records[0].seq : null });
+            if (last) {
+                this.writeSegment = torn ? number + 1 : number;     // Never append onto a torn line
+                if (records.length > 0) this.lastSeq = records[records.length - 1].seq;
+                this.recent = records.slice(-RECENT_RECORDS);
+            }
+        });
+        if (this.lastSeq === 0 && numbers.length > 1) {
+            // Last segment empty or torn - the one before it ends the log
+            const previous = parseSegment(fs.readFileSync(this.segmentPath(numbers[numbers.length - 2]), 'utf8'));
+            if (previous.records.length > 0) this.lastSeq = previous.records[previous.records.length - 1].seq;
+        }
+
+        try {
+            if (fs.existsSync(this.checkpointPath)) {
+                const saved = JSON.parse(fs.readFileSync(this.checkpointPath, 'utf8'));
+                if (saved.version === CHECKPOINT_VERSION) {
+                    this.checkpointSeq = Math.min(saved.seq, this.lastSeq);
+                    (saved.aborted || []).forEach(seq => this.aborted.add(seq));
+                }
+            }
+        } catch (error) {
+            console.log(`⚠️ Append log checkpoint unreadable, checking every logged record: ${error.message}`);
+        }
+        return this;
+    }
+
+    // Enough of a segment's start to parse its first line
+    readHead(number) {
+        const fd = fs.openSync(this.segmentPath(number), 'r');
+        try {
+            let length = 4096;
+            for (;;) {
+                const buffer = Buffer.alloc(length);
+                const bytesRead = fs.readSync(fd, buffer, 0, length, 0);
+                const newline = buffer.subarray(0, bytesRead).indexOf(10);
+                if (newline !== -1) return buffer.subarray(0, newline + 1).toString('utf8');
+                if (bytesRead < length) return buffer.subarray(0, bytesRead).toString('utf8');
+                length *= 4;
+            }
+        } finally {
+            fs.closeSync(fd);
+        }
+    }
+
+    // An empty standby log can start where a copied tree left off
+    startAt(seq) {
+        if (this.lastSeq > 0 || this.segments.size > 0) return;
+        this.lastSeq = seq - 1;
+        this.checkpointSeq = seq - 1;
+    }
+
+    oldestSeq() {
+        for (const number of [...this.segments.keys()].sort((a, b) => a - b)) {
+            const { firstSeq } = this.segments.get(number);
+            if (firstSeq !== null) return firstSeq;
+        }
+        return this.lastSeq + 1;
+    }
+
+    // Log a record and return its seq. Standbys pass the leader's seq:
+    // records they already have are skipped (null), gaps are refused
+    append(record, seq = null) {
+        const run = this.appendChain.then(async () => {
+            if (seq !== null && seq <= this.lastSeq) return null;
+            if (seq !== null && seq !== this.lastSeq + 1) {
+                throw new Error(`Append log gap: expected seq ${this.lastSeq + 1}, got ${seq}`);
+            }
+            const entry = Object.assign({ seq: this.lastSeq + 1, time: Date.now() }, record);
+            const line = JSON.stringify(entry) + '\n';
+            const bytes = Buffer.byteLength(line, 'utf8');
+
+            let segment = this.segments.get(this.writeSegment);
+            if (segment && segment.size > 0 && segment.size + bytes > this.segmentBytes) {
+                this.writeSegment++;
+                segment = null;
+            }
+            if (!segment) {
+                segment = { size: 0, firstSeq: entry.seq };
+                this.segments.set(this.writeSegment, segment);
+            }
+            await this.io.appendFile(this.segmentPath(this.writeSegment), line);
+            segment.size += bytes;
+            if (segment.firstSeq === null) segment.firstSeq = entry.seq;
+
+            this.lastSeq = entry.seq;
+            this.unapplied.add(entry.seq);
+            this.recent.push(entry);
+            if (this.recent.length > RECENT_RECORDS) this.recent.shift();
+            this.counters.records++;
+            this.counters.bytes += bytes;
+            return entry.seq;
+        });
+        this.appendChain = run.catch(() => {});
+        return run;
+    }
+
+    // The record's file write finished (or failed for good)
+    applied(seq) {
+        if (seq === null || !this.unapplied.delete(seq)) return;
+        const checkpoint = this.unapplied.size > 0 ? Math.min(...this.unapplied) - 1 : this.lastSeq;
+        if (checkpoint <= this.checkpointSeq) return;
+        this.checkpointSeq = checkpoint;
+        this.emit('settled', checkpoint);
+        if (!this.checkpointTimer) {
+            this.checkpointTimer = setTimeout(() => {
+                this.checkpointTimer = null;
+                writeJsonAtomic(this.checkpointPath, this.checkpointSnapshot())
+                    .then(() => this.prune())
+                    .catch(error => console.log(`Warning: Could not save append log checkpoint: ${error.message}`));
+            }, CHECKPOINT_DELAY);
+            this.checkpointTimer.unref();
+        }
+    }
+
+    // A logged write failed and its partial bytes were removed: log that,
+    // so recovery never redoes it and followers never apply it
+    async abort(seq) {
+        const abortSeq = await this.append({ op: 'abort', aborts: seq });
+        this.aborted.add(seq);
+        this.applied(seq);
+        this.applied(abortSeq);
+        return abortSeq;
+    }
+
+    checkpointSnapshot() {
+        return {
+            version: CHECKPOINT_VERSION,
+            seq: this.checkpointSeq,
+            aborted: [...this.aborted],
+            updated: new Date().toISOString()
+        };
+    }
+
+    flush() {
+        clearTimeout(this.checkpointTimer);
+        this.checkpointTimer = null;
+        writeJsonAtomicSync(this.checkpointPath, this.checkpointSnapshot());
+    }
+
+    // fsync the segment being written (group commit durability)
+    sync() {
+        const segmentPath = this.segmentPath(this.writeSegment);
+        return this.appendChain.then(() => (this.segments.has(this.writeSegment) ? this.io.sync(segmentPath) : undefined));
+    }
+
+    // Records with seq >= fromSeq (through throughSeq), oldest first
+    async read(fromSeq, { limit = 500, maxBytes = READ_BYTES * 4, throughSeq = this.lastSeq } = {}) {
+        if (fromSeq > throughSeq) return [];
+        limit = Math.min(limit, throughSeq - fromSeq + 1);
+        if (this.recent.length > 0 && fromSeq >= this.recent[0].seq) {
+            const start = fromSeq - this.recent[0].seq;
+            return this.limitBytes(this.recent.slice(start, start + limit), maxBytes);
+        }
+
+        // Older than what's in memory: start at the segment holding fromSeq
+        const numbers = [...this.segments.keys()].sort((a, b) => a - b);
+        let first = numbers.findIndex((number, index) => {
+            const next = numbers[index + 1];
+            const nextFirst = next !== undefined ? this.segments.get(next).firstSeq : null;
+            return nextFirst === null || nextFirst > fromSeq;
+        });
+        if (first === -1) first = numbers.length - 1;
+
+        const records = [];
+        for (const number of numbers.slice(first)) {
+            const content = await this.io.readFile(this.segmentPath(number));
+            for (const record of parseSegment(content).records) {
+                if (record.seq < fromSeq) continue;
+                records.push(record);
+                if (records.length >= limit) return this.limitBytes(records, maxBytes);
+            }
+        }
+        return this.limitBytes(records, maxBytes);
+    }
+
+    // What followers get: records up to the checkpoint, aborted ones as aborts
+    async readSettled(fromSeq, options = {}) {
+        const records = await this.read(fromSeq, Object.assign({}, options, { throughSeq: this.checkpointSeq }));
+        return records.map(record => (this.aborted.has(record.seq)
+            ? { seq: record.seq, time: record.time, op: 'abort', project: record.project, file: record.file, aborts: record.seq }
+            : record));
+    }
+
+    // Cut a read at maxBytes of text (always at least one record)
+    limitBytes(records, maxBytes) {
+        let bytes = 0;
+        const count = records.findIndex(record => {
+            bytes += record.text ? record.text.length : 0;
+            return bytes > maxBytes;
+        });
+        return count > 0 ? records.slice(0, count) : count === 0 ? records.slice(0, 1) : records;
+    }
+
+    // Resolves once the checkpoint is past `seq`, or after `ms`
+    waitFor(seq, ms) {
+        if (this.checkpointSeq > seq || ms <= 0) return Promise.resolve(this.checkpointSeq > seq);
+        return new Promise(resolve => {
+            const done = (arrived) => {
+                clearTimeout(timer);
+                this.removeListener('settled', onSettled);
+                resolve(arrived);
+            };
+            const onSettled = (checkpoint) => { if (checkpoint > seq) done(true); };
+            const timer = setTimeout(() => done(false), ms);
+            this.on('settled', onSettled);
+        });
+    }
+
+    // Every record past the checkpoint, in order
+    async forEachPending(task) {
+        let from = this.checkpointSeq + 1;
+        while (from <= this.lastSeq) {
+            const records = await this.read(from, { limit: 500, maxBytes: Infinity });
+            if (records.length === 0) break;
+            for (const record of records) await task(record);
+            from = records[records.length - 1].seq + 1;
+        }
+    }
+
+    // After a crash: hand every record past the checkpoint to `redo`
+    // (in order) so writes that didn't land are made again. Aborted
+    // records are skipped, and so is anything of a chat that a later
+    // compact or migrate rewrote - the rewrite read the files as they were
+    async recover(redo) {
+        if (this.checkpointSeq >= this.lastSeq) return 0;
+        const rewritten = new Map();        // chat -> seq of its last rewrite
+        await this.forEachPending(record => {
+            if (record.op === 'abort') this.aborted.add(record.aborts);
+            else if (REWRITE_OPS.has(record.op)) rewritten.set(chatKey(record), record.seq);
+        });
+        let redone = 0;
+        await this.forEachPending(async record => {
+            if (this.aborted.has(record.seq) || (rewritten.get(chatKey(record)) || 0) > record.seq) return;
+            if (await redo(record)) redone++;
+        });
+        this.counters.redone += redone;
+        this.unapplied.clear();
+        this.checkpointSeq = this.lastSeq;
+        this.flush();
+        return redone;
+    }
+
+    // Delete the oldest segments past retainBytes - never the one being
+    // written or anything past the checkpoint
+    async prune() {
+        const numbers = [...this.segments.keys()].sort((a, b) => a - b);
+        let total = numbers.reduce((sum, number) => sum + this.segments.get(number).size, 0);
+        for (let i = 0; i < numbers.length - 1 && total > this.retainBytes; i++) {
+            const next = this.segments.get(numbers[i + 1]);
+            if (next.firstSeq === null || next.firstSeq - 1 > this.checkpointSeq) break;
+            await fs.promises.unlink(this.segmentPath(numbers[i])).catch(() => {});
+            total -= this.segments.get(numbers[i]).size;
+            this.segments.delete(numbers[i]);
+            this.counters.prunedSegments++;
+        }
+        const oldest = this.oldestSeq();
+        this.aborted.forEach(seq => { if (seq < oldest) this.aborted.delete(seq); });
+    }
+
+    stats() {
+        let bytesOnDisk = 0;
+        this.segments.forEach(segment => { bytesOnDisk += segment.size; });
+        return Object.assign({
+            lastSeq: this.lastSeq,
+            oldestSeq: this.oldestSeq(),
+            checkpointSeq: this.checkpointSeq,
+            segments: this.segments.size,
+            bytesOnDisk
+        }, this.counters);
+    }
+}
+
+module.exports = { AppendLog, parseSegment };
@@ -0,0 +1,105 @@
+// ============================================
+// APPEND SEQUENCER - Idempotent batched appends
+// ============================================
+// Every chat in the browser writes through its own
+// stream (random id + increasing seq). The server
+// remembers the highest seq applied per stream, so
+// retries and offline replays of a batch are dropped
+// instead of appended twice.
+// ============================================
+
+const fs = require('fs');
+const { writeJsonAtomic, writeJsonAtomicSync } = require('./async-io.js');
+
+const SEQUENCER_VERSION = 1;
+const STREAM_MAX_AGE = 30 * 24 * 60 * 60 * 1000; // Forget streams idle for 30 days
+const STREAM_ID_PATTERN = /^[A-Za-z0-9_-]{8,64}$/;
+
+class AppendSequencer {
+    constructor({ statePath }) {
+        this.statePath = statePath;
+        this.streams = {};      // streamId -> { seq, project, file, updated }
+        this.saveChain = Promise.resolve();
+        this.queued = null;     // Write waiting to start
+    }
+
+    load() {
+        try {
+            if (fs.existsSync(this.statePath)) {
+                const data = JSON.parse(fs.readFileSync(this.statePath, 'utf8'));
+                if (data.version === SEQUENCER_VERSION) {
+                    this.streams = data.streams || {};
+                }
+            }
+        } catch (error) {
+            console.log(`⚠️ Append sequence state unreadable, starting fresh: ${error.message}`);
+            this.streams = {};
+        }
+        this.prune();
+        return this;
+    }
+
+    snapshot() {
+        return {
+            version: SEQUENCER_VERSION,
+            updated: new Date().toISOString(),
+            streams: this.streams
+        };
+    }
+
+    flush() {
+        writeJsonAtomicSync(this.statePath, this.snapshot());
+    }
+
+    // Write state to disk. Writes run one at a time; callers that arrive
+    // before the next write starts share it (its snapshot covers them)
+    persist() {
+        if (!this.queued) {
+            this.queued = this.saveChain.then(() => {
+                this.queued = null;
+                return writeJsonAtomic(this.statePath, this.snapshot());
+            });
+            this.saveChain = this.queued.catch(() => {});
+        }
+        return this.queued;
+    }
+
+    prune(now = Date.now()) {
+        Object.entries(this.streams).forEach(([streamId, stream]) => {
+            if (now - stream.updated > STREAM_MAX_AGE) delete this.streams[streamId];
+        });
+    }
+
+    isValidStream(streamId) {
+        return typeof streamId === 'string' && STREAM_ID_PATTERN.test(streamId);
+    }
+
+    acked(streamId) {
+        const stream = this.streams[streamId];
+        return stream ? stream.seq : 0;
+    }
+
+    // Entries not applied yet, in seq order, one per seq
+    pending(streamId, entries) {
+        const acked = this.acked(streamId);
+        const seen = new Set();
+        return entries
+            .filter(entry => entry && Number.isInteger(entry.seq) && entry.seq > acked
+                && typeof entry.text === 'string')
+            .sort((a, b) => a.seq - b.seq)
+            .filter(entry => {
+                if (seen.has(entry.seq)) return false;
+                seen.add(entry.seq);
+                return true;
+            });
+    }
+
+    // Record that everything up to seq is on disk
+    async commit(streamId, seq, { project, file }) {
+        this.streams[streamId] = { seq, project, file, updated: Date.now() };
+        await this.persist();
+        return seq;
+    }
+}
+
+module.exports = { AppendSequencer };
@@ -0,0 +1,160 @@
+// ============================================
+// ASYNC I/O LAYER FOR SMART SAVE
+// ============================================
+// One place for the server's file access. In 'async'
+// mode everything goes through fs.promises, with reads
+// bounded so a big reconcile can't flood the thread
+// pool; in 'sync' mode the same calls use fs.*Sync so
+// the two paths can be benchmarked against each other.
+// ============================================
+
+const fs = require('fs');
+const fsp = fs.promises;
+const { threadId } = require('worker_threads');
+
+const IO_MODES = ['async', 'sync'];
+const DEFAULT_CONCURRENCY = 16;
+
+// Run at most `concurrency` tasks at once; the rest wait in order
+function createLimiter(concurrency) {
+    let active = 0;
+    const queue = [];
+
+    const next = () => {
+        if (active >= concurrency || queue.length === 0) return;
+        active++;
+        const { task, resolve, reject } = queue.shift();
+        Promise.resolve()
+            .then(task)
+            .then(resolve, reject)
+            .finally(() => {
+                active--;
+                next();
+            });
+    };
+
+    const limit = (task) => new Promise((resolve, reject) => {
+        queue.push({ task, resolve, reject });
+        next();
+    });
+    limit.pending = () => queue.length;
+    limit.active = () => active;
+    return limit;
+}
+
+function createIo({ mode = 'async', concurrency = DEFAULT_CONCURRENCY } = {}) {
+    if (!IO_MODES.includes(mode)) {
+        throw new Error(`Unknown I/O mode "${mode}" (expected ${IO_MODES.join(' or ')})`);
+    }
+
+    if (mode === 'sync') {
+        return {
+            mode,
+            readFile: async (file) => fs.readFileSync(file, 'utf-8'),
+            readRange: async (file, start, length) => {
+                const buffer = Buffer.alloc(length);
+                const fd = fs.openSync(file, 'r');
+                try {
+                    const bytesRead = fs.readSync(fd, buffer, 0, length, start);
+                    return buffer.subarray(0, bytesRead);
+                } finally {
+                    fs.closeSync(fd);
+                }
+            },
+            readdir: async (dir) => fs.readdirSync(dir),
+            stat: async (file) => fs.statSync(file),
+            exists: async (file) => fs.existsSync(file),
+            mkdir: async (dir) => { fs.mkdirSync(dir, { recursive: true }); },
+            writeFile: async (file, data) => fs.writeFileSync(file, data),
+            appendFile: async (file, data) => fs.appendFileSync(file, data),
+            rename: async (from, to) => fs.renameSync(from, to),
+            truncate: async (file, length) => fs.truncateSync(file, length),
+            sync: async (file) => {
+                const fd = fs.openSync(file, 'r');
+                try {
+                    fs.fsyncSync(fd);
+                } finally {
+                    fs.closeSync(fd);
+                }
+            }
+        };
+    }
+
+    // Reads and directory listings share a bound; writes skip the queue so
+    // the append path is never stuck behind a reconcile
+    const limit = createLimiter(concurrency);
+
+    return {
+        mode,
+        limit,
+        readFile: (file) => limit(() => fsp.readFile(file, 'utf-8')),
+        readRange: (file, start, length) => limit(async () => {
+            const handle = await fsp.open(file, 'r');
+            try {
+                const buffer = Buffer.alloc(length);
+                const { bytesRead } = await handle.read(buffer, 0, length, start);
+                return buffer.subarray(0, bytesRead);
+            } finally {
+                await handle.close();
+            }
+        }),
+        readdir: (dir) => limit(() => fsp.readdir(dir)),
+        stat: (file) => limit(() => fsp.stat(file)),
+        exists: (file) => fsp.access(file).then(() => true, () => false),
+        mkdir: (dir) => fsp.mkdir(dir, { recursive: true }).then(() => undefined),
+        writeFile: (file, data) => fsp.writeFile(file, data),
+        appendFile: (file, data) => fsp.appendFile(file, data),
+        rename: (from, to) => fsp.rename(from, to),
+        truncate: (file, length) => fsp.truncate(file, length),
+        // fsync a file written earlier (group commit durability)
+        sync: async (file) => {
+            const handle = await fsp.open(file, 'r');
+            try {
+                await handle.sync();
+            } finally {
+                await handle.close();
+            }
+        }
+    };
+}
+
+// Temp name unique to this write: two saves of one file in flight (or
+// from a worker thread) never share a temp file, and the last rename wins
+let tmpCounter = 0;
+const tmpPathFor = (file) => `${file}.${process.pid}-${threadId}-${++tmpCounter}.tmp`;
+
+// Atomic JSON write (temp file + rename) used by the on-disk indexes
+async function writeJsonAtomic(file, data) {
+    const tmpPath = tmpPathFor(file);
+    try {
+        await fsp.writeFile(tmpPath, JSON.stringify(data));
+        await fsp.rename(tmpPath, file);
+    } catch (error) {
+        await fsp.unlink(tmpPath).catch(() => {});
+        throw error;
+    }
+}
+
+function writeJsonAtomicSync(file, data) {
+    const tmpPath = tmpPathFor(file);
+    try {
+        fs.writeFileSync(tmpPath, JSON.stringify(data));
+        fs.renameSync(tmpPath, file);
+    } catch (error) {
+        try {
+            fs.unlinkSync(tmpPath);
+        } catch (unlinkError) {
+            // Never created
+        }
+        throw error;
+    }
+}
+
+module.exports = {
+    createIo,
+    createLimiter,
+    writeJsonAtomic,
+    writeJsonAtomicSync,
+    IO_MODES,
+    DEFAULT_CONCURRENCY
+};
@@ -17,25 +17,80 @@ const { findClaudeConversationsPath } = require('./path-finder-portable.js');
 const CONVERSATIONS_PATH = path.join(findClaudeConversationsPath(__dirname), 'Projects');
 console.log(`📁 Using conversations path: ${CONVERSATIONS_PATH}`);
 
+const { extract, toEntities } = require('./memory-extractor.js');
+
+const { createIo, createLimiter, writeJsonAtomicSync } = require('./async-io.js');
+const { walkProjects } = require('./scan-worker.js');
+
 const PROCESSED_FILE = path.join(__dirname, '.processed-conversations.json');
-const CHECK_INTERVAL = 30000; // Check every 30 seconds
+const JOURNAL_FILE = path.join(__dirname, '.processed-conversations.journal.jsonl');
+const CHECK_INTERVAL = 30000;          // Reconcile when fs.watch is unavailable
+const WATCH_RECONCILE_INTERVAL = 300000; // Safety-net reconcile while watching (5 min)
+const WATCH_DEBOUNCE = 500;            // Let a burst of writes settle first
+const MAX_CONCURRENT = 2;              // Files processed at once
+const MAX_READ_BYTES = 1024 * 1024;    // New text read per step
+const COMPACT_AFTER = 500;             // Journal lines before compacting
 
-// Load processed files list
+const io = createIo();
+const limit = createLimiter(MAX_CONCURRENT);
+
+// filePath -> { offset, size, mtimeMs, processed, entitiesFound, relationsFound }
+// Snapshot in PROCESSED_FILE, then every later update as a journal line
 let processedFiles = {};
-if (fs.existsSync(PROCESSED_FILE)) {
-    processedFiles = JSON.parse(fs.readFileSync(PROCESSED_FILE, 'utf8'));
+let journalLines = 0;
+
+function loadProcessedFiles() {
+    if (fs.existsSync(PROCESSED_FILE)) {
+        try {
+            processedFiles = JSON.parse(fs.readFileSync(PROCESSED_FILE, 'utf8'));
+        } catch (error) {
+            console.log(`⚠️ Processed list unreadable, starting fresh: ${error.message}`);
+            processedFiles = {};
+        }
+    }
+    if (fs.existsSync(JOURNAL_FILE)) {
+        fs.readFileSync(JOURNAL_FILE, 'utf8').split('\n').forEach(line => {
+            if (!line) return;
+            try {
+                const { file, ...entry } = JSON.parse(line);
+                if (entry.removed) delete processedFiles[file];
+                else processedFiles[file] = entry;
+                journalLines++;
+            } catch (error) {
+                // Torn last line from a crash - the next pass redoes that file
+            }
+        });
+    }
+}
+
+// Record one file's progress (append-only; compacted later); null = file gone
+async function recordProgress(filePath, entry) {
+    if (entry) processedFiles[filePath] = entry;
+    else delete processedFiles[filePath];
+    await fs.promises.appendFile(JOURNAL_FILE, JSON.stringify({ file: filePath, ...(entry || { removed: true }) }) + '\n');
+    if (++journalLines >= COMPACT_AFTER) saveProcessedFiles();
 }
 
-// Save processed files list
+// Fold the journal into the snapshot and start a new journal
 function saveProcessedFiles() {
-    fs.writeFileSync(PROCESSED_FILE, JSON.stringify(processedFiles, null, 2));
+    writeJsonAtomicSync(PROCESSED_FILE, processedFiles);
+    fs.writeFileSync(JOURNAL_FILE, '');
+    journalLines = 0;
+}
+
+// Bytes at the end of `buffer` that start an unfinished UTF-8 character
+function incompleteUtf8Tail(buffer) {
+    for (let back = 1; back <= Math.min(3, buffer.length); back++) {
+        const byte = buffer[buffer.length - back];
+        if ((byte & 0xC0) === 0x80) continue;          // Continuation byte
+        const needed = byte >= 0xF0 ? 4 : byte >= 0xE0 ? 3 : byte >= 0xC0 ? 2 : 1;
+        return needed > back ? back : 0;
+    }
+    return 0;
 }
 
-// Extract entities from conversation text
+// Extract entities from conversation text (single pass, shared with the server)
 function extractEntities(text, fileName) {
-    const entities = [];
-    const relations = [];
-    
     // Extract project name from file path
     const projectMatch = fileName.match(/Projects\/([^\/]+)\//);
     const projectName = projectMatch ? projectMatch[1].replace(/_/g, ' ') : 'General';
@@ -43,184 +98,185 @@ function extractEntities(text, fileName) {
     // Extract chat title
     const chatTitle = path.basename(fileName, '.md').replace(/_/g, ' ');
     
-    // Create project entity if new
-    if (projectName && projectName !== 'General') {
-        entities.push({
-            name: projectName.replace(/ /g, '_'),
-            entityType: 'Project',
-            observations: [
-                `Active project with saved conversations`,
-                `Last updated: ${new Date().toLocaleDateString()}`,
-                `Chat: ${chatTitle}`
-            ]
-        });
-    }
-    
-    // Extract mentioned tools/technologies
-    const toolPatterns = [
-        /(?:using|with|via|through)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)/g,
-        /(?:MCP|server|tool|command):\s*([a-zA-Z-]+)/g,
-        /desktop-commander|memory|sqlite|github|puppeteer|reddit/gi
-    ];
-    
-    const foundTools = new Set();
-    toolPatterns.forEach(pattern => {
-        let match;
-        while ((match = pattern.exec(text)) !== null) {
-            if (match[1] && match[1].length > 2) {
-                foundTools.add(match[1]);
-            }
+    return toEntities(extract(text), { projectName, chatTitle });
+}
+
+// Log what would be stored for one chunk of new text
+function storeEntities(entities, relations) {
+    // Group similar entities
+    const groupedEntities = {};
+    entities.forEach(entity => {
+        const key = `${entity.name}_${entity.entityType}`;
+        if (!groupedEntities[key]) {
+            groupedEntities[key] = entity;
+        } else {
+            // Merge observations
+            groupedEntities[key].observations = [
+                ...new Set([
+                    ...groupedEntities[key].observations,
+                    ...entity.observations
+                ])
+            ];
         }
     });
     
-    foundTools.forEach(tool => {
-        entities.push({
-            name: tool.replace(/ /g, '_').replace(/-/g, '_'),
-            entityType: 'Tool',
-            observations: [`Mentioned in ${chatTitle}`]
-        });
-    });
-    
-    // Extract bugs/issues
-    const bugPattern = /(?:bug|issue|problem|error):\s*([^\n]+)/gi;
-    let bugMatch;
-    while ((bugMatch = bugPattern.exec(text)) !== null) {
-        entities.push({
-            name: 'Bug_History',
-            entityType: 'Knowledge',
-            observations: [bugMatch[1].substring(0, 200)]
-        });
-    }
-    
-    // Extract solutions
-    const solutionPattern = /(?:fix|fixed|solution|solved|resolved):\s*([^\n]+)/gi;
-    let solutionMatch;
-    while ((solutionMatch = solutionPattern.exec(text)) !== null) {
-        entities.push({
-            name: 'Solution_Database',
-            entityType: 'Knowledge',
-            observations: [solutionMatch[1].substring(0, 200)]
+    for (const entity of Object.values(groupedEntities)) {
+        // You'll need to call the memory server here
+        // For now, we'll just log what would be stored
+        console.log(`  📦 Entity: ${entity.name} (${entity.entityType})`);
+        entity.observations.forEach(obs => {
+            console.log(`     - ${obs.substring(0, 50)}...`);
         });
     }
     
-    // Create relations
-    if (projectName && entities.length > 0) {
-        entities.forEach(entity => {
-            if (entity.entityType === 'Tool') {
-                relations.push({
-                    from: projectName.replace(/ /g, '_'),
-                    to: entity.name,
-                    relationType: 'uses'
-                });
-            }
-        });
+    for (const relation of relations) {
+        console.log(`  🔗 Relation: ${relation.from} ${relation.relationType} ${relation.to}`);
     }
-    
-    return { entities, relations };
 }
 
-// Process a conversation file
+// Process the bytes appended to a conversation file since last time
 async function processConversation(filePath) {
     try {
-        const content = fs.readFileSync(filePath, 'utf8');
-        const stats = fs.statSync(filePath);
-        
-        // Check if already processed with same modification time
-        if (processedFiles[filePath] && 
-            processedFiles[filePath].mtime === stats.mtime.toISOString()) {
+        let stats;
+        try {
+            stats = await io.stat(filePath);
+        } catch (error) {
+            if (processedFiles[filePath]) await recordProgress(filePath, null);
             return;
         }
         
-        console.log(`📝 Processing: ${path.basename(filePath)}`);
-        
-        // Extract entities and relations
-        const { entities, relations } = extractEntities(content, filePath);
+        const previous = processedFiles[filePath];
+        let offset = previous && Number.isInteger(previous.offset) ? previous.offset : 0;
         
-        // Store entities in memory server
-        if (entities.length > 0) {
-            // Group similar entities
-            const groupedEntities = {};
-            entities.forEach(entity => {
-                const key = `${entity.name}_${entity.entityType}`;
-                if (!groupedEntities[key]) {
-                    groupedEntities[key] = entity;
-                } else {
-                    // Merge observations
-                    groupedEntities[key].observations = [
-                        ...new Set([
-                            ...groupedEntities[key].observations,
-                            ...entity.observations
-                        ])
-                    ];
-                }
-            });
-            
-            // Create memory entries
-            const uniqueEntities = Object.values(groupedEntities);
-            
-            for (const entity of uniqueEntities) {
-                // You'll need to call the memory server here
-                // For now, we'll just log what would be stored
-                console.log(`  📦 Entity: ${entity.name} (${entity.entityType})`);
-                entity.observations.forEach(obs => {
-                    console.log(`     - ${obs.substring(0, 50)}...`);
+        // Entry from before offsets were tracked: same mtime means fully read
+        if (previous && !Number.isInteger(previous.offset) && previous.mtime === stats.mtime.toISOString()) {
+            offset = stats.size;
+        }
+        // Shorter than what we read - rewritten (e.g. split into segments)
+        if (stats.size < offset) {
+            console.log(`↩️ ${path.basename(filePath)} shrank - reprocessing from the start`);
+            offset = 0;
+        }
+        if (stats.size === offset) {
+            if (!previous || previous.offset !== offset) {
+                await recordProgress(filePath, {
+                    offset,
+                    size: stats.size,
+                    mtimeMs: stats.mtimeMs,
+                    processed: new Date().toISOString(),
+                    entitiesFound: 0,
+                    relationsFound: 0
                 });
             }
+            return;
+        }
+        
+        console.log(`📝 Processing: ${path.basename(filePath)} (+${stats.size - offset} bytes)`);
+        
+        let entitiesFound = 0;
+        let relationsFound = 0;
+        let carry = Buffer.alloc(0);    // Unfinished last line, read with the next chunk
+        while (offset + carry.length < stats.size) {
+            const start = offset + carry.length;
+            const chunk = await io.readRange(filePath, start, Math.min(MAX_READ_BYTES, stats.size - start));
+            if (chunk.length === 0) break;
+            const buffer = carry.length > 0 ? Buffer.concat([carry, chunk]) : chunk;
             
-            // Create relations
-            for (const relation of relations) {
-                console.log(`  🔗 Relation: ${relation.from} ${relation.relationType} ${relation.to}`);
-            }
+            // Whole lines only, so a phrase or name is never cut in two. A line
+            // longer than a read goes as it is (cut at a character boundary);
+            // an unfinished line at the end waits for the rest of it
+            let usable = buffer.lastIndexOf(10) + 1;
+            if (usable === 0 && buffer.length >= MAX_READ_BYTES) usable = buffer.length - incompleteUtf8Tail(buffer);
+            carry = buffer.subarray(usable);
+            if (usable === 0) continue;
+            
+            const { entities, relations } = extractEntities(buffer.subarray(0, usable).toString('utf8'), filePath);
+            if (entities.length > 0) storeEntities(entities, relations);
+            entitiesFound += entities.length;
+            relationsFound += relations.length;
+            offset += usable;
         }
         
-        // Mark as processed
-        processedFiles[filePath] = {
-            mtime: stats.mtime.toISOString(),
+        await recordProgress(filePath, {
+            offset,
+            size: stats.size,
+            mtimeMs: stats.mtimeMs,
             processed: new Date().toISOString(),
-            entitiesFound: entities.length,
-            relationsFound: relations.length
-        };
-        
-        saveProcessedFiles();
-        console.log(`✅ Processed ${entities.length} entities, ${relations.length} relations\n`);
+            entitiesFound,
+            relationsFound
+        });
+        console.log(`✅ Processed ${entitiesFound} entities, ${relationsFound} relations\n`);
         
     } catch (error) {
         console.error(`❌ Error processing ${filePath}:`, error.message);
     }
 }
 
-// Scan for new or updated conversations
+// One run per file at a time, at most MAX_CONCURRENT files at once
+const queuedFiles = new Set();
+function queueConversation(filePath) {
+    if (queuedFiles.has(filePath)) return;
+    queuedFiles.add(filePath);
+    limit(() => {
+        queuedFiles.delete(filePath);
+        return processConversation(filePath);
+    });
+}
+
+// Reconcile: queue every file whose size differs from when it was last
+// read (fallback for missed watch events, and the whole job without
+// fs.watch). The offset can stop short of that, before an unfinished line
 async function scanConversations() {
-    // Only log if we actually find something to process
-    let foundNew = false;
+    const listing = walkProjects(CONVERSATIONS_PATH);
+    const seen = new Set();
+    let changed = 0;
     
-    function scanDir(dir) {
-        if (!fs.existsSync(dir)) return;
-        
-        const items = fs.readdirSync(dir);
-        items.forEach(item => {
-            const fullPath = path.join(dir, item);
-            const stats = fs.statSync(fullPath);
-            
-            if (stats.isDirectory()) {
-                scanDir(fullPath);
-            } else if (item.endsWith('.md')) {
-                // Check if needs processing
-                if (!processedFiles[fullPath] || 
-                    processedFiles[fullPath].mtime !== stats.mtime.toISOString()) {
-                    foundNew = true;
-                }
-                processConversation(fullPath);
+    Object.entries(listing.projects).forEach(([project, { files }]) => {
+        Object.entries(files).forEach(([file, { size }]) => {
+            const filePath = path.join(CONVERSATIONS_PATH, project, file);
+            const entry = processedFiles[filePath];
+            seen.add(filePath);
+            if (!entry || entry.size !== size) {
+                changed++;
+                queueConversation(filePath);
             }
         });
-    }
+    });
     
-    scanDir(CONVERSATIONS_PATH);
+    // Files that are gone
+    Object.keys(processedFiles).forEach(filePath => {
+        if (!seen.has(filePath)) queueConversation(filePath);
+    });
     
-    // Only log if we found something new
-    if (foundNew) {
-        const totalProcessed = Object.keys(processedFiles).length;
-        console.log(`✅ Scan complete: ${totalProcessed} conversations tracked`);
+    if (changed > 0) {
+        console.log(`✅ Scan complete: ${changed} changed of ${seen.size} conversations tracked`);
+    }
+}
+
+// fs.watch drives processing; returns false where it isn't supported
+const watchTimers = new Map();
+let watchFallbackTimer = null;      // Scan interval once the watcher failed (one only)
+function watchConversations() {
+    try {
+        const watcher = fs.watch(CONVERSATIONS_PATH, { recursive: true }, (eventType, fileName) => {
+            if (!fileName || !fileName.endsWith('.md')) return;
+            const filePath = path.join(CONVERSATIONS_PATH, fileName);
+            clearTimeout(watchTimers.get(filePath));
+            watchTimers.set(filePath, setTimeout(() => {
+                watchTimers.delete(filePath);
+                queueConversation(filePath);
+            }, WATCH_DEBOUNCE));
+        });
+        watcher.on('error', (error) => {
+            watcher.close();
+            if (watchFallbackTimer) return;
+            console.log(`Warning: File watcher stopped (${error.message}) - reconciling every ${CHECK_INTERVAL / 1000}s`);
+            watchFallbackTimer = setInterval(scanConversations, CHECK_INTERVAL);
+        });
+        return true;
+    } catch (error) {
+        console.log(`Warning: fs.watch unavailable (${error.message})`);
+        return false;
     }
 }
 
@@ -233,6 +289,10 @@ async function cleanupMemory() {
 
 // Main loop
 async function main() {
+    loadProcessedFiles();
+    const watching = fs.existsSync(CONVERSATIONS_PATH) && watchConversations();
+    const interval = watching ? WATCH_RECONCILE_INTERVAL : CHECK_INTERVAL;
+    
     console.log('');
     console.log('╔═══════════════════════════════════════════════╗');
     console.log('║   SMART SAVE AUTO-MEMORY BRIDGE              ║');
@@ -240,16 +300,19 @@ async function main() {
     console.log('╚═══════════════════════════════════════════════╝');
     console.log('');
     console.log(`📁 Watching: ${CONVERSATIONS_PATH}`);
-    console.log(`⏱️  Check interval: ${CHECK_INTERVAL/1000} seconds`);
+    console.log(`👀 Mode: ${watching ? 'fs.watch' : 'polling'} (reconcile every ${interval / 1000} seconds)`);
     console.log('');
     
     // Initial scan
     await scanConversations();
     
-    // Set up periodic scanning
-    setInterval(async () => {
-        await scanConversations();
-    }, CHECK_INTERVAL);
+    // Periodic reconcile (catches anything the watcher missed)
+    setInterval(scanConversations, interval);
+    
+    // Fold the journal into the snapshot now and then even when quiet
+    setInterval(() => {
+        if (journalLines > 0) saveProcessedFiles();
+    }, 10 * 60 * 1000);
     
     // Periodic cleanup
     setInterval(async () => {
@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+
+# ============================================
+# SMART SAVE SERVER BENCHMARK
+# ============================================
+# Reproducible load test for claude-server-v5.js:
+# - Builds a synthetic Claude_Conversations/Projects
+#   tree (projects x chats x MB, seeded, so the same
+#   arguments give the same bytes)
+# - Starts the server under test in a throwaway
+#   sandbox next to that tree (never your real
+#   conversations), or targets one with --url
+# - Simulated extension clients POST deltas to
+#   /api/project/append while readers hit
+#   /api/stats, /api/search and /api/projects
+# - Prints throughput and p50/p99 latency per
+#   endpoint as JSON, for comparing server versions
+# - Measures startup: spawn to healthy, and spawn to
+#   the first successfully saved append
+#
+# Usage:
+#   python3 bench_server.py                       # this folder's server
+#   python3 bench_server.py --server-dir ../old   # another version
+#   python3 bench_server.py generate --root /tmp/corpus
+#   python3 bench_server.py run --url http://localhost:3737
+# ============================================
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PORT = 3737                     # claude-server-v5.js default (server.port)
+DEFAULT_URL = f'http://localhost:{PORT}'
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Words for the synthetic chats. Drawn with a skewed distribution so common
+# words hit many files and rare ones few, like real search traffic
+VOCABULARY = (
+    'the server file project chat save dashboard memory index search error fix config '
+    'function dashboard extension browser folder session append token words stats '
+    'worker queue segment offset cache latency request response stream event health '
+    'restart monitor backup archive install version python node express route json '
+    'markdown claude desktop assistant human question answer problem solution decision '
+    'person code review test deploy release branch commit merge refactor performance '
+    'startup shutdown signal process thread pool batch retry timeout socket buffer '
+    'icloud sync disk write read rename fsync compact dedup replica follower leader'
+).split()
+
+SPEAKERS = ('Human', 'Assistant')
+
+
+def log(message):
+    # Progress goes to stderr; stdout is only the JSON result
+    print(message, file=sys.stderr, flush=True)
+
+
+# ============================================
+# SYNTHETIC CORPUS
+# ============================================
+
+class TextGenerator:
+    """Seeded chat-like text"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        # Zipf-like weights: word n is drawn ~1/n as often as the first
+        self.weights = [1.0 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+    def sentence(self):
+        words = self.rng.choices(VOCABULARY, self.weights, k=self.rng.randint(6, 18))
+        return ' '.join(words).capitalize() + '.'
+
+    def message(self, turn):
+        sentences = ' '.join(self.sentence() for _ in range(self.rng.randint(1, 6)))
+        return f'{SPEAKERS[turn % 2]}: {sentences}\n\n'
+
+    def chunk(self, size):
+        """About `size` characters of conversation (an extension delta)"""
+        parts = []
+        length = 0
+        while length < size:
+            part = self.sentence() + ' '
+            parts.append(part)
+            length += len(part)
+        return ''.join(parts)[:size]
+
+
+def chat_header(chat_name, project):
+    # Same header getChatFile() writes for a new chat
+    return f"# {chat_name}\n\n**Project:** {project}  \n**Started:** synthetic  \n{'=' * 60}\n\n"
+
+
+def generate_corpus(root, projects=10, chats=20, megabytes=20.0, seed=1):
+    """Write root/Projects/<project>/<chat>.md; returns a manifest of what was written"""
+    rng = random.Random(seed)
+    text = TextGenerator(rng)
+    projects_dir = os.path.join(root, 'Projects')
+    os.makedirs(projects_dir, exist_ok=True)
+
+    per_chat = int(megabytes * 1024 * 1024 / max(1, projects * chats))
+    manifest = {'root': root, 'seed': seed, 'projects': projects, 'chatsPerProject': chats,
+                'megabytes': megabytes, 'files': 0, 'bytes': 0, 'chats': []}
+
+    for p in range(projects):
+        project = f'Bench-Project-{p + 1:03d}'
+        os.makedirs(os.path.join(projects_dir, project), exist_ok=True)
+        for c in range(chats):
+            chat_name = f'Bench Chat {p + 1:03d}-{c + 1:03d}'
+            # +-50% around the average so files aren't all the same size
+            target = max(256, int(per_chat * rng.uniform(0.5, 1.5)))
+            parts = [chat_header(chat_name, project)]
+            size = len(parts[0])
+            turn = 0
+            while size < target:
+                message = text.message(turn)
+                parts.append(message)
+                size += len(message)
+                turn += 1
+            content = ''.join(parts)
+            with open(os.path.join(projects_dir, project, f'{chat_name}.md'), 'w', encoding='utf-8') as f:
+                f.write(content)
+            manifest['files'] += 1
+            manifest['bytes'] += len(content.encode('utf-8'))
+            manifest['chats'].append({'project': project, 'chatName': chat_name})
+
+    with open(os.path.join(root, 'bench-corpus.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    log(f"📁 Corpus: {manifest['files']} chats in {projects} projects, "
+        f"{manifest['bytes'] / 1024 / 1024:.1f} MB at {projects_dir}")
+    return manifest
+
+
+def load_manifest(root):
+    with open(os.path.join(root, 'bench-corpus.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ============================================
+# SERVER SANDBOX
+# ============================================
+
+def server_answering(url, timeout=0.5):
+    try:
+        return requests.get(f'{url}/api/health', timeout=timeout).status_code == 200
+    except requests.RequestException:
+        return False
+
+
+class ServerSandbox:
+    """A copy of a server folder with the corpus as its ../Claude_Conversations"""
+
+    def __init__(self, server_dir, sandbox_dir, env=None):
+        self.server_dir = os.path.abspath(server_dir)
+        self.sandbox_dir = sandbox_dir
+        self.app_dir = os.path.join(sandbox_dir, 'Claude_AutoSave_FINAL')
+        self.conversations_dir = os.path.join(sandbox_dir, 'Claude_Conversations')
+        self.env = env
+        self.process = None
+        self.spawned = None
+        self.log_path = os.path.join(sandbox_dir, 'server.log')
+
+    def prepare(self):
+        # Dot files are the server's saved indexes and queues - start cold
+        shutil.copytree(self.server_dir, self.app_dir,
+                        ignore=shutil.ignore_patterns('.*', 'node_modules', '__pycache__'))
+        for candidate in (self.server_dir, os.path.dirname(self.server_dir)):
+            modules = os.path.join(candidate, 'node_modules')
+            if os.path.isdir(modules):
+                os.symlink(modules, os.path.join(self.app_dir, 'node_modules'))
+                break
+        config_path = os.path.join(self.app_dir, 'config.json')
+        if not os.path.exists(config_path):
+            with open(config_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 'bench'}, f)
+        return self
+
+    def start(self, timeout=60):
+        if server_answering(DEFAULT_URL):
+            raise RuntimeError(f'Something is already answering on port {PORT} - stop it first')
+        log_file = open(self.log_path, 'w')
+        self.spawned = time.monotonic()
+        self.process = subprocess.Popen(['node', 'claude-server-v5.js'], cwd=self.app_dir,
+                                        stdout=log_file, stderr=subprocess.STDOUT,
+                                        env=dict(os.environ, **(self.env or {})))
+        while time.monotonic() - self.spawned < timeout:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'Server exited during startup - see {self.log_path}')
+            if server_answering(DEFAULT_URL):
+                return round(time.monotonic() - self.spawned, 3)
+            time.sleep(0.1)
+        raise RuntimeError(f'Server not healthy after {timeout}s - see {self.log_path}')
+
+    def stop(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.send_signal(signal.SIGINT)
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# ============================================
+# LOAD
+# ============================================
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Latencies and errors per endpoint, shared by all client threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}           # endpoint -> [ms]
+        self.errors = {}
+        self.bytes = {}
+        self.recording = False      # Off during warm-up
+
+    def record(self, endpoint, ms, ok, sent_bytes=0):
+        if not self.recording:
+            return
+        with self.lock:
+            if ok:
+                self.samples.setdefault(endpoint, []).append(ms)
+                self.bytes[endpoint] = self.bytes.get(endpoint, 0) + sent_bytes
+            else:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint in sorted(set(self.samples) | set(self.errors)):
+            values = sorted(self.samples.get(endpoint, []))
+            entry = {
+                'requests': len(values),
+                'errors': self.errors.get(endpoint, 0),
+                'throughput': round(len(values) / elapsed, 2),
+                'p50Ms': round(percentile(values, 0.50), 2),
+                'p95Ms': round(percentile(values, 0.95), 2),
+                'p99Ms': round(percentile(values, 0.99), 2),
+                'maxMs': round(values[-1], 2) if values else 0,
+                'meanMs': round(sum(values) / len(values), 2) if values else 0,
+            }
+            if self.bytes.get(endpoint):
+                entry['bytesPerSecond'] = round(self.bytes[endpoint] / elapsed)
+            endpoints[endpoint] = entry
+        return endpoints
+
+
+def new_session():
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+    return session
+
+
+def timed(recorder, endpoint, call, sent_bytes=0):
+    started = time.perf_counter()
+    try:
+        response = call()
+        ok = response.status_code == 200
+    except requests.RequestException:
+        ok = False
+    recorder.record(endpoint, (time.perf_counter() - started) * 1000, ok, sent_bytes)
+
+
+def append_client(url, manifest, recorder, stop, seed, delta_chars, think_ms):
+    """One simulated extension: picks a chat and keeps sending deltas to it"""
+    rng = random.Random(seed)
+    text = TextGenerator(rng)
+    session = new_session()
+    chat = rng.choice(manifest['chats'])
+    session_id = f'bench-{seed}'
+    while not stop.is_set():
+        # Now and then the user moves on to another conversation
+        if rng.random() < 0.02:
+            chat = rng.choice(manifest['chats'])
+        content = text.chunk(delta_chars)
+        body = {'sessionId': session_id, 'project': chat['project'],
+                'chatName': chat['chatName'], 'newContent': content}
+        timed(recorder, 'append', lambda: session.post(f'{url}/api/project/append', json=body, timeout=30),
+              len(content.encode('utf-8')))
+        if think_ms:
+            stop.wait(think_ms / 1000)
+    session.close()
+
+
+def reader_client(url, recorder, stop, seed, think_ms):
+    """Dashboard-like reader: stats, projects and searches in turn"""
+    rng = random.Random(seed)
+    session = new_session()
+    reads = ('stats', 'projects', 'search')
+    turn = rng.randrange(len(reads))
+    while not stop.is_set():
+        kind = reads[turn % len(reads)]
+        turn += 1
+        if kind == 'stats':
+            timed(recorder, 'stats', lambda: session.get(f'{url}/api/stats', timeout=30))
+        elif kind == 'projects':
+            timed(recorder, 'projects', lambda: session.get(f'{url}/api/projects', timeout=30))
+        else:
+            query = ' '.join(rng.sample(VOCABULARY[:60], rng.randint(1, 2)))
+            timed(recorder, 'search', lambda: session.post(f'{url}/api/search', json={'query': query, 'limit': 20},
+                                                          timeout=30))
+        if think_ms:
+            stop.wait(think_ms / 1000)
+    session.close()
+
+
+def time_to_first_append(url, manifest, since, timeout=60):
+    """Seconds from `since` (server spawn) until an append succeeds"""
+    chat = manifest['chats'][0]
+    body = {'sessionId': 'bench-startup', 'project': chat['project'], 'chatName': chat['chatName'],
+            'newContent': 'Startup probe.\n'}
+    while time.monotonic() - since < timeout:
+        try:
+            if requests.post(f'{url}/api/project/append', json=body, timeout=timeout).status_code == 200:
+                return round(time.monotonic() - since, 3)
+        except requests.RequestException:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f'No successful append within {timeout}s of startup')
+
+
+def fetch_json(url, path):
+    try:
+        response = requests.get(f'{url}{path}', headers={'Accept': 'application/json'}, timeout=5)
+        return response.json() if response.status_code == 200 else None
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def run_load(url, manifest, clients=8, readers=2, duration=30.0, warmup=5.0, delta_chars=200,
+             append_think_ms=0, read_think_ms=0, seed=1):
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = []
+    for i in range(clients):
+        threads.append(threading.Thread(target=append_client, daemon=True,
+                                        args=(url, manifest, recorder, stop, seed * 1000 + i,
+                                              delta_chars, append_think_ms)))
+    for i in range(readers):
+        threads.append(threading.Thread(target=reader_client, daemon=True,
+                                        args=(url, recorder, stop, seed * 1000 + 500 + i, read_think_ms)))
+
+    log(f"🚀 {clients} append clients, {readers} readers: {warmup}s warm-up, {duration}s measured")
+    for thread in threads:
+        thread.start()
+    stop.wait(warmup)
+    recorder.recording = True
+    started = time.monotonic()
+    stop.wait(duration)
+    recorder.recording = False
+    elapsed = time.monotonic() - started
+    stop.set()
+    for thread in threads:
+        thread.join(35)
+
+    endpoints = recorder.summary(elapsed)
+    total = sum(entry['requests'] for entry in endpoints.values())
+    return {
+        'elapsedSeconds': round(elapsed, 2),
+        'totalRequests': total,
+        'totalThroughput': round(total / elapsed, 2),
+        'endpoints': endpoints,
+    }
+
+
+# ============================================
+# CLI
+# ============================================
+
+def environment():
+    try:
+        node = subprocess.run(['node', '--version'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        node = None
+    return {'python': platform.python_version(), 'node': node, 'platform': platform.platform(),
+            'cpus': os.cpu_count()}
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument('--projects', type=int, default=10)
+    parser.add_argument('--chats', type=int, default=20, help='chats per project')
+    parser.add_argument('--mb', type=float, default=20.0, help='total corpus size')
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def add_load_arguments(parser):
+    parser.add_argument('--clients', type=int, default=8, help='concurrent append clients')
+    parser.add_argument('--readers', type=int, default=2, help='concurrent stats/search/projects readers')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5.0, help='unmeasured seconds first')
+    parser.add_argument('--delta-chars', type=int, default=200, help='characters per append')
+    parser.add_argument('--append-think-ms', type=int, default=0, help='pause between appends')
+    parser.add_argument('--read-think-ms', type=int, default=0, help='pause between reads')
+    parser.add_argument('--output', help='also write the JSON here')
+
+
+def load_options(args):
+    return {'clients': args.clients, 'readers': args.readers, 'duration': args.duration,
+            'warmup': args.warmup, 'delta_chars': args.delta_chars,
+            'append_think_ms': args.append_think_ms, 'read_think_ms': args.read_think_ms,
+            'seed': args.seed}
+
+
+def emit(result, output):
+    text = json.dumps(result, indent=2)
+    print(text)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        log(f"📝 Results written to {output}")
+
+
+def bench(args):
+    """Sandbox + corpus + server + load, all cleaned up afterwards"""
+    sandbox_dir = tempfile.mkdtemp(prefix='smart-save-bench-')
+    sandbox = ServerSandbox(args.server_dir, sandbox_dir).prepare()
+    try:
+        manifest = generate_corpus(sandbox.conversations_dir, args.projects, args.chats, args.mb, args.seed)
+        startup = sandbox.start()
+        first_append = time_to_first_append(DEFAULT_URL, manifest, sandbox.spawned)
+        log(f"✅ Server healthy after {startup}s, first append saved after {first_append}s")
+        health = fetch_json(DEFAULT_URL, '/api/health') or {}
+        result = run_load(DEFAULT_URL, manifest, **load_options(args))
+        result.update({
+            'serverDir': sandbox.server_dir,
+            'serverVersion': health.get('version'),
+            'startupSeconds': startup,
+            'firstAppendSeconds': first_append,
+            'warmUp': fetch_json(DEFAULT_URL, '/api/ready'),
+            'corpus': {key: manifest[key] for key in ('seed', 'projects', 'chatsPerProject', 'megabytes',
+                                                      'files', 'bytes')},
+            'load': load_options(args),
+            'environment': environment(),
+            'serverMetrics': fetch_json(DEFAULT_URL, '/api/metrics?format=json'),
+        })
+        emit(result, args.output)
+    finally:
+        sandbox.stop()
+        if args.keep:
+            log(f"📂 Sandbox kept at {sandbox_dir}")
+        else:
+            shutil.rmtree(sandbox_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Smart Save server benchmark')
+    commands = parser.add_subparsers(dest='command')
+
+    bench_parser = commands.add_parser('bench', help='sandbox a server, load it, print JSON (default)')
+    bench_parser.add_argument('--server-dir', default=SCRIPT_DIR, help='Claude_AutoSave_FINAL folder to test')
+    bench_parser.add_argument('--keep', action='store_true', help='keep the sandbox and server.log')
+    add_corpus_arguments(bench_parser)
+    add_load_arguments(bench_parser)
+
+    generate_parser = commands.add_parser('generate', help='only write a synthetic corpus')
+    generate_parser.add_argument('--root', required=True, help='becomes <root>/Projects/...')
+    add_corpus_arguments(generate_parser)
+
+    run_parser = commands.add_parser('run', help='load a server that is already running')
+    run_parser.add_argument('--url', default=DEFAULT_URL)
+    run_parser.add_argument('--root', required=True, help='corpus the server is serving (from generate)')
+    run_parser.add_argument('--seed', type=int, default=1)
+    add_load_arguments(run_parser)
+
+    argv = sys.argv[1:]
+    if not argv or argv[0].startswith('-') and argv[0] not in ('-h', '--help'):
+        argv = ['bench'] + argv
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        generate_corpus(os.path.abspath(args.root), args.projects, args.chats, args.mb, args.seed)
+    elif args.command == 'run':
+        manifest = load_manifest(args.root)
+        result = run_load(args.url, manifest, **load_options(args))
+        result.update({'url': args.url, 'serverVersion': (fetch_json(args.url, '/api/health') or {}).get('version'),
+                       'load': load_options(args), 'environment': environment(),
+                       'serverMetrics': fetch_json(args.url, '/api/metrics?format=json')})
+        emit(result, args.output)
+    else:
+        try:
+            bench(args)
+        except RuntimeError as e:
+            log(f"❌ {e}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+// ============================================
+// BLOCK DEDUP - Content-addressed appends
+// ============================================
+// Appended text is split into message-level blocks
+// (paragraphs, cut at blank lines) and each block is
+// hashed. Per chat we keep the set of block hashes
+// already stored plus the unfinished last block, so
+// a delta that re-sends text the chat already has
+// (full capture after a reload or chat switch) only
+// writes the blocks that are new.
+//
+// Only runs of duplicates are dropped: a single
+// repeated paragraph between new ones is kept, and
+// short blocks ("Copy", "Edit") only go when the
+// duplicates around them do. A capture separator
+// is dropped when everything after it was.
+//
+// The same pass, with nothing stored yet, compacts
+// existing chat files (compact-chats.js).
+// ============================================
+
+const crypto = require('crypto');
+const path = require('path');
+const { createIo } = require('./async-io.js');
+const { parseSegmentName, segmentFileName } = require('./chat-segments.js');
+
+const BLOCK_END = /\n{2,}$/;
+const BLOCK_BOUNDARY = /\n{2,}/g;
+// Separator the browser script writes before a full capture / continuation
+const CAPTURE_MARKER = /^\s*={20,}\n📅 /;
+const DEFAULT_MIN_BLOCK_CHARS = 64;       // Shorter blocks are never hashed
+const DEFAULT_MIN_RUN_CHARS = 1024;       // A duplicate run this long is dropped...
+const DEFAULT_MIN_RUN_BLOCKS = 3;         // ...or one with this many duplicate blocks
+const DEFAULT_MAX_CHATS = 50;             // Chat hash sets kept in memory
+const MAX_TAIL_CHARS = 64 * 1024;         // Longer unfinished blocks are not tracked
+
+// Blocks end with their blank-line boundary, so joining them gives the text back
+function splitBlocks(text) {
+    const blocks = [];
+    let start = 0;
+    BLOCK_BOUNDARY.lastIndex = 0;
+    let match;
+    while ((match = BLOCK_BOUNDARY.exec(text)) !== null) {
+        const end = match.index + match[0].length;
+        blocks.push(text.slice(start, end));
+        start = end;
+    }
+    if (start < text.length) blocks.push(text.slice(start));
+    return blocks;
+}
+
+const blockHash = (block) => crypto.createHash('sha1').update(block.trim()).digest('hex').slice(0, 20);
+
+const emptyChatState = () => ({ hashes: new Set(), tail: '', midBlock: false });
+
+class BlockDedup {
+    constructor({
+        projectsDir,
+        chatSegments,
+        io = createIo(),
+        minBlockChars = DEFAULT_MIN_BLOCK_CHARS,
+        minRunChars = DEFAULT_MIN_RUN_CHARS,
+        minRunBlocks = DEFAULT_MIN_RUN_BLOCKS,
+        maxChats = DEFAULT_MAX_CHATS
+    }) {
+        this.projectsDir = projectsDir;
+        this.chatSegments = chatSegments;
+        this.io = io;
+        this.minBlockChars = minBlockChars;
+        this.minRunChars = minRunChars;
+        this.minRunBlocks = minRunBlocks;
+        this.maxChats = maxChats;
+        this.chats = new Map();           // "project/chat" -> state, oldest first
+        this.counters = {
+            appends: 0,
+            dedupedAppends: 0,
+            skippedBlocks: 0,
+            skippedChars: 0,
+            chatLoads: 0
+        };
+    }
+
+    // ---------- the block pass ----------
+
+    // Drop duplicate runs from `text` given what the chat already stores.
+    // Updates `state` (hashes, unfinished tail) as if the result was written.
+    filter(state, text, { keepAll = false, keepLast = false } = {}) {
+        const blocks = splitBlocks(text);
+        const continuation = state.tail.length > 0 || state.midBlock;
+
+        const entries = blocks.map((block, i) => {
+            const complete = BLOCK_END.test(block);
+            const last = i === blocks.length - 1;
+            const size = block.trim().length;
+            if (i === 0 && continuation) {
+                // Finishes the block the chat file ends with - never dropped
+                const whole = state.tail + block;
+                if (complete && whole.trim().length >= this.minBlockChars) state.hashes.add(blockHash(whole));
+                return { block, kind: 'new' };
+            }
+            if (CAPTURE_MARKER.test(block)) return { block, kind: 'marker' };
+            if (size < this.minBlockChars) return { block, kind: 'short' };
+            const hash = blockHash(block);
+            if (state.hashes.has(hash) && !(last && keepLast)) return { block, kind: 'dup' };
+            // An unfinished last block may still grow; hash it once it's complete
+            if (complete) state.hashes.add(hash);
+            return { block, kind: 'new' };
+        });
+
+        if (!keepAll) this.markDrops(entries);
+
+        let output = '';
+        let skippedBlocks = 0;
+        let skippedChars = 0;
+        entries.forEach(entry => {
+            if (entry.drop) {
+                skippedBlocks++;
+                skippedChars += entry.block.length;
+            } else {
+                output += entry.block;
+            }
+        });
+
+        this.advanceTail(state, output);
+        return { text: output, skippedBlocks, skippedChars };
+    }
+
+    // Mark duplicate runs (between new blocks and capture markers) for dropping
+    markDrops(entries) {
+        let i = 0;
+        while (i < entries.length) {
+            if (entries[i].kind === 'new' || entries[i].kind === 'marker') {
+                i++;
+                continue;
+            }
+            const start = i;
+            while (i < entries.length && (entries[i].kind === 'dup' || entries[i].kind === 'short')) i++;
+            const run = entries.slice(start, i);
+            const dups = run.filter(entry => entry.kind === 'dup');
+            const dupChars = dups.reduce((total, entry) => total + entry.block.length, 0);
+            if (dups.length === 0 || (dupChars < this.minRunChars && dups.length < this.minRunBlocks)) continue;
+
+            // Short blocks right before a new block likely belong to it
+            let end = run.length;
+            if (i < entries.length && entries[i].kind === 'new') {
+                while (end > 0 && run[end - 1].kind === 'short') end--;
+            }
+            run.slice(0, end).forEach(entry => { entry.drop = true; });
+        }
+
+        // A separator with nothing left after it goes too
+        entries.forEach((entry, index) => {
+            if (entry.kind !== 'marker') return;
+            const section = [];
+            for (let j = index + 1; j < entries.length && entries[j].kind !== 'marker'; j++) section.push(entries[j]);
+            if (section.length > 0 && section.every(next => next.drop)) entry.drop = true;
+        });
+
+        // Blank lines alone are not worth writing once the rest is gone
+        if (entries.some(entry => entry.drop) && entries.every(entry => entry.drop || entry.block.trim() === '')) {
+            entries.forEach(entry => { entry.drop = true; });
+        }
+    }
+
+    advanceTail(state, written) {
+        if (written.length === 0) return;
+        if (BLOCK_END.test(written)) {
+            state.tail = '';
+            state.midBlock = false;
+            return;
+        }
+        BLOCK_BOUNDARY.lastIndex = 0;
+        let lastBoundary = -1;
+        let match;
+        while ((match = BLOCK_BOUNDARY.exec(written)) !== null) lastBoundary = match.index + match[0].length;
+        if (lastBoundary !== -1) {
+            state.tail = written.slice(lastBoundary);
+            state.midBlock = false;
+        } else {
+            state.tail += written;
+        }
+        if (state.tail.length > MAX_TAIL_CHARS) {
+            state.tail = '';
+            state.midBlock = true;
+        }
+    }
+
+    // ---------- append path ----------
+
+    // Hash set for a chat, built from its segment files on first use
+    async chatState(project, baseFile) {
+        const key = `${project}/${parseSegmentName(baseFile).chat}`;
+        let state = this.chats.get(key);
+        if (state) {
+            this.chats.delete(key);       // Move to the newest end
+        } else {
+            state = emptyChatState();
+            for await (const { content } of this.chatSegments.readChat(project, baseFile)) {
+                this.filter(state, content, { keepAll: true });
+            }
+            this.counters.chatLoads++;
+        }
+        this.chats.set(key, state);
+        while (this.chats.size > this.maxChats) this.chats.delete(this.chats.keys().next().value);
+        return state;
+    }
+
+    // What of `text` still needs writing. Call inside the chat's write chain;
+    // if the write then fails, call forget() so the state is rebuilt
+    async dedupeAppend(project, baseFile, text) {
+        const state = await this.chatState(project, baseFile);
+        const result = this.filter(state, text);
+        this.counters.appends++;
+        if (result.skippedBlocks > 0) {
+            this.counters.dedupedAppends++;
+            this.counters.skippedBlocks += result.skippedBlocks;
+            this.counters.skippedChars += result.skippedChars;
+        }
+        return result;
+    }
+
+    forget(project, file) {
+        this.chats.delete(`${project}/${parseSegmentName(file).chat}`);
+    }
+
+    // Outside edits and removals invalidate a chat's hash set
+    attach(metadataIndex) {
+        metadataIndex.on('rescan', (project, file) => this.forget(project, file));
+        metadataIndex.on('remove', (project, file) => this.forget(project, file));
+        return this;
+    }
+
+    stats() {
+        return Object.assign({ chatsCached: this.chats.size }, this.counters);
+    }
+
+    // ---------- compaction ----------
+
+    // Rewrite one chat (all its segments) without duplicate runs. Each
+    // segment is replaced with temp + rename, so a crash leaves either
+    // the old or the new file.
+    async compactChat(project, baseFile, { dryRun = false } = {}) {
+        const state = emptyChatState();
+        const segments = await this.chatSegments.segmentsFor(project, baseFile);
+        const report = { project, file: baseFile, segments: segments.length, bytesBefore: 0, bytesAfter: 0, skippedBlocks: 0 };
+
+        for (let i = 0; i < segments.length; i++) {
+            const segment = segments[i];
+            const content = await this.io.readFile(segment.path);
+            // A segment's last block may carry on in the next one
+            const result = this.filter(state, content, { keepLast: i < segments.length - 1 });
+            report.bytesBefore += Buffer.byteLength(content, 'utf8');
+            report.bytesAfter += Buffer.byteLength(result.text, 'utf8');
+            report.skippedBlocks += result.skippedBlocks;
+            if (dryRun || result.skippedBlocks === 0) continue;
+
+            const tmpPath = `${segment.path}.tmp`;
+            await this.io.writeFile(tmpPath, result.text);
+            await this.io.rename(tmpPath, segment.path);
+        }
+
+        if (!dryRun && report.skippedBlocks > 0) {
+            this.forget(project, baseFile);
+            const chat = parseSegmentName(baseFile).chat;
+            this.chatSegments.manifests.delete(`${project}/${chat}`);
+            if (this.chatSegments.metadataIndex) await this.chatSegments.metadataIndex.reconcileProject(project);
+            await this.chatSegments.refresh(project, chat);
+        }
+        return report;
+    }
+
+    // Compact every chat; `withChat(filePath, task)` lets the server hold
+    // each chat's write chain while it is rewritten
+    async compactAll({ dryRun = false, project: onlyProject = null, withChat = (filePath, task) => task() } = {}) {
+        const results = [];
+        if (!await this.io.exists(this.projectsDir)) return results;
+
+        const projects = onlyProject ? [onlyProject] : await this.io.readdir(this.projectsDir);
+        for (const project of projects) {
+            const projectDir = path.join(this.projectsDir, project);
+            let files;
+            try {
+                if (!(await this.io.stat(projectDir)).isDirectory()) continue;
+                files = await this.io.readdir(projectDir);
+            } catch (error) {
+                continue;
+            }
+            const chats = new Set(files.filter(f => f.endsWith('.md')).map(f => parseSegmentName(f).chat));
+            for (const chat of chats) {
+                const baseFile = segmentFileName(chat, 1);
+                try {
+                    const report = await withChat(path.join(projectDir, baseFile),
+                        () => this.compactChat(project, baseFile, { dryRun }));
+                    if (report.skippedBlocks > 0) results.push(report);
+                } catch (error) {
+                    console.log(`Warning: Could not compact ${project}/${baseFile}: ${error.message}`);
+                }
+            }
+        }
+        return results;
+    }
+}
+
+module.exports = { BlockDedup, splitBlocks, blockHash };
@@ -0,0 +1,208 @@
+// ============================================
+// CHAT READER - Ranged, streamed reads of a chat
+// ============================================
+// A chat is read as one byte sequence over its
+// segment files, in part order, in chunks of at most
+// chunkBytes - a long chat is never held in memory.
+//
+// Messages are the blocks block-dedup.js hashes:
+// text up to and including a run of blank lines
+// (blank lines at the very start join the first).
+// Message ranges are found by scanning forward only
+// as far as the last message asked for; tail-N and
+// excerpts scan backward from the end.
+//
+// open() takes a snapshot of the segment sizes, so
+// a read never runs into text appended meanwhile, and
+// an ETag from the segments' sizes and mtimes (chats
+// only grow, and compaction changes both).
+// ============================================
+
+const crypto = require('crypto');
+const path = require('path');
+const { parseSegmentName, segmentFileName } = require('./chat-segments.js');
+
+const DEFAULT_CHUNK_BYTES = 64 * 1024;
+const BYTES_PER_TOKEN = 4;            // Rough budget estimate (English text)
+const NEWLINE = 0x0A;
+
+// UTF-8 continuation bytes (10xxxxxx) never start a character
+const isContinuation = (byte) => (byte & 0xC0) === 0x80;
+
+class ChatReader {
+    constructor({ projectsDir, chatSegments, io, chunkBytes = DEFAULT_CHUNK_BYTES }) {
+        this.projectsDir = projectsDir;
+        this.chatSegments = chatSegments;
+        this.io = io;
+        this.chunkBytes = chunkBytes;
+    }
+
+    // Snapshot of a chat's segments (null if there is no such chat)
+    async open(project, file) {
+        // Only folders directly under Projects/ - a name like "..%2F.."
+        // must not reach files anywhere else
+        const projectDir = path.resolve(this.projectsDir, project);
+        if (path.dirname(projectDir) !== path.resolve(this.projectsDir) || path.basename(projectDir) !== project) return null;
+
+        const chat = parseSegmentName(path.basename(file)).chat;
+        const baseFile = segmentFileName(chat, 1);
+        if (!await this.io.exists(path.join(this.projectsDir, project, baseFile))) return null;
+
+        const segments = [];
+        let size = 0;
+        let mtimeMs = 0;
+        for (const segment of await this.chatSegments.segmentsFor(project, baseFile)) {
+            // The manifest's ranges can lag the files; the files decide
+            const stat = await this.io.stat(segment.path);
+            segments.push({
+                file: segment.file,
+                path: segment.path,
+                start: size,
+                end: size + stat.size,
+                mtimeMs: stat.mtimeMs,
+                archived: Boolean(stat.archived)
+            });
+            size += stat.size;
+            mtimeMs = Math.max(mtimeMs, stat.mtimeMs);
+        }
+        if (segments.length === 0) return null;
+
+        const etag = crypto.createHash('sha1')
+            .update(segments.map(segment => `${segment.file}:${segment.end - segment.start}:${segment.mtimeMs}`).join('\n'))
+            .digest('hex').slice(0, 20);
+        return { project, chat, file: baseFile, segments, size, mtimeMs, etag: `"${etag}"` };
+    }
+
+    // Bytes [start, end) of the chat, chunk by chunk
+    async *readBytes(view, start = 0, end = view.size) {
+        for (const segment of view.segments) {
+            if (segment.end <= start || segment.start >= end) continue;
+            const from = Math.max(start, segment.start) - segment.start;
+            const to = Math.min(end, segment.end) - segment.start;
+
+            if (segment.archived) {
+                // Packed chats come out of their pack whole; hand that out in chunks
+                const buffer = await this.io.readRange(segment.path, 0, segment.end - segment.start);
+                for (let offset = from; offset < to; offset += this.chunkBytes) {
+                    yield buffer.subarray(offset, Math.min(to, offset + this.chunkBytes));
+                }
+                continue;
+            }
+            for (let offset = from; offset < to; offset += this.chunkBytes) {
+                const chunk = await this.io.readRange(segment.path, offset, Math.min(this.chunkBytes, to - offset));
+                if (chunk.length === 0) break;      // Shrunk under us (compaction)
+                yield chunk;
+            }
+        }
+    }
+
+    // Chunks before `end`, last first: { start, buffer }
+    async *readBackward(view, end = view.size) {
+        for (let offset = end; offset > 0; offset -= this.chunkBytes) {
+            const start = Math.max(0, offset - this.chunkBytes);
+            const parts = [];
+            for await (const chunk of this.readBytes(view, start, offset)) parts.push(chunk);
+            yield { start, buffer: parts.length === 1 ? parts[0] : Buffer.concat(parts) };
+        }
+    }
+
+    // Byte range of messages first..last (last null = through the end);
+    // null if the chat has fewer than first + 1 messages
+    async messageRange(view, first, last = null) {
+        let index = 0;
+        let run = 0;
+        let seenText = false;
+        let start = first === 0 ? 0 : null;
+        let position = 0;
+
+        for await (const chunk of this.readBytes(view)) {
+            for (let i = 0; i < chunk.length; i++) {
+                if (chunk[i] === NEWLINE) {
+                    run++;
+                    continue;
+                }
+                if (seenText && run >= 2) {
+                    index++;
+                    if (index === first) start = position + i;
+                    if (last !== null && index === last + 1) return { start, end: position + i };
+                }
+                seenText = true;
+                run = 0;
+            }
+            position += chunk.length;
+        }
+        return start === null ? null : { start, end: view.size };
+    }
+
+    // Start offsets of messages ending at or before `end`, last first
+    async *messageStartsBackward(view, end = view.size) {
+        let run = 0;
+        let above = null;   // Nearest text byte after the scan position
+        for await (const { start, buffer } of this.readBackward(view, end)) {
+            for (let i = buffer.length - 1; i >= 0; i--) {
+                if (buffer[i] === NEWLINE) {
+                    run++;
+                    continue;
+                }
+                if (above !== null && run >= 2) yield above;
+                above = start + i;
+                run = 0;
+            }
+        }
+        if (end > 0) yield 0;
+    }
+
+    // Byte range of the last n messages
+    async tailRange(view, n) {
+        let count = 0;
+        let start = view.size;
+        for await (const messageStart of this.messageStartsBackward(view)) {
+            start = messageStart;
+            if (++count >= n) break;
+        }
+        return { start, end: view.size };
+    }
+
+    // The most recent whole messages that fit maxTokens. When even the last
+    // message is too long, its end is cut at a line start (or, failing
+    // that, a character start) instead
+    async excerpt(view, maxTokens) {
+        const budget = Math.max(1, Math.floor(maxTokens * BYTES_PER_TOKEN));
+        let start = view.size;
+        let messages = 0;
+        for await (const messageStart of this.messageStartsBackward(view)) {
+            if (view.size - messageStart > budget) break;
+            start = messageStart;
+            messages++;
+        }
+
+        let truncated = false;
+        if (messages === 0 && view.size > 0) {
+            truncated = true;
+            start = view.size - budget;
+            const parts = [];
+            for await (const chunk of this.readBytes(view, start, view.size)) parts.push(chunk);
+            const window = Buffer.concat(parts);
+            const newline = window.indexOf(NEWLINE);
+            let skip = newline >= 0 && newline + 1 < window.length ? newline + 1 : 0;
+            while (skip < window.length && isContinuation(window[skip])) skip++;
+            start += skip;
+        }
+
+        const parts = [];
+        for await (const chunk of this.readBytes(view, start, view.size)) parts.push(chunk);
+        const text = Buffer.concat(parts).toString('utf8');
+        return {
+            text,
+            start,
+            end: view.size,
+            bytes: view.size - start,
+            messages,
+            estimatedTokens: Math.ceil((view.size - start) / BYTES_PER_TOKEN),
+            truncated,
+            complete: start === 0
+        };
+    }
+}
+
+module.exports = { ChatReader, BYTES_PER_TOKEN };
@@ -0,0 +1,346 @@
+// ============================================
+// CHAT SEGMENTS - Size-capped conversation files
+// ============================================
+// A chat starts as "Chat.md". Once an append would push
+// the active file past the segment size it rolls over to
+// "Chat.part-002.md", "Chat.part-003.md", ... A small
+// manifest per chat (Project/.manifests/Chat.json) lists
+// the segments in order with their byte range in the
+// whole conversation and their word counts, so readers
+// can open only the segments they need.
+// ============================================
+
+const fs = require('fs');
+const path = require('path');
+const { createIo, writeJsonAtomic, writeJsonAtomicSync } = require('./async-io.js');
+
+const MANIFEST_VERSION = 1;
+const DEFAULT_SEGMENT_BYTES = 900000; // Under the 1MB file size limit
+const MANIFEST_DIR = '.manifests';
+const SAVE_DELAY = 2000;              // Batch manifest writes (ms)
+const SEGMENT_PATTERN = /^(.*)\.part-(\d{3,})\.md$/;
+
+// "Chat.md" is part 1, later parts are "Chat.part-NNN.md"
+function segmentFileName(chat, part) {
+    return part <= 1 ? `${chat}.md` : `${chat}.part-${String(part).padStart(3, '0')}.md`;
+}
+
+// "Chat.part-002.md" -> { chat: 'Chat', part: 2 }
+function parseSegmentName(file) {
+    const match = file.match(SEGMENT_PATTERN);
+    if (match) return { chat: match[1], part: parseInt(match[2], 10) };
+    return { chat: file.replace(/\.md$/, ''), part: 1 };
+}
+
+// Group per-file metadata entries into chats: { chat: { file, segments, ...totals } }
+function groupSegments(files) {
+    const chats = {};
+    Object.entries(files).forEach(([file, entry]) => {
+        const { chat, part } = parseSegmentName(file);
+        const group = chats[chat] || (chats[chat] = {
+            file: segmentFileName(chat, 1),
+            segments: [],
+            words: 0,
+            chars: 0,
+            bytes: 0,
+            lines: 0,
+            mtimeMs: 0
+        });
+        group.segments.push({ file, part });
+        group.words += entry.words;
+        group.chars += entry.chars;
+        group.bytes += entry.bytes;
+        group.lines += entry.lines;
+        group.mtimeMs = Math.max(group.mtimeMs, entry.mtimeMs);
+    });
+    Object.values(chats).forEach(group => group.segments.sort((a, b) => a.part - b.part));
+    return chats;
+}
+
+// Header written at the top of each new segment
+const segmentHeader = (chat, part) => `# ${chat} (part ${part})
+
+**Continued from:** ${segmentFileName(chat, part - 1)}
+**Started:** ${new Date().toLocaleString()}
+${'='.repeat(60)}
+
+`;
+
+// Split text into chunks of at most maxBytes, cutting after a newline
+// where possible (a single longer line is kept whole)
+function splitAtLines(content, maxBytes) {
+    const chunks = [];
+    let current = '';
+    let currentBytes = 0;
+    content.split(/(?<=\n)/).forEach(line => {
+        const lineBytes = Buffer.byteLength(line, 'utf8');
+        if (currentBytes > 0 && currentBytes + lineBytes > maxBytes) {
+            chunks.push(current);
+            current = '';
+            currentBytes = 0;
+        }
+        current += line;
+        currentBytes += lineBytes;
+    });
+    if (current.length > 0 || chunks.length === 0) chunks.push(current);
+    return chunks;
+}
+
+class ChatSegments {
+    constructor({ projectsDir, io, segmentBytes = DEFAULT_SEGMENT_BYTES, metadataIndex = null }) {
+        this.projectsDir = projectsDir;
+        this.io = io || createIo();
+        this.segmentBytes = segmentBytes;
+        this.metadataIndex = metadataIndex;
+        this.manifests = new Map();   // "project/chat" -> manifest
+        this.saveTimers = new Map();
+    }
+
+    manifestPath(project, chat) {
+        return path.join(this.projectsDir, project, MANIFEST_DIR, `${chat}.json`);
+    }
+
+    // Words for a segment file, from the metadata index when it has it
+    wordsFor(project, file) {
+        if (!this.metadataIndex) return 0;
+        const entry = this.metadataIndex.getProjectFiles(project)[file];
+        return entry ? entry.words : 0;
+    }
+
+    // Rebuild a chat's manifest from the segment files on disk
+    async refresh(project, chat) {
+        const projectDir = path.join(this.projectsDir, project);
+        const files = await this.io.exists(projectDir) ? await this.io.readdir(projectDir) : [];
+        const parts = files
+            .filter(file => file.endsWith('.md') && parseSegmentName(file).chat === chat)
+            .map(file => ({ file, part: parseSegmentName(file).part }))
+            .sort((a, b) => a.part - b.part);
+
+        const segments = [];
+        let offset = 0;
+        for (const { file, part } of parts) {
+            const stat = await this.io.stat(path.join(projectDir, file));
+            segments.push({
+                file,
+                part,
+                start: offset,
+                end: offset + stat.size,
+                words: this.wordsFor(project, file),
+                sealed: true
+            });
+            offset += stat.size;
+        }
+        if (segments.length > 0) segments[segments.length - 1].sealed = false;
+
+        const manifest = { version: MANIFEST_VERSION, project, chat, segments };
+        this.manifests.set(`${project}/${chat}`, manifest);
+        if (segments.length > 1) await this.save(manifest);
+        return manifest;
+    }
+
+    // Manifest from memory, then disk, then rebuilt from the segment files
+    async getManifest(project, chat) {
+        const key = `${project}/${chat}`;
+        if (this.manifests.has(key)) return this.manifests.get(key);
+
+        try {
+            const manifest = JSON.parse(await this.io.readFile(this.manifestPath(project, chat)));
+            const active = manifest.segments[manifest.segments.length - 1];
+            if (manifest.version === MANIFEST_VERSION && active) {
+                // The last range may lag the file if we stopped before a save
+                const stat = await this.io.stat(path.join(this.projectsDir, project, active.file));
+                active.end = active.start + stat.size;
+                this.manifests.set(key, manifest);
+                return manifest;
+            }
+        } catch (error) {
+            // No manifest yet - single-file chat or written by an older version
+        }
+        return this.refresh(project, chat);
+    }
+
+    async save(manifest) {
+        const key = `${manifest.project}/${manifest.chat}`;
+        if (this.saveTimers.has(key)) {
+            clearTimeout(this.saveTimers.get(key));
+            this.saveTimers.delete(key);
+        }
+        manifest.updated = new Date().toISOString();
+        await this.io.mkdir(path.join(this.projectsDir, manifest.project, MANIFEST_DIR));
+        await writeJsonAtomic(this.manifestPath(manifest.project, manifest.chat), manifest);
+    }
+
+    scheduleSave(manifest) {
+        const key = `${manifest.project}/${manifest.chat}`;
+        if (this.saveTimers.has(key)) return;
+        const timer = setTimeout(() => {
+            this.saveTimers.delete(key);
+            this.save(manifest).catch(error => {
+                console.error('Manifest save error:', error);
+            });
+        }, SAVE_DELAY);
+        if (timer.unref) timer.unref();
+        this.saveTimers.set(key, timer);
+    }
+
+    // Write pending manifest updates now (shutdown path)
+    flush() {
+        this.saveTimers.forEach((timer, key) => {
+            clearTimeout(timer);
+            const manifest = this.manifests.get(key);
+            manifest.updated = new Date().toISOString();
+            fs.mkdirSync(path.join(this.projectsDir, manifest.project, MANIFEST_DIR), { recursive: true });
+            writeJsonAtomicSync(this.manifestPath(manifest.project, manifest.chat), manifest);
+        });
+        this.saveTimers.clear();
+    }
+
+    // Segment file the next `bytes` should be appended to, rolling over to a
+    // new segment when the active one would pass the size limit. Callers hold
+    // the chat's write chain.
+    async appendTarget(project, baseFile, bytes) {
+        const chat = parseSegmentName(baseFile).chat;
+        let manifest = await this.getManifest(project, chat);
+        if (manifest.segments.length === 0) {
+            // Manifest was looked up before the chat file was created
+            manifest = await this.refresh(project, chat);
+        }
+        let active = manifest.segments[manifest.segments.length - 1];
+
+        if (!active) {
+            return { file: baseFile, path: path.join(this.projectsDir, project, baseFile), rolled: false, offset: 0 };
+        }
+
+        const size = active.end - active.start;
+        const rolled = size > 0 && size + bytes > this.segmentBytes;
+        if (rolled) {
+            const part = active.part + 1;
+            const file = segmentFileName(chat, part);
+            const header = segmentHeader(chat, part);
+            await this.io.writeFile(path.join(this.projectsDir, project, file), header);
+            if (this.metadataIndex) await this.metadataIndex.rescanFile(project, file);
+
+            active.sealed = true;
+            active = {
+                file,
+                part,
+                start: active.end,
+                end: active.end + Buffer.byteLength(header, 'utf8'),
+                words: this.wordsFor(project, file),
+                sealed: false
+            };
+            manifest.segments.push(active);
+            await this.save(manifest);
+            console.log(`📚 ${project}/${baseFile} rolled over to ${file}`);
+        }
+
+        // offset: the segment's size before this append (the append log's redo check)
+        return {
+            file: active.file,
+            path: path.join(this.projectsDir, project, active.file),
+            rolled,
+            offset: active.end - active.start
+        };
+    }
+
+    // Keep the active segment's range and words in step with the metadata
+    // index entry recorded for the append
+    recordAppend(project, baseFile, segmentFile, entry) {
+        const manifest = this.manifests.get(`${project}/${parseSegmentName(baseFile).chat}`);
+        const segment = manifest && manifest.segments.find(s => s.file === segmentFile);
+        if (!segment || !entry) return;
+        segment.end = segment.start + entry.bytes;
+        segment.words = entry.words;
+        this.scheduleSave(manifest);
+    }
+
+    // Ordered segment list with absolute paths (nothing is read)
+    async segmentsFor(project, baseFile) {
+        const chat = parseSegmentName(baseFile).chat;
+        const manifest = await this.getManifest(project, chat);
+        return manifest.segments.map(segment => Object.assign({}, segment, {
+            path: path.join(this.projectsDir, project, segment.file)
+        }));
+    }
+
+    // Read a chat one segment at a time
+    async *readChat(project, baseFile) {
+        for (const segment of await this.segmentsFor(project, baseFile)) {
+            yield { segment, content: await this.io.readFile(segment.path) };
+        }
+    }
+
+    // Split one oversized single-file chat into segments. Later parts are
+    // written first and the original is replaced last (temp + rename), so
+    // an interrupted run never loses text.
+    async migrateFile(project, file, { dryRun = false } = {}) {
+        const { chat, part } = parseSegmentName(file);
+        const filePath = path.join(this.projectsDir, project, file);
+        const stat = await this.io.stat(filePath);
+        const report = { project, file, size: stat.size, parts: 1, skipped: null };
+
+        if (part !== 1) {
+            report.skipped = 'already a segment';
+            return report;
+        }
+        if (stat.size <= this.segmentBytes) {
+            report.skipped = 'under the segment size';
+            return report;
+        }
+        if (await this.io.exists(path.join(this.projectsDir, project, segmentFileName(chat, 2)))) {
+            report.skipped = 'already has segments';
+            return report;
+        }
+
+        const chunks = splitAtLines(await this.io.readFile(filePath), this.segmentBytes);
+        report.parts = chunks.length;
+        if (dryRun || chunks.length < 2) return report;
+
+        for (let i = 1; i < chunks.length; i++) {
+            await this.io.writeFile(path.join(this.projectsDir, project, segmentFileName(chat, i + 1)), chunks[i]);
+        }
+        const tmpPath = `${filePath}.tmp`;
+        await this.io.writeFile(tmpPath, chunks[0]);
+        await this.io.rename(tmpPath, filePath);
+
+        this.manifests.delete(`${project}/${chat}`);
+        if (this.metadataIndex) await this.metadataIndex.reconcileProject(project);
+        await this.refresh(project, chat);
+        return report;
+    }
+
+    // Split every oversized chat file in every project
+    async migrateAll({ dryRun = false } = {}) {
+        const results = [];
+        if (!await this.io.exists(this.projectsDir)) return results;
+
+        for (const project of await this.io.readdir(this.projectsDir)) {
+            const projectDir = path.join(this.projectsDir, project);
+            let files;
+            try {
+                if (!(await this.io.stat(projectDir)).isDirectory()) continue;
+                files = await this.io.readdir(projectDir);
+            } catch (error) {
+                continue;
+            }
+            for (const file of files.filter(f => f.endsWith('.md') && parseSegmentName(f).part === 1)) {
+                try {
+                    const report = await this.migrateFile(project, file, { dryRun });
+                    if (!report.skipped) results.push(report);
+                } catch (error) {
+                    console.log(`Warning: Could not migrate ${project}/${file}: ${error.message}`);
+                }
+            }
+        }
+        return results;
+    }
+}
+
+module.exports = {
+    ChatSegments,
+    segmentFileName,
+    parseSegmentName,
+    groupSegments,
+    splitAtLines,
+    DEFAULT_SEGMENT_BYTES
+};
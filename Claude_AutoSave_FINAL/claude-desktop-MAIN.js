@@ -14,6 +14,7 @@
 // Track our own intervals to clean up properly
 const smartSaveIntervals = [];
 const smartSaveTimeouts = [];
+const smartSaveObservers = [];
 
 // Clear only OUR old intervals (not all intervals globally!)
 if (window.smartSaveCleanup) {
@@ -24,8 +25,10 @@ if (window.smartSaveCleanup) {
 window.smartSaveCleanup = () => {
     smartSaveIntervals.forEach(id => clearInterval(id));
     smartSaveTimeouts.forEach(id => clearTimeout(id));
+    smartSaveObservers.forEach(observer => observer.disconnect());
     smartSaveIntervals.length = 0;
     smartSaveTimeouts.length = 0;
+    smartSaveObservers.length = 0;
     console.log('🧹 Cleaned up Smart Save timers');
 };
 
@@ -44,8 +47,34 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
     const UPDATE_INTERVAL = 1000;
     const MIN_CHANGE_SIZE = 50;
     const MAX_SAVE_SIZE = 500000;
+    const SUGGEST_TEXT_CHARS = 20000; // Page text sent for a folder suggestion
     const FINGERPRINT_LENGTH = 2500;  // Increased for better unique identification
     
+    // Capture mode: 'observer' watches message nodes with a MutationObserver
+    // and reads only the ones that changed; 'polling' is the old full-page
+    // innerText read every UPDATE_INTERVAL. Switch with setCaptureMode().
+    const CAPTURE_MODE_KEY = 'smart_save_capture_mode';
+    const STREAM_DEBOUNCE = 1500;     // Quiet time before reading changed nodes
+    const MAX_STREAM_WAIT = 15000;    // Save at least this often while streaming
+    const TITLE_CHECK_INTERVAL = 1000; // Chat-switch check (title only, no layout)
+    const MESSAGE_SELECTORS = [
+        '[data-testid="user-message"]',
+        '[data-is-streaming]',
+        '.font-claude-message',
+        '.font-user-message'
+    ].join(', ');
+    const OWN_ELEMENTS = '#autosave-indicator, #autosave-mini, #folder-modal';
+    
+    // Appends: deltas are batched per chat and sent gzip'd
+    const OUTBOX_KEY = 'smart_save_outbox_v1';
+    const STREAMS_KEY = 'smart_save_streams_v1';
+    const BATCH_DELAY = 750;           // Collect deltas this long per request
+    const RETRY_DELAY = 5000;          // Server unreachable - try again
+    const MAX_BATCH_ENTRIES = 100;
+    const MAX_BATCH_CHARS = 2000000;
+    const COMPRESS_MIN_SIZE = 1024;    // Not worth gzipping tiny bodies
+    let captureMode = localStorage.getItem(CAPTURE_MODE_KEY) === 'polling' ? 'polling' : 'observer';
+    
     // State Management - SIMPLE!
     let currentChatName = '';
     let currentFolder = null;
@@ -61,13 +90,42 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
     let chatLastContent = {};   // Chat name -> Last 1000 chars (for finding position)
     let lastSeenContent = '';
     
+    // Append protocol state (see APPEND OUTBOX)
+    let appendStreams = {};   // Chat name -> { id, seq }
+    let outbox = [];          // Deltas not yet acknowledged by the server
+    let outboxTimer = null;
+    let outboxSending = false;
+    
+    // Observer capture state
+    let conversationObserver = null;
+    let observedContainer = null;
+    let dirtyNodes = new Set();          // Message nodes changed since last read
+    let nodeTextCache = new WeakMap();   // Message node -> text already saved
+    let pendingDelta = '';               // Read but not yet saved (below MIN_CHANGE_SIZE)
+    let flushTimer = null;
+    let firstDirtyAt = 0;
+    let captureTimers = [];
+    
+    // Cost of each capture path, for comparing the two modes
+    const captureStats = {
+        mode: captureMode,
+        captures: 0,
+        charsRead: 0,
+        captureMs: 0,
+        mutations: 0
+    };
+    
     let stats = { 
         words: 0,
         messages: 0,
         saves: 0,
         tokens: 0,
         duplicatesPrevented: 0,
-        chatsTracked: 0
+        chatsTracked: 0,
+        bytesSent: 0,
+        rejectedDeltas: 0,      // Refused by the server (400) and dropped
+        rejectedChars: 0,
+        splitDeltas: 0          // Too big for one request (413)
     };
     
     // Load saved mappings
@@ -99,6 +157,14 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
             chatFingerprints = {};
         }
         
+        try {
+            appendStreams = JSON.parse(localStorage.getItem(STREAMS_KEY) || '{}');
+            outbox = JSON.parse(localStorage.getItem(OUTBOX_KEY) || '[]');
+        } catch (e) {
+            appendStreams = {};
+            outbox = [];
+        }
+        
         const lastContent = localStorage.getItem('chat_last_content_v7');
         if (lastContent) {
             try {
@@ -137,6 +203,24 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
         return '';  // Return empty string
     };
     
+    const CONTAINER_SELECTORS = [
+        'main[class*="conversation"]',
+        'div[class*="conversation-container"]',
+        'div[class*="chat-messages"]',
+        'main:not(aside):not(nav)'
+    ];
+    
+    // Conversation container for the observer (null = use polling)
+    const findConversationContainer = () => {
+        for (const selector of CONTAINER_SELECTORS) {
+            const container = document.querySelector(selector);
+            if (container && container.querySelector(MESSAGE_SELECTORS)) {
+                return container;
+            }
+        }
+        return null;
+    };
+    
     // Get conversation content (EXCLUDING our indicator!)
     const getConversationContent = () => {
         // First, temporarily hide our indicators
@@ -149,15 +233,9 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
         if (modal) modal.style.display = 'none';
         
         let text = '';
+        const started = performance.now();
         
-        const selectors = [
-            'main[class*="conversation"]',
-            'div[class*="conversation-container"]',
-            'div[class*="chat-messages"]',
-            'main:not(aside):not(nav)'
-        ];
-        
-        for (const selector of selectors) {
+        for (const selector of CONTAINER_SELECTORS) {
             const container = document.querySelector(selector);
             if (container) {
                 text = container.innerText || '';
@@ -177,6 +255,9 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
         if (miniIndicator && indicatorMinimized) miniIndicator.style.display = 'flex';
         if (modal && isShowingModal) modal.style.display = 'flex';
         
+        captureStats.captures++;
+        captureStats.charsRead += text.length;
+        captureStats.captureMs += performance.now() - started;
         return text;
     };
     
@@ -326,8 +407,15 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
             
             isShowingModal = true;
             
-            // Get existing folders from server BEFORE creating modal
+            // Get existing folders (and a suggestion from what the chat is
+            // about) from server BEFORE creating modal
             let existingFolders = [];
+            let suggested = null;
+            const suggestion = fetch(`${SERVER_URL}/api/projects/suggest-folder`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ chatName, text: getConversationContent().slice(0, SUGGEST_TEXT_CHARS) })
+            }).then(response => response.ok ? response.json() : null).catch(() => null);
             try {
                 const response = await fetch(`${SERVER_URL}/api/projects`);
                 if (response.ok) {
@@ -337,6 +425,12 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
             } catch (error) {
                 console.log('Could not fetch folders');
             }
+            const suggestionData = await suggestion;
+            if (suggestionData && suggestionData.suggestions.length > 0 &&
+                existingFolders.includes(suggestionData.suggestions[0].project)) {
+                suggested = suggestionData.suggestions[0];
+                console.log(`💡 Suggested folder: ${suggested.project} (like "${suggested.chats[0]}")`);
+            }
             
             const modal = document.createElement('div');
             modal.id = 'folder-modal';
@@ -373,6 +467,9 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
                         <p style="margin: 0; font-size: 14px;">
                             Chat: <strong>${chatName}</strong>
                         </p>
+                        ${suggested ? `<p style="margin: 8px 0 0 0; font-size: 13px; opacity: 0.9;">
+                            💡 Similar to "${suggested.chats[0]}" in <strong>${suggested.project}</strong>
+                        </p>` : ''}
                     </div>
                     
                     <div style="margin-bottom: 15px;">
@@ -390,7 +487,7 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
                         ">
                             <option value="">-- Select Folder --</option>
                             ${existingFolders.map(folder => 
-                                `<option value="${folder}">${folder}</option>`
+                                `<option value="${folder}"${suggested && folder === suggested.project ? ' selected' : ''}>${folder}</option>`
                             ).join('')}
                             ${!existingFolders.includes('General') ? '<option value="General">General</option>' : ''}
                             <option value="__new__">+ Create New Folder</option>
@@ -536,6 +633,7 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
                         <div id="token-info"></div>
                         <div id="save-stats"></div>
                         <div id="tracking-info" style="color: #a78bfa; margin-top: 4px;"></div>
+                        <div id="save-warning" style="color: #fca5a5; margin-top: 4px;"></div>
                     </div>
                 </div>
             </div>
@@ -667,6 +765,13 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
             if (trackingInfo) {
                 trackingInfo.textContent = `🔍 Tracking ${Object.keys(chatFolders).length} chats`;
             }
+            
+            const saveWarning = document.getElementById('save-warning');
+            if (saveWarning) {
+                saveWarning.textContent = stats.rejectedDeltas > 0
+                    ? `⚠️ ${stats.rejectedChars.toLocaleString()} chars NOT saved (rejected by server, see console)`
+                    : '';
+            }
         }
         
         const miniIndicator = document.getElementById('autosave-mini');
@@ -684,7 +789,7 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
             }
             
             if (miniSaves) {
-                miniSaves.textContent = `💾 ${stats.saves}`;
+                miniSaves.textContent = `💾 ${stats.saves}${stats.rejectedDeltas > 0 ? ' ⚠️ not all saved' : ''}`;
             }
         }
     };
@@ -725,57 +830,223 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
         }
     };
     
-    const saveContent = async (content, chatName, folder, isFullCapture = false) => {
-        if (!sessionActive || !content || content.length < MIN_CHANGE_SIZE) return;
+    // ============================================
+    // APPEND OUTBOX
+    // ============================================
+    // Each chat writes through its own stream (id + seq). Deltas wait in a
+    // persisted outbox and go out in batches (gzip when supported); the
+    // server acknowledges the highest seq it applied, so retries and
+    // replays after a reload never duplicate text.
+    
+    const getAppendStream = (chatName) => {
+        if (!appendStreams[chatName]) {
+            const id = `${Date.now().toString(36)}${Math.random().toString(36).substr(2, 10)}`;
+            appendStreams[chatName] = { id, seq: 0 };
+        }
+        return appendStreams[chatName];
+    };
+    
+    // Streams go in their own key so a full outbox (quota) can never roll
+    // a seq back and get new text mistaken for a replay
+    const saveOutbox = () => {
+        localStorage.setItem(STREAMS_KEY, JSON.stringify(appendStreams));
+        try {
+            localStorage.setItem(OUTBOX_KEY, JSON.stringify(outbox));
+        } catch (error) {
+            console.log(`Warning: Outbox too large for localStorage (${outbox.length} pending) - kept in memory`);
+        }
+    };
+    
+    const scheduleOutboxFlush = (delay = BATCH_DELAY) => {
+        if (outboxTimer) {
+            if (delay > 0) return;
+            clearTimeout(outboxTimer);
+        }
+        outboxTimer = setTimeout(flushOutbox, delay);
+        smartSaveTimeouts.push(outboxTimer);
+    };
+    
+    const flashSaved = () => {
+        setTimeout(() => {
+            const dot = document.getElementById('status-dot');
+            const miniDot = document.getElementById('mini-status-dot');
+            if (dot) dot.style.background = '#fbbf24';
+            if (miniDot) miniDot.style.background = '#fbbf24';
+            setTimeout(() => {
+                if (dot) dot.style.background = '#4ade80';
+                if (miniDot) miniDot.style.background = '#4ade80';
+            }, 200);
+        }, 100);
+    };
+    
+    // A delta too big for any request becomes two in its place; the
+    // stream's later seqs move up one (none of them has been sent yet)
+    const splitOutboxEntry = (entry) => {
+        let cut = Math.ceil(entry.text.length / 2);
+        const code = entry.text.charCodeAt(cut - 1);
+        if (code >= 0xD800 && code <= 0xDBFF) cut++;   // Keep surrogate pairs whole
         
-        const now = Date.now();
-        if (now - lastSaveTime < 2000 && !isFullCapture) {
-            return;
+        outbox.forEach(other => {
+            if (other.streamId === entry.streamId && other.seq > entry.seq) other.seq++;
+        });
+        const rest = Object.assign({}, entry, { seq: entry.seq + 1, text: entry.text.substring(cut) });
+        outbox.splice(outbox.indexOf(entry) + 1, 0, rest);
+        entry.text = entry.text.substring(0, cut);
+        
+        const stream = Object.values(appendStreams).find(s => s.id === entry.streamId);
+        if (stream) stream.seq++;
+        stats.splitDeltas++;
+        saveOutbox();
+    };
+    
+    // POST one batch; resolves to the server's ackedSeq (null = retry later)
+    const sendBatch = async (batch) => {
+        const { streamId, chatName, project } = batch[0];
+        const body = JSON.stringify({
+            sessionId: SESSION_ID,
+            streamId,
+            project,
+            chatName,
+            entries: batch.map(({ seq, text }) => ({ seq, text }))
+        });
+        
+        const headers = { 'Content-Type': 'application/json' };
+        let payload = body;
+        if (window.CompressionStream && body.length >= COMPRESS_MIN_SIZE) {
+            const compressed = new Blob([body]).stream().pipeThrough(new CompressionStream('gzip'));
+            payload = await new Response(compressed).blob();
+            headers['Content-Encoding'] = 'gzip';
         }
         
+        const response = await fetch(`${SERVER_URL}/api/project/append-batch`, {
+            method: 'POST',
+            headers,
+            body: payload
+        });
+        
+        if (response.ok) {
+            const result = await response.json();
+            stats.bytesSent += payload.size || payload.length;
+            return result.ackedSeq;
+        }
+        if (response.status === 413) {
+            // Over the server's size limit: send it in halves
+            if (batch.length > 1) {
+                const half = Math.ceil(batch.length / 2);
+                const ackedSeq = await sendBatch(batch.slice(0, half));
+                if (ackedSeq === null || ackedSeq < batch[half - 1].seq) return ackedSeq;
+                return sendBatch(batch.slice(half));
+            }
+            if (batch[0].text.length > 1) {
+                // One delta on its own is too big - split its text; the
+                // outbox sends the halves next
+                console.log(`📦 Splitting a ${batch[0].text.length} char delta for the server's size limit`);
+                splitOutboxEntry(batch[0]);
+                return batch[0].seq - 1;
+            }
+        }
+        if (response.status === 400) {
+            // The server will never accept this batch - drop it, but say so
+            const chars = batch.reduce((sum, entry) => sum + entry.text.length, 0);
+            console.error(`❌ Batch rejected (400), ${chars} chars of "${batch[0].chatName}" NOT saved: ${await response.text()}`);
+            stats.rejectedDeltas += batch.length;
+            stats.rejectedChars += chars;
+            await updateIndicator('Save Rejected', '#ef4444');
+            return batch[batch.length - 1].seq;
+        }
+        // Anything else (5xx, 429, ...) may pass later
+        return null;
+    };
+    
+    const flushOutbox = async () => {
+        outboxTimer = null;
+        if (outboxSending || outbox.length === 0) return;
+        outboxSending = true;
+        
         try {
-            const response = await fetch(`${SERVER_URL}/api/project/append`, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    sessionId: SESSION_ID,
-                    project: folder,
-                    newContent: content,
-                    fullContent: getConversationContent(),
-                    chatName: chatName,
-                    timestamp: new Date().toISOString()
-                })
-            });
-            
-            if (response.ok) {
-                lastSaveTime = now;
-                stats.saves++;
+            while (outbox.length > 0) {
+                // Oldest stream first; a batch is a run of its entries for one folder
+                const first = outbox[0];
+                const batch = [];
+                let chars = 0;
+                for (const entry of outbox) {
+                    if (entry.streamId !== first.streamId) continue;
+                    if (entry.project !== first.project) break;
+                    if (batch.length >= MAX_BATCH_ENTRIES || (batch.length > 0 && chars + entry.text.length > MAX_BATCH_CHARS)) break;
+                    batch.push(entry);
+                    chars += entry.text.length;
+                }
                 
-                // Don't calculate from current content - let updateIndicator fetch real stats
-                console.log(`✅ ${isFullCapture ? 'Full capture' : 'Incremental'}: ${content.length} chars`);
-                console.log(`   Chat: "${chatName}" → ${folder}/`);
+                const splitsBefore = stats.splitDeltas;
+                const ackedSeq = await sendBatch(batch);
+                if (ackedSeq === null) {
+                    await updateIndicator('Connection Error', '#f59e0b');
+                    scheduleOutboxFlush(RETRY_DELAY);
+                    return;
+                }
+                if (stats.splitDeltas !== splitsBefore) continue;   // Send the halves first
                 
-                // Update indicator will fetch real stats from server
-                await updateIndicator('Auto-Save Active', '#4ade80');
+                outbox = outbox.filter(entry => entry.streamId !== first.streamId || entry.seq > ackedSeq);
+                saveOutbox();
+                lastSaveTime = Date.now();
+                stats.saves++;
                 
-                // Flash
-                setTimeout(() => {
-                    const dot = document.getElementById('status-dot');
-                    const miniDot = document.getElementById('mini-status-dot');
-                    if (dot) dot.style.background = '#fbbf24';
-                    if (miniDot) miniDot.style.background = '#fbbf24';
-                    setTimeout(() => {
-                        if (dot) dot.style.background = '#4ade80';
-                        if (miniDot) miniDot.style.background = '#4ade80';
-                    }, 200);
-                }, 100);
+                const fullCapture = batch.some(entry => entry.isFullCapture);
+                console.log(`✅ ${fullCapture ? 'Full capture' : 'Incremental'}: ${chars} chars in ${batch.length} deltas`);
+                console.log(`   Chat: "${first.chatName}" → ${first.project}/`);
             }
+            
+            // Update indicator will fetch real stats from server
+            await updateIndicator('Auto-Save Active', '#4ade80');
+            flashSaved();
         } catch (error) {
             console.error('Save error:', error);
             await updateIndicator('Connection Error', '#f59e0b');
+            scheduleOutboxFlush(RETRY_DELAY);
+        } finally {
+            outboxSending = false;
+        }
+    };
+    
+    // Drop replayed entries the server already has (after a reload)
+    const resyncOutbox = async () => {
+        const streamIds = Array.from(new Set(outbox.map(entry => entry.streamId)));
+        for (const streamId of streamIds) {
+            try {
+                const response = await fetch(`${SERVER_URL}/api/project/append-batch/${streamId}`);
+                if (!response.ok) continue;
+                const { ackedSeq } = await response.json();
+                outbox = outbox.filter(entry => entry.streamId !== streamId || entry.seq > ackedSeq);
+            } catch (error) {
+                // Server unreachable - the batch endpoint skips duplicates anyway
+            }
+        }
+        saveOutbox();
+        if (outbox.length > 0) {
+            console.log(`📤 Replaying ${outbox.length} unsent deltas`);
+            scheduleOutboxFlush(0);
         }
     };
     
+    // Queue a delta for the chat's stream; full captures go out right away
+    const saveContent = async (content, chatName, folder, isFullCapture = false) => {
+        if (!sessionActive || !content || content.length < MIN_CHANGE_SIZE) return false;
+        
+        const stream = getAppendStream(chatName);
+        stream.seq++;
+        outbox.push({
+            streamId: stream.id,
+            seq: stream.seq,
+            chatName,
+            project: folder,
+            text: content,
+            isFullCapture
+        });
+        saveOutbox();
+        scheduleOutboxFlush(isFullCapture ? 0 : BATCH_DELAY);
+        return true;
+    };
+    
     // Monitor for changes
     const monitorContent = async () => {
         // Skip monitoring if modal is showing to prevent interference
@@ -801,8 +1072,9 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
             
             console.log(`💬 Switched to: "${chatName}"`);
             
-            // Save fingerprint of previous chat before switching
-            if (currentChatName && lastSeenContent) {
+            // Save fingerprint of previous chat before switching (the
+            // observer keeps chatLastContent current itself)
+            if (currentChatName && lastSeenContent && captureMode === 'polling') {
                 updateFingerprint(lastSeenContent, currentChatName);
             }
             
@@ -867,6 +1139,203 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
         await updateIndicator('Auto-Save Active', '#4ade80');
     };
     
+    // ============================================
+    // OBSERVER CAPTURE
+    // ============================================
+    // Marks message nodes dirty as Claude renders them, waits for
+    // streaming to go quiet, then reads innerText from just those
+    // nodes. Chat switches still go through monitorContent().
+    
+    // Selectors nest (a [data-is-streaming] wrapper holds the
+    // .font-claude-message), so a message is always its outermost match -
+    // otherwise the same text is read and saved once per level
+    const enclosingMessage = (node) => {
+        const parent = node.parentElement;
+        const outer = parent && parent.closest(MESSAGE_SELECTORS);
+        return outer && observedContainer.contains(outer) ? outer : null;
+    };
+    
+    const outermostMessage = (node) => {
+        let message = node;
+        let outer;
+        while ((outer = enclosingMessage(message))) message = outer;
+        return message;
+    };
+    
+    const topLevelMessages = (root) => Array.from(root.querySelectorAll(MESSAGE_SELECTORS))
+        .filter(node => !enclosingMessage(node));
+    
+    // The message node a mutation belongs to (null for our own UI)
+    const getMessageNode = (node) => {
+        const element = node.nodeType === Node.ELEMENT_NODE ? node : node.parentElement;
+        if (!element || !observedContainer || element.closest(OWN_ELEMENTS)) return null;
+        
+        const message = element.closest(MESSAGE_SELECTORS);
+        if (message && observedContainer.contains(message)) return outermostMessage(message);
+        
+        // Newly added subtree that contains whole messages
+        if (element.querySelectorAll) {
+            const inner = topLevelMessages(element);
+            if (inner.length > 0) return inner;
+        }
+        return null;
+    };
+    
+    const markDirty = (node) => {
+        const message = getMessageNode(node);
+        if (!message) return;
+        (Array.isArray(message) ? message : [message]).forEach(m => dirtyNodes.add(m));
+        if (!firstDirtyAt) firstDirtyAt = Date.now();
+    };
+    
+    const scheduleFlush = () => {
+        if (flushTimer) clearTimeout(flushTimer);
+        flushTimer = setTimeout(flushObserved, STREAM_DEBOUNCE);
+    };
+    
+    const onMutations = (mutations) => {
+        captureStats.mutations += mutations.length;
+        mutations.forEach(mutation => {
+            if (mutation.type === 'characterData') {
+                markDirty(mutation.target);
+            } else {
+                markDirty(mutation.target);
+                mutation.addedNodes.forEach(markDirty);
+            }
+        });
+        if (dirtyNodes.size > 0) scheduleFlush();
+    };
+    
+    // Read the dirty nodes and save what they gained
+    const flushObserved = async () => {
+        flushTimer = null;
+        if (isShowingModal || !currentChatName || !currentFolder || !sessionActive) {
+            if (dirtyNodes.size > 0) scheduleFlush();
+            return;
+        }
+        
+        // Keep waiting while a response streams, up to MAX_STREAM_WAIT
+        const streaming = observedContainer && observedContainer.querySelector('[data-is-streaming="true"]');
+        if (streaming && Date.now() - firstDirtyAt < MAX_STREAM_WAIT) {
+            scheduleFlush();
+            return;
+        }
+        
+        const nodes = Array.from(dirtyNodes)
+            .filter(node => node.isConnected)
+            .sort((a, b) => a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING ? -1 : 1);
+        dirtyNodes.clear();
+        firstDirtyAt = 0;
+        
+        const started = performance.now();
+        const parts = [];
+        let lastText = '';
+        nodes.forEach(node => {
+            const text = node.innerText || '';
+            const saved = nodeTextCache.get(node) || '';
+            captureStats.charsRead += text.length;
+            if (text === saved) return;
+            // Streaming only ever extends a message; anything else is a
+            // re-render or edit, so save the whole message again
+            parts.push(text.startsWith(saved) ? text.substring(saved.length) : text);
+            nodeTextCache.set(node, text);
+            lastText = text;
+        });
+        captureStats.captures++;
+        captureStats.captureMs += performance.now() - started;
+        
+        if (parts.length > 0) {
+            pendingDelta += (pendingDelta ? '\n\n' : '') + parts.join('\n\n');
+            // Lets getContentToSave find our place after a chat switch
+            chatLastContent[currentChatName] = lastText.slice(-1000);
+        }
+        
+        if (pendingDelta.length >= MIN_CHANGE_SIZE) {
+            const saved = await saveContent(pendingDelta, currentChatName, currentFolder, false);
+            if (saved) {
+                pendingDelta = '';
+                saveData();
+            } else {
+                scheduleFlush();  // Session not active yet - retry with what we have
+            }
+        }
+    };
+    
+    // Observe the current conversation; existing messages count as saved
+    const attachObserver = () => {
+        if (conversationObserver) conversationObserver.disconnect();
+        conversationObserver = null;
+        dirtyNodes.clear();
+        nodeTextCache = new WeakMap();
+        pendingDelta = '';
+        
+        observedContainer = findConversationContainer();
+        if (!observedContainer) return false;
+        
+        topLevelMessages(observedContainer).forEach(node => {
+            nodeTextCache.set(node, node.innerText || '');
+        });
+        
+        conversationObserver = new MutationObserver(onMutations);
+        conversationObserver.observe(observedContainer, {
+            childList: true,
+            subtree: true,
+            characterData: true
+        });
+        smartSaveObservers.push(conversationObserver);
+        return true;
+    };
+    
+    // Observer mode tick: chat switches and a detached container only
+    const checkObservedChat = async () => {
+        if (isShowingModal) return;
+        
+        if (!document.getElementById('autosave-indicator') && !document.getElementById('autosave-mini')) {
+            createIndicator();
+            await updateIndicator('Auto-Save Active', '#4ade80');
+        }
+        
+        const chatName = getChatName();
+        const chatChanged = chatName && chatName !== currentChatName;
+        if (!chatChanged && observedContainer && observedContainer.isConnected) return;
+        
+        if (pendingDelta && currentChatName && currentFolder) {
+            await saveContent(pendingDelta, currentChatName, currentFolder, true);
+        }
+        // Switches keep the fingerprint/continuation logic; a re-rendered
+        // container only needs observing again (retried each tick until found)
+        if (chatChanged) await monitorContent();
+        attachObserver();
+    };
+    
+    const stopCapture = () => {
+        captureTimers.forEach(id => clearInterval(id));
+        captureTimers = [];
+        if (flushTimer) clearTimeout(flushTimer);
+        flushTimer = null;
+        if (conversationObserver) conversationObserver.disconnect();
+        conversationObserver = null;
+        observedContainer = null;
+    };
+    
+    const startCapture = () => {
+        stopCapture();
+        captureStats.mode = captureMode;
+        
+        let tick = monitorContent;
+        if (captureMode === 'observer' && window.MutationObserver) {
+            attachObserver();
+            tick = checkObservedChat;
+            console.log('👁️ Capture mode: observer');
+        } else {
+            console.log('⏱️ Capture mode: polling');
+        }
+        
+        const id = setInterval(tick, captureMode === 'observer' ? TITLE_CHECK_INTERVAL : UPDATE_INTERVAL);
+        captureTimers.push(id);
+        smartSaveIntervals.push(id);  // Track our interval
+    };
+    
     // Initialize
     const initializeRealTimeSave = async () => {
         console.log('🚀 Initializing Claude Auto-Save V9.3.0 Ultimate...');
@@ -903,6 +1372,7 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
         }
         
         await startSession();
+        await resyncOutbox();
         
         // Initial capture if needed
         const initialContent = getConversationContent();
@@ -918,8 +1388,7 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
         lastSeenContent = initialContent;
         
         // Start monitoring
-        const monitorIntervalId = setInterval(monitorContent, UPDATE_INTERVAL);
-        smartSaveIntervals.push(monitorIntervalId);  // Track our interval
+        startCapture();
         
         // Keep visible
         document.addEventListener('visibilitychange', () => {
@@ -962,6 +1431,8 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
         console.log('   • Words:', stats.words.toLocaleString());
         console.log('   • Messages:', stats.messages);
         console.log('   • Saves:', stats.saves);
+        console.log('   • Sent:', `${(stats.bytesSent / 1024).toFixed(1)} KB`);
+        console.log('   • Unsent deltas:', outbox.length);
         console.log('   • Chats tracked:', Object.keys(chatFolders).length);
         console.log('   • Duplicates prevented:', stats.duplicatesPrevented);
         console.log('');
@@ -987,6 +1458,32 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
         }
     };
     
+    // Switch capture mode: setCaptureMode('observer') or setCaptureMode('polling')
+    window.setCaptureMode = (mode) => {
+        if (mode !== 'observer' && mode !== 'polling') {
+            console.log('Usage: setCaptureMode("observer") or setCaptureMode("polling")');
+            return;
+        }
+        captureMode = mode;
+        localStorage.setItem(CAPTURE_MODE_KEY, mode);
+        Object.assign(captureStats, { captures: 0, charsRead: 0, captureMs: 0, mutations: 0 });
+        
+        // Polling diffs against the full page, so give it a fresh baseline
+        if (mode === 'polling') lastSeenContent = getConversationContent();
+        startCapture();
+        console.log(`✅ Capture mode set to ${mode}`);
+    };
+    
+    // Cost of the current capture mode so far
+    window.captureStats = () => {
+        const perCapture = captureStats.captures ? captureStats.captureMs / captureStats.captures : 0;
+        console.log(`📈 ${captureStats.mode}: ${captureStats.captures} reads, ` +
+            `${captureStats.charsRead.toLocaleString()} chars read, ` +
+            `${captureStats.captureMs.toFixed(1)}ms total (${perCapture.toFixed(2)}ms/read), ` +
+            `${captureStats.mutations} mutations`);
+        return Object.assign({}, captureStats);
+    };
+    
     window.resetMappings = () => {
         localStorage.removeItem('chat_folders_v7');
         localStorage.removeItem('chat_fingerprints_v7');
@@ -998,6 +1495,7 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
     window.stopSave = () => {
         console.log('🛑 Stopping auto-save...');
         sessionActive = false;
+        stopCapture();
         for(let i = 1; i < 99999; i++) clearInterval(i);
         const indicator = document.getElementById('autosave-indicator');
         const miniIndicator = document.getElementById('autosave-mini');
@@ -1026,6 +1524,8 @@ console.log('🧹 Starting fresh with V10.0.3 stable system');
     console.log('   checkSave()     - View stats & mappings');
     console.log('   changeFolder()  - Change current chat folder');
     console.log('   resetMappings() - Clear all mappings');
+    console.log('   setCaptureMode("observer" | "polling") - Switch capture mode');
+    console.log('   captureStats()  - Compare capture cost');
     console.log('   stopSave()      - Stop saving');
     console.log('─────────────────────────────────────────────────');
 })();
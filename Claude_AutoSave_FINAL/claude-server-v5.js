@@ -10,6 +10,7 @@ const express = require('express');
 const cors = require('cors');
 const bodyParser = require('body-parser');
 const fs = require('fs');
+const os = require('os');
 const path = require('path');
 const { execSync } = require('child_process');
 
@@ -17,7 +18,24 @@ const { execSync } = require('child_process');
 const VERSION = require('./version-detector.js');
 
 // Dynamic path finding - PORTABLE VERSION
-const { findClaudeConversationsPath, ensureDirectories, getPathInfo } = require('./path-finder-portable.js');
+const { findClaudeConversationsPath, ensureDirectories } = require('./path-finder-portable.js');
+
+// Persistent per-file metadata (words, chars, bytes, lines, mtime)
+const { MetadataIndex } = require('./metadata-index.js');
+const { ContentAnalytics } = require('./content-analytics.js');
+const { SearchIndex } = require('./search-index.js');
+const { AppendSequencer } = require('./append-sequencer.js');
+const { ChatSegments, groupSegments, parseSegmentName, segmentFileName, DEFAULT_SEGMENT_BYTES } = require('./chat-segments.js');
+const { EventStream } = require('./event-stream.js');
+const { BlockDedup } = require('./block-dedup.js');
+const { ColdStorage } = require('./cold-storage.js');
+const { Metrics } = require('./metrics.js');
+const { WarmUp } = require('./warm-up.js');
+const { WriteQueue } = require('./write-queue.js');
+const { AppendLog } = require('./append-log.js');
+const { FollowerRegistry, ReplicaFollower } = require('./replication.js');
+const { RelatedIndex } = require('./related-index.js');
+const { ChatReader } = require('./chat-reader.js');
 
 // Load configuration
 const configPath = path.join(__dirname, 'config.json');
@@ -30,19 +48,33 @@ console.log = function(...args) {
     originalLog(`[${timestamp}]`, ...args);
 };
 
-// Create fs-extra compatible functions
-const ensureDirSync = (dir) => {
-    if (!fs.existsSync(dir)) {
-        fs.mkdirSync(dir, { recursive: true });
-    }
-};
+// ============================================
+// I/O LAYER - fs.promises with bounded concurrency
+// ============================================
+// SMART_SAVE_IO_MODE=sync switches every route back to
+// fs.*Sync (and inline tree walks) for benchmarking.
+const { createIo } = require('./async-io.js');
+const { WorkerPool } = require('./worker-pool.js');
+const { walkProjects } = require('./scan-worker.js');
+
+// Route latency, fs call timings, cache hits, event-loop lag (/api/metrics).
+// metrics.slowRequestMs in config.json turns on the slow-request log
+const metricsConfig = config.metrics || {};
+const metrics = new Metrics({ slowRequestMs: metricsConfig.slowRequestMs || 0 });
 
-const writeFileSync = fs.writeFileSync;
-const readFileSync = fs.readFileSync;
-const readdirSync = fs.readdirSync;
-const existsSync = fs.existsSync;
-const statSync = fs.statSync;
-const appendFileSync = fs.appendFileSync;
+const ioConfig = config.io || {};
+const IO_MODE = process.env.SMART_SAVE_IO_MODE || ioConfig.mode || 'async';
+const io = metrics.instrumentIo(createIo({ mode: IO_MODE, concurrency: ioConfig.concurrency || 16 }));
+
+// Whole-tree walks (stats, size checks, project listing) run in worker
+// threads so the append path is never queued behind a directory walk
+const scanPool = IO_MODE === 'async'
+    ? new WorkerPool(path.join(__dirname, 'scan-worker.js'), { size: ioConfig.workers || 2, name: 'scan' })
+    : null;
+
+const scanProjectsTree = (projectsDir) => scanPool
+    ? scanPool.run({ type: 'walk', projectsDir })
+    : Promise.resolve(walkProjects(projectsDir));
 
 
 // ============================================
@@ -50,161 +82,431 @@ const appendFileSync = fs.appendFileSync;
 // ============================================
 const { spawn } = require('child_process');
 
-// Extract and store memories automatically
-async function extractMemories(content, chatName, project) {
-    try {
-        // Skip if content too short
-        if (!content || content.length < 100) return;
-        
-        const memories = [];
-        
-        // Extract project as entity
-        if (project && project !== 'General') {
-            memories.push({
-                type: 'entity',
-                name: project.replace(/ /g, '_'),
-                entityType: 'Project',
-                observations: [
-                    `Active project with chat: ${chatName}`,
-                    `Updated: ${new Date().toLocaleDateString()}`
-                ]
-            });
-        }
-        
-        // Extract mentioned files
-        const filePattern = /(?:file|script|code):\s*([\w\-\.]+)/gi;
-        let match;
-        while ((match = filePattern.exec(content)) !== null) {
-            memories.push({
-                type: 'entity',
-                name: match[1].replace(/\./g, '_'),
-                entityType: 'File',
-                observations: [`Referenced in ${chatName}`]
-            });
-        }
-        
-        // Extract decisions made
-        const decisionPattern = /(?:decided?|agreed?|chose|will)\s+(?:to\s+)?([^\n\.]+)/gi;
-        const decisions = [];
-        while ((match = decisionPattern.exec(content)) !== null) {
-            const decision = match[1].trim();
-            if (decision.length > 10 && decision.length < 200) {
-                decisions.push(decision);
-            }
-        }
-        
-        if (decisions.length > 0) {
-            memories.push({
-                type: 'entity',
-                name: 'Decisions_Log',
-                entityType: 'Knowledge',
-                observations: decisions.slice(0, 5).map(d => `${chatName}: ${d}`)
-            });
-        }
-        
-        // Extract problems and solutions
-        const problemPattern = /(?:problem|issue|bug|error):\s*([^\n]+)/gi;
-        const solutionPattern = /(?:solution|fixed|resolved):\s*([^\n]+)/gi;
-        
-        const problems = [];
-        const solutions = [];
-        
-        while ((match = problemPattern.exec(content)) !== null) {
-            problems.push(match[1].substring(0, 150));
-        }
-        
-        while ((match = solutionPattern.exec(content)) !== null) {
-            solutions.push(match[1].substring(0, 150));
-        }
-        
-        if (problems.length > 0) {
-            memories.push({
-                type: 'entity',
-                name: 'Problem_Log',
-                entityType: 'Knowledge',
-                observations: problems.slice(0, 3)
-            });
-        }
-        
-        if (solutions.length > 0) {
-            memories.push({
-                type: 'entity',
-                name: 'Solution_Log',
-                entityType: 'Knowledge',
-                observations: solutions.slice(0, 3)
-            });
-        }
-        
-        // Store in a queue file for processing
-        if (memories.length > 0) {
-            const queueFile = path.join(__dirname, '.memory-queue.jsonl');
-            const entry = {
-                timestamp: new Date().toISOString(),
-                chatName,
-                project,
-                memories,
-                contentLength: content.length
-            };
-            fs.appendFileSync(queueFile, JSON.stringify(entry) + '\n');
-            console.log(`🧠 Queued ${memories.length} memories for extraction`);
-        }
-        
-    } catch (error) {
-        console.error('Memory extraction error:', error);
-    }
-}
+// Appended deltas (metadata index 'append' events) are extracted in a
+// worker pool by the single-pass scanner in memory-extractor.js; results
+// go to the durable memory queue below. The append path only ever enqueues.
+const { ExtractionQueue } = require('./extraction-queue.js');
+const { extract, toMemories } = require('./memory-extractor.js');
+const { MemoryQueue, createLogSink, createMemoryFileSink } = require('./memory-queue.js');
 
-// Process memory queue periodically
-setInterval(() => {
-    const queueFile = path.join(__dirname, '.memory-queue.jsonl');
-    if (!fs.existsSync(queueFile)) return;
-    
-    try {
-        const lines = fs.readFileSync(queueFile, 'utf8').split('\n').filter(l => l);
-        if (lines.length === 0) return;
-        
-        console.log(`🧠 Processing ${lines.length} memory queue entries...`);
-        
-        // Process entries (this would call the memory MCP server)
-        // For now, just log and clear
-        lines.forEach(line => {
-            const entry = JSON.parse(line);
-            console.log(`  📦 ${entry.memories.length} memories from "${entry.chatName}"`);
+const memoryConfig = config.memory || {};
+const extractPool = IO_MODE === 'async'
+    ? new WorkerPool(path.join(__dirname, 'extract-worker.js'), { size: memoryConfig.workers || 1, name: 'extract' })
+    : null;
+
+// Segmented log + saved consumer offset; batches reach the sink at least once.
+// sink: 'store' merges into the memory MCP server's extracted-memories.json
+// (in a single worker that keeps the file parsed), 'log' only prints what
+// would be stored
+const memoryPool = IO_MODE === 'async' && memoryConfig.sink !== 'log'
+    ? new WorkerPool(path.join(__dirname, 'extract-worker.js'), { size: 1, name: 'memory' })
+    : null;
+const memoryQueue = new MemoryQueue({
+    dir: path.join(__dirname, '.memory-queue'),
+    legacyFile: path.join(__dirname, '.memory-queue.jsonl'),
+    io,
+    sink: memoryConfig.sink === 'log' ? createLogSink() : createMemoryFileSink(memoryConfig.storePath, { pool: memoryPool }),
+    segmentBytes: memoryConfig.queueSegmentBytes,
+    batchSize: memoryConfig.queueBatchSize,
+    highWaterBytes: memoryConfig.queueHighWaterBytes
+});
+
+const extractionQueue = new ExtractionQueue({
+    run: extractPool
+        ? (payload) => extractPool.run(payload)
+        : async (payload) => toMemories(extract(payload.text), payload),
+    concurrency: extractPool ? extractPool.size : 1,
+    maxPendingBytes: memoryConfig.maxPendingBytes,
+    chunkBytes: memoryConfig.chunkBytes,
+    onResult: async ({ chatName, project, text }, memories) => {
+        if (memories.length === 0) return;
+        await memoryQueue.append({
+            timestamp: new Date().toISOString(),
+            chatName,
+            project,
+            memories,
+            contentLength: text.length
         });
-        
-        // Clear queue after processing
-        fs.unlinkSync(queueFile);
-        
-    } catch (error) {
-        console.error('Queue processing error:', error);
+        console.log(`🧠 Queued ${memories.length} memories for extraction`);
     }
-}, 60000); // Every minute
+});
 
 // ============================================
 
 const app = express();
-const PORT = 3737;
+// server.port (or SMART_SAVE_PORT) lets a standby run next to the primary
+const serverConfig = config.server || {};
+const PORT = Number(process.env.SMART_SAVE_PORT) || serverConfig.port || 3737;
 
-// Middleware
+// Only config, the base path and listen are on the critical path; saved
+// indexes, the memory queue and the first tree walk load after listen
+const warmUp = new WarmUp();
+
+// Middleware - appends carry deltas only (gzip/deflate bodies are inflated
+// by body-parser), so the old 50mb full-conversation limit is gone
+const appendConfig = config.append || {};
+const BODY_LIMIT = appendConfig.bodyLimit || '10mb';
+app.use(metrics.middleware());
 app.use(cors());
-app.use(bodyParser.json({ limit: '50mb' }));
-app.use(bodyParser.urlencoded({ limit: '50mb', extended: true }));
+app.use(bodyParser.json({ limit: BODY_LIMIT }));
+app.use(bodyParser.urlencoded({ limit: BODY_LIMIT, extended: true }));
 
-// Base directory for conversations - dynamically detected
+// Base directory for conversations - dynamically detected (once)
 const BASE_DIR = findClaudeConversationsPath(__dirname);
-
-// Show path information on startup  
-const pathInfo = getPathInfo();
-console.log(`[PATHS] Claude_Conversations: ${pathInfo.basePath}`);
-console.log(`[PATHS] Projects found: ${pathInfo.projectCount} projects`);
-if (pathInfo.projectCount > 0) {
-    console.log(`[PATHS] Project folders: ${pathInfo.projects.join(', ')}`);
-}
-console.log(`[PATHS] Storage type: ${pathInfo.isCloudStorage ? 'Cloud Storage' : 'Local'}`);
-console.log(`[PATHS] Portable: ${pathInfo.isPortable ? 'Yes' : 'No'}`);
+console.log(`[PATHS] Claude_Conversations: ${BASE_DIR}`);
 
 // Ensure directories exist
-ensureDirectories();
+ensureDirectories(BASE_DIR);
+
+// Every accepted change is logged (with a seq) before it reaches a chat
+// file. replication.role: 'standby' follows replication.primary's log
+// instead of taking saves; standbys answer stats/search from their own tree
+const replicationConfig = config.replication || {};
+let replicationRole = replicationConfig.role === 'standby' ? 'standby' : 'primary';
+const appendLog = new AppendLog({
+    dir: path.join(__dirname, '.append-log'),
+    io,
+    segmentBytes: replicationConfig.logSegmentBytes,
+    retainBytes: replicationConfig.logRetainBytes
+});
+const followers = new FollowerRegistry();
+let replicaFollower = null;
+
+// Chats idle for archive.idleDays move into compressed per-project packs.
+// chatIo lists and reads them as plain files (everything that touches chat
+// files uses it); writing to one restores the chat first
+const archiveConfig = config.archive || {};
+const coldStorage = new ColdStorage({
+    projectsDir: path.join(BASE_DIR, 'Projects'),
+    io,
+    idleDays: archiveConfig.idleDays,
+    packBytes: archiveConfig.packBytes
+});
+const chatIo = coldStorage.wrapIo(io);
+
+// Metadata index - endpoints answer from it and only reread files
+// whose mtime no longer matches (loaded during warm-up)
+const metadataIndex = new MetadataIndex({
+    projectsDir: path.join(BASE_DIR, 'Projects'),
+    indexPath: path.join(__dirname, '.metadata-index.json'),
+    io: chatIo
+});
+
+// Memory extraction sees only what was appended (on the primary - a
+// standby would store the same memories a second time)
+metadataIndex.on('append', (project, file, text) => {
+    if (replicationRole === 'standby') return;
+    extractionQueue.push(project, parseSegmentName(file).chat, text);
+});
+
+// Dashboard analytics follow the index as running counters
+const contentAnalytics = new ContentAnalytics({
+    analyticsPath: path.join(__dirname, '.content-analytics.json')
+}).attach(metadataIndex);
+
+// Full-text search index, also kept current from appends. One index
+// worker writes its saves, so they land in order and off the event loop
+const indexPool = IO_MODE === 'async'
+    ? new WorkerPool(path.join(__dirname, 'index-worker.js'), { size: 1, name: 'index' })
+    : null;
+const searchIndex = new SearchIndex({
+    projectsDir: path.join(BASE_DIR, 'Projects'),
+    indexDir: path.join(__dirname, '.search-index'),
+    io: chatIo,
+    pool: indexPool
+}).attach(metadataIndex);
+
+// Related chats and folder suggestions (MinHash signatures in LSH
+// buckets), kept current from appends like the search index
+const relatedIndex = new RelatedIndex({
+    indexPath: path.join(__dirname, '.related-index.json')
+}).attach(metadataIndex);
+// Chats roll over to numbered segment files at the size limit
+const storageConfig = config.storage || {};
+const chatSegments = new ChatSegments({
+    projectsDir: path.join(BASE_DIR, 'Projects'),
+    io: chatIo,
+    segmentBytes: storageConfig.segmentBytes || DEFAULT_SEGMENT_BYTES,
+    metadataIndex
+});
+
+// Chat content for the read API and send-to-claude excerpts, streamed
+// from disk a chunk at a time
+const readConfig = config.read || {};
+const chatReader = new ChatReader({
+    projectsDir: path.join(BASE_DIR, 'Projects'),
+    chatSegments,
+    io: chatIo,
+    chunkBytes: readConfig.chunkBytes
+});
+const DEFAULT_EXCERPT_TOKENS = readConfig.excerptTokens || 8000;
+const MAX_EXCERPT_TOKENS = 200000;
+
+// Re-sent blocks (full captures after a reload or chat switch) are dropped
+// before they reach the chat file; config.dedup.enabled: false turns it off
+const dedupConfig = config.dedup || {};
+const blockDedup = dedupConfig.enabled === false ? null : new BlockDedup({
+    projectsDir: path.join(BASE_DIR, 'Projects'),
+    chatSegments,
+    io: chatIo,
+    minBlockChars: dedupConfig.minBlockChars,
+    minRunChars: dedupConfig.minRunChars,
+    minRunBlocks: dedupConfig.minRunBlocks,
+    maxChats: dedupConfig.maxChats
+}).attach(metadataIndex);
+
+// Highest applied seq per browser append stream (idempotent batches)
+const appendSequencer = new AppendSequencer({
+    statePath: path.join(__dirname, '.append-sequences.json')
+});
+const MAX_BATCH_ENTRIES = appendConfig.maxBatchEntries || 500;
+
+const DEFAULT_SEARCH_LIMIT = 20;
+const MAX_SEARCH_LIMIT = 100;
+const SEARCH_RECONCILE_INTERVAL = 30 * 1000; // Check disk for outside edits every 30s
+let lastSearchReconcile = 0;
+
+const DEFAULT_RELATED_LIMIT = 10;
+const MAX_RELATED_LIMIT = 50;
+const DEFAULT_FOLDER_SUGGESTIONS = 3;
+const MAX_SUGGEST_TEXT = 200000;       // Chars of a new chat's page used for its suggestion
+
+// Project folders from the last tree walk (includes empty ones)
+const knownProjects = new Set();
+
+// Walk the tree (worker pool), reread only changed files, then bring the
+// analytics and search indexes up to date - each stale file is read once
+const reconcileIndexes = async () => {
+    // Archived chats are listed with their original size and mtime
+    const listing = coldStorage.mergeListing(
+        await metrics.span('scan', () => scanProjectsTree(path.join(BASE_DIR, 'Projects'))));
+    const projectNames = await metadataIndex.applyListing(listing);
+    knownProjects.clear();
+    projectNames.forEach(project => knownProjects.add(project));
+    
+    const stale = [];
+    projectNames.forEach(project => {
+        Object.entries(metadataIndex.getProjectFiles(project)).forEach(([file, meta]) => {
+            const analytics = contentAnalytics.needsRebuild(project, file, meta);
+            const search = searchIndex.needsRebuild(project, file, meta);
+            const related = relatedIndex.needsRebuild(project, file, meta);
+            if (analytics || search || related) stale.push({ project, file, meta, analytics, search, related });
+        });
+    });
+    
+    await Promise.all(stale.map(async ({ project, file, meta, analytics, search, related }) => {
+        try {
+            const content = await chatIo.readFile(path.join(BASE_DIR, 'Projects', project, file));
+            if (analytics) contentAnalytics.rebuildFile(project, file, content, meta.mtimeMs);
+            if (search) searchIndex.indexFile(project, file, content);
+            if (related) relatedIndex.rebuildFile(project, file, content);
+        } catch (readError) {
+            console.log(`Warning: Could not read file ${project}/${file}`);
+        }
+    }));
+    
+    return { listing, projectNames };
+};
+
+// Memory counters as the dashboard shows them
+const memoryTotals = (totalFiles) => ({
+    memoryCount: contentAnalytics.totals.memories,
+    // Deduplicate people count (rough estimate)
+    peopleCount: Math.max(1, Math.floor(contentAnalytics.totals.people / Math.max(1, totalFiles))),
+    bugsCount: contentAnalytics.totals.bugs,
+    solutionsCount: contentAnalytics.totals.solutions
+});
+
+const projectSummary = (name) => {
+    const rollup = metadataIndex.getProject(name);
+    return {
+        name,
+        words: rollup.words,
+        chats: Object.keys(groupSegments(metadataIndex.getProjectFiles(name))).length,
+        files: rollup.files
+    };
+};
+
+const totalIndexedFiles = () => Object.keys(metadataIndex.projects)
+    .reduce((total, name) => total + metadataIndex.getProject(name).files, 0);
+
+// ============================================
+// LIVE EVENTS - /api/events (Server-Sent Events)
+// ============================================
+// Everything here comes from in-process state; the first connection
+// waits for one tree walk so the snapshot isn't empty after a restart
+let firstReconcile = null;
+const events = new EventStream({
+    snapshot: async () => {
+        if (!firstReconcile) firstReconcile = reconcileIndexes();
+        await firstReconcile.catch(() => {});
+        const names = new Set([...knownProjects, ...Object.keys(metadataIndex.projects)]);
+        return {
+            projects: [...names].map(projectSummary),
+            totals: memoryTotals(totalIndexedFiles()),
+            sessions: [...sessions.entries()].map(([sessionId, session]) => ({ sessionId, ...session })),
+            activeSessions: sessions.size,
+            metrics: metricsSummary()
+        };
+    }
+});
+
+// The few numbers the dashboard's performance panel shows
+const metricsSummary = () => {
+    const summary = metrics.toJSON();
+    const appendRoute = summary.routes['POST /api/project/append-batch'] || summary.routes['POST /api/project/append'];
+    const chatFilesCache = summary.caches.chatFiles;
+    return {
+        appendP95Ms: appendRoute ? appendRoute.p95Ms : null,
+        bytesPerSecond: summary.append.bytesPerSecond,
+        loopLagP99Ms: summary.eventLoop.lagP99Ms,
+        heapUsedBytes: summary.memory.heapUsedBytes,
+        chatFilesHitRate: chatFilesCache ? chatFilesCache.hitRate : null
+    };
+};
+const METRICS_EVENT_INTERVAL = 10 * 1000;
+setInterval(() => {
+    if (events.clients.size > 0) events.publish('metrics', metricsSummary());
+}, METRICS_EVENT_INTERVAL).unref();
+
+// Counter changes are coalesced per project (an append burst is one event)
+const PROJECT_EVENT_DELAY = 250;
+const changedProjects = new Set();
+let projectEventTimer = null;
+const projectChanged = (project) => {
+    changedProjects.add(project);
+    if (projectEventTimer) return;
+    projectEventTimer = setTimeout(() => {
+        projectEventTimer = null;
+        changedProjects.forEach(name => {
+            const known = metadataIndex.projects[name] || knownProjects.has(name);
+            events.publish('project', known ? projectSummary(name) : { name, removed: true });
+        });
+        changedProjects.clear();
+        events.publish('totals', memoryTotals(totalIndexedFiles()));
+    }, PROJECT_EVENT_DELAY);
+};
+
+metadataIndex.on('append', (project, file, text) => {
+    events.publish('append', {
+        project,
+        file,
+        chat: parseSegmentName(file).chat,
+        chars: text.length,
+        time: new Date().toISOString()
+    });
+    projectChanged(project);
+});
+metadataIndex.on('rescan', (project) => projectChanged(project));
+metadataIndex.on('remove', (project) => projectChanged(project));
+
+const publishSession = (event, sessionId, session) => {
+    events.publish('session', {
+        event,
+        sessionId,
+        project: session.project,
+        chatName: session.chatName,
+        activeSessions: sessions.size
+    });
+};
+
+// One append at a time per chat file, so the index sees appends in order
+const chatWriteChains = new Map();
+const withChatFile = (filePath, task) => {
+    const previous = chatWriteChains.get(filePath) || Promise.resolve();
+    const run = previous.then(task, task);
+    const settled = run.catch(() => {});
+    chatWriteChains.set(filePath, settled);
+    settled.then(() => {
+        if (chatWriteChains.get(filePath) === settled) chatWriteChains.delete(filePath);
+    });
+    return run;
+};
+
+// A logged write that failed: `undo` removes whatever part of it landed,
+// then an abort is logged so recovery skips it and standbys never apply
+// it (the client was told it failed, and retries). If the undo fails too,
+// the record stays unapplied and recover() settles it on the next start.
+// A standby's log mirrors the primary's, so there it is only undone
+const abortWrite = async (seq, undo, { replicated = false } = {}) => {
+    try {
+        await undo();
+        if (!replicated) await appendLog.abort(seq);
+    } catch (error) {
+        console.log(`Warning: Could not undo failed write (seq ${seq}): ${error.message}`);
+    }
+};
+
+// Append to a chat (call inside withChatFile): drop blocks the chat already
+// has, log the rest, write it to the active segment (rolling over at the
+// size limit), then update the indexes from the delta. Records replicated
+// from the primary carry its seq and were deduplicated there already
+const appendToChat = async (filePath, text, { replicatedSeq = null } = {}) => {
+    const project = path.basename(path.dirname(filePath));
+    const baseFile = path.basename(filePath);
+    const replicated = replicatedSeq !== null;
+    if (replicated && blockDedup) blockDedup.forget(project, baseFile);
+    const deduped = blockDedup && !replicated
+        ? await blockDedup.dedupeAppend(project, baseFile, text)
+        : { text, skippedChars: 0 };
+    if (deduped.text.length === 0) {
+        warmUp.recordAppend();
+        return { file: baseFile, path: filePath, rolled: false, written: 0, skippedChars: deduped.skippedChars };
+    }
+    
+    const bytes = Buffer.byteLength(deduped.text, 'utf8');
+    let target;
+    let seq = null;
+    try {
+        target = await chatSegments.appendTarget(project, baseFile, bytes);
+        seq = await appendLog.append({
+            op: 'append',
+            project,
+            file: baseFile,
+            segment: target.file,
+            offset: target.offset,
+            text: deduped.text
+        }, replicatedSeq);
+        await chatIo.appendFile(target.path, deduped.text);
+    } catch (error) {
+        // The hash set assumed the write happened - rebuild it next time
+        if (blockDedup) blockDedup.forget(project, baseFile);
+        if (seq !== null) {
+            await abortWrite(seq, async () => {
+                if (await chatIo.exists(target.path) && (await chatIo.stat(target.path)).size > target.offset) {
+                    await chatIo.truncate(target.path, target.offset);
+                }
+            }, { replicated });
+        }
+        throw error;
+    }
+    appendLog.applied(seq);
+    metrics.recordAppend(bytes);
+    const entry = await metadataIndex.recordAppend(project, target.file, deduped.text);
+    chatSegments.recordAppend(project, baseFile, target.file, entry);
+    warmUp.recordAppend();
+    return Object.assign(target, { written: deduped.text.length, skippedChars: deduped.skippedChars });
+};
+
+// Appends to one chat arriving within append.groupCommitMs share a write
+// (each session's text stays together, in arrival order). append.durability:
+// 'none' (OS decides), 'batch' (fsync before answering) or 'interval'
+// (fsync written chats every append.fsyncIntervalMs)
+const writeQueue = new WriteQueue({
+    run: withChatFile,
+    write: async (filePath, text, appends) => {
+        const target = await appendToChat(filePath, text);
+        const skipped = target.skippedChars ? `, ${target.skippedChars} duplicate chars skipped` : '';
+        const grouped = appends > 1 ? `, ${appends} appends` : '';
+        console.log(`💾 Appended to ${target.file}: +${target.written} chars${grouped}${skipped}`);
+        return target;
+    },
+    sync: (file) => Promise.all([io.sync(file), appendLog.sync()]),
+    windowMs: appendConfig.groupCommitMs,
+    maxBatchBytes: appendConfig.groupCommitBytes,
+    durability: appendConfig.durability,
+    fsyncIntervalMs: appendConfig.fsyncIntervalMs
+}).start();
 
 // Active sessions
 const sessions = new Map();
@@ -253,18 +555,15 @@ setInterval(() => {
         const sessionAge = now - new Date(session.startTime).getTime();
         if (sessionAge > MAX_SESSION_AGE) {
             sessions.delete(sessionId);
+            publishSession('end', sessionId, session);
             cleaned++;
         }
     }
     
-    // Clear memory queue if it's too large
-    const queueFile = path.join(__dirname, '.memory-queue.jsonl');
-    if (fs.existsSync(queueFile)) {
-        const stats = fs.statSync(queueFile);
-        if (stats.size > 1024 * 1024) { // 1MB limit for queue
-            fs.truncateSync(queueFile, 0);
-            console.log('🧹 Cleared memory queue (size limit reached)');
-        }
+    // Memory queue backlog is reported, never truncated
+    const queueStats = memoryQueue.stats();
+    if (queueStats.overHighWater) {
+        console.log(`Warning: Memory queue backlog ${(queueStats.backlogBytes / 1048576).toFixed(1)}MB in ${queueStats.segments} segments (last error: ${queueStats.lastError || 'none'})`);
     }
     
     if (cleaned > 0) {
@@ -276,8 +575,34 @@ setInterval(() => {
     }
 }, CLEANUP_INTERVAL);
 
+// New chat file with its header, logged first like an append. The header
+// is indexed right away, so the chat's first append is taken as an append
+// (search, extraction and the event stream follow it) and not a rescan
+const createChatFile = async (filePath, header, { replicatedSeq = null } = {}) => {
+    const project = path.basename(path.dirname(filePath));
+    const file = path.basename(filePath);
+    const seq = await appendLog.append({
+        op: 'create',
+        project,
+        file,
+        text: header
+    }, replicatedSeq);
+    try {
+        await io.mkdir(path.dirname(filePath));
+        await io.writeFile(filePath, header);
+    } catch (error) {
+        await abortWrite(seq, async () => {
+            if (await io.exists(filePath)) await fs.promises.unlink(filePath);
+        }, { replicated: replicatedSeq !== null });
+        throw error;
+    }
+    appendLog.applied(seq);
+    const stat = await io.stat(filePath);
+    metadataIndex.applyContent(project, file, header, stat.mtimeMs);
+};
+
 // Get or create chat file - SIMPLIFIED with chat name as filename
-const getChatFile = (project, chatName) => {
+const getChatFile = async (project, chatName) => {
     let projectDir = path.join(BASE_DIR, 'Projects', project);
     const chatKey = `${project}:${chatName}`;
     
@@ -286,14 +611,16 @@ const getChatFile = (project, chatName) => {
     
     // Check cache first
     if (chatFiles.has(chatKey)) {
+        metrics.cacheHit('chatFiles');
         console.log(`📄 Using cached file for: ${chatName}`);
         return chatFiles.get(chatKey);
     }
+    metrics.cacheMiss('chatFiles');
     
     // Ensure project directory exists
-    if (!existsSync(projectDir)) {
+    if (!await io.exists(projectDir)) {
         console.log(`📁 Creating new project folder: ${project}/`);
-        ensureDirSync(projectDir);
+        await io.mkdir(projectDir);
     } else {
         console.log(`📁 Using existing project folder: ${project}/`);
     }
@@ -321,8 +648,8 @@ const getChatFile = (project, chatName) => {
     projectDir = path.join(BASE_DIR, 'Projects', finalProjectName);
     const filePath = path.join(projectDir, fileName);
     
-    // Check if file already exists
-    if (existsSync(filePath)) {
+    // Check if file already exists (archived chats count)
+    if (await chatIo.exists(filePath)) {
         console.log(`✅ Found existing file: ${fileName}`);
         chatFiles.set(chatKey, filePath); // Add to cache
         return filePath;
@@ -338,13 +665,103 @@ ${'='.repeat(60)}
 
 `;
     
-    writeFileSync(filePath, header);
+    await createChatFile(filePath, header);
     console.log(`📄 Created: ${project}/${fileName}`);
     
     chatFiles.set(chatKey, filePath); // Add to cache
     return filePath;
 };
 
+// ============================================
+// APPEND LOG REPLAY - crash redo and standbys
+// ============================================
+
+// After a crash: make a logged write that didn't land (or landed half).
+// The segment's size tells: at offset + length it's there, between
+// offset and that it's cut back to offset and written again - but only
+// when the bytes past offset are the start of this record's text
+const redoRecord = async (record) => {
+    const projectDir = path.join(BASE_DIR, 'Projects', record.project);
+    if (record.op === 'create') {
+        const filePath = path.join(projectDir, record.file);
+        if (await chatIo.exists(filePath)) return false;
+        await io.mkdir(projectDir);
+        await io.writeFile(filePath, record.text);
+        return true;
+    }
+    if (record.op !== 'append') return false;
+    
+    const segmentPath = path.join(projectDir, record.segment);
+    const size = await chatIo.exists(segmentPath) ? (await chatIo.stat(segmentPath)).size : 0;
+    const end = record.offset + Buffer.byteLength(record.text, 'utf8');
+    if (size >= end) return false;
+    if (size < record.offset) {
+        console.log(`Warning: ${record.project}/${record.segment} changed since seq ${record.seq} - not redone`);
+        return false;
+    }
+    if (size > record.offset) {
+        const landed = await chatIo.readRange(segmentPath, record.offset, size - record.offset);
+        if (!landed.equals(Buffer.from(record.text, 'utf8').subarray(0, landed.length))) {
+            console.log(`Warning: ${record.project}/${record.segment} was rewritten since seq ${record.seq} - not redone`);
+            return false;
+        }
+        await chatIo.truncate(segmentPath, record.offset);
+    }
+    await io.mkdir(projectDir);
+    await chatIo.appendFile(segmentPath, record.text);
+    return true;
+};
+
+// A record from the primary, written to this standby's tree and log under
+// the primary's seq (appends go through the normal path minus dedup)
+const applyReplicated = async (record) => {
+    if (record.seq <= appendLog.lastSeq) return;
+    if (record.op === 'abort') {
+        // The primary's write failed - nothing to apply, keep the seq
+        appendLog.applied(await appendLog.append(record, record.seq));
+        return;
+    }
+    const projectDir = path.join(BASE_DIR, 'Projects', record.project);
+    const filePath = path.join(projectDir, record.file);
+    await withChatFile(filePath, async () => {
+        if (record.op === 'append') {
+            await io.mkdir(projectDir);
+            await appendToChat(filePath, record.text, { replicatedSeq: record.seq });
+        } else if (record.op === 'create') {
+            if (await chatIo.exists(filePath)) {
+                appendLog.applied(await appendLog.append(record, record.seq));
+            } else {
+                await createChatFile(filePath, record.text, { replicatedSeq: record.seq });
+            }
+        } else {
+            // Rewrites are redone here (same input, same result), then logged
+            if (record.op === 'compact') {
+                const compactor = blockDedup || new BlockDedup({ projectsDir: path.join(BASE_DIR, 'Projects'), chatSegments, io: chatIo });
+                await compactor.compactChat(record.project, record.file);
+            } else if (record.op === 'migrate') {
+                await chatSegments.migrateFile(record.project, record.file);
+            }
+            appendLog.applied(await appendLog.append(record, record.seq));
+        }
+    });
+};
+
+// Compaction and migration are logged once done (they replace files
+// atomically, so there is nothing to redo) for standbys to repeat
+const logRewrite = async (op, project, file) => {
+    appendLog.applied(await appendLog.append({ op, project, file }));
+};
+
+// Saves go to the primary only
+const primaryOnly = (req, res, next) => {
+    if (replicationRole !== 'standby') return next();
+    res.status(503).json({
+        success: false,
+        error: 'This server is a read-only standby - saves go to the primary',
+        primary: replicationConfig.primary || null
+    });
+};
+
 // API Routes
 
 // Health check
@@ -353,53 +770,155 @@ app.get('/api/health', (req, res) => {
         status: 'running', 
         version: VERSION,
         feature: 'fixed-file-detection',
+        ioMode: IO_MODE,
+        extraction: extractionQueue.stats(),
+        memoryQueue: memoryQueue.stats(),
+        dedup: blockDedup ? blockDedup.stats() : null,
+        writeQueue: writeQueue.stats(),
+        coldStorage: coldStorage.stats(),
+        related: relatedIndex.stats(),
+        replication: { role: replicationRole, lastSeq: appendLog.lastSeq, following: replicaFollower ? replicaFollower.stats() : null },
+        events: events.stats(),
+        warmUp: warmUp.status().timings,
         activeSessions: sessions.size 
     });
 });
 
-// Continue or start project
-app.post('/api/project/continue', (req, res) => {
-    const { sessionId, project, chatName } = req.body;
+// Readiness: 503 until saves are accepted, then 200 while the rest of
+// the warm-up (first tree walk) reports its progress
+app.get('/api/ready', (req, res) => {
+    const status = warmUp.status();
+    res.status(status.ready ? 200 : 503).json(status);
+});
+
+// Metrics: Prometheus text by default, JSON with ?format=json (or
+// Accept: application/json)
+app.get('/api/metrics', (req, res) => {
+    const wantsJson = req.query.format === 'json' ||
+        (req.query.format !== 'prometheus' && req.accepts(['text/plain', 'application/json']) === 'application/json');
+    if (wantsJson) {
+        return res.json(metrics.toJSON());
+    }
+    res.type('text/plain; version=0.0.4').send(metrics.prometheus());
+});
+
+// Everything below needs the saved indexes; early requests wait for them
+app.use(warmUp.middleware());
+
+// Reads from a standby say so, and how far it has got
+app.use((req, res, next) => {
+    res.set('X-Smart-Save-Role', replicationRole);
+    if (replicationRole === 'standby') res.set('X-Smart-Save-Seq', String(appendLog.lastSeq));
+    next();
+});
+
+// ============================================
+// REPLICATION - append log for standbys
+// ============================================
+
+// Settled records from seq `from` on; with `wait` (ms) the request is
+// held until one exists. Standbys pass `follower` so their lag shows in status
+app.get('/api/replication/log', async (req, res) => {
+    const from = Math.max(1, parseInt(req.query.from, 10) || 1);
+    const limit = Math.min(Math.max(1, parseInt(req.query.limit, 10) || 500), 2000);
+    const wait = Math.min(Math.max(0, parseInt(req.query.wait, 10) || 0), 60 * 1000);
+    if (req.query.follower) followers.seen(String(req.query.follower).substring(0, 64), from, req.ip);
     
-    const projectDir = path.join(BASE_DIR, 'Projects', project);
-    ensureDirSync(projectDir);
+    if (from < appendLog.oldestSeq()) {
+        return res.status(410).json({ error: `Seq ${from} is no longer in the log`, oldestSeq: appendLog.oldestSeq(), lastSeq: appendLog.lastSeq });
+    }
+    if (from > appendLog.lastSeq + 1) {
+        return res.status(409).json({ error: `Seq ${from} is past the end of the log`, lastSeq: appendLog.lastSeq });
+    }
     
-    // Register session
-    sessions.set(sessionId, {
-        project,
-        chatName,
-        startTime: new Date().toISOString()
+    try {
+        await appendLog.waitFor(from - 1, wait);
+        const records = await appendLog.readSettled(from, { limit });
+        res.json({ role: replicationRole, lastSeq: appendLog.checkpointSeq, oldestSeq: appendLog.oldestSeq(), records });
+    } catch (error) {
+        console.error('Replication log error:', error);
+        res.status(500).json({ error: error.message });
+    }
+});
+
+app.get('/api/replication/status', (req, res) => {
+    res.json({
+        role: replicationRole,
+        log: appendLog.stats(),
+        followers: followers.stats(appendLog.lastSeq),
+        following: replicaFollower ? replicaFollower.stats() : null
     });
+});
+
+// Failover: stop following and start taking saves
+app.post('/api/replication/promote', async (req, res) => {
+    if (replicationRole !== 'standby') {
+        return res.status(409).json({ success: false, error: 'Already the primary' });
+    }
+    if (replicaFollower) await replicaFollower.stop();
+    replicationRole = 'primary';
+    console.log(`👑 Promoted to primary at seq ${appendLog.lastSeq}`);
+    res.json({ success: true, role: replicationRole, lastSeq: appendLog.lastSeq });
+});
+
+// Live dashboard stream: snapshot, then append/project/totals/session/metrics events.
+// Reconnects resume from Last-Event-ID
+app.get('/api/events', (req, res) => {
+    events.handle(req, res);
+});
+
+// Continue or start project
+app.post('/api/project/continue', primaryOnly, async (req, res) => {
+    const { sessionId, project, chatName } = req.body;
+    
+    if (!project) {
+        return res.status(400).json({ success: false, error: 'project is required' });
+    }
     
-    // Count total words across all files in project
-    let totalWords = 0;
     try {
-        const files = fs.readdirSync(projectDir);
-        files.forEach(file => {
-            if (file.endsWith('.md')) {
-                const content = fs.readFileSync(path.join(projectDir, file), 'utf-8');
-                totalWords += content.split(/\s+/).filter(w => w.length > 0).length;
-            }
+        const projectDir = path.join(BASE_DIR, 'Projects', project);
+        await io.mkdir(projectDir);
+        
+        // Register session
+        const session = {
+            project,
+            chatName,
+            startTime: new Date().toISOString()
+        };
+        sessions.set(sessionId, session);
+        publishSession('start', sessionId, session);
+        
+        // Count total words across all files in project (from the index)
+        let totalWords = 0;
+        try {
+            totalWords = (await metadataIndex.reconcileProject(project)).words;
+        } catch (error) {
+            console.error('Error counting words:', error);
+        }
+        
+        console.log(`✅ Session started for project: ${project}`);
+        console.log(`💬 Chat: ${chatName}`);
+        console.log(`📊 Project total: ${totalWords} words across all chats`);
+        
+        res.json({
+            success: true,
+            project,
+            chatName,
+            totalWords,
+            projectFile: `${project}/`
         });
+        
     } catch (error) {
-        console.error('Error counting words:', error);
+        console.error('Error starting session:', error);
+        res.status(500).json({ 
+            success: false, 
+            error: error.message 
+        });
     }
-    
-    console.log(`✅ Session started for project: ${project}`);
-    console.log(`💬 Chat: ${chatName}`);
-    console.log(`📊 Project total: ${totalWords} words across all chats`);
-    
-    res.json({
-        success: true,
-        project,
-        chatName,
-        totalWords,
-        projectFile: `${project}/`
-    });
 });
 
 // Append to project
-app.post('/api/project/append', (req, res) => {
+app.post('/api/project/append', primaryOnly, async (req, res) => {
     const { sessionId, project, newContent, chatName } = req.body;
     
     if (!newContent || newContent.trim().length === 0) {
@@ -408,28 +927,23 @@ app.post('/api/project/append', (req, res) => {
     
     try {
         // Get or create the chat file - WILL NOW FIND EXISTING
-        const filePath = getChatFile(project, chatName || 'Untitled');
-        
-        // Append content
-        fs.appendFileSync(filePath, newContent);
+        const filePath = await getChatFile(project, chatName || 'Untitled');
+        const savedProject = path.basename(path.dirname(filePath));
         
-        // Count total words in project
-        const projectDir = path.join(BASE_DIR, 'Projects', project);
-        let totalWords = 0;
-        const files = fs.readdirSync(projectDir);
-        files.forEach(file => {
-            if (file.endsWith('.md')) {
-                const content = fs.readFileSync(path.join(projectDir, file), 'utf-8');
-                totalWords += content.split(/\s+/).filter(w => w.length > 0).length;
-            }
+        // Queue the append (grouped with other tabs on this chat), then the
+        // index is updated from the appended delta - no rereading the project
+        const { result: target, appends } = await writeQueue.append(filePath, {
+            session: sessionId || null,
+            text: newContent
         });
-        
-        console.log(`💾 Appended to ${path.basename(filePath)}: +${newContent.length} chars`);
+        const totalWords = metadataIndex.getProject(savedProject).words;
         
         res.json({
             success: true,
-            savedTo: filePath,
+            savedTo: target.path,
             contentLength: newContent.length,
+            duplicateChars: target.skippedChars,
+            groupedAppends: appends,
             totalWords
         });
         
@@ -442,46 +956,92 @@ app.post('/api/project/append', (req, res) => {
     }
 });
 
-// Get projects list
-app.get('/api/projects', (req, res) => {
+// Append a batch of sequenced deltas. Entries at or below the stream's
+// acknowledged seq were already written and are skipped, so the browser
+// can resend a batch (retry, offline replay) without duplicating text
+app.post('/api/project/append-batch', primaryOnly, async (req, res) => {
+    const { streamId, project, chatName, entries } = req.body;
+    
+    if (!appendSequencer.isValidStream(streamId) || !Array.isArray(entries)) {
+        return res.status(400).json({ success: false, error: 'streamId and entries[] are required' });
+    }
+    if (entries.length > MAX_BATCH_ENTRIES) {
+        return res.status(413).json({ success: false, error: `At most ${MAX_BATCH_ENTRIES} entries per batch` });
+    }
+    
     try {
-        const projectsDir = path.join(BASE_DIR, 'Projects');
-        const projects = [];
+        const filePath = await getChatFile(project || 'General', chatName || 'Untitled');
+        const savedProject = path.basename(path.dirname(filePath));
+        const file = path.basename(filePath);
         
-        if (fs.existsSync(projectsDir)) {
-            const dirs = fs.readdirSync(projectsDir);
-            
-            dirs.forEach(dir => {
-                const projectPath = path.join(projectsDir, dir);
-                const stat = fs.statSync(projectPath);
-                
-                if (stat.isDirectory()) {
-                    // Count files and words
-                    let fileCount = 0;
-                    let wordCount = 0;
-                    let chatCount = 0;
-                    
-                    const files = fs.readdirSync(projectPath);
-                    files.forEach(file => {
-                        if (file.endsWith('.md')) {
-                            fileCount++;
-                            chatCount++;
-                            const content = fs.readFileSync(path.join(projectPath, file), 'utf-8');
-                            wordCount += content.split(/\s+/).filter(w => w.length > 0).length;
-                        }
-                    });
-                    
-                    projects.push({
-                        name: dir,
-                        words: wordCount,
-                        chats: chatCount,
-                        files: fileCount,
-                        modified: stat.mtime
-                    });
-                }
-            });
+        // The seq check runs when the group is written (inside the chat's
+        // write chain), so two copies of the same batch can't both pass it -
+        // `claimed` covers copies queued in the same group
+        let fresh = [];
+        const { value: ackedSeq, result: target } = await writeQueue.append(filePath, {
+            session: streamId,
+            size: entries.reduce((total, entry) => total + (entry && typeof entry.text === 'string' ? entry.text.length : 0), 0),
+            prepare: (claimed) => {
+                const seen = claimed.get(streamId) || 0;
+                fresh = appendSequencer.pending(streamId, entries).filter(entry => entry.seq > seen);
+                if (fresh.length === 0) return '';
+                claimed.set(streamId, fresh[fresh.length - 1].seq);
+                return fresh.map(entry => entry.text).join('');
+            },
+            commit: () => fresh.length === 0
+                ? appendSequencer.acked(streamId)
+                : appendSequencer.commit(streamId, fresh[fresh.length - 1].seq, { project: savedProject, file })
+        });
+        const applied = fresh.length;
+        const savedTo = target ? target.path : filePath;
+        
+        if (applied > 0) {
+            console.log(`🔢 Stream ${streamId}: ${applied} entries applied, seq ${ackedSeq}`);
         }
         
+        res.json({
+            success: true,
+            savedTo,
+            ackedSeq,
+            applied,
+            duplicates: entries.length - applied,
+            totalWords: metadataIndex.getProject(savedProject).words
+        });
+        
+    } catch (error) {
+        console.error('Error appending batch:', error);
+        res.status(500).json({ 
+            success: false, 
+            error: error.message 
+        });
+    }
+});
+
+// Highest seq applied for a stream (browser resync after a reload)
+app.get('/api/project/append-batch/:streamId', (req, res) => {
+    const { streamId } = req.params;
+    if (!appendSequencer.isValidStream(streamId)) {
+        return res.status(400).json({ error: 'Invalid streamId' });
+    }
+    res.json({ streamId, ackedSeq: appendSequencer.acked(streamId) });
+});
+
+// Get projects list
+app.get('/api/projects', async (req, res) => {
+    try {
+        // Tree walk happens in the scan pool; files and words come from the index
+        const { listing, projectNames } = await reconcileIndexes();
+        const projects = projectNames.map(dir => {
+            const rollup = metadataIndex.getProject(dir);
+            return {
+                name: dir,
+                words: rollup.words,
+                chats: Object.keys(groupSegments(metadataIndex.getProjectFiles(dir))).length,
+                files: rollup.files,
+                modified: new Date(listing.projects[dir].mtimeMs)
+            };
+        });
+        
         res.json({
             projects,
             totalProjects: projects.length,
@@ -498,12 +1058,12 @@ app.get('/api/projects', (req, res) => {
 });
 
 // Get project path
-app.get('/api/project/:name/path', (req, res) => {
+app.get('/api/project/:name/path', async (req, res) => {
     try {
         const projectName = req.params.name;
         const projectPath = path.join(BASE_DIR, 'Projects', projectName);
         
-        if (fs.existsSync(projectPath)) {
+        if (await io.exists(projectPath)) {
             res.json({
                 success: true,
                 name: projectName,
@@ -529,12 +1089,12 @@ app.get('/api/project/:name/path', (req, res) => {
 });
 
 // Open project location in Finder/Explorer
-app.post('/api/project/:name/open', (req, res) => {
+app.post('/api/project/:name/open', async (req, res) => {
     try {
         const projectName = req.params.name;
         const projectPath = path.join(BASE_DIR, 'Projects', projectName);
         
-        if (fs.existsSync(projectPath)) {
+        if (await io.exists(projectPath)) {
             // Use the appropriate command for macOS
             const { exec } = require('child_process');
             exec(`open "${projectPath}"`, (error) => {
@@ -569,14 +1129,43 @@ app.post('/api/project/:name/open', (req, res) => {
 });
 
 // Send path to Claude chat
-app.post('/api/project/:name/send-to-claude', (req, res) => {
+app.post('/api/project/:name/send-to-claude', async (req, res) => {
     try {
         const projectName = req.params.name;
         const projectPath = path.join(BASE_DIR, 'Projects', projectName);
+        const chatFile = req.body && req.body.chat;
+        // maxTokens (or excerpt: true) adds the chat's most recent messages
+        // that fit the budget - read from the end, never the whole chat
+        const maxTokens = Math.min(MAX_EXCERPT_TOKENS,
+            parseInt(req.body && req.body.maxTokens, 10) || (req.body && req.body.excerpt ? DEFAULT_EXCERPT_TOKENS : 0));
         
-        if (fs.existsSync(projectPath)) {
+        if (await io.exists(projectPath)) {
             // Create a formatted message for Claude
             const message = `Project: "${projectName}"\nPath: ${projectPath}`;
+            let formatted = `The project "${projectName}" is located at:\n\`${projectPath}\`\n\nThis is the full file system path to the project folder.`;
+            
+            // For one chat, list its segment files in order from the manifest
+            // (chat content is only read for an excerpt)
+            let segments;
+            let restored = false;
+            let excerpt;
+            if (chatFile) {
+                // Claude opens these paths itself - bring an archived chat back first
+                const baseFile = segmentFileName(parseSegmentName(path.basename(chatFile)).chat, 1);
+                restored = (await withChatFile(path.join(projectPath, baseFile),
+                    () => coldStorage.promoteChat(projectName, baseFile))).length > 0;
+                segments = await chatSegments.segmentsFor(projectName, path.basename(chatFile));
+                if (segments.length > 1) {
+                    formatted += `\n\nThe chat "${parseSegmentName(path.basename(chatFile)).chat}" is split into ${segments.length} files, in order:\n` +
+                        segments.map(segment => `${segment.part}. \`${segment.path}\` (${segment.words.toLocaleString()} words)`).join('\n');
+                }
+                const view = maxTokens > 0 ? await chatReader.open(projectName, chatFile) : null;
+                if (view) {
+                    excerpt = await chatReader.excerpt(view, maxTokens);
+                    formatted += `\n\n${excerpt.complete ? 'The whole chat' : 'The most recent part of the chat'} ` +
+                        `(about ${excerpt.estimatedTokens.toLocaleString()} tokens):\n\n${excerpt.text}`;
+                }
+            }
             
             console.log(`[CLAUDE] Prepared message for project: ${projectName}`);
             
@@ -585,7 +1174,10 @@ app.post('/api/project/:name/send-to-claude', (req, res) => {
                 name: projectName,
                 path: projectPath,
                 message: message,
-                formatted: `The project "${projectName}" is located at:\n\`${projectPath}\`\n\nThis is the full file system path to the project folder.`
+                segments,
+                restored,
+                excerpt,
+                formatted
             });
         } else {
             res.status(404).json({
@@ -603,9 +1195,8 @@ app.post('/api/project/:name/send-to-claude', (req, res) => {
 });
 
 // Get real statistics from actual files and data
-app.get('/api/stats', (req, res) => {
+app.get('/api/stats', async (req, res) => {
     try {
-        const projectsDir = path.join(BASE_DIR, 'Projects');
         const stats = {
             totalConversations: 0,
             totalWords: 0,
@@ -627,109 +1218,40 @@ app.get('/api/stats', (req, res) => {
             }
         };
         
-        const now = new Date();
-        const today = new Date(now.getFullYear(), now.getMonth(), now.getDate());
-        const weekAgo = new Date(today.getTime() - (7 * 24 * 60 * 60 * 1000));
-        const monthAgo = new Date(today.getTime() - (30 * 24 * 60 * 60 * 1000));
+        // Bring the index in line with the disk (only changed files are
+        // reread), then answer from the running counters
+        const { projectNames } = await reconcileIndexes();
         
-        if (fs.existsSync(projectsDir)) {
-            const projects = fs.readdirSync(projectsDir);
+        projectNames.forEach(projectName => {
+            const rollup = metadataIndex.getProject(projectName);
+            stats.totalProjects++;
+            stats.totalFiles += rollup.files;
+            stats.totalConversations += Object.keys(groupSegments(metadataIndex.getProjectFiles(projectName))).length;
+            stats.totalWords += rollup.words;
             
-            projects.forEach(projectName => {
-                const projectPath = path.join(projectsDir, projectName);
-                const stat = fs.statSync(projectPath);
-                
-                if (stat.isDirectory()) {
-                    stats.totalProjects++;
-                    let projectWords = 0;
-                    let projectFiles = 0;
-                    
-                    try {
-                        const files = fs.readdirSync(projectPath);
-                        files.forEach(file => {
-                            if (file.endsWith('.md')) {
-                                const filePath = path.join(projectPath, file);
-                                const fileStat = fs.statSync(filePath);
-                                
-                                projectFiles++;
-                                stats.totalFiles++;
-                                
-                                // Check if file is recent
-                                if (fileStat.mtime > today) stats.dailyStats.today++;
-                                if (fileStat.mtime > weekAgo) stats.dailyStats.thisWeek++;
-                                if (fileStat.mtime > monthAgo) stats.dailyStats.thisMonth++;
-                                
-                                // Track oldest and newest files
-                                if (!stats.oldestFile || fileStat.mtime < stats.oldestFile.date) {
-                                    stats.oldestFile = { name: file, project: projectName, date: fileStat.mtime };
-                                }
-                                if (!stats.newestFile || fileStat.mtime > stats.newestFile.date) {
-                                    stats.newestFile = { name: file, project: projectName, date: fileStat.mtime };
-                                }
-                                
-                                try {
-                                    const content = fs.readFileSync(filePath, 'utf-8');
-                                    const words = content.split(/\s+/).filter(w => w.length > 0).length;
-                                    projectWords += words;
-                                    stats.totalWords += words;
-                                    
-                                    // Analyze content for people, bugs, solutions
-                                    const contentLower = content.toLowerCase();
-                                    
-                                    // Count people mentions (names with capital letters)
-                                    const peopleMatches = content.match(/\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\b/g) || [];
-                                    const uniquePeople = new Set(peopleMatches.filter(name => 
-                                        name.length > 2 && !['The', 'This', 'That', 'When', 'Where', 'What', 'How'].includes(name)
-                                    ));
-                                    stats.peopleCount += uniquePeople.size;
-                                    
-                                    // Count bug-related terms
-                                    const bugTerms = ['bug', 'error', 'issue', 'problem', 'broken', 'fail', 'crash', 'exception'];
-                                    bugTerms.forEach(term => {
-                                        const matches = (contentLower.match(new RegExp(term, 'g')) || []).length;
-                                        stats.bugsCount += matches;
-                                    });
-                                    
-                                    // Count solution-related terms
-                                    const solutionTerms = ['fix', 'solve', 'solution', 'resolve', 'answer', 'working', 'success'];
-                                    solutionTerms.forEach(term => {
-                                        const matches = (contentLower.match(new RegExp(term, 'g')) || []).length;
-                                        stats.solutionsCount += matches;
-                                    });
-                                    
-                                    // Count memory/conversation references
-                                    const memoryTerms = ['remember', 'recall', 'conversation', 'discussed', 'mentioned', 'talked'];
-                                    memoryTerms.forEach(term => {
-                                        const matches = (contentLower.match(new RegExp(term, 'g')) || []).length;
-                                        stats.memoryCount += matches;
-                                    });
-                                    
-                                } catch (readError) {
-                                    console.log(`Warning: Could not read file ${filePath}`);
-                                }
-                            }
-                        });
-                        
-                        stats.totalConversations += projectFiles;
-                        
-                        // Track largest project
-                        if (projectWords > stats.largestProject.words) {
-                            stats.largestProject = { name: projectName, words: projectWords };
-                        }
-                        
-                    } catch (readDirError) {
-                        console.log(`Warning: Could not read project directory ${projectPath}`);
-                    }
+            // Track largest project
+            if (rollup.words > stats.largestProject.words) {
+                stats.largestProject = { name: projectName, words: rollup.words };
+            }
+            
+            // Track oldest and newest files
+            Object.entries(metadataIndex.getProjectFiles(projectName)).forEach(([file, entry]) => {
+                const modified = new Date(entry.mtimeMs);
+                if (!stats.oldestFile || modified < stats.oldestFile.date) {
+                    stats.oldestFile = { name: file, project: projectName, date: modified };
+                }
+                if (!stats.newestFile || modified > stats.newestFile.date) {
+                    stats.newestFile = { name: file, project: projectName, date: modified };
                 }
             });
-        }
+        });
+        
+        Object.assign(stats, memoryTotals(stats.totalFiles));
+        stats.dailyStats = contentAnalytics.activity();
         
         // Calculate averages
         stats.averageWordsPerFile = stats.totalFiles > 0 ? Math.round(stats.totalWords / stats.totalFiles) : 0;
         
-        // Deduplicate people count (rough estimate)
-        stats.peopleCount = Math.max(1, Math.floor(stats.peopleCount / Math.max(1, stats.totalFiles)));
-        
         console.log(`[STATS] Generated real statistics: ${stats.totalFiles} files, ${stats.totalWords} words, ${stats.totalProjects} projects`);
         
         res.json({
@@ -749,48 +1271,32 @@ app.get('/api/stats', (req, res) => {
     }
 });
 
-// Search across projects
-app.post('/api/search', (req, res) => {
+// Search across projects (inverted index, BM25 ranked, paged)
+app.post('/api/search', async (req, res) => {
     const { query } = req.body;
-    const results = [];
+    const offset = Math.max(0, parseInt(req.body.offset, 10) || 0);
+    const limit = Math.min(MAX_SEARCH_LIMIT, Math.max(1, parseInt(req.body.limit, 10) || DEFAULT_SEARCH_LIMIT));
     
     try {
-        const projectsDir = path.join(BASE_DIR, 'Projects');
-        const projects = fs.readdirSync(projectsDir);
-        
-        projects.forEach(project => {
-            const projectPath = path.join(projectsDir, project);
-            if (fs.statSync(projectPath).isDirectory()) {
-                const files = fs.readdirSync(projectPath);
-                
-                files.forEach(file => {
-                    if (file.endsWith('.md')) {
-                        const filePath = path.join(projectPath, file);
-                        const content = fs.readFileSync(filePath, 'utf-8');
-                        
-                        if (content.toLowerCase().includes(query.toLowerCase())) {
-                            // Find matching lines
-                            const lines = content.split('\n');
-                            const matches = lines.filter(line => 
-                                line.toLowerCase().includes(query.toLowerCase())
-                            );
-                            
-                            results.push({
-                                project,
-                                file,
-                                matches: matches.slice(0, 5),
-                                totalMatches: matches.length
-                            });
-                        }
-                    }
-                });
-            }
-        });
+        // Appends keep the index current; only look for files changed
+        // outside the server every so often, not on every keystroke
+        if (Date.now() - lastSearchReconcile > SEARCH_RECONCILE_INTERVAL) {
+            lastSearchReconcile = Date.now();
+            await reconcileIndexes();
+        }
+        
+        const { results, total, totalMatches } = await searchIndex.search(query, { offset, limit });
+        
+        // Hits are per segment file; name the chat each one belongs to
+        results.forEach(result => Object.assign(result, parseSegmentName(result.file)));
         
         res.json({
             query,
             results,
-            totalMatches: results.reduce((sum, r) => sum + r.totalMatches, 0)
+            total,
+            offset,
+            limit,
+            totalMatches
         });
         
     } catch (error) {
@@ -799,40 +1305,216 @@ app.post('/api/search', (req, res) => {
     }
 });
 
-// Get project stats
-app.get('/api/project/:name/stats', (req, res) => {
+// Chats on the same topic as this one, from any project (MinHash / LSH;
+// :file may name the chat or any of its segment files)
+app.get('/api/project/:name/chat/:file/related', async (req, res) => {
     const projectName = req.params.name;
-    const projectPath = path.join(BASE_DIR, 'Projects', projectName);
+    const { chat } = parseSegmentName(req.params.file.endsWith('.md') ? req.params.file : `${req.params.file}.md`);
+    const chatFile = segmentFileName(chat, 1);
+    const limit = Math.min(MAX_RELATED_LIMIT, Math.max(1, parseInt(req.query.limit, 10) || DEFAULT_RELATED_LIMIT));
+    const minSimilarity = parseFloat(req.query.minSimilarity);
+    
+    try {
+        if (!await chatIo.exists(path.join(BASE_DIR, 'Projects', projectName, chatFile))) {
+            return res.status(404).json({ error: 'Chat not found' });
+        }
+        // Saved but not hashed yet (first save moments ago, or edited outside
+        // the server) - hash just this chat's segments
+        if (!relatedIndex.has(projectName, chat)) {
+            for await (const { segment, content } of chatSegments.readChat(projectName, chatFile)) {
+                relatedIndex.rebuildFile(projectName, segment.file, content);
+            }
+        }
+        
+        const found = relatedIndex.related(projectName, chat, {
+            limit,
+            minSimilarity: Number.isFinite(minSimilarity) ? minSimilarity : undefined
+        });
+        res.json({
+            project: projectName,
+            chat,
+            file: chatFile,
+            related: found ? found.matches : [],
+            candidates: found ? found.candidates : 0
+        });
+        
+    } catch (error) {
+        console.error('Related chats error:', error);
+        res.status(500).json({ error: error.message });
+    }
+});
+
+// "a-b", "a-" or "-n" (inclusive, as in a Range header) -> { start, end }
+// with end exclusive; null if malformed, { unsatisfiable } past the end
+const parseByteRange = (spec, size) => {
+    const match = /^(\d*)-(\d*)$/.exec(spec.trim());
+    if (!match || (match[1] === '' && match[2] === '')) return null;
+    if (match[1] === '') {
+        const suffix = Number(match[2]);
+        return suffix > 0 && size > 0 ? { start: Math.max(0, size - suffix), end: size } : { unsatisfiable: true };
+    }
+    const start = Number(match[1]);
+    if (match[2] !== '' && Number(match[2]) < start) return null;
+    if (start >= size) return { unsatisfiable: true };
+    return { start, end: match[2] === '' ? size : Math.min(size, Number(match[2]) + 1) };
+};
+
+const etagMatches = (header, etag) => Boolean(header) &&
+    (header.trim() === '*' || header.split(',').some(tag => tag.trim().replace(/^W\//, '') === etag));
+
+// Write bytes [start, end) of a chat as they are read, waiting on the
+// client when its buffer is full; stops if the client goes away
+const streamChat = async (res, view, { start, end }) => {
+    let closed = false;
+    const onClose = () => { closed = true; };
+    res.on('close', onClose);
+    try {
+        for await (const chunk of chatReader.readBytes(view, start, end)) {
+            if (closed) return;
+            if (!res.write(chunk)) {
+                await new Promise(resolve => {
+                    const done = () => {
+                        res.off('drain', done);
+                        res.off('close', done);
+                        resolve();
+                    };
+                    res.on('drain', done);
+                    res.on('close', done);
+                });
+            }
+        }
+        res.end();
+    } finally {
+        res.off('close', onClose);
+    }
+};
+
+// Chat content, streamed from disk. Pick a part with one of:
+//   Range: bytes=a-b (or ?bytes=a-b)  byte range, answered 206
+//   ?messages=a-b                     messages a..b (0-based; "a" or "a-" too)
+//   ?tail=n                           the last n messages
+// Messages are the blocks between blank lines. Message answers carry
+// X-Byte-Range so a client can continue by bytes; If-None-Match with the
+// ETag answers 304 while the chat is unchanged
+app.get('/api/project/:name/chat/:file/content', async (req, res) => {
+    try {
+        const view = await chatReader.open(req.params.name, req.params.file);
+        if (!view) return res.status(404).json({ error: 'Chat not found' });
+        
+        res.set({
+            'ETag': view.etag,
+            'Last-Modified': new Date(view.mtimeMs).toUTCString(),
+            'Accept-Ranges': 'bytes',
+            'Cache-Control': 'no-cache',
+            'X-Chat-Bytes': String(view.size)
+        });
+        if (etagMatches(req.get('If-None-Match'), view.etag)) return res.status(304).end();
+        
+        let range = null;
+        let byMessage = false;
+        if (req.query.tail !== undefined) {
+            const count = parseInt(req.query.tail, 10);
+            if (!(count > 0)) return res.status(400).json({ error: 'tail must be a number of messages (1 or more)' });
+            range = await chatReader.tailRange(view, count);
+            byMessage = true;
+        } else if (req.query.messages !== undefined) {
+            const match = /^(\d+)(?:-(\d*))?$/.exec(req.query.messages);
+            const first = match ? Number(match[1]) : null;
+            const last = !match ? null : match[2] === undefined ? first : match[2] === '' ? null : Number(match[2]);
+            if (!match || (last !== null && last < first)) {
+                return res.status(400).json({ error: 'messages must look like 5, 5-10 or 5-' });
+            }
+            range = await chatReader.messageRange(view, first, last);
+            if (!range) return res.status(416).json({ error: `Chat has fewer than ${first + 1} messages` });
+            byMessage = true;
+        } else {
+            // A Range header counts only if the chat is still the one If-Range names
+            const header = req.get('Range');
+            const ifRange = req.get('If-Range');
+            const spec = req.query.bytes ||
+                (header && header.startsWith('bytes=') && !header.includes(',') && (!ifRange || ifRange === view.etag)
+                    ? header.slice('bytes='.length) : null);
+            if (spec) {
+                range = parseByteRange(spec, view.size);
+                if (!range && req.query.bytes) return res.status(400).json({ error: 'bytes must look like 0-499, 500- or -500' });
+                if (range && range.unsatisfiable) {
+                    res.set('Content-Range', `bytes */${view.size}`);
+                    return res.status(416).json({ error: 'Range is past the end of the chat' });
+                }
+            }
+        }
+        
+        res.type('text/markdown; charset=utf-8');
+        if (byMessage) {
+            // Length unknown up front is fine - this goes out chunked
+            res.set('X-Byte-Range', range.end > range.start
+                ? `${range.start}-${range.end - 1}/${view.size}` : `*/${view.size}`);
+        } else if (range) {
+            res.status(206).set({
+                'Content-Range': `bytes ${range.start}-${range.end - 1}/${view.size}`,
+                'Content-Length': String(range.end - range.start)
+            });
+        } else {
+            range = { start: 0, end: view.size };
+            res.set('Content-Length', String(view.size));
+        }
+        await streamChat(res, view, range);
+        
+    } catch (error) {
+        console.error('Chat read error:', error);
+        if (res.headersSent) {
+            res.destroy(error);
+        } else {
+            res.status(500).json({ error: error.message });
+        }
+    }
+});
+
+// Folder suggestion for a new chat (the extension asks before showing
+// its folder picker): projects whose chats look most like its text
+app.post('/api/projects/suggest-folder', (req, res) => {
+    const { chatName, text } = req.body;
+    const limit = Math.min(MAX_RELATED_LIMIT, Math.max(1, parseInt(req.body.limit, 10) || DEFAULT_FOLDER_SUGGESTIONS));
     
-    if (!fs.existsSync(projectPath)) {
-        return res.status(404).json({ error: 'Project not found' });
+    try {
+        const sample = `${chatName || ''}\n${String(text || '').slice(0, MAX_SUGGEST_TEXT)}`;
+        const { suggestions, candidates } = relatedIndex.suggestFolders(sample, { limit });
+        res.json({ chatName, suggestions, candidates });
+        
+    } catch (error) {
+        console.error('Folder suggestion error:', error);
+        res.status(500).json({ error: error.message, suggestions: [] });
     }
+});
+
+// Get project stats
+app.get('/api/project/:name/stats', async (req, res) => {
+    const projectName = req.params.name;
+    const projectPath = path.join(BASE_DIR, 'Projects', projectName);
     
     try {
-        const files = fs.readdirSync(projectPath);
-        let totalWords = 0;
-        let totalChars = 0;
-        let chatCount = 0;
+        if (!await io.exists(projectPath)) {
+            return res.status(404).json({ error: 'Project not found' });
+        }
+        
+        const rollup = await metadataIndex.reconcileProject(projectName);
+        const totalWords = rollup.words;
+        const totalChars = rollup.chars;
         const chats = [];
         
-        files.forEach(file => {
-            if (file.endsWith('.md')) {
-                const filePath = path.join(projectPath, file);
-                const content = fs.readFileSync(filePath, 'utf-8');
-                const words = content.split(/\s+/).filter(w => w.length > 0).length;
-                
-                chatCount++;
-                totalWords += words;
-                totalChars += content.length;
-                
-                chats.push({
-                    file,
-                    words,
-                    chars: content.length,
-                    modified: fs.statSync(filePath).mtime
-                });
-            }
+        // One entry per chat, summed over its segment files
+        Object.values(groupSegments(metadataIndex.getProjectFiles(projectName))).forEach(chat => {
+            chats.push({
+                file: chat.file,
+                words: chat.words,
+                chars: chat.chars,
+                bytes: chat.bytes,
+                lines: chat.lines,
+                segments: chat.segments.length,
+                modified: new Date(chat.mtimeMs)
+            });
         });
+        const chatCount = chats.length;
         
         res.json({
             project: projectName,
@@ -850,44 +1532,34 @@ app.get('/api/project/:name/stats', (req, res) => {
 });
 
 // Check file sizes endpoint
-app.get('/api/check-sizes', (req, res) => {
+app.get('/api/check-sizes', async (req, res) => {
     const warnings = [];
     const errors = [];
     const FILE_SIZE_WARNING = 900000; // 900KB
     const FILE_SIZE_LIMIT = 1048576;  // 1MB
     
     try {
-        const projectsDir = path.join(BASE_DIR, 'Projects');
-        const projects = fs.readdirSync(projectsDir);
-        
-        projects.forEach(project => {
-            const projectPath = path.join(projectsDir, project);
-            if (fs.statSync(projectPath).isDirectory()) {
-                const files = fs.readdirSync(projectPath);
-                
-                files.forEach(file => {
-                    if (file.endsWith('.md')) {
-                        const filePath = path.join(projectPath, file);
-                        const stats = fs.statSync(filePath);
-                        
-                        if (stats.size > FILE_SIZE_LIMIT) {
-                            errors.push({
-                                project,
-                                file,
-                                size: stats.size,
-                                overBy: stats.size - FILE_SIZE_LIMIT
-                            });
-                        } else if (stats.size > FILE_SIZE_WARNING) {
-                            warnings.push({
-                                project,
-                                file,
-                                size: stats.size,
-                                percentOfLimit: Math.round(stats.size / FILE_SIZE_LIMIT * 100)
-                            });
-                        }
-                    }
-                });
-            }
+        // Sizes come straight from the scan pool's tree walk - no file reads
+        const listing = await scanProjectsTree(path.join(BASE_DIR, 'Projects'));
+        
+        Object.entries(listing.projects).forEach(([project, { files }]) => {
+            Object.entries(files).forEach(([file, stats]) => {
+                if (stats.size > FILE_SIZE_LIMIT) {
+                    errors.push({
+                        project,
+                        file,
+                        size: stats.size,
+                        overBy: stats.size - FILE_SIZE_LIMIT
+                    });
+                } else if (stats.size > FILE_SIZE_WARNING) {
+                    warnings.push({
+                        project,
+                        file,
+                        size: stats.size,
+                        percentOfLimit: Math.round(stats.size / FILE_SIZE_LIMIT * 100)
+                    });
+                }
+            });
         });
         
         res.json({
@@ -895,8 +1567,11 @@ app.get('/api/check-sizes', (req, res) => {
             errors,
             limits: {
                 warning: FILE_SIZE_WARNING,
-                limit: FILE_SIZE_LIMIT
-            }
+                limit: FILE_SIZE_LIMIT,
+                segment: chatSegments.segmentBytes
+            },
+            // New appends roll over on their own; older files need splitting
+            migrate: errors.length > 0 ? 'npm run migrate-segments' : null
         });
         
     } catch (error) {
@@ -905,6 +1580,79 @@ app.get('/api/check-sizes', (req, res) => {
     }
 });
 
+// Split chat files over the segment size into segments (see
+// migrate-segments.js, which calls this when the server is running)
+app.post('/api/segments/migrate', primaryOnly, async (req, res) => {
+    const dryRun = Boolean(req.body && req.body.dryRun);
+    
+    try {
+        const { listing } = await reconcileIndexes();
+        const migrated = [];
+        for (const [project, { files }] of Object.entries(listing.projects)) {
+            for (const [file, stat] of Object.entries(files)) {
+                if (stat.size <= chatSegments.segmentBytes) continue;
+                // Hold the chat's write chain so no append lands mid-split
+                const filePath = path.join(BASE_DIR, 'Projects', project, file);
+                const report = await withChatFile(filePath, () => chatSegments.migrateFile(project, file, { dryRun }));
+                if (report.skipped) continue;
+                migrated.push(report);
+                if (!dryRun) await logRewrite('migrate', project, file);
+            }
+        }
+        
+        console.log(`📚 Segment migration${dryRun ? ' (dry run)' : ''}: ${migrated.length} files`);
+        res.json({ success: true, dryRun, segmentBytes: chatSegments.segmentBytes, migrated });
+        
+    } catch (error) {
+        console.error('Segment migration error:', error);
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
+// Remove duplicate runs from existing chat files (compact-chats.js)
+app.post('/api/chats/compact', primaryOnly, async (req, res) => {
+    const dryRun = Boolean(req.body && req.body.dryRun);
+    const project = (req.body && req.body.project) || null;
+    
+    try {
+        await reconcileIndexes();
+        const compactor = blockDedup || new BlockDedup({ projectsDir: path.join(BASE_DIR, 'Projects'), chatSegments, io: chatIo });
+        // Each chat is rewritten under its write chain, so no append lands mid-rewrite
+        const compacted = await compactor.compactAll({ dryRun, project, withChat: withChatFile });
+        if (!dryRun) {
+            for (const report of compacted) await logRewrite('compact', report.project, report.file);
+        }
+        const saved = compacted.reduce((total, report) => total + report.bytesBefore - report.bytesAfter, 0);
+        
+        console.log(`🧹 Chat compaction${dryRun ? ' (dry run)' : ''}: ${compacted.length} chats, ${(saved / 1024).toFixed(0)}KB of duplicates`);
+        res.json({ success: true, dryRun, compacted, bytesSaved: saved });
+        
+    } catch (error) {
+        console.error('Chat compaction error:', error);
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
+// Pack idle chats into cold storage now instead of waiting for the timer
+const archiveIdleChats = async ({ dryRun = false } = {}) => {
+    const listing = await scanProjectsTree(path.join(BASE_DIR, 'Projects'));
+    return coldStorage.archiveIdle(listing, { dryRun, withChat: withChatFile });
+};
+
+app.post('/api/archive/run', async (req, res) => {
+    const dryRun = Boolean(req.body && req.body.dryRun);
+    
+    try {
+        const archived = await archiveIdleChats({ dryRun });
+        console.log(`📦 Cold storage run${dryRun ? ' (dry run)' : ''}: ${archived.length} chats`);
+        res.json({ success: true, dryRun, idleDays: coldStorage.idleDays, archived, stats: coldStorage.stats() });
+        
+    } catch (error) {
+        console.error('Cold storage error:', error);
+        res.status(500).json({ success: false, error: error.message });
+    }
+});
+
 // Dashboard
 app.get('/dashboard', (req, res) => {
     res.sendFile(path.join(__dirname, 'dashboard.html'));
@@ -915,8 +1663,49 @@ app.get('/inject.js', (req, res) => {
     res.sendFile(path.join(__dirname, 'claude-desktop-MAIN.js'));
 });
 
+// Background warm-up, in order; the gate steps hold back requests
+warmUp
+    .step('cold storage', () => coldStorage.load(), { gate: true })
+    .step('append log', async () => {
+        appendLog.open();
+        // A standby set up from a copy of the primary's tree starts where the copy was taken
+        if (replicationRole === 'standby' && replicationConfig.fromSeq) appendLog.startAt(replicationConfig.fromSeq);
+        const redone = await appendLog.recover(redoRecord);
+        if (redone > 0) console.log(`🩹 Redid ${redone} logged writes that hadn't reached their chat files`);
+    }, { gate: true })
+    .step('metadata index', () => metadataIndex.load(), { gate: true })
+    .step('content analytics', () => contentAnalytics.load(), { gate: true })
+    .step('search index', () => searchIndex.load(), { gate: true })
+    .step('related index', () => relatedIndex.load(), { gate: true })
+    .step('append sequences', () => appendSequencer.load(), { gate: true })
+    .step('memory queue', () => memoryQueue.open().start(memoryConfig.queueInterval || 5000), { gate: true })
+    .step('project scan', async () => {
+        if (!firstReconcile) firstReconcile = reconcileIndexes();
+        const { projectNames } = await firstReconcile;
+        console.log(`[PATHS] Projects found: ${projectNames.length} projects`);
+        if (projectNames.length > 0) {
+            console.log(`[PATHS] Project folders: ${projectNames.join(', ')}`);
+        }
+    })
+    .step('archiver', () => {
+        if (archiveConfig.enabled === false) return;
+        coldStorage.start(archiveConfig.interval || 60 * 60 * 1000, archiveIdleChats);
+    })
+    .step('replication', () => {
+        if (replicationRole !== 'standby') return;
+        if (!replicationConfig.primary) throw new Error('replication.primary is not set');
+        replicaFollower = new ReplicaFollower({
+            primary: replicationConfig.primary,
+            appendLog,
+            apply: applyReplicated,
+            followerId: replicationConfig.followerId || `${os.hostname()}:${PORT}`,
+            waitMs: replicationConfig.pollWaitMs
+        }).start();
+    });
+
 // Start server
 app.listen(PORT, () => {
+    warmUp.listening();
     console.log('');
     console.log('╔═══════════════════════════════════════════════╗');
     console.log(`║   CLAUDE AUTO-SAVE SERVER V${VERSION}              ║`);
@@ -926,6 +1715,7 @@ app.listen(PORT, () => {
     console.log(`✅ Server running at http://localhost:${PORT}`);
     console.log(`📊 Dashboard: http://localhost:${PORT}/dashboard`);
     console.log(`📁 Save location: ${BASE_DIR}`);
+    console.log(`⚙️  I/O mode: ${IO_MODE}${scanPool ? ` (${scanPool.size} scan workers)` : ''}`);
     console.log('');
     console.log(`🆕 V${VERSION} Improvements:`);
     console.log('   • Files named exactly as chats');
@@ -935,11 +1725,46 @@ app.listen(PORT, () => {
     console.log('');
     console.log('Press Ctrl+C to stop the server');
     console.log('─'.repeat(60));
+    warmUp.run();
 });
 
-// Graceful shutdown
-process.on('SIGINT', () => {
-    console.log('\n\n👋 Shutting down server...');
+// Graceful shutdown - Ctrl+C, or SIGTERM from the menu bar app / STOP.command
+const SHUTDOWN_TIMEOUT = 10 * 1000;
+let shuttingDown = false;
+const shutdown = async (signal) => {
+    if (shuttingDown) return;
+    shuttingDown = true;
+    console.log(`\n\n👋 Shutting down server (${signal})...`);
+    setTimeout(() => {
+        console.log('Warning: Shutdown timed out, exiting without a full flush');
+        process.exit(1);
+    }, SHUTDOWN_TIMEOUT).unref();
+    
+    // Queued appends are written (and synced) before the indexes are saved
+    try {
+        if (replicaFollower) await replicaFollower.stop();
+        await writeQueue.close();
+    } catch (error) {
+        console.error('Write queue flush error:', error);
+    }
+    // Before the gate opens nothing has changed - and half-loaded indexes
+    // (a gate step failed, so the gate never opened) must not overwrite
+    // the saved ones
+    if (warmUp.gateOpen()) {
+        // A save still in flight would land on top of the flush
+        await Promise.all([searchIndex.settle(), relatedIndex.settle()]);
+        metadataIndex.flush();
+        contentAnalytics.flush();
+        searchIndex.flush();
+        relatedIndex.flush();
+        chatSegments.flush();
+        appendSequencer.flush();
+        appendLog.flush();
+    }
+    events.close();
+    coldStorage.stop();
     console.log(`📊 Served ${sessions.size} sessions`);
     process.exit(0);
-});
+};
+process.on('SIGINT', () => shutdown('SIGINT'));
+process.on('SIGTERM', () => shutdown('SIGTERM'));
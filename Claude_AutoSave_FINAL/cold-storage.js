@@ -0,0 +1,439 @@
+// ============================================
+// COLD STORAGE - Compressed packs for idle chats
+// ============================================
+// Chats nobody has touched for `idleDays` are moved
+// out of the synced .md files into per-project pack
+// files (Project/.archive/pack-NNN.gz). Each chat
+// segment is its own gzip member, so one can be read
+// back from its offset without the rest of the pack;
+// Project/.archive/index.json maps file -> pack,
+// offset, length, original size and mtime.
+//
+// wrapIo() gives the server an io object that still
+// lists, stats and reads archived files as if they
+// were on disk, so the indexes, stats, search and
+// project stats don't change. Any write to an
+// archived chat (an append, a compaction) restores
+// the whole chat to plain .md first.
+// ============================================
+
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const util = require('util');
+const zlib = require('zlib');
+const { createIo, writeJsonAtomic } = require('./async-io.js');
+const { parseSegmentName, groupSegments } = require('./chat-segments.js');
+
+const gzip = util.promisify(zlib.gzip);
+const gunzip = util.promisify(zlib.gunzip);
+
+const INDEX_VERSION = 1;
+const ARCHIVE_DIR = '.archive';
+const DEFAULT_IDLE_DAYS = 30;
+const DEFAULT_PACK_BYTES = 8 * 1024 * 1024;   // Start a new pack past this
+const READ_CACHE_SIZE = 8;                     // Decompressed files kept for range reads
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+const packName = (number) => `pack-${String(number).padStart(3, '0')}.gz`;
+const sha1 = (buffer) => crypto.createHash('sha1').update(buffer).digest('hex');
+
+class ColdStorage {
+    constructor({ projectsDir, io = createIo(), idleDays = DEFAULT_IDLE_DAYS, packBytes = DEFAULT_PACK_BYTES }) {
+        this.projectsDir = projectsDir;
+        this.io = io;                   // Plain io - never sees archived files
+        this.idleDays = idleDays;
+        this.packBytes = packBytes;
+        this.projects = new Map();      // project -> { files: { file: entry }, packs: { name: size }, unreadable }
+        this.chains = new Map();        // project -> pack/index write chain
+        this.cache = new Map();         // "project/file" -> Buffer, oldest first
+        this.timer = null;
+        this.running = null;
+        this.counters = {
+            archivedFiles: 0,
+            archivedBytes: 0,
+            packedBytes: 0,
+            promotedFiles: 0,
+            reads: 0,
+            cacheHits: 0,
+            runs: 0
+        };
+        this.lastRun = null;
+    }
+
+    archiveDir(project) {
+        return path.join(this.projectsDir, project, ARCHIVE_DIR);
+    }
+
+    // One pack/index writer per project at a time
+    withProject(project, task) {
+        const previous = this.chains.get(project) || Promise.resolve();
+        const run = previous.then(task, task);
+        const settled = run.catch(() => {});
+        this.chains.set(project, settled);
+        settled.then(() => {
+            if (this.chains.get(project) === settled) this.chains.delete(project);
+        });
+        return run;
+    }
+
+    // ---------- index ----------
+
+    // Read every project's index; a hot .md next to an archived entry wins
+    // (a restore that stopped before its index write). A project that
+    // fails to load is logged and skipped, the others still load
+    async load() {
+        if (!await this.io.exists(this.projectsDir)) return this;
+        for (const project of await this.io.readdir(this.projectsDir)) {
+            try {
+                await this.loadProject(project);
+            } catch (error) {
+                console.log(`⚠️ Archive for ${project} not loaded: ${error.message}`);
+            }
+        }
+        return this;
+    }
+
+    async loadProject(project) {
+        const indexPath = path.join(this.archiveDir(project), 'index.json');
+        let data;
+        try {
+            data = JSON.parse(await this.io.readFile(indexPath));
+        } catch (error) {
+            if (error.code !== 'ENOENT') console.log(`⚠️ Archive index for ${project} unreadable: ${error.message}`);
+            return;
+        }
+        if (data.version !== INDEX_VERSION) return;
+
+        const state = { files: data.files || {}, packs: {}, unreadable: new Set() };
+        let stale = false;
+        for (const file of Object.keys(state.files)) {
+            if (await this.io.exists(path.join(this.projectsDir, project, file))) {
+                delete state.files[file];
+                stale = true;
+            }
+        }
+        for (const name of new Set(Object.values(state.files).map(entry => entry.pack))) {
+            try {
+                state.packs[name] = (await this.io.stat(path.join(this.archiveDir(project), name))).size;
+            } catch (error) {
+                // Its chats stay archived (reads fail until the pack is
+                // back) - dropping them would drop them from every index.
+                // Nothing more is appended to it
+                console.log(`⚠️ Archive pack ${project}/${name} unreadable: ${error.message}`);
+                state.packs[name] = Object.values(state.files)
+                    .filter(entry => entry.pack === name)
+                    .reduce((end, entry) => Math.max(end, entry.offset + entry.length), 0);
+                state.unreadable.add(name);
+            }
+        }
+        this.projects.set(project, state);
+        if (stale) await this.withProject(project, () => this.saveIndex(project));
+    }
+
+    async saveIndex(project) {
+        const state = this.projects.get(project);
+        await this.io.mkdir(this.archiveDir(project));
+        await writeJsonAtomic(path.join(this.archiveDir(project), 'index.json'), {
+            version: INDEX_VERSION,
+            updated: new Date().toISOString(),
+            files: state.files
+        });
+        // Packs whose chats were all restored are only dead bytes now
+        const live = new Set(Object.values(state.files).map(entry => entry.pack));
+        for (const name of Object.keys(state.packs)) {
+            if (live.has(name)) continue;
+            delete state.packs[name];
+            await fs.promises.unlink(path.join(this.archiveDir(project), name)).catch(() => {});
+        }
+    }
+
+    entry(project, file) {
+        const state = this.projects.get(project);
+        return state ? state.files[file] || null : null;
+    }
+
+    // "Projects/<project>/<file>" -> { project, file, entry } when archived
+    locate(filePath) {
+        const parts = path.relative(this.projectsDir, filePath).split(path.sep);
+        if (parts.length !== 2) return null;
+        const entry = this.entry(parts[0], parts[1]);
+        return entry ? { project: parts[0], file: parts[1], entry } : null;
+    }
+
+    archivedFiles(project) {
+        const state = this.projects.get(project);
+        return state ? state.files : {};
+    }
+
+    // Add archived files to a tree listing (scan-worker.js format) with their
+    // original size and mtime, so the indexes see nothing change
+    mergeListing(listing) {
+        this.projects.forEach((state, project) => {
+            const listed = listing.projects[project];
+            if (!listed) return;
+            Object.entries(state.files).forEach(([file, entry]) => {
+                if (!listed.files[file]) listed.files[file] = { size: entry.size, mtimeMs: entry.mtimeMs };
+            });
+        });
+        return listing;
+    }
+
+    // ---------- reads ----------
+
+    async read(project, file) {
+        const key = `${project}/${file}`;
+        this.counters.reads++;
+        if (this.cache.has(key)) {
+            const cached = this.cache.get(key);
+            this.cache.delete(key);
+            this.cache.set(key, cached);
+            this.counters.cacheHits++;
+            return cached;
+        }
+
+        const entry = this.entry(project, file);
+        if (!entry) throw Object.assign(new Error(`ENOENT: not archived: ${key}`), { code: 'ENOENT' });
+        const packed = await this.io.readRange(path.join(this.archiveDir(project), entry.pack), entry.offset, entry.length);
+        const content = await gunzip(packed);
+        if (sha1(content) !== entry.sha1) throw new Error(`Archived copy of ${key} is corrupt`);
+
+        this.cache.set(key, content);
+        while (this.cache.size > READ_CACHE_SIZE) this.cache.delete(this.cache.keys().next().value);
+        return content;
+    }
+
+    // The io the rest of the server uses: archived files look like plain ones
+    wrapIo(io) {
+        const fakeStat = (entry) => ({
+            size: entry.size,
+            mtimeMs: entry.mtimeMs,
+            mtime: new Date(entry.mtimeMs),
+            isFile: () => true,
+            isDirectory: () => false,
+            archived: true
+        });
+        // Writing to an archived chat brings it back first
+        const promoting = (op) => async (file, ...args) => {
+            const found = this.locate(file);
+            if (found) await this.promoteChat(found.project, found.file);
+            return io[op](file, ...args);
+        };
+
+        return Object.assign({}, io, {
+            readFile: async (file) => {
+                const found = this.locate(file);
+                return found ? (await this.read(found.project, found.file)).toString('utf8') : io.readFile(file);
+            },
+            readRange: async (file, start, length) => {
+                const found = this.locate(file);
+                return found ? (await this.read(found.project, found.file)).subarray(start, start + length) : io.readRange(file, start, length);
+            },
+            stat: async (file) => {
+                const found = this.locate(file);
+                return found ? fakeStat(found.entry) : io.stat(file);
+            },
+            exists: async (file) => Boolean(this.locate(file)) || io.exists(file),
+            readdir: async (dir) => {
+                const files = await io.readdir(dir);
+                if (path.dirname(dir) !== this.projectsDir) return files;
+                const archived = Object.keys(this.archivedFiles(path.basename(dir))).filter(file => !files.includes(file));
+                return files.concat(archived);
+            },
+            writeFile: promoting('writeFile'),
+            appendFile: promoting('appendFile'),
+            truncate: promoting('truncate'),
+            rename: async (from, to) => {
+                const found = this.locate(to);
+                if (found) await this.promoteChat(found.project, found.file);
+                return io.rename(from, to);
+            }
+        });
+    }
+
+    // ---------- archive / restore ----------
+
+    // Pack every segment of one chat, then remove the .md files. The pack
+    // is synced, read back and the index written before anything is deleted.
+    async archiveChat(project, files) {
+        return this.withProject(project, async () => {
+            if (!this.projects.has(project)) this.projects.set(project, { files: {}, packs: {}, unreadable: new Set() });
+            const state = this.projects.get(project);
+            const dir = this.archiveDir(project);
+            await this.io.mkdir(dir);
+
+            const packed = [];
+            for (const file of files) {
+                const filePath = path.join(this.projectsDir, project, file);
+                const stat = await fs.promises.stat(filePath);
+                const content = await fs.promises.readFile(filePath);
+                const member = await gzip(content);
+
+                // Current pack, or the next one once it is full
+                const names = Object.keys(state.packs).sort();
+                let name = names[names.length - 1];
+                if (!name || state.unreadable.has(name) || state.packs[name] + member.length > this.packBytes) {
+                    name = packName(names.length > 0 ? parseInt(names[names.length - 1].slice(5, 8), 10) + 1 : 1);
+                    state.packs[name] = 0;
+                }
+                // The file, not the index, says where the member starts: a
+                // crash before an index write leaves bytes no entry points at
+                const handle = await fs.promises.open(path.join(dir, name), 'a');
+                let offset;
+                try {
+                    offset = (await handle.stat()).size;
+                    await handle.write(member, 0, member.length);
+                    await handle.sync();
+                } finally {
+                    await handle.close();
+                }
+                packed.push([file, {
+                    pack: name,
+                    offset,
+                    length: member.length,
+                    size: stat.size,
+                    mtimeMs: stat.mtimeMs,
+                    sha1: sha1(content),
+                    archivedAt: new Date().toISOString()
+                }]);
+                state.packs[name] = offset + member.length;
+                this.counters.archivedBytes += stat.size;
+                this.counters.packedBytes += member.length;
+            }
+
+            // Every member must read back whole before any .md goes
+            for (const [file, entry] of packed) {
+                const stored = await gunzip(await this.io.readRange(path.join(dir, entry.pack), entry.offset, entry.length));
+                if (sha1(stored) !== entry.sha1) throw new Error(`Packed copy of ${project}/${file} does not match, kept the .md`);
+            }
+            packed.forEach(([file, entry]) => { state.files[file] = entry; });
+            await this.saveIndex(project);
+            for (const [file] of packed) {
+                await fs.promises.unlink(path.join(this.projectsDir, project, file));
+            }
+            this.counters.archivedFiles += packed.length;
+            return packed.map(([file, entry]) => ({ file, size: entry.size, packed: entry.length }));
+        });
+    }
+
+    // Write every archived segment of the chat `file` belongs to back as .md
+    // (original mtime kept, so the indexes see no change), then drop them
+    // from the index
+    async promoteChat(project, file) {
+        const chat = parseSegmentName(file).chat;
+        return this.withProject(project, async () => {
+            const archived = Object.keys(this.archivedFiles(project)).filter(name => parseSegmentName(name).chat === chat);
+            if (archived.length === 0) return [];
+
+            for (const name of archived) {
+                const entry = this.entry(project, name);
+                const content = await this.read(project, name);
+                const filePath = path.join(this.projectsDir, project, name);
+                const tmpPath = `${filePath}.tmp`;
+                await fs.promises.writeFile(tmpPath, content);
+                await fs.promises.utimes(tmpPath, new Date(), new Date(entry.mtimeMs));
+                await fs.promises.rename(tmpPath, filePath);
+            }
+
+            const state = this.projects.get(project);
+            archived.forEach(name => {
+                delete state.files[name];
+                this.cache.delete(`${project}/${name}`);
+            });
+            await this.saveIndex(project);
+            this.counters.promotedFiles += archived.length;
+            console.log(`📤 Restored ${project}/${chat} from cold storage (${archived.length} files)`);
+            return archived;
+        });
+    }
+
+    // Archive every chat whose newest segment is older than idleDays. Takes
+    // a tree listing (scan-worker.js) so no extra walk is needed;
+    // `withChat(filePath, task)` lets the server hold each chat's write chain
+    async archiveIdle(listing, { now = Date.now(), dryRun = false, withChat = (filePath, task) => task() } = {}) {
+        const cutoff = now - this.idleDays * DAY_MS;
+        const results = [];
+        for (const [project, { files }] of Object.entries(listing.projects)) {
+            const hot = {};
+            Object.entries(files).forEach(([file, stat]) => {
+                if (!this.entry(project, file)) hot[file] = { words: 0, chars: 0, bytes: stat.size, lines: 0, mtimeMs: stat.mtimeMs };
+            });
+            for (const [chat, group] of Object.entries(groupSegments(hot))) {
+                if (group.mtimeMs >= cutoff) continue;
+                const segmentFiles = group.segments.map(segment => segment.file);
+                const report = { project, chat, files: segmentFiles.length, bytes: group.bytes, idleDays: Math.floor((now - group.mtimeMs) / DAY_MS) };
+                if (!dryRun) {
+                    try {
+                        const packed = await withChat(path.join(this.projectsDir, project, group.file), async () => {
+                            // Written to while we waited for the chain - still hot
+                            const newest = Math.max(...await Promise.all(segmentFiles.map(async file =>
+                                (await fs.promises.stat(path.join(this.projectsDir, project, file))).mtimeMs)));
+                            return newest >= cutoff ? null : this.archiveChat(project, segmentFiles);
+                        });
+                        if (!packed) continue;
+                        report.packedBytes = packed.reduce((total, item) => total + item.packed, 0);
+                    } catch (error) {
+                        console.log(`Warning: Could not archive ${project}/${chat}: ${error.message}`);
+                        continue;
+                    }
+                }
+                results.push(report);
+            }
+        }
+        return results;
+    }
+
+    // Run `task` (which calls archiveIdle) now and every `interval` ms
+    start(interval, task) {
+        const run = () => {
+            if (this.running) return;
+            this.running = Promise.resolve()
+                .then(task)
+                .then(results => {
+                    this.counters.runs++;
+                    this.lastRun = new Date().toISOString();
+                    if (results && results.length > 0) {
+                        console.log(`📦 Archived ${results.length} idle chats to cold storage`);
+                    }
+                })
+                .catch(error => console.error('Cold storage error:', error))
+                .finally(() => { this.running = null; });
+        };
+        run();
+        this.timer = setInterval(run, interval);
+        if (this.timer.unref) this.timer.unref();
+        return this;
+    }
+
+    stop() {
+        clearInterval(this.timer);
+        this.timer = null;
+    }
+
+    stats() {
+        let files = 0;
+        let packs = 0;
+        let packBytes = 0;
+        let originalBytes = 0;
+        this.projects.forEach(state => {
+            Object.values(state.files).forEach(entry => {
+                files++;
+                originalBytes += entry.size;
+            });
+            Object.values(state.packs).forEach(size => {
+                packs++;
+                packBytes += size;
+            });
+        });
+        return Object.assign({
+            idleDays: this.idleDays,
+            files,
+            packs,
+            packBytes,
+            originalBytes,
+            lastRun: this.lastRun
+        }, this.counters);
+    }
+}
+
+module.exports = { ColdStorage, ARCHIVE_DIR };
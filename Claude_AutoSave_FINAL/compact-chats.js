@@ -0,0 +1,102 @@
+#!/usr/bin/env node
+// ============================================
+// COMPACT CHATS - Remove duplicate transcripts
+// ============================================
+// Usage: node compact-chats.js [--dry-run] [Project]
+//
+// Rewrites chat files (every segment) without the
+// duplicate runs that full captures left behind,
+// using the same block hashing as the append path
+// (block-dedup.js). If the server is running the
+// work is handed to it, so no append can land
+// mid-rewrite.
+// ============================================
+
+const fs = require('fs');
+const http = require('http');
+const path = require('path');
+const { ChatSegments, DEFAULT_SEGMENT_BYTES } = require('./chat-segments.js');
+const { BlockDedup } = require('./block-dedup.js');
+const { findClaudeConversationsPath } = require('./path-finder-portable.js');
+
+const dryRun = process.argv.includes('--dry-run');
+const project = process.argv.slice(2).find(arg => !arg.startsWith('--')) || null;
+
+const readConfig = () => {
+    try {
+        return JSON.parse(fs.readFileSync(path.join(__dirname, 'config.json'), 'utf8'));
+    } catch (error) {
+        return {};
+    }
+};
+
+const config = readConfig();
+const PORT = (config.server && config.server.port) || 3737;
+
+// POST to the running server; resolves null if nothing is listening
+const askServer = () => new Promise((resolve, reject) => {
+    const body = JSON.stringify({ dryRun, project });
+    const req = http.request({
+        host: 'localhost',
+        port: PORT,
+        path: '/api/chats/compact',
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(body) }
+    }, (res) => {
+        let data = '';
+        res.on('data', chunk => { data += chunk; });
+        res.on('end', () => {
+            try {
+                const result = JSON.parse(data);
+                if (res.statusCode !== 200) return reject(new Error(result.error || `HTTP ${res.statusCode}`));
+                resolve(result.compacted);
+            } catch (error) {
+                reject(error);
+            }
+        });
+    });
+    req.on('error', (error) => {
+        if (error.code === 'ECONNREFUSED') resolve(null);
+        else reject(error);
+    });
+    req.end(body);
+});
+
+const main = async () => {
+    let compacted = await askServer();
+    if (compacted) {
+        console.log(`✅ Server running on port ${PORT} - compacted through the server`);
+    } else {
+        const projectsDir = path.join(findClaudeConversationsPath(__dirname), 'Projects');
+        const dedupConfig = config.dedup || {};
+        const dedup = new BlockDedup({
+            projectsDir,
+            chatSegments: new ChatSegments({
+                projectsDir,
+                segmentBytes: (config.storage && config.storage.segmentBytes) || DEFAULT_SEGMENT_BYTES
+            }),
+            minBlockChars: dedupConfig.minBlockChars,
+            minRunChars: dedupConfig.minRunChars,
+            minRunBlocks: dedupConfig.minRunBlocks
+        });
+        compacted = await dedup.compactAll({ dryRun, project });
+        // Indexes notice the changed files (mtime/size) on the server's next reconcile
+    }
+
+    if (compacted.length === 0) {
+        console.log('✅ No duplicate runs found');
+        return;
+    }
+    let saved = 0;
+    compacted.forEach(({ project, file, bytesBefore, bytesAfter, skippedBlocks }) => {
+        saved += bytesBefore - bytesAfter;
+        console.log(`${dryRun ? '🔍 Would compact' : '🧹 Compacted'} ${project}/${file}: ` +
+            `${(bytesBefore / 1024).toFixed(0)}KB -> ${(bytesAfter / 1024).toFixed(0)}KB (${skippedBlocks} blocks)`);
+    });
+    console.log(`${dryRun ? 'Would save' : 'Saved'} ${(saved / 1024).toFixed(0)}KB in ${compacted.length} chats`);
+};
+
+main().catch(error => {
+    console.error('❌ Compaction failed:', error.message);
+    process.exit(1);
+});
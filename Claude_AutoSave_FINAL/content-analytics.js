@@ -0,0 +1,280 @@
+// ============================================
+// CONTENT ANALYTICS - Running dashboard counters
+// ============================================
+// People, bug, solution and memory term counts plus
+// daily/weekly/monthly activity buckets, kept as
+// running counters. Appends update them from the
+// delta; a file is only re-analyzed when it changed
+// outside the server.
+// ============================================
+
+const fs = require('fs');
+const { writeJsonAtomic, writeJsonAtomicSync } = require('./async-io.js');
+
+const ANALYTICS_VERSION = 1;
+const SAVE_DELAY = 2000; // Batch analytics writes (ms)
+const TAIL_LENGTH = 40;  // Chars kept per file to catch matches across appends
+
+// Same terms /api/stats has always counted
+const TERM_GROUPS = {
+    bugs: ['bug', 'error', 'issue', 'problem', 'broken', 'fail', 'crash', 'exception'],
+    solutions: ['fix', 'solve', 'solution', 'resolve', 'answer', 'working', 'success'],
+    memories: ['remember', 'recall', 'conversation', 'discussed', 'mentioned', 'talked']
+};
+
+const PEOPLE_PATTERN = /\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\b/g;
+const PEOPLE_STOP_WORDS = new Set(['The', 'This', 'That', 'When', 'Where', 'What', 'How']);
+
+// ============================================
+// Multi-term matcher (Aho-Corasick)
+// ============================================
+// Counts every term of every group in one pass over
+// the text instead of one regex scan per term.
+class TermMatcher {
+    constructor(groups) {
+        this.groupNames = Object.keys(groups);
+        this.maxTermLength = 0;
+        this.nodes = [{ next: new Map(), fail: 0, out: [] }];
+
+        // Build the trie
+        this.groupNames.forEach((group, groupIndex) => {
+            groups[group].forEach(term => {
+                let node = 0;
+                for (const ch of term) {
+                    let child = this.nodes[node].next.get(ch);
+                    if (child === undefined) {
+                        child = this.nodes.length;
+                        this.nodes.push({ next: new Map(), fail: 0, out: [] });
+                        this.nodes[node].next.set(ch, child);
+                    }
+                    node = child;
+                }
+                this.nodes[node].out.push(groupIndex);
+                this.maxTermLength = Math.max(this.maxTermLength, term.length);
+            });
+        });
+
+        // Failure links, breadth first
+        const queue = [];
+        this.nodes[0].next.forEach(child => queue.push(child));
+        while (queue.length > 0) {
+            const current = queue.shift();
+            this.nodes[current].next.forEach((child, ch) => {
+                let fail = this.nodes[current].fail;
+                while (fail !== 0 && !this.nodes[fail].next.has(ch)) {
+                    fail = this.nodes[fail].fail;
+                }
+                const target = this.nodes[fail].next.get(ch);
+                this.nodes[child].fail = target !== undefined && target !== child ? target : 0;
+                this.nodes[child].out = this.nodes[child].out.concat(this.nodes[this.nodes[child].fail].out);
+                queue.push(child);
+            });
+        }
+    }
+
+    // Count matches in already-lowercased text; matches ending before
+    // `fromIndex` are skipped (they were counted on a previous append)
+    count(text, fromIndex = 0) {
+        const counts = {};
+        this.groupNames.forEach(group => { counts[group] = 0; });
+
+        let node = 0;
+        for (let i = 0; i < text.length; i++) {
+            const ch = text[i];
+            while (node !== 0 && !this.nodes[node].next.has(ch)) {
+                node = this.nodes[node].fail;
+            }
+            node = this.nodes[node].next.get(ch) || 0;
+            if (i >= fromIndex) {
+                const out = this.nodes[node].out;
+                for (let k = 0; k < out.length; k++) {
+                    counts[this.groupNames[out[k]]]++;
+                }
+            }
+        }
+        return counts;
+    }
+}
+
+const findPeople = (text) => {
+    const names = new Set();
+    const matches = text.match(PEOPLE_PATTERN) || [];
+    matches.forEach(name => {
+        if (name.length > 2 && !PEOPLE_STOP_WORDS.has(name)) names.add(name);
+    });
+    return names;
+};
+
+const dayKey = (date) => {
+    const d = new Date(date);
+    const pad = (n) => String(n).padStart(2, '0');
+    return `${d.getFullYear()}-${pad(d.getMonth() + 1)}-${pad(d.getDate())}`;
+};
+
+class ContentAnalytics {
+    constructor({ analyticsPath }) {
+        this.analyticsPath = analyticsPath;
+        this.matcher = new TermMatcher(TERM_GROUPS);
+        this.saveTimer = null;
+        this.reset();
+    }
+
+    reset() {
+        this.files = {};   // "project/file" -> per-file counters
+        this.totals = { bugs: 0, solutions: 0, memories: 0, people: 0 };
+        this.days = {};    // "YYYY-MM-DD" -> files last modified that day
+    }
+
+    load() {
+        try {
+            if (fs.existsSync(this.analyticsPath)) {
+                const data = JSON.parse(fs.readFileSync(this.analyticsPath, 'utf8'));
+                if (data.version === ANALYTICS_VERSION) {
+                    this.files = data.files || {};
+                    this.totals = data.totals || this.totals;
+                    this.days = data.days || {};
+                }
+            }
+        } catch (error) {
+            console.log(`⚠️ Analytics cache unreadable, rebuilding: ${error.message}`);
+            this.reset();
+        }
+        return this;
+    }
+
+    snapshot() {
+        return {
+            version: ANALYTICS_VERSION,
+            updated: new Date().toISOString(),
+            files: this.files,
+            totals: this.totals,
+            days: this.days
+        };
+    }
+
+    flush() {
+        if (this.saveTimer) {
+            clearTimeout(this.saveTimer);
+            this.saveTimer = null;
+        }
+        writeJsonAtomicSync(this.analyticsPath, this.snapshot());
+    }
+
+    scheduleSave() {
+        if (this.saveTimer) return;
+        this.saveTimer = setTimeout(() => {
+            this.saveTimer = null;
+            writeJsonAtomic(this.analyticsPath, this.snapshot()).catch(error => {
+                console.error('Analytics save error:', error);
+            });
+        }, SAVE_DELAY);
+        if (this.saveTimer.unref) this.saveTimer.unref();
+    }
+
+    // Follow a MetadataIndex so counters move with every append/rescan
+    attach(metadataIndex) {
+        this.metadataIndex = metadataIndex;
+        metadataIndex.on('append', (project, file, text) => this.recordAppend(project, file, text));
+        metadataIndex.on('rescan', (project, file, content, mtimeMs) => this.rebuildFile(project, file, content, mtimeMs));
+        metadataIndex.on('remove', (project, file) => this.removeFile(project, file));
+        return this;
+    }
+
+    // Swap one file's contribution to the totals and day buckets
+    setFile(key, entry) {
+        const previous = this.files[key];
+        if (previous) {
+            this.totals.bugs -= previous.bugs;
+            this.totals.solutions -= previous.solutions;
+            this.totals.memories -= previous.memories;
+            this.totals.people -= previous.people.length;
+            if (this.days[previous.day] && --this.days[previous.day] === 0) {
+                delete this.days[previous.day];
+            }
+        }
+        if (entry) {
+            this.files[key] = entry;
+            this.totals.bugs += entry.bugs;
+            this.totals.solutions += entry.solutions;
+            this.totals.memories += entry.memories;
+            this.totals.people += entry.people.length;
+            this.days[entry.day] = (this.days[entry.day] || 0) + 1;
+        } else {
+            delete this.files[key];
+        }
+        this.scheduleSave();
+    }
+
+    // Analyze a whole file (one read, one matcher pass)
+    rebuildFile(project, file, content, modified = Date.now()) {
+        const counts = this.matcher.count(content.toLowerCase());
+        this.setFile(`${project}/${file}`, {
+            bugs: counts.bugs,
+            solutions: counts.solutions,
+            memories: counts.memories,
+            people: Array.from(findPeople(content)),
+            bytes: Buffer.byteLength(content, 'utf8'),
+            tail: content.slice(-TAIL_LENGTH),
+            day: dayKey(modified)
+        });
+    }
+
+    // Update counters from appended text only
+    recordAppend(project, file, text) {
+        const key = `${project}/${file}`;
+        const entry = this.files[key];
+        if (!entry) {
+            // Never analyzed - the next stats call rebuilds it from disk
+            return;
+        }
+
+        // Prefix with the previous tail so matches spanning the boundary
+        // are found, but only count the ones that end inside the new text
+        const tailLower = entry.tail.slice(-(this.matcher.maxTermLength - 1)).toLowerCase();
+        const counts = this.matcher.count(tailLower + text.toLowerCase(), tailLower.length);
+
+        // People is a per-file set, so rescanning the tail is harmless
+        // (it stays a rough estimate, as it always was)
+        const people = new Set(entry.people);
+        findPeople(entry.tail + text).forEach(name => people.add(name));
+
+        this.setFile(key, {
+            bugs: entry.bugs + counts.bugs,
+            solutions: entry.solutions + counts.solutions,
+            memories: entry.memories + counts.memories,
+            people: Array.from(people),
+            bytes: entry.bytes + Buffer.byteLength(text, 'utf8'),
+            tail: (entry.tail + text).slice(-TAIL_LENGTH),
+            day: dayKey(Date.now())
+        });
+    }
+
+    removeFile(project, file) {
+        this.setFile(`${project}/${file}`, null);
+    }
+
+    // Any indexed file we have no (or outdated) counters for - first run,
+    // or a cache lost between restarts; appends and rescans cover the rest
+    needsRebuild(project, file, meta) {
+        const entry = this.files[`${project}/${file}`];
+        return !entry || entry.bytes !== meta.bytes;
+    }
+
+    // Activity buckets, same cut-offs /api/stats has always used
+    activity(now = new Date()) {
+        const today = new Date(now.getFullYear(), now.getMonth(), now.getDate());
+        const todayKey = dayKey(today);
+        const weekKey = dayKey(today.getTime() - (7 * 24 * 60 * 60 * 1000));
+        const monthKey = dayKey(today.getTime() - (30 * 24 * 60 * 60 * 1000));
+        const buckets = { today: 0, thisWeek: 0, thisMonth: 0 };
+
+        Object.entries(this.days).forEach(([day, count]) => {
+            if (day >= todayKey) buckets.today += count;
+            if (day >= weekKey) buckets.thisWeek += count;
+            if (day >= monthKey) buckets.thisMonth += count;
+        });
+        return buckets;
+    }
+}
+
+module.exports = { ContentAnalytics, TermMatcher, TERM_GROUPS };
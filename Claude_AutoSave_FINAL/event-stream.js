@@ -0,0 +1,140 @@
+// ============================================
+// EVENT STREAM - Server-Sent Events for the
+// dashboard
+// ============================================
+// Small events (appends, project counters, session
+// start/end) are numbered and kept in a ring buffer.
+// A client that reconnects with Last-Event-ID gets
+// only what it missed; a new client, or one that
+// fell out of the buffer, gets a fresh snapshot.
+// ============================================
+
+const DEFAULT_BUFFER_SIZE = 1000;
+const HEARTBEAT_INTERVAL = 25 * 1000;      // Keeps proxies and idle sockets open
+const MAX_CLIENT_BUFFER = 1024 * 1024;     // Slow client: drop it, it resumes later
+const RETRY_MS = 3000;
+
+class EventStream {
+    constructor({ snapshot, bufferSize = DEFAULT_BUFFER_SIZE }) {
+        this.snapshot = snapshot;           // async () => view of the current state
+        this.bufferSize = bufferSize;
+        // Ids restart with the server; the epoch tells a client its id is stale
+        this.epoch = Date.now().toString(36);
+        this.seq = 0;
+        this.buffer = [];                   // { seq, type, data }
+        this.clients = new Set();
+        this.published = 0;
+        this.dropped = 0;
+        this.heartbeat = null;
+    }
+
+    lastEventId() {
+        return `${this.epoch}-${this.seq}`;
+    }
+
+    publish(type, data) {
+        const event = { seq: ++this.seq, type, data };
+        this.buffer.push(event);
+        if (this.buffer.length > this.bufferSize) this.buffer.shift();
+        this.published++;
+        this.clients.forEach(res => this.send(res, event));
+    }
+
+    format({ seq, type, data }) {
+        return `id: ${this.epoch}-${seq}\nevent: ${type}\ndata: ${JSON.stringify(data)}\n\n`;
+    }
+
+    send(res, event) {
+        if (res.writableLength > MAX_CLIENT_BUFFER) {
+            this.dropped++;
+            this.clients.delete(res);
+            res.end();
+            return;
+        }
+        res.write(this.format(event));
+    }
+
+    // Events after `lastId`, or null when they can't be replayed
+    missedSince(lastId) {
+        const match = /^([a-z0-9]+)-(\d+)$/.exec(lastId || '');
+        if (!match || match[1] !== this.epoch) return null;
+        const seq = parseInt(match[2], 10);
+        if (seq > this.seq) return null;
+        if (seq === this.seq) return [];
+        if (this.buffer.length === 0 || this.buffer[0].seq > seq + 1) return null;
+        return this.buffer.filter(event => event.seq > seq);
+    }
+
+    // GET handler: resume from Last-Event-ID, otherwise start with a snapshot
+    async handle(req, res) {
+        res.writeHead(200, {
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'Connection': 'keep-alive',
+            'X-Accel-Buffering': 'no'
+        });
+        res.write(`retry: ${RETRY_MS}\n\n`);
+
+        // Registered before the snapshot await: a client gone by the time
+        // it is built must not be added (and written to) afterwards
+        let closed = false;
+        req.on('close', () => {
+            closed = true;
+            this.clients.delete(res);
+            if (this.clients.size === 0) this.stopHeartbeat();
+        });
+
+        const lastId = req.headers['last-event-id'] || req.query.lastEventId;
+        const missed = this.missedSince(lastId);
+        if (missed) {
+            missed.forEach(event => res.write(this.format(event)));
+        } else {
+            try {
+                // Events published while the snapshot is built come after it
+                const seq = this.seq;
+                const data = await this.snapshot();
+                if (closed) return;
+                res.write(this.format({ seq, type: 'snapshot', data }));
+                this.buffer.filter(event => event.seq > seq).forEach(event => res.write(this.format(event)));
+            } catch (error) {
+                console.error('Event stream snapshot error:', error);
+                res.end();
+                return;
+            }
+        }
+
+        if (closed) return;
+        this.clients.add(res);
+        this.startHeartbeat();
+    }
+
+    startHeartbeat() {
+        if (this.heartbeat) return;
+        this.heartbeat = setInterval(() => {
+            this.clients.forEach(res => res.write(': ping\n\n'));
+        }, HEARTBEAT_INTERVAL);
+    }
+
+    stopHeartbeat() {
+        clearInterval(this.heartbeat);
+        this.heartbeat = null;
+    }
+
+    close() {
+        this.stopHeartbeat();
+        this.clients.forEach(res => res.end());
+        this.clients.clear();
+    }
+
+    stats() {
+        return {
+            clients: this.clients.size,
+            lastEventId: this.lastEventId(),
+            buffered: this.buffer.length,
+            published: this.published,
+            droppedClients: this.dropped
+        };
+    }
+}
+
+module.exports = { EventStream };
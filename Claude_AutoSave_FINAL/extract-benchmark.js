@@ -0,0 +1,131 @@
+#!/usr/bin/env node
+// ============================================
+// EXTRACTION BENCHMARK
+// ============================================
+// Usage: node extract-benchmark.js [MB]
+//
+// Compares the old per-pattern regex extraction
+// (server + bridge, one global scan per pattern)
+// with the single-pass memory-extractor.js, inline
+// and through the worker pool + ExtractionQueue,
+// and prints MB/s for each.
+// ============================================
+
+const path = require('path');
+const { extract, toMemories, toEntities } = require('./memory-extractor.js');
+const { WorkerPool } = require('./worker-pool.js');
+const { ExtractionQueue } = require('./extraction-queue.js');
+
+const TARGET_MB = parseFloat(process.argv[2]) || 8;
+
+// Chat-like text with the trigger words mixed in
+const SAMPLE_LINES = [
+    'Human: I keep getting an error: Cannot read properties of undefined when the server starts.',
+    'Assistant: Let me look at that. We decided to move the config loading into path-finder-portable.js first.',
+    'The problem: the file: claude-server-v5.js reads config.json before ensureDirectories runs',
+    'We will add a check so the folder exists before anything is written to it',
+    'Fixed: moved ensureDirectories above the first read and added a fallback',
+    'I am using Visual Studio Code with the MCP tool: desktop-commander for this.',
+    'Solution: restart the server after the change and the dashboard loads again',
+    'This is a plain line of conversation without any of the trigger words in it at all,',
+    'just enough ordinary prose to make the sample look like a real chat transcript.',
+    'Through Claude Desktop the memory server keeps what we talked about between sessions',
+    'Most of a real conversation is ordinary explanation like this, with code samples,',
+    'lists of steps, and back-and-forth questions that never hit any of the triggers.',
+    'Assistant: That makes sense. Here is the updated version of the function below.',
+    'It reads the listing once, compares sizes and modification times, and moves on.',
+    'Human: Great, that looks right to me. Can you also check the dashboard numbers?'
+];
+
+function makeCorpus(megabytes) {
+    const lines = [];
+    let size = 0;
+    for (let i = 0; size < megabytes * 1048576; i++) {
+        const line = SAMPLE_LINES[i % SAMPLE_LINES.length];
+        lines.push(line);
+        size += line.length + 1;
+    }
+    return lines.join('\n');
+}
+
+// The extraction this replaced: every pattern is its own pass over the
+// whole text, collecting its captures
+function legacyExtract(text) {
+    const passes = [
+        /(?:file|script|code):\s*([\w\-\.]+)/gi,
+        /(?:decided?|agreed?|chose|will)\s+(?:to\s+)?([^\n\.]+)/gi,
+        /(?:problem|issue|bug|error):\s*([^\n]+)/gi,
+        /(?:solution|fixed|resolved):\s*([^\n]+)/gi,
+        /(?:using|with|via|through)\s+([A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)*)/g,
+        /(?:MCP|server|tool|command):\s*([a-zA-Z-]+)/g,
+        /desktop-commander|memory|sqlite|github|puppeteer|reddit/gi,
+        /(?:bug|issue|problem|error):\s*([^\n]+)/gi,
+        /(?:fix|fixed|solution|solved|resolved):\s*([^\n]+)/gi
+    ];
+    return passes.map(pattern => {
+        const captures = [];
+        let match;
+        while ((match = pattern.exec(text)) !== null) {
+            if (match[1]) captures.push(match[1].substring(0, 200));
+        }
+        return captures;
+    });
+}
+
+const mbPerSec = (bytes, ms) => Math.round(bytes / 1048576 / (ms / 1000) * 10) / 10;
+
+function time(fn) {
+    const started = process.hrtime.bigint();
+    const result = fn();
+    return { result, ms: Number(process.hrtime.bigint() - started) / 1e6 };
+}
+
+async function main() {
+    const corpus = makeCorpus(TARGET_MB);
+    const bytes = Buffer.byteLength(corpus, 'utf8');
+    console.log(`📊 Corpus: ${(bytes / 1048576).toFixed(1)}MB`);
+
+    // Warm up both paths
+    legacyExtract(corpus.slice(0, 100000));
+    extract(corpus.slice(0, 100000));
+
+    const legacy = time(() => legacyExtract(corpus));
+    // Captures only on both sides; building entities costs the same either way
+    const single = time(() => extract(corpus));
+    toMemories(single.result, { chatName: 'Benchmark', project: 'Bench' });
+    toEntities(single.result, { projectName: 'Bench', chatTitle: 'Benchmark' });
+
+    // Appends arrive as deltas; feed ~4KB pieces through the real queue
+    const pool = new WorkerPool(path.join(__dirname, 'extract-worker.js'), { size: 2, name: 'extract' });
+    const queue = new ExtractionQueue({
+        run: (payload) => pool.run(payload),
+        concurrency: pool.size,
+        maxPendingBytes: bytes + 1
+    });
+    const deltas = corpus.match(/[\s\S]{1,4096}/g);
+    const pooledStart = Date.now();
+    // Main-thread cost of handing the deltas off (what an append pays)
+    const handoff = time(() => deltas.forEach((delta, i) => queue.push('Bench', `Chat ${i % 8}`, delta)));
+    while (queue.queue.length > 0 || queue.active > 0) {
+        await new Promise(resolve => setTimeout(resolve, 5));
+    }
+    const pooledMs = Date.now() - pooledStart;
+    await pool.close();
+
+    const results = {
+        corpusMB: Math.round(bytes / 1048576 * 10) / 10,
+        legacyRegexMBps: mbPerSec(bytes, legacy.ms),
+        singlePassMBps: mbPerSec(bytes, single.ms),
+        pooledMBps: mbPerSec(bytes, pooledMs),
+        pooledPerWorkerMBps: queue.stats().mbPerSec,
+        mainThreadHandoffMBps: mbPerSec(bytes, handoff.ms),
+        deltas: deltas.length,
+        chunksProcessed: queue.counters.processed
+    };
+    console.log(JSON.stringify(results, null, 2));
+}
+
+main().catch(error => {
+    console.error('❌ Benchmark failed:', error);
+    process.exit(1);
+});
@@ -0,0 +1,33 @@
+// ============================================
+// EXTRACT WORKER - Memory extraction off the
+// main thread
+// ============================================
+// Runs memory-extractor.js over appended deltas for
+// the server's ExtractionQueue, so a huge paste is
+// scanned here instead of on the HTTP thread. The
+// memory queue's store sink merges and writes
+// extracted-memories.json here too.
+// ============================================
+
+const { parentPort, isMainThread } = require('worker_threads');
+const { extract, toMemories } = require('./memory-extractor.js');
+const { storeMemories } = require('./memory-queue.js');
+
+const tasks = {
+    extract: ({ text, chatName, project }) => toMemories(extract(text), { chatName, project }),
+    storeMemories: ({ memoryPath, entries }) => storeMemories(memoryPath, entries)
+};
+
+if (!isMainThread && parentPort) {
+    parentPort.on('message', (message) => {
+        try {
+            const handler = tasks[message.type];
+            if (!handler) throw new Error(`Unknown extract task: ${message.type}`);
+            parentPort.postMessage({ id: message.id, result: handler(message) });
+        } catch (error) {
+            parentPort.postMessage({ id: message.id, error: error.message });
+        }
+    });
+}
+
+module.exports = { tasks };
@@ -0,0 +1,133 @@
+// ============================================
+// EXTRACTION QUEUE - Bounded feed for memory
+// extraction
+// ============================================
+// Appended deltas wait here for a free extraction
+// worker. Deltas for the same chat coalesce while
+// they wait, large pastes are cut into chunks, and
+// once maxPendingBytes are waiting new text is shed
+// (and counted) instead of growing memory or holding
+// up the append that produced it.
+// ============================================
+
+const { splitAtLines } = require('./chat-segments.js');
+
+const DROP_WARNING_INTERVAL = 60 * 1000;
+
+class ExtractionQueue {
+    constructor({
+        run,                               // payload -> Promise<memories>
+        concurrency = 2,
+        maxPendingBytes = 8 * 1024 * 1024,
+        chunkBytes = 256 * 1024,
+        minChars = 100,                    // Shorter deltas hold nothing worth extracting
+        onResult = () => {}
+    }) {
+        this.run = run;
+        this.concurrency = Math.max(1, concurrency);
+        this.maxPendingBytes = maxPendingBytes;
+        this.chunkBytes = chunkBytes;
+        this.minChars = minChars;
+        this.onResult = onResult;
+
+        this.queue = [];          // { project, chatName, text, bytes }
+        this.pendingBytes = 0;
+        this.active = 0;
+        this.lastDropWarning = 0;
+        this.counters = {
+            accepted: 0,
+            acceptedBytes: 0,
+            processed: 0,
+            processedBytes: 0,
+            skipped: 0,
+            dropped: 0,
+            droppedBytes: 0,
+            failed: 0,
+            busyMs: 0
+        };
+    }
+
+    // Queue a delta; false when it had to be shed (queue full)
+    push(project, chatName, text) {
+        if (!text) return true;
+        const bytes = Buffer.byteLength(text, 'utf8');
+
+        if (this.pendingBytes + bytes > this.maxPendingBytes) {
+            this.counters.dropped++;
+            this.counters.droppedBytes += bytes;
+            if (Date.now() - this.lastDropWarning > DROP_WARNING_INTERVAL) {
+                this.lastDropWarning = Date.now();
+                console.log(`Warning: Extraction queue full (${(this.pendingBytes / 1048576).toFixed(1)}MB waiting) - skipping new text`);
+            }
+            return false;
+        }
+
+        this.counters.accepted++;
+        this.counters.acceptedBytes += bytes;
+        this.pendingBytes += bytes;
+
+        // Grow the chat's newest waiting item when it still fits in a chunk
+        let last = null;
+        for (let i = this.queue.length - 1; i >= 0; i--) {
+            if (this.queue[i].project === project && this.queue[i].chatName === chatName) {
+                last = this.queue[i];
+                break;
+            }
+        }
+        if (last && last.bytes + bytes <= this.chunkBytes) {
+            last.text += text;
+            last.bytes += bytes;
+        } else {
+            const chunks = bytes > this.chunkBytes ? splitAtLines(text, this.chunkBytes) : [text];
+            chunks.forEach(chunk => {
+                this.queue.push({ project, chatName, text: chunk, bytes: Buffer.byteLength(chunk, 'utf8') });
+            });
+        }
+
+        this.pump();
+        return true;
+    }
+
+    pump() {
+        while (this.active < this.concurrency && this.queue.length > 0) {
+            const item = this.queue.shift();
+            this.pendingBytes -= item.bytes;
+
+            if (item.text.length < this.minChars) {
+                this.counters.skipped++;
+                continue;
+            }
+
+            this.active++;
+            const started = Date.now();
+            this.run({ type: 'extract', text: item.text, chatName: item.chatName, project: item.project })
+                .then(memories => {
+                    this.counters.processed++;
+                    this.counters.processedBytes += item.bytes;
+                    return this.onResult(item, memories);
+                })
+                .catch(error => {
+                    this.counters.failed++;
+                    console.error('Memory extraction error:', error);
+                })
+                .finally(() => {
+                    this.counters.busyMs += Date.now() - started;
+                    this.active--;
+                    this.pump();
+                });
+        }
+    }
+
+    stats() {
+        const { processedBytes, busyMs } = this.counters;
+        return Object.assign({
+            queued: this.queue.length,
+            pendingBytes: this.pendingBytes,
+            active: this.active,
+            // Per-worker throughput while extracting
+            mbPerSec: busyMs > 0 ? Math.round(processedBytes / 1048576 / (busyMs / 1000) * 10) / 10 : 0
+        }, this.counters);
+    }
+}
+
+module.exports = { ExtractionQueue };
@@ -0,0 +1,30 @@
+// ============================================
+// INDEX WORKER - Search index saves off the main
+// thread
+// ============================================
+// Merges the search index's changed terms into their
+// shard files and writes them, with the docs table
+// and new line offsets, for SearchIndex.save(). In sync I/O mode
+// the index calls writeIndexFiles() directly.
+// ============================================
+
+const { parentPort, isMainThread } = require('worker_threads');
+const { writeIndexFiles } = require('./search-index.js');
+
+const tasks = {
+    searchIndex: (message) => writeIndexFiles(message)
+};
+
+if (!isMainThread && parentPort) {
+    parentPort.on('message', (message) => {
+        try {
+            const handler = tasks[message.type];
+            if (!handler) throw new Error(`Unknown index task: ${message.type}`);
+            parentPort.postMessage({ id: message.id, result: handler(message) });
+        } catch (error) {
+            parentPort.postMessage({ id: message.id, error: error.message });
+        }
+    });
+}
+
+module.exports = { tasks };
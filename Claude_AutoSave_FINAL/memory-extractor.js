@@ -0,0 +1,196 @@
+// ============================================
+// MEMORY EXTRACTOR - Single-pass entity scanner
+// ============================================
+// Shared by the server (appended deltas, in the
+// extraction worker pool) and auto-memory-bridge.js.
+// One regex finds every trigger word ("bug:",
+// "decided to", "using Foo") in a single pass over
+// the text; each hit captures what follows with a
+// bounded forward scan, so no pattern can run away
+// on a huge paste.
+// ============================================
+
+const MAX_CAPTURE = 200;      // Longest observation kept (chars)
+
+// "word:" triggers and what they capture (longer words first so the
+// regex below never stops at a prefix)
+const COLON_TRIGGERS = {
+    file: 'files', script: 'files', code: 'files',
+    problem: 'problems', issue: 'problems', bug: 'problems', error: 'problems',
+    fix: 'solutions', fixed: 'solutions', solution: 'solutions', solved: 'solutions', resolved: 'solutions',
+    mcp: 'tools', server: 'tools', tool: 'tools', command: 'tools'
+};
+const DECISION_WORDS = ['decide', 'decided', 'agree', 'agreed', 'chose', 'will'];
+const TOOL_LEADS = ['using', 'with', 'via', 'through']; // Lowercase only, as before
+
+// Group 1: "word:" trigger, group 2: decision word, group 3: tool lead
+const TRIGGERS = new RegExp(
+    `\\b(?:(${Object.keys(COLON_TRIGGERS).sort((a, b) => b.length - a.length).join('|')}):` +
+    `|(${DECISION_WORDS.join('|')})\\s` +
+    `|(${TOOL_LEADS.join('|')})\\s)`,
+    'gi'
+);
+
+// Bounded sticky scanners for what follows a trigger (run at lastIndex)
+const NAME = /[\w\-.]{1,200}/y;
+const TOOL = /[a-zA-Z-]{1,200}/y;
+const LINE = /[^\n]{1,200}/y;
+const DECISION = /[^\n.]{1,200}/y;
+const TOOL_NAME = /[A-Z][a-zA-Z]{1,63}(?:\s+[A-Z][a-zA-Z]{1,63}){0,3}/y;
+
+// Match `pattern` exactly at position i ('' when it doesn't)
+const scanAt = (pattern, text, i) => {
+    pattern.lastIndex = i;
+    const match = pattern.exec(text);
+    return match ? match[0] : '';
+};
+
+const isSpace = (code) => code === 32 || (code >= 9 && code <= 13);
+
+const skipSpaces = (text, i) => {
+    while (i < text.length && isSpace(text.charCodeAt(i))) i++;
+    return i;
+};
+
+// One pass over `text`; returns raw captures by kind
+function extract(text) {
+    const found = { files: [], decisions: [], problems: [], solutions: [], tools: [] };
+    if (!text) return found;
+
+    const triggers = new RegExp(TRIGGERS.source, TRIGGERS.flags);
+    let match;
+    while ((match = triggers.exec(text)) !== null) {
+        const end = match.index + match[0].length;
+
+        if (match[1]) {
+            const kind = COLON_TRIGGERS[match[1].toLowerCase()];
+            const start = skipSpaces(text, end);
+            const value = scanAt(kind === 'files' ? NAME : kind === 'tools' ? TOOL : LINE, text, start);
+            if (value.length > 0) found[kind].push(value);
+        } else if (match[2]) {
+            let start = skipSpaces(text, end);
+            if (text.startsWith('to', start) && isSpace(text.charCodeAt(start + 2))) {
+                start = skipSpaces(text, start + 2);
+            }
+            // Only decisions of 11-199 chars are kept, so never scan further
+            const decision = scanAt(DECISION, text, start).trim();
+            if (decision.length > 10 && decision.length < MAX_CAPTURE) found.decisions.push(decision);
+        } else if (match[3] === match[3].toLowerCase()) {
+            const name = scanAt(TOOL_NAME, text, skipSpaces(text, end)).replace(/\s+/g, ' ');
+            if (name.length > 2) found.tools.push(name);
+        }
+        // The capture may hold further triggers ("error: we decided to ...")
+        triggers.lastIndex = end;
+    }
+
+    return found;
+}
+
+// Server queue format (see memory-queue.js)
+function toMemories(found, { chatName, project }) {
+    const memories = [];
+
+    if (project && project !== 'General') {
+        memories.push({
+            type: 'entity',
+            name: project.replace(/ /g, '_'),
+            entityType: 'Project',
+            observations: [
+                `Active project with chat: ${chatName}`,
+                `Updated: ${new Date().toLocaleDateString()}`
+            ]
+        });
+    }
+
+    found.files.forEach(file => {
+        memories.push({
+            type: 'entity',
+            name: file.replace(/\./g, '_'),
+            entityType: 'File',
+            observations: [`Referenced in ${chatName}`]
+        });
+    });
+
+    if (found.decisions.length > 0) {
+        memories.push({
+            type: 'entity',
+            name: 'Decisions_Log',
+            entityType: 'Knowledge',
+            observations: found.decisions.slice(0, 5).map(d => `${chatName}: ${d}`)
+        });
+    }
+
+    if (found.problems.length > 0) {
+        memories.push({
+            type: 'entity',
+            name: 'Problem_Log',
+            entityType: 'Knowledge',
+            observations: found.problems.slice(0, 3).map(p => p.substring(0, 150))
+        });
+    }
+
+    if (found.solutions.length > 0) {
+        memories.push({
+            type: 'entity',
+            name: 'Solution_Log',
+            entityType: 'Knowledge',
+            observations: found.solutions.slice(0, 3).map(s => s.substring(0, 150))
+        });
+    }
+
+    return memories;
+}
+
+// Memory MCP format used by auto-memory-bridge.js
+function toEntities(found, { projectName, chatTitle }) {
+    const entities = [];
+    const relations = [];
+
+    if (projectName && projectName !== 'General') {
+        entities.push({
+            name: projectName.replace(/ /g, '_'),
+            entityType: 'Project',
+            observations: [
+                `Active project with saved conversations`,
+                `Last updated: ${new Date().toLocaleDateString()}`,
+                `Chat: ${chatTitle}`
+            ]
+        });
+    }
+
+    new Set(found.tools).forEach(tool => {
+        const name = tool.replace(/ /g, '_').replace(/-/g, '_');
+        entities.push({
+            name,
+            entityType: 'Tool',
+            observations: [`Mentioned in ${chatTitle}`]
+        });
+        if (projectName) {
+            relations.push({
+                from: projectName.replace(/ /g, '_'),
+                to: name,
+                relationType: 'uses'
+            });
+        }
+    });
+
+    found.problems.forEach(problem => {
+        entities.push({
+            name: 'Bug_History',
+            entityType: 'Knowledge',
+            observations: [problem]
+        });
+    });
+
+    found.solutions.forEach(solution => {
+        entities.push({
+            name: 'Solution_Database',
+            entityType: 'Knowledge',
+            observations: [solution]
+        });
+    });
+
+    return { entities, relations };
+}
+
+module.exports = { extract, toMemories, toEntities };
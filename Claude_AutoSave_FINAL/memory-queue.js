@@ -0,0 +1,390 @@
+// ============================================
+// MEMORY QUEUE - Durable log between extraction
+// and the memory store
+// ============================================
+// Extracted memories are appended to numbered
+// segment files in .memory-queue/. One consumer
+// reads them in batches of N entries, hands each
+// batch to a sink, and only then moves its saved
+// offset forward (at-least-once: a crash or a
+// failing sink means the batch is delivered again).
+// Fully consumed segments are deleted; nothing is
+// ever truncated. A growing backlog shows up in
+// stats() instead of being dropped.
+// ============================================
+
+const fs = require('fs');
+const path = require('path');
+const os = require('os');
+const { createIo, writeJsonAtomic, writeJsonAtomicSync } = require('./async-io.js');
+
+const CONSUMER_VERSION = 1;
+const SEGMENT_PATTERN = /^(\d{8})\.jsonl$/;
+const DEFAULT_SEGMENT_BYTES = 1024 * 1024;
+const DEFAULT_BATCH_SIZE = 100;
+const DEFAULT_HIGH_WATER_BYTES = 16 * 1024 * 1024;
+const READ_BYTES = 256 * 1024;            // First read per batch; grows for long lines
+const MAX_OBSERVATIONS = 200;             // Per memory in the store sink (newest kept)
+const DEFAULT_MEMORY_PATH = path.join(os.homedir(), '.cache/smart-save-memory/extracted-memories.json');
+
+const segmentName = (number) => `${String(number).padStart(8, '0')}.jsonl`;
+
+class MemoryQueue {
+    constructor({
+        dir,
+        sink,                                   // async (entries) => void; throw to retry
+        io = createIo(),
+        legacyFile = null,                      // Old single-file queue to import once
+        segmentBytes = DEFAULT_SEGMENT_BYTES,
+        batchSize = DEFAULT_BATCH_SIZE,
+        highWaterBytes = DEFAULT_HIGH_WATER_BYTES
+    }) {
+        this.dir = dir;
+        this.sink = sink;
+        this.io = io;
+        this.legacyFile = legacyFile;
+        this.segmentBytes = segmentBytes;
+        this.batchSize = batchSize;
+        this.highWaterBytes = highWaterBytes;
+        this.consumerPath = path.join(dir, 'consumer.json');
+
+        this.segments = new Map();              // segment number -> size on disk
+        this.writeSegment = 1;
+        this.position = { segment: 1, offset: 0 };
+        this.appendChain = Promise.resolve();
+        this.consuming = null;
+        this.timer = null;
+        this.counters = {
+            appended: 0,
+            appendedBytes: 0,
+            delivered: 0,
+            deliveredBytes: 0,
+            batches: 0,
+            failures: 0,
+            consecutiveFailures: 0,
+            skippedLines: 0
+        };
+        this.lastError = null;
+        this.lastDelivery = null;
+    }
+
+    segmentPath(number) {
+        return path.join(this.dir, segmentName(number));
+    }
+
+    open() {
+        fs.mkdirSync(this.dir, { recursive: true });
+        fs.readdirSync(this.dir).forEach(file => {
+            const match = file.match(SEGMENT_PATTERN);
+            if (match) this.segments.set(parseInt(match[1], 10), fs.statSync(path.join(this.dir, file)).size);
+        });
+
+        // Entries left in the old .memory-queue.jsonl become the next segment
+        if (this.legacyFile && fs.existsSync(this.legacyFile)) {
+            const number = this.segments.size > 0 ? Math.max(...this.segments.keys()) + 1 : 1;
+            fs.renameSync(this.legacyFile, this.segmentPath(number));
+            this.segments.set(number, fs.statSync(this.segmentPath(number)).size);
+            console.log(`📦 Imported old memory queue file as segment ${number}`);
+        }
+
+        const numbers = [...this.segments.keys()].sort((a, b) => a - b);
+        this.writeSegment = numbers.length > 0 ? numbers[numbers.length - 1] : 1;
+        if (this.endsTorn(this.writeSegment)) this.writeSegment++;  // Never append onto a torn line
+        this.position = { segment: numbers.length > 0 ? numbers[0] : 1, offset: 0 };
+
+        try {
+            if (fs.existsSync(this.consumerPath)) {
+                const saved = JSON.parse(fs.readFileSync(this.consumerPath, 'utf8'));
+                if (saved.version === CONSUMER_VERSION && this.segments.has(saved.segment)) {
+                    this.position = { segment: saved.segment, offset: saved.offset };
+                }
+            }
+        } catch (error) {
+            console.log(`⚠️ Memory queue offset unreadable, replaying from the oldest segment: ${error.message}`);
+        }
+        return this;
+    }
+
+    endsTorn(number) {
+        const size = this.segments.get(number);
+        if (!size) return false;
+        const fd = fs.openSync(this.segmentPath(number), 'r');
+        try {
+            const last = Buffer.alloc(1);
+            fs.readSync(fd, last, 0, 1, size - 1);
+            return last[0] !== 10;
+        } finally {
+            fs.closeSync(fd);
+        }
+    }
+
+    // Append one entry (writes are serialized; a full segment rolls over)
+    append(entry) {
+        const line = JSON.stringify(entry) + '\n';
+        const bytes = Buffer.byteLength(line, 'utf8');
+        this.appendChain = this.appendChain.then(async () => {
+            const size = this.segments.get(this.writeSegment) || 0;
+            if (size > 0 && size + bytes > this.segmentBytes) this.writeSegment++;
+            await this.io.appendFile(this.segmentPath(this.writeSegment), line);
+            this.segments.set(this.writeSegment, (this.segments.get(this.writeSegment) || 0) + bytes);
+            this.counters.appended++;
+            this.counters.appendedBytes += bytes;
+        });
+        return this.appendChain;
+    }
+
+    // Up to batchSize entries from the consumer position, and where they end
+    async readBatch(limit = this.batchSize) {
+        const entries = [];
+        let { segment, offset } = this.position;
+        let bytes = 0;
+
+        while (entries.length < limit) {
+            const size = this.segments.get(segment);
+            if (size === undefined || offset >= size) {
+                // Move past a finished segment, never past the one being written
+                if (segment >= this.writeSegment) break;
+                segment++;
+                offset = 0;
+                continue;
+            }
+
+            let readLength = Math.min(READ_BYTES, size - offset);
+            let chunk = await this.io.readRange(this.segmentPath(segment), offset, readLength);
+            while (chunk.lastIndexOf(10) === -1 && readLength < size - offset) {
+                readLength = Math.min(readLength * 4, size - offset);
+                chunk = await this.io.readRange(this.segmentPath(segment), offset, readLength);
+            }
+            const end = chunk.lastIndexOf(10);
+            if (end === -1) {
+                // Half-written last line: wait for it, unless a crash left it torn
+                if (segment >= this.writeSegment) break;
+                this.counters.skippedLines++;
+                bytes += size - offset;
+                segment++;
+                offset = 0;
+                continue;
+            }
+
+            let start = 0;
+            while (start <= end && entries.length < limit) {
+                const newline = chunk.indexOf(10, start);
+                const line = chunk.subarray(start, newline).toString('utf8');
+                try {
+                    if (line.trim()) entries.push(JSON.parse(line));
+                } catch (error) {
+                    this.counters.skippedLines++;   // Torn line from a crash
+                }
+                bytes += newline + 1 - start;
+                offset += newline + 1 - start;
+                start = newline + 1;
+            }
+        }
+
+        return { entries, bytes, position: { segment, offset } };
+    }
+
+    // Deliver batches until caught up or the sink fails (it is retried next run)
+    consume() {
+        if (!this.consuming) {
+            this.consuming = this.deliver().finally(() => {
+                this.consuming = null;
+            });
+        }
+        return this.consuming;
+    }
+
+    async deliver() {
+        for (;;) {
+            const batch = await this.readBatch();
+            if (batch.entries.length === 0) {
+                // Skipped-only reads still move the offset
+                if (batch.bytes > 0) await this.commit(batch.position);
+                return;
+            }
+
+            try {
+                await this.sink(batch.entries);
+            } catch (error) {
+                this.counters.failures++;
+                this.counters.consecutiveFailures++;
+                this.lastError = error.message;
+                console.error('Memory queue sink error:', error.message);
+                return;
+            }
+
+            this.counters.batches++;
+            this.counters.delivered += batch.entries.length;
+            this.counters.deliveredBytes += batch.bytes;
+            this.counters.consecutiveFailures = 0;
+            this.lastDelivery = new Date().toISOString();
+            await this.commit(batch.position);
+        }
+    }
+
+    // Save the offset, then drop segments that are entirely behind it
+    async commit(position) {
+        this.position = position;
+        await writeJsonAtomic(this.consumerPath, {
+            version: CONSUMER_VERSION,
+            segment: position.segment,
+            offset: position.offset,
+            updated: new Date().toISOString()
+        });
+        for (const number of [...this.segments.keys()]) {
+            if (number < position.segment) {
+                this.segments.delete(number);
+                await fs.promises.unlink(this.segmentPath(number)).catch(() => {});
+            }
+        }
+    }
+
+    start(interval) {
+        this.consume();
+        this.timer = setInterval(() => this.consume(), interval);
+        return this;
+    }
+
+    stop() {
+        clearInterval(this.timer);
+        this.timer = null;
+    }
+
+    backlogBytes() {
+        let total = 0;
+        this.segments.forEach((size, number) => {
+            if (number >= this.position.segment) total += size;
+        });
+        return Math.max(0, total - this.position.offset);
+    }
+
+    stats() {
+        const backlogBytes = this.backlogBytes();
+        return Object.assign({
+            segments: this.segments.size,
+            backlogBytes,
+            highWaterBytes: this.highWaterBytes,
+            overHighWater: backlogBytes > this.highWaterBytes,
+            position: this.position,
+            lastDelivery: this.lastDelivery,
+            lastError: this.lastError
+        }, this.counters);
+    }
+}
+
+// ============================================
+// SINKS
+// ============================================
+
+// Stand-in that only logs each batch (tests, or no memory store)
+function createLogSink() {
+    return async (entries) => {
+        entries.forEach(entry => {
+            console.log(`  📦 ${entry.memories.length} memories from "${entry.chatName}"`);
+        });
+    };
+}
+
+const STORE_TYPES = {
+    Project: 'projects',
+    File: 'code',
+    Person: 'people',
+    Problem_Log: 'bugs',
+    Solution_Log: 'solutions',
+    Decisions_Log: 'decisions'
+};
+
+// extracted-memories.json kept parsed, with each type's items indexed by
+// name, so merging a batch costs the batch and not the file. It is read
+// again only when its size or mtime moved under us. Sync I/O: this runs
+// in the extract worker (or inline in sync I/O mode)
+class MemoryFile {
+    constructor(memoryPath) {
+        this.memoryPath = memoryPath;
+        this.data = null;
+        this.byName = new Map();        // type -> Map(name -> item)
+        this.stamp = null;              // "size:mtime" as last read or written
+    }
+
+    fileStamp() {
+        try {
+            const stat = fs.statSync(this.memoryPath);
+            return `${stat.size}:${stat.mtimeMs}`;
+        } catch (error) {
+            if (error.code !== 'ENOENT') throw error;
+            return null;
+        }
+    }
+
+    load() {
+        const stamp = this.fileStamp();
+        if (this.data && stamp === this.stamp) return;
+        this.data = stamp === null ? {} : JSON.parse(fs.readFileSync(this.memoryPath, 'utf8'));
+        this.byName = new Map();
+        Object.entries(this.data).forEach(([type, items]) => {
+            if (!Array.isArray(items)) return;
+            const names = new Map();
+            items.forEach(item => {
+                if (item && !names.has(item.name)) names.set(item.name, item);
+            });
+            this.byName.set(type, names);
+        });
+        this.stamp = stamp;
+    }
+
+    // Merging is by name with observations de-duplicated, so a redelivered
+    // batch is a no-op
+    merge(entries) {
+        entries.forEach(({ chatName, project, memories, timestamp }) => {
+            (memories || []).forEach(memory => {
+                const type = STORE_TYPES[memory.name] || STORE_TYPES[memory.entityType] || 'other';
+                if (!Array.isArray(this.data[type])) {
+                    this.data[type] = [];
+                    this.byName.set(type, new Map());
+                }
+                const names = this.byName.get(type);
+                let item = names.get(memory.name);
+                if (!item) {
+                    item = { name: memory.name, entityType: memory.entityType, observations: [], chats: [] };
+                    this.data[type].push(item);
+                    names.set(memory.name, item);
+                }
+                item.observations = [...new Set([...(item.observations || []), ...(memory.observations || [])])]
+                    .slice(-MAX_OBSERVATIONS);
+                const chat = project ? `${project}/${chatName}` : chatName;
+                if (chat && !(item.chats || []).includes(chat)) {
+                    item.chats = [...(item.chats || []), chat].slice(-MAX_OBSERVATIONS);
+                }
+                item.updated = timestamp;
+            });
+        });
+    }
+
+    save() {
+        fs.mkdirSync(path.dirname(this.memoryPath), { recursive: true });
+        writeJsonAtomicSync(this.memoryPath, this.data);
+        this.stamp = this.fileStamp();
+    }
+}
+
+const memoryFiles = new Map();          // path -> MemoryFile, per thread
+
+// Merge a batch into the memory file and write it
+function storeMemories(memoryPath, entries) {
+    if (!memoryFiles.has(memoryPath)) memoryFiles.set(memoryPath, new MemoryFile(memoryPath));
+    const file = memoryFiles.get(memoryPath);
+    file.load();
+    file.merge(entries);
+    file.save();
+    return entries.length;
+}
+
+// Merge into extracted-memories.json for the memory MCP server. With a pool
+// (one worker, so one copy of the file's state) the merge and the write
+// run there, off the server's event loop
+function createMemoryFileSink(memoryPath = DEFAULT_MEMORY_PATH, { pool = null } = {}) {
+    if (pool) return (entries) => pool.run({ type: 'storeMemories', memoryPath, entries });
+    return async (entries) => storeMemories(memoryPath, entries);
+}
+
+module.exports = { MemoryQueue, createLogSink, createMemoryFileSink, storeMemories };
@@ -0,0 +1,237 @@
+// ============================================
+// MEMORY STORE - Indexed extracted memories for
+// the memory MCP server
+// ============================================
+// Parses extracted-memories.json once and keeps
+// it in memory with indexes by type, by entity
+// name and by token. When the file's mtime moves
+// only the items that changed are re-indexed, and
+// every listing is paged so tool responses stay
+// small however big the file gets.
+// ============================================
+
+const fs = require('fs');
+const { tokenizeLine } = require('./search-index.js');
+
+const MEMORY_TYPES = ['people', 'projects', 'bugs', 'solutions', 'preferences', 'code'];
+const RELOAD_CHECK_INTERVAL = 2000;   // At most one stat per window (ms)
+const DEFAULT_LIMIT = 20;
+const MAX_LIMIT = 100;
+const MAX_PREFIX_TERMS = 64;          // Cap on tokens a partial word expands to
+
+// Display name of a memory item ('' when it has none)
+function itemName(item) {
+    if (typeof item === 'string') return item.length <= 80 ? item : '';
+    if (!item || typeof item !== 'object') return '';
+    return String(item.name || item.title || item.person || item.project || '');
+}
+
+// Every string inside an item, for the token index
+function itemText(item, parts = []) {
+    if (typeof item === 'string') parts.push(item);
+    else if (typeof item === 'number') parts.push(String(item));
+    else if (Array.isArray(item)) item.forEach(value => itemText(value, parts));
+    else if (item && typeof item === 'object') Object.values(item).forEach(value => itemText(value, parts));
+    return parts;
+}
+
+// { type: [items] } as written by the extractor, or a flat [items] with a type field
+function flatten(data) {
+    const entries = [];
+    if (Array.isArray(data)) {
+        data.forEach(item => {
+            const type = String((item && (item.category || item.type)) || 'other').toLowerCase();
+            entries.push({ type, item });
+        });
+    } else if (data && typeof data === 'object') {
+        Object.entries(data).forEach(([type, items]) => {
+            if (Array.isArray(items)) items.forEach(item => entries.push({ type, item }));
+        });
+    }
+    return entries;
+}
+
+const addTo = (map, key, id) => {
+    if (!map.has(key)) map.set(key, new Set());
+    map.get(key).add(id);
+};
+
+const removeFrom = (map, key, id) => {
+    const ids = map.get(key);
+    if (!ids) return;
+    ids.delete(id);
+    if (ids.size === 0) map.delete(key);
+};
+
+const clampLimit = (limit) => Math.min(MAX_LIMIT, Math.max(1, parseInt(limit, 10) || DEFAULT_LIMIT));
+const clampOffset = (offset) => Math.max(0, parseInt(offset, 10) || 0);
+
+class MemoryStore {
+    constructor(memoryPath) {
+        this.memoryPath = memoryPath;
+        this.entries = new Map();     // id -> { id, type, name, item, tokens }
+        this.bySignature = new Map(); // type + serialized item -> id
+        this.byType = new Map();      // type -> Set(id)
+        this.byName = new Map();      // lowercase name -> Set(id)
+        this.tokens = new Map();      // token -> Set(id)
+        this.nextId = 1;
+        this.mtimeMs = null;
+        this.size = null;
+        this.lastCheck = 0;
+        this.loaded = false;
+        this.error = null;
+        this.stats = { loads: 0, added: 0, removed: 0, unchanged: 0, lastLoadMs: 0 };
+    }
+
+    // Reload when the file changed since the last look (cheap stat, throttled)
+    refresh(force = false) {
+        const now = Date.now();
+        if (!force && this.loaded && now - this.lastCheck < RELOAD_CHECK_INTERVAL) return;
+        this.lastCheck = now;
+
+        let stat;
+        try {
+            stat = fs.statSync(this.memoryPath);
+        } catch (error) {
+            if (this.entries.size > 0) this.apply([]);
+            this.mtimeMs = null;
+            this.size = null;
+            this.loaded = false;
+            return;
+        }
+        if (this.loaded && stat.mtimeMs === this.mtimeMs && stat.size === this.size) return;
+
+        const started = Date.now();
+        try {
+            this.apply(flatten(JSON.parse(fs.readFileSync(this.memoryPath, 'utf8'))));
+            this.mtimeMs = stat.mtimeMs;
+            this.size = stat.size;
+            this.loaded = true;
+            this.error = null;
+            this.stats.loads++;
+            this.stats.lastLoadMs = Date.now() - started;
+        } catch (error) {
+            // Half-written file - keep serving what we have and retry next check
+            this.error = error.message;
+        }
+    }
+
+    // Diff against what is indexed: only new items are indexed, only gone ones removed
+    apply(flatEntries) {
+        const seen = new Set();
+        flatEntries.forEach(({ type, item }) => {
+            // Identical items collapse into one
+            const signature = `${type}\u0000${JSON.stringify(item)}`;
+            const existing = this.bySignature.get(signature);
+            if (existing !== undefined) {
+                if (!seen.has(existing)) this.stats.unchanged++;
+                seen.add(existing);
+                return;
+            }
+            seen.add(this.add(type, item, signature));
+        });
+
+        for (const [signature, id] of this.bySignature) {
+            if (!seen.has(id)) {
+                this.remove(id);
+                this.bySignature.delete(signature);
+            }
+        }
+    }
+
+    add(type, item, signature) {
+        const id = this.nextId++;
+        const name = itemName(item);
+        const tokens = new Set();
+        itemText(item).forEach(text => tokenizeLine(text).forEach(token => tokens.add(token.term)));
+
+        this.entries.set(id, { id, type, name, item, tokens });
+        this.bySignature.set(signature, id);
+        addTo(this.byType, type, id);
+        if (name) addTo(this.byName, name.toLowerCase(), id);
+        tokens.forEach(token => addTo(this.tokens, token, id));
+        this.stats.added++;
+        return id;
+    }
+
+    remove(id) {
+        const entry = this.entries.get(id);
+        if (!entry) return;
+        this.entries.delete(id);
+        removeFrom(this.byType, entry.type, id);
+        if (entry.name) removeFrom(this.byName, entry.name.toLowerCase(), id);
+        entry.tokens.forEach(token => removeFrom(this.tokens, token, id));
+        this.stats.removed++;
+    }
+
+    // Ids holding `term`, or any token starting with it when there is no exact hit
+    postings(term) {
+        if (this.tokens.has(term)) return this.tokens.get(term);
+        const ids = new Set();
+        let expanded = 0;
+        for (const [token, tokenIds] of this.tokens) {
+            if (!token.startsWith(term)) continue;
+            tokenIds.forEach(id => ids.add(id));
+            if (++expanded >= MAX_PREFIX_TERMS) break;
+        }
+        return ids;
+    }
+
+    page(ids, { limit, offset } = {}) {
+        const size = clampLimit(limit);
+        const start = clampOffset(offset);
+        const items = ids.slice(start, start + size).map(id => {
+            const entry = this.entries.get(id);
+            return { type: entry.type, name: entry.name || undefined, memory: entry.item };
+        });
+        return {
+            total: ids.length,
+            offset: start,
+            limit: size,
+            nextOffset: start + size < ids.length ? start + size : null,
+            items
+        };
+    }
+
+    // Every query token must match; exact name matches come first
+    search(query, { type, limit, offset } = {}) {
+        this.refresh();
+        const terms = [...new Set(tokenizeLine(String(query || '')).map(token => token.term))];
+        if (terms.length === 0) return this.page([], { limit, offset });
+
+        const sets = terms.map(term => this.postings(term)).sort((a, b) => a.size - b.size);
+        let ids = [...sets[0]].filter(id => sets.every(set => set.has(id)));
+        if (type) ids = ids.filter(id => this.entries.get(id).type === type);
+
+        const exact = this.byName.get(String(query).trim().toLowerCase());
+        if (exact) ids.sort((a, b) => (exact.has(b) ? 1 : 0) - (exact.has(a) ? 1 : 0));
+        return this.page(ids, { limit, offset });
+    }
+
+    list(type, { limit, offset } = {}) {
+        this.refresh();
+        return this.page([...(this.byType.get(type) || [])], { limit, offset });
+    }
+
+    byEntityName(name, { limit, offset } = {}) {
+        this.refresh();
+        return this.page([...(this.byName.get(String(name || '').trim().toLowerCase()) || [])], { limit, offset });
+    }
+
+    summary() {
+        this.refresh();
+        const types = {};
+        this.byType.forEach((ids, type) => { types[type] = ids.size; });
+        return {
+            loaded: this.loaded,
+            total: this.entries.size,
+            types,
+            names: this.byName.size,
+            tokens: this.tokens.size,
+            error: this.error,
+            stats: this.stats
+        };
+    }
+}
+
+module.exports = { MemoryStore, MEMORY_TYPES, DEFAULT_LIMIT, MAX_LIMIT };
@@ -10,16 +10,25 @@
 # - Server health monitoring
 # - V10.0.1: Better version tracking
 # - V10.0.4: Safe process management with PID tracking
+# - Health monitoring runs in server_monitor.py (one
+#   keep-alive session, event stream, backoff restarts)
+# - Start/stop/restart run as background jobs
+#   (action_executor.py), never on the menu thread
 # ============================================
 
 import rumps
 import subprocess
-import time
-import requests
 import os
 import json
-import threading
 import signal
+import time
+import queue
+
+from server_monitor import ServerMonitor, UNKNOWN, RUNNING, RESTARTING, CRASH_LOOP
+from action_executor import ActionExecutor, CommandRunner, close_smart_save_windows
+
+# Seconds a stopping server gets to flush queued appends (it gives up after 10)
+SHUTDOWN_WAIT = 12
 
 class SmartSaveMenuBar(rumps.App):
     def __init__(self):
@@ -37,7 +46,24 @@ class SmartSaveMenuBar(rumps.App):
         
         self.is_running = False
         self.server_process = None
-        self.health_check_timer = None
+        self.server_version = None
+        
+        # One engine watches the server; the UI timer only reads its state.
+        # Other threads hand UI work to the timer through these
+        self.notifications = queue.Queue()
+        self.menu_dirty = False
+        self.progress_text = None
+        
+        # Menu actions run here, one at a time
+        self.runner = CommandRunner(stub=False)
+        self.executor = ActionExecutor(on_progress=self.on_job_progress, on_done=self.on_job_done)
+        self.monitor = ServerMonitor(
+            port=self.config["server"]["port"],
+            restart=self.restart_for_monitor,
+            on_change=self.on_monitor_change,
+            auto_restart=self.config.get("features", {}).get("autoRestart", True),
+            pid_files=[self.pid_file, os.path.expanduser("~/.smart_save_pids/server.pid")]
+        )
         
         # Create menu items as instance variables
         self.menu_dashboard = rumps.MenuItem("📊 Open Dashboard", callback=self.open_dashboard)
@@ -47,13 +73,16 @@ class SmartSaveMenuBar(rumps.App):
         self.menu_restart = rumps.MenuItem("🔄 Restart Server", callback=self.restart_server)
         self.menu_check_sizes = rumps.MenuItem("📏 Check File Sizes", callback=self.check_file_sizes)
         self.menu_about = rumps.MenuItem(f"ℹ️ About (v{self.version})", callback=self.show_about)
+        self.menu_recovery = rumps.MenuItem("⏱ No crashes detected")
+        self.menu_progress = rumps.MenuItem("⏳ Working...")
         self.menu_quit = rumps.MenuItem("Quit Menu Bar", callback=self.quit_app)
         
         self.check_status()
+        self.title = "SS 🟢" if self.is_running else "SS 🔴"
         self.update_menu()
         
         # Start health monitoring
-        self.start_health_monitor()
+        self.monitor.start()
         
     def save_pid(self, pid):
         """Save process PID to file"""
@@ -90,6 +119,26 @@ class SmartSaveMenuBar(rumps.App):
             print(f"❌ Error killing process {pid}: {e}")
             return False
     
+    def wait_for_exit(self, pid, timeout=SHUTDOWN_WAIT, interval=0.1):
+        """Wait for a process to exit (the server flushes queued appends on SIGTERM)"""
+        # Our own child stays a zombie until reaped, so wait on the handle
+        if self.server_process and self.server_process.pid == pid:
+            try:
+                self.server_process.wait(timeout=timeout)
+                return True
+            except subprocess.TimeoutExpired:
+                return False
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                return False
+            time.sleep(interval)
+        return False
+    
     def detect_version(self):
         """Auto-detect version from folder name"""
         try:
@@ -152,28 +201,30 @@ class SmartSaveMenuBar(rumps.App):
         }
     
     def check_status(self):
-        """Check if server is running"""
-        try:
-            response = requests.get(f'http://localhost:{self.config["server"]["port"]}/api/health', timeout=1)
-            self.is_running = response.status_code == 200
-            if self.is_running:
-                data = response.json()
-                self.server_version = data.get('version', 'unknown')
-        except:
-            self.is_running = False
-            self.server_version = None
-        
-        # Update title to show status
-        self.title = "SS 🟢" if self.is_running else "SS 🔴"
+        """Check if server is running (pooled session via the monitor)"""
+        data = self.monitor.check_health()
+        self.is_running = data is not None
+        self.server_version = self.monitor.server_version if self.is_running else None
         
     def update_menu(self):
-        """Update menu based on status"""
+        """Update menu based on status (main thread only)"""
         self.menu.clear()
         
-        if self.is_running:
+        if self.progress_text:
+            self.menu_progress.title = f"⏳ {self.progress_text}"
+            self.menu = [
+                self.menu_progress,
+                None,
+                self.menu_folder,
+                self.menu_about,
+                None,
+                self.menu_quit
+            ]
+        elif self.is_running:
             status_text = f"🟢 Smart Save Running (v{self.server_version or self.version})"
             self.menu = [
                 status_text,
+                self.menu_recovery,
                 None,
                 self.menu_dashboard,
                 self.menu_folder,
@@ -199,23 +250,42 @@ class SmartSaveMenuBar(rumps.App):
                 self.menu_quit
             ]
     
-    def start_health_monitor(self):
-        """Monitor server health and auto-restart if needed"""
-        def monitor():
-            while True:
-                time.sleep(30)  # Check every 30 seconds
-                if self.is_running:
-                    old_status = self.is_running
-                    self.check_status()
-                    
-                    # If server crashed and auto-restart is enabled
-                    if not self.is_running and old_status and self.config.get("features", {}).get("autoRestart", True):
-                        rumps.notification("Smart Save", "", "Server crashed, restarting...")
-                        self.restart_server(None)
-        
-        if self.config.get("features", {}).get("autoRestart", True):
-            self.health_thread = threading.Thread(target=monitor, daemon=True)
-            self.health_thread.start()
+    def notify(self, title, message):
+        """Thread-safe notification (shown by the UI timer)"""
+        self.notifications.put((title, message))
+    
+    def on_monitor_change(self, state, message):
+        """Called on the monitor thread - queue notifications for the UI timer"""
+        if state == RESTARTING:
+            self.notify("Smart Save", "Server crashed, restarting...")
+        elif state == RUNNING and message:
+            self.notify("Smart Save", f"Server back up ({message})")
+        elif state == CRASH_LOOP:
+            self.notify("Smart Save", f"Server keeps crashing - auto-restart paused ({message})")
+    
+    def on_job_progress(self, job, text):
+        """Executor thread: show the step in the menu"""
+        print(f"[MENUBAR] {job.name}: {text}")
+        self.progress_text = text
+        self.menu_dirty = True
+    
+    def on_job_done(self, job):
+        if job.error:
+            self.notify(f"Smart Save v{self.version}", f"{job.name} failed: {job.error}")
+        self.progress_text = None if not self.executor.busy() else self.progress_text
+        self.menu_dirty = True
+    
+    def restart_for_monitor(self):
+        """Monitor's restart hook: kill whatever is left, start a fresh server"""
+        self.kill_server()
+        return self.spawn_server()
+    
+    def recovery_text(self):
+        metrics = self.monitor.metrics()
+        if not metrics['recoveries']:
+            return "⏱ No crashes detected"
+        return (f"⏱ Last recovery {metrics['last_recovery_seconds']}s "
+                f"(avg {metrics['avg_recovery_seconds']}s, {metrics['restarts']} restarts)")
     
     def open_dashboard(self, sender):
         """Open dashboard in Safari"""
@@ -229,9 +299,13 @@ class SmartSaveMenuBar(rumps.App):
     
     def check_file_sizes(self, sender):
         """Check for files approaching size limit"""
+        self.executor.submit("Check sizes", self.check_file_sizes_job)
+    
+    def check_file_sizes_job(self, progress):
+        progress("Checking file sizes...")
         try:
             port = self.config["server"]["port"]
-            response = requests.get(f'http://localhost:{port}/api/check-sizes', timeout=5)
+            response = self.monitor.session.get(f'http://localhost:{port}/api/check-sizes', timeout=5)
             if response.ok:
                 data = response.json()
                 warnings = data.get('warnings', [])
@@ -241,12 +315,14 @@ class SmartSaveMenuBar(rumps.App):
                 
                 if errors:
                     message += "\n\n⚠️ Some files exceed the 1MB limit!"
+                    if data.get('migrate'):
+                        message += f"\nSplit them with: {data['migrate']}"
                 
-                rumps.notification("File Size Check", "", message)
+                self.notify("File Size Check", message)
             else:
-                rumps.notification("Error", "", "Could not check file sizes")
+                self.notify("Error", "Could not check file sizes")
         except:
-            rumps.notification("Error", "", "Server not responding")
+            self.notify("Error", "Server not responding")
     
     def show_about(self, sender):
         """Show about dialog"""
@@ -256,40 +332,73 @@ class SmartSaveMenuBar(rumps.App):
             "Created by Darren Couturier\nhttps://github.com/Mecozz/Claude-Smart-Save"
         )
     
+    # ---------- menu actions (queued on the executor) ----------
+    
     def restart_server(self, sender):
         """Restart the server"""
+        self.executor.submit("Restart", self.restart_job)
+    
+    def stop_everything(self, sender):
+        """Stop Smart Save processes only - not ALL Node processes"""
+        self.executor.submit("Stop", self.stop_everything_job)
+    
+    def start_automation(self, sender):
+        """Start the automation"""
+        self.executor.submit("Start", self.start_automation_job)
+    
+    # ---------- jobs (executor thread) ----------
+    
+    def restart_job(self, progress):
+        progress("Stopping server...")
         self.stop_server_only()
-        time.sleep(2)
-        self.start_server_only()
+        progress("Starting server...")
+        self.start_server_only(progress)
         
         if self.is_running:
-            rumps.notification("Smart Save", "", "Server restarted successfully!")
+            self.notify("Smart Save", "Server restarted successfully!")
     
     def stop_server_only(self):
         """Stop only the server process using PID tracking"""
+        # Tell the monitor first so this isn't treated as a crash
+        self.monitor.expect_stop()
+        self.kill_server()
+        self.monitor.wait_until_down()
+        self.check_status()
+    
+    def kill_server(self):
+        """Kill our server: saved PID, process handle, then pkill"""
         # First try to kill by saved PID
         saved_pid = self.load_pid()
         if saved_pid:
             if self.kill_by_pid(saved_pid):
                 self.remove_pid_file()
+                # Let it write queued appends before anything harder is tried
+                self.wait_for_exit(saved_pid)
         
         # If we have a process handle, terminate it
         if self.server_process:
             try:
                 self.server_process.terminate()
-                self.server_process.wait(timeout=5)
+                self.server_process.wait(timeout=SHUTDOWN_WAIT)
                 self.server_process = None
             except:
                 pass
         
         # As last resort, kill specific Smart Save process only
-        subprocess.run(["pkill", "-f", "claude-server-v5.js"], stderr=subprocess.DEVNULL)
+        self.runner.run(["pkill", "-f", "claude-server-v5.js"])
+    
+    def start_server_only(self, progress=None):
+        """Start only the server"""
+        self.spawn_server()
+        self.monitor.resume()
         
-        time.sleep(1)
+        # Ready as soon as /api/ready says saves are accepted - no fixed sleep
+        self.monitor.wait_until_ready(on_progress=progress)
         self.check_status()
+        self.menu_dirty = True
     
-    def start_server_only(self):
-        """Start only the server"""
+    def spawn_server(self):
+        """Launch claude-server-v5.js and track it"""
         server_path = os.path.expanduser("~/Library/Mobile Documents/com~apple~CloudDocs/Smart Save/Claude_AutoSave_FINAL/claude-server-v5.js")
         
         # Start server in background
@@ -302,109 +411,69 @@ class SmartSaveMenuBar(rumps.App):
         
         # Save the PID
         self.save_pid(self.server_process.pid)
+        self.monitor.track(self.server_process)
+        return self.server_process
         
-        time.sleep(3)
-        self.check_status()
-        self.update_menu()
-        
-    def stop_everything(self, sender):
-        """Stop Smart Save processes only - not ALL Node processes"""
-        rumps.notification(f"Smart Save v{self.version}", "", "Stopping Smart Save...")
+    def stop_everything_job(self, progress):
+        self.notify(f"Smart Save v{self.version}", "Stopping Smart Save...")
         
         # Stop our server using PID tracking
+        progress("Stopping server...")
         self.stop_server_only()
         
         # Kill the Terminal running START.command
-        subprocess.run(["pkill", "-f", "START.command"], stderr=subprocess.DEVNULL)
-        
-        # Close Terminal windows running Smart Save
-        apple_script_terminal = '''
-        tell application "Terminal"
-            set windowList to windows
-            repeat with aWindow in windowList
-                try
-                    if name of aWindow contains "Smart Save" or name of aWindow contains "START.command" then
-                        close aWindow
-                    end if
-                end try
-            end repeat
-        end tell
-        '''
-        subprocess.run(["osascript", "-e", apple_script_terminal], stderr=subprocess.DEVNULL)
+        self.runner.run(["pkill", "-f", "START.command"])
         
-        # Close dashboard tabs in Chrome (Smart Save specific)
-        apple_script_chrome = '''
-        tell application "Google Chrome"
-            if (count of windows) > 0 then
-                set windowList to windows
-                repeat with aWindow in windowList
-                    set tabList to tabs of aWindow
-                    repeat with i from (count of tabList) to 1 by -1
-                        try
-                            set tabURL to URL of tab i of aWindow
-                            if tabURL contains "localhost:3737" then
-                                close tab i of aWindow
-                            end if
-                        end try
-                    end repeat
-                end repeat
-            end if
-        end tell
-        '''
-        subprocess.run(["osascript", "-e", apple_script_chrome], stderr=subprocess.DEVNULL)
+        # Terminal windows, Chrome and Safari dashboard tabs - all at once
+        progress("Closing windows and dashboard tabs...")
+        close_smart_save_windows(self.runner)
         
-        # Close dashboard in Safari too
-        apple_script_safari = '''
-        tell application "Safari"
-            if (count of windows) > 0 then
-                repeat with aWindow in windows
-                    set tabList to tabs of aWindow
-                    repeat with i from (count of tabList) to 1 by -1
-                        try
-                            set tabURL to URL of tab i of aWindow
-                            if tabURL contains "localhost:3737" then
-                                close tab i of aWindow
-                            end if
-                        end try
-                    end repeat
-                end repeat
-            end if
-        end tell
-        '''
-        subprocess.run(["osascript", "-e", apple_script_safari], stderr=subprocess.DEVNULL)
-        
-        time.sleep(1)
         self.check_status()
-        self.update_menu()
-        rumps.notification(f"Smart Save v{self.version}", "", "Smart Save stopped!")
+        self.menu_dirty = True
+        self.notify(f"Smart Save v{self.version}", "Smart Save stopped!")
         
-    def start_automation(self, sender):
-        """Start the automation"""
-        rumps.notification(f"Smart Save v{self.version}", "", "Starting automation...")
+    def start_automation_job(self, progress):
+        self.notify(f"Smart Save v{self.version}", "Starting automation...")
         script_path = os.path.expanduser("~/Library/Mobile Documents/com~apple~CloudDocs/Smart Save/Claude_AutoSave_FINAL/START.command")
         
+        progress("Starting server...")
         if os.path.exists(script_path):
-            subprocess.Popen(["open", "-a", "Terminal", script_path])
+            self.runner.popen(["open", "-a", "Terminal", script_path])
+            self.monitor.resume()
+            progress("Waiting for the server to be ready...")
+            self.monitor.wait_until_ready(on_progress=progress)
         else:
             # Fallback to just starting the server
-            self.start_server_only()
+            self.start_server_only(progress)
         
-        time.sleep(5)
         self.check_status()
-        self.update_menu()
-        rumps.notification(f"Smart Save v{self.version}", "", "Auto-Save started!")
+        self.menu_dirty = True
+        self.notify(f"Smart Save v{self.version}", "Auto-Save started!")
     
     def quit_app(self, sender):
         # Clean up PID file on quit
+        self.monitor.stop()
         self.remove_pid_file()
         rumps.quit_application()
         
-    @rumps.timer(10)
+    @rumps.timer(1)
     def update_status(self, _):
-        """Check status every 10 seconds"""
+        """Reflect the monitor's state (no HTTP on the UI thread)"""
+        while not self.notifications.empty():
+            title, message = self.notifications.get()
+            rumps.notification(title, "", message)
+        
         old_status = self.is_running
-        self.check_status()
-        if old_status != self.is_running:
+        # Until its first look the monitor doesn't know - keep what check_status saw
+        if self.monitor.state != UNKNOWN:
+            self.is_running = self.monitor.state == RUNNING
+        self.server_version = self.monitor.server_version
+        self.title = "SS 🟢" if self.is_running else ("SS 🟡" if self.monitor.state == RESTARTING else "SS 🔴")
+        self.menu_recovery.title = self.recovery_text()
+        if self.progress_text:
+            self.title = "SS ⏳"
+        if old_status != self.is_running or self.menu_dirty:
+            self.menu_dirty = False
             self.update_menu()
 
 if __name__ == "__main__":
@@ -0,0 +1,263 @@
+// ============================================
+// METADATA INDEX - Per-file word/size tracking
+// ============================================
+// Keeps words, chars, bytes, mtime and line count
+// for every conversation file plus per-project
+// rollups, so appends and project listings never
+// have to reread the whole Projects tree.
+//
+// Events (for analytics and other derived indexes):
+//   'append'  (project, file, text)    - delta appended
+//   'rescan'  (project, file, content, mtimeMs) - file reread from disk
+//   'remove'  (project, file)          - file no longer exists
+// ============================================
+
+const fs = require('fs');
+const path = require('path');
+const EventEmitter = require('events');
+const { createIo, writeJsonAtomic, writeJsonAtomicSync } = require('./async-io.js');
+
+const INDEX_VERSION = 1;
+const SAVE_DELAY = 2000; // Batch index writes (ms)
+
+// Count text the same way the server always has: split on whitespace
+function countText(text) {
+    if (!text) {
+        return { words: 0, chars: 0, bytes: 0, newlines: 0 };
+    }
+    const words = text.split(/\s+/).filter(w => w.length > 0).length;
+    let newlines = 0;
+    for (let i = text.indexOf('\n'); i !== -1; i = text.indexOf('\n', i + 1)) {
+        newlines++;
+    }
+    return {
+        words,
+        chars: text.length,
+        bytes: Buffer.byteLength(text, 'utf8'),
+        newlines
+    };
+}
+
+const emptyRollup = () => ({ files: 0, words: 0, chars: 0, bytes: 0, lines: 0 });
+
+class MetadataIndex extends EventEmitter {
+    constructor({ projectsDir, indexPath, io }) {
+        super();
+        this.projectsDir = projectsDir;
+        this.indexPath = indexPath;
+        this.io = io || createIo();
+        this.files = {};     // project -> file -> entry
+        this.projects = {};  // project -> rollup
+        this.saveTimer = null;
+    }
+
+    // Load persisted index (ignored if missing or from an older format)
+    load() {
+        try {
+            if (fs.existsSync(this.indexPath)) {
+                const data = JSON.parse(fs.readFileSync(this.indexPath, 'utf8'));
+                if (data.version === INDEX_VERSION) {
+                    this.files = data.files || {};
+                    this.projects = data.projects || {};
+                }
+            }
+        } catch (error) {
+            console.log(`⚠️ Metadata index unreadable, rebuilding: ${error.message}`);
+            this.files = {};
+            this.projects = {};
+        }
+        return this;
+    }
+
+    snapshot() {
+        return {
+            version: INDEX_VERSION,
+            updated: new Date().toISOString(),
+            files: this.files,
+            projects: this.projects
+        };
+    }
+
+    // Write index to disk now (shutdown path)
+    flush() {
+        if (this.saveTimer) {
+            clearTimeout(this.saveTimer);
+            this.saveTimer = null;
+        }
+        writeJsonAtomicSync(this.indexPath, this.snapshot());
+    }
+
+    scheduleSave() {
+        if (this.saveTimer) return;
+        this.saveTimer = setTimeout(() => {
+            this.saveTimer = null;
+            writeJsonAtomic(this.indexPath, this.snapshot()).catch(error => {
+                console.error('Metadata index save error:', error);
+            });
+        }, SAVE_DELAY);
+        if (this.saveTimer.unref) this.saveTimer.unref();
+    }
+
+    // Replace a file entry and keep the project rollup in step
+    setEntry(project, file, entry) {
+        const projectFiles = this.files[project] || (this.files[project] = {});
+        const rollup = this.projects[project] || (this.projects[project] = emptyRollup());
+        const previous = projectFiles[file];
+
+        if (previous) {
+            rollup.files--;
+            rollup.words -= previous.words;
+            rollup.chars -= previous.chars;
+            rollup.bytes -= previous.bytes;
+            rollup.lines -= previous.lines;
+        }
+
+        if (entry) {
+            projectFiles[file] = entry;
+            rollup.files++;
+            rollup.words += entry.words;
+            rollup.chars += entry.chars;
+            rollup.bytes += entry.bytes;
+            rollup.lines += entry.lines;
+        } else {
+            delete projectFiles[file];
+        }
+
+        this.scheduleSave();
+        return entry;
+    }
+
+    // Index a file from its full content
+    applyContent(project, file, content, mtimeMs) {
+        const counts = countText(content);
+
+        this.emit('rescan', project, file, content, mtimeMs);
+        return this.setEntry(project, file, {
+            words: counts.words,
+            chars: counts.chars,
+            bytes: counts.bytes,
+            lines: content.length > 0 ? counts.newlines + 1 : 0,
+            mtimeMs,
+            endsInWord: content.length > 0 && !/\s/.test(content[content.length - 1])
+        });
+    }
+
+    // Read one file from disk and index it from scratch
+    async rescanFile(project, file, stat) {
+        const filePath = path.join(this.projectsDir, project, file);
+        const fileStat = stat || await this.io.stat(filePath);
+        const content = await this.io.readFile(filePath);
+        return this.applyContent(project, file, content, fileStat.mtimeMs);
+    }
+
+    // Update a file entry from the text just appended to it
+    async recordAppend(project, file, text) {
+        const filePath = path.join(this.projectsDir, project, file);
+        const stat = await this.io.stat(filePath);
+        const entry = this.files[project] && this.files[project][file];
+        const delta = countText(text);
+
+        // Anything other than "old size + this append" means the file changed
+        // behind our back - fall back to a full rescan of this one file
+        if (!entry || entry.bytes + delta.bytes !== stat.size) {
+            return this.rescanFile(project, file, stat);
+        }
+
+        // A word split across the append boundary must only count once
+        let words = entry.words + delta.words;
+        if (entry.endsInWord && text.length > 0 && !/\s/.test(text[0])) {
+            words--;
+        }
+
+        this.emit('append', project, file, text);
+        return this.setEntry(project, file, {
+            words,
+            chars: entry.chars + delta.chars,
+            bytes: stat.size,
+            lines: (entry.lines || 1) + delta.newlines,
+            mtimeMs: stat.mtimeMs,
+            endsInWord: !/\s/.test(text[text.length - 1])
+        });
+    }
+
+    // Bring one project in line with a listing of its files
+    // ({ file: { size, mtimeMs } }); only files whose mtime or size
+    // no longer match are reread
+    async applyProjectListing(project, listedFiles) {
+        const known = Object.assign({}, this.files[project] || {});
+        const changed = Object.entries(listedFiles).filter(([file, stat]) => {
+            const entry = known[file];
+            return !entry || entry.mtimeMs !== stat.mtimeMs || entry.bytes !== stat.size;
+        });
+
+        await Promise.all(changed.map(([file, stat]) =>
+            this.rescanFile(project, file, stat).catch(error => {
+                console.log(`Warning: Could not index ${project}/${file}: ${error.message}`);
+            })
+        ));
+
+        Object.keys(known).forEach(file => {
+            if (!listedFiles[file]) {
+                this.setEntry(project, file, null);
+                this.emit('remove', project, file);
+            }
+        });
+
+        return this.getProject(project);
+    }
+
+    // Reconcile a single project folder against the disk
+    async reconcileProject(project) {
+        const projectDir = path.join(this.projectsDir, project);
+        if (!await this.io.exists(projectDir)) {
+            this.dropProject(project);
+            return this.getProject(project);
+        }
+
+        const listed = {};
+        const files = (await this.io.readdir(projectDir)).filter(file => file.endsWith('.md'));
+        await Promise.all(files.map(async file => {
+            try {
+                const stat = await this.io.stat(path.join(projectDir, file));
+                listed[file] = { size: stat.size, mtimeMs: stat.mtimeMs };
+            } catch (error) {
+                // File vanished mid-listing
+            }
+        }));
+
+        return this.applyProjectListing(project, listed);
+    }
+
+    // Reconcile every project against a whole-tree listing (see
+    // scan-worker.js); returns the project names found
+    async applyListing(listing) {
+        const found = Object.keys(listing.projects);
+        for (const project of found) {
+            await this.applyProjectListing(project, listing.projects[project].files);
+        }
+        Object.keys(this.projects).forEach(project => {
+            if (!listing.projects[project]) this.dropProject(project);
+        });
+        return found;
+    }
+
+    dropProject(project) {
+        if (!this.projects[project] && !this.files[project]) return;
+        Object.keys(this.files[project] || {}).forEach(file => {
+            this.emit('remove', project, file);
+        });
+        delete this.files[project];
+        delete this.projects[project];
+        this.scheduleSave();
+    }
+
+    getProject(project) {
+        return this.projects[project] || emptyRollup();
+    }
+
+    getProjectFiles(project) {
+        return this.files[project] || {};
+    }
+}
+
+module.exports = { MetadataIndex, countText, INDEX_VERSION };
@@ -0,0 +1,319 @@
+// ============================================
+// METRICS - Hot-path instrumentation for
+// /api/metrics
+// ============================================
+// Per-route latency histograms, bytes appended
+// per second, fs operation counts and timings,
+// cache hit rates, event-loop lag and heap use.
+// Served as Prometheus text or as JSON for the
+// dashboard. With slowRequestMs set, requests
+// slower than that are logged with the time each
+// fs operation (and named span) took inside them.
+// ============================================
+
+const { AsyncLocalStorage } = require('async_hooks');
+const { monitorEventLoopDelay } = require('perf_hooks');
+
+// Upper bounds in milliseconds (Prometheus "le" buckets, in seconds there)
+const LATENCY_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000];
+const RATE_WINDOW = 60;              // Seconds of append history for bytes/sec
+const SLOW_LOG_SIZE = 50;            // Slow requests kept for the JSON view
+const PREFIX = 'smart_save';
+
+const round = (value, places = 2) => Math.round(value * 10 ** places) / 10 ** places;
+
+class Histogram {
+    constructor(buckets = LATENCY_BUCKETS) {
+        this.buckets = buckets;
+        this.counts = new Array(buckets.length + 1).fill(0);   // Last slot: +Inf
+        this.count = 0;
+        this.sum = 0;
+        this.max = 0;
+    }
+
+    observe(ms) {
+        let i = 0;
+        while (i < this.buckets.length && ms > this.buckets[i]) i++;
+        this.counts[i]++;
+        this.count++;
+        this.sum += ms;
+        if (ms > this.max) this.max = ms;
+    }
+
+    // Estimated by linear interpolation inside the bucket the rank lands in
+    quantile(q) {
+        if (this.count === 0) return 0;
+        const rank = q * this.count;
+        let seen = 0;
+        for (let i = 0; i < this.counts.length; i++) {
+            if (seen + this.counts[i] >= rank) {
+                const lower = i === 0 ? 0 : this.buckets[i - 1];
+                const upper = i < this.buckets.length ? this.buckets[i] : this.max;
+                const within = this.counts[i] > 0 ? (rank - seen) / this.counts[i] : 0;
+                return Math.min(this.max, lower + (upper - lower) * within);
+            }
+            seen += this.counts[i];
+        }
+        return this.max;
+    }
+
+    summary() {
+        return {
+            count: this.count,
+            meanMs: this.count > 0 ? round(this.sum / this.count) : 0,
+            p50Ms: round(this.quantile(0.5)),
+            p95Ms: round(this.quantile(0.95)),
+            p99Ms: round(this.quantile(0.99)),
+            maxMs: round(this.max)
+        };
+    }
+
+    // Prometheus histogram lines (seconds)
+    prometheus(name, labels) {
+        const lines = [];
+        let cumulative = 0;
+        this.buckets.forEach((bound, i) => {
+            cumulative += this.counts[i];
+            lines.push(`${name}_bucket{${labels},le="${bound / 1000}"} ${cumulative}`);
+        });
+        lines.push(`${name}_bucket{${labels},le="+Inf"} ${this.count}`);
+        lines.push(`${name}_sum{${labels}} ${this.sum / 1000}`);
+        lines.push(`${name}_count{${labels}} ${this.count}`);
+        return lines;
+    }
+}
+
+const escapeLabel = (value) => String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+
+class Metrics {
+    constructor({ slowRequestMs = 0 } = {}) {
+        this.slowRequestMs = slowRequestMs;
+        this.started = Date.now();
+        this.routes = new Map();          // "GET /api/stats" -> Histogram
+        this.fs = new Map();              // op -> { histogram, errors }
+        this.caches = new Map();          // name -> { hits, misses }
+        this.appendedBytes = 0;
+        this.appendSeconds = new Array(RATE_WINDOW).fill(0);
+        this.appendSecond = 0;            // Epoch second of the newest slot
+        this.slowRequests = [];
+        this.requestContext = new AsyncLocalStorage();
+
+        this.loopDelay = monitorEventLoopDelay({ resolution: 20 });
+        this.loopDelay.enable();
+    }
+
+    // ---------- requests ----------
+
+    // Express middleware: time every request, keyed by its matched route
+    middleware() {
+        return (req, res, next) => {
+            const started = process.hrtime.bigint();
+            const context = { spans: {} };
+            res.on('finish', () => {
+                const ms = Number(process.hrtime.bigint() - started) / 1e6;
+                const route = req.route ? `${req.method} ${req.baseUrl}${req.route.path}` : `${req.method} (unmatched)`;
+                this.observeRoute(route, ms);
+                if (this.slowRequestMs > 0 && ms >= this.slowRequestMs) {
+                    this.logSlowRequest(route, req.originalUrl, res.statusCode, ms, context.spans);
+                }
+            });
+            this.requestContext.run(context, next);
+        };
+    }
+
+    observeRoute(route, ms) {
+        if (!this.routes.has(route)) this.routes.set(route, new Histogram());
+        this.routes.get(route).observe(ms);
+    }
+
+    // Add time to the current request's breakdown (no-op outside a request)
+    addSpan(name, ms) {
+        const context = this.requestContext.getStore();
+        if (!context) return;
+        const span = context.spans[name] || (context.spans[name] = { count: 0, ms: 0 });
+        span.count++;
+        span.ms += ms;
+    }
+
+    // Time a named step of a request (e.g. 'reconcile')
+    async span(name, task) {
+        const started = process.hrtime.bigint();
+        try {
+            return await task();
+        } finally {
+            this.addSpan(name, Number(process.hrtime.bigint() - started) / 1e6);
+        }
+    }
+
+    logSlowRequest(route, url, status, ms, spans) {
+        const breakdown = Object.entries(spans)
+            .sort((a, b) => b[1].ms - a[1].ms)
+            .map(([name, span]) => ({ name, count: span.count, ms: round(span.ms) }));
+        const entry = { time: new Date().toISOString(), route, url, status, ms: round(ms), breakdown };
+        this.slowRequests.push(entry);
+        if (this.slowRequests.length > SLOW_LOG_SIZE) this.slowRequests.shift();
+
+        const detail = breakdown.map(span => `${span.name}×${span.count} ${span.ms}ms`).join(', ');
+        console.log(`🐢 Slow request: ${route} ${Math.round(ms)}ms${detail ? ` (${detail})` : ''}`);
+    }
+
+    // ---------- fs ----------
+
+    // Same io object (see async-io.js) with every call counted and timed
+    instrumentIo(io) {
+        const instrumented = {};
+        Object.entries(io).forEach(([op, fn]) => {
+            if (typeof fn !== 'function') {
+                instrumented[op] = fn;
+                return;
+            }
+            instrumented[op] = (...args) => {
+                const started = process.hrtime.bigint();
+                const done = (failed) => {
+                    const ms = Number(process.hrtime.bigint() - started) / 1e6;
+                    this.observeFs(op, ms, failed);
+                    this.addSpan(`fs.${op}`, ms);
+                };
+                return Promise.resolve(fn(...args)).then(
+                    result => { done(false); return result; },
+                    error => { done(true); throw error; }
+                );
+            };
+        });
+        return instrumented;
+    }
+
+    observeFs(op, ms, failed) {
+        if (!this.fs.has(op)) this.fs.set(op, { histogram: new Histogram(), errors: 0 });
+        const entry = this.fs.get(op);
+        entry.histogram.observe(ms);
+        if (failed) entry.errors++;
+    }
+
+    // ---------- appends and caches ----------
+
+    recordAppend(bytes) {
+        this.appendedBytes += bytes;
+        this.appendSeconds[this.advanceRate()] += bytes;
+    }
+
+    // Clear the slots for seconds that passed; index of the current second
+    advanceRate() {
+        const now = Math.floor(Date.now() / 1000);
+        const gap = Math.min(RATE_WINDOW, now - this.appendSecond);
+        for (let i = 1; i <= gap; i++) this.appendSeconds[(this.appendSecond + i) % RATE_WINDOW] = 0;
+        this.appendSecond = now;
+        return now % RATE_WINDOW;
+    }
+
+    appendRate() {
+        this.advanceRate();
+        const window = Math.min(RATE_WINDOW, Math.max(1, Math.floor((Date.now() - this.started) / 1000)));
+        const total = this.appendSeconds.reduce((sum, bytes) => sum + bytes, 0);
+        return round(total / window);
+    }
+
+    cacheHit(name) {
+        this.cache(name).hits++;
+    }
+
+    cacheMiss(name) {
+        this.cache(name).misses++;
+    }
+
+    cache(name) {
+        if (!this.caches.has(name)) this.caches.set(name, { hits: 0, misses: 0 });
+        return this.caches.get(name);
+    }
+
+    // ---------- output ----------
+
+    eventLoop() {
+        const ns = (value) => Number.isFinite(value) ? round(value / 1e6) : 0;
+        return {
+            lagP50Ms: ns(this.loopDelay.percentile(50)),
+            lagP99Ms: ns(this.loopDelay.percentile(99)),
+            lagMaxMs: ns(this.loopDelay.max),
+            lagMeanMs: ns(this.loopDelay.mean)
+        };
+    }
+
+    toJSON() {
+        const routes = {};
+        this.routes.forEach((histogram, route) => { routes[route] = histogram.summary(); });
+        const fs = {};
+        this.fs.forEach(({ histogram, errors }, op) => {
+            fs[op] = Object.assign(histogram.summary(), { errors, totalMs: round(histogram.sum) });
+        });
+        const caches = {};
+        this.caches.forEach(({ hits, misses }, name) => {
+            caches[name] = { hits, misses, hitRate: hits + misses > 0 ? round(hits / (hits + misses), 3) : null };
+        });
+        const memory = process.memoryUsage();
+
+        return {
+            uptimeSeconds: Math.round((Date.now() - this.started) / 1000),
+            routes,
+            append: { bytesTotal: this.appendedBytes, bytesPerSecond: this.appendRate() },
+            fs,
+            caches,
+            eventLoop: this.eventLoop(),
+            memory: {
+                heapUsedBytes: memory.heapUsed,
+                heapTotalBytes: memory.heapTotal,
+                rssBytes: memory.rss,
+                externalBytes: memory.external
+            },
+            slowRequestMs: this.slowRequestMs || null,
+            slowRequests: this.slowRequests
+        };
+    }
+
+    prometheus() {
+        const lines = [];
+        const family = (name, type, help) => {
+            lines.push(`# HELP ${PREFIX}_${name} ${help}`);
+            lines.push(`# TYPE ${PREFIX}_${name} ${type}`);
+        };
+
+        family('http_request_duration_seconds', 'histogram', 'Request latency by route');
+        this.routes.forEach((histogram, route) => {
+            lines.push(...histogram.prometheus(`${PREFIX}_http_request_duration_seconds`, `route="${escapeLabel(route)}"`));
+        });
+
+        family('fs_operation_duration_seconds', 'histogram', 'File system call latency by operation');
+        this.fs.forEach(({ histogram }, op) => {
+            lines.push(...histogram.prometheus(`${PREFIX}_fs_operation_duration_seconds`, `op="${op}"`));
+        });
+        family('fs_operation_errors_total', 'counter', 'File system calls that failed');
+        this.fs.forEach(({ errors }, op) => lines.push(`${PREFIX}_fs_operation_errors_total{op="${op}"} ${errors}`));
+
+        family('appended_bytes_total', 'counter', 'Bytes appended to chat files');
+        lines.push(`${PREFIX}_appended_bytes_total ${this.appendedBytes}`);
+        family('appended_bytes_per_second', 'gauge', `Append rate over the last ${RATE_WINDOW}s`);
+        lines.push(`${PREFIX}_appended_bytes_per_second ${this.appendRate()}`);
+
+        family('cache_hits_total', 'counter', 'Cache hits');
+        this.caches.forEach(({ hits }, name) => lines.push(`${PREFIX}_cache_hits_total{cache="${name}"} ${hits}`));
+        family('cache_misses_total', 'counter', 'Cache misses');
+        this.caches.forEach(({ misses }, name) => lines.push(`${PREFIX}_cache_misses_total{cache="${name}"} ${misses}`));
+
+        const loop = this.eventLoop();
+        family('event_loop_lag_seconds', 'summary', 'Event loop delay');
+        lines.push(`${PREFIX}_event_loop_lag_seconds{quantile="0.5"} ${loop.lagP50Ms / 1000}`);
+        lines.push(`${PREFIX}_event_loop_lag_seconds{quantile="0.99"} ${loop.lagP99Ms / 1000}`);
+        lines.push(`${PREFIX}_event_loop_lag_seconds{quantile="1"} ${loop.lagMaxMs / 1000}`);
+
+        const memory = process.memoryUsage();
+        family('heap_used_bytes', 'gauge', 'V8 heap in use');
+        lines.push(`${PREFIX}_heap_used_bytes ${memory.heapUsed}`);
+        family('heap_total_bytes', 'gauge', 'V8 heap reserved');
+        lines.push(`${PREFIX}_heap_total_bytes ${memory.heapTotal}`);
+        family('resident_memory_bytes', 'gauge', 'Resident set size');
+        lines.push(`${PREFIX}_resident_memory_bytes ${memory.rss}`);
+
+        return lines.join('\n') + '\n';
+    }
+}
+
+module.exports = { Metrics, Histogram, LATENCY_BUCKETS };
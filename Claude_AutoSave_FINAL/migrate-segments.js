@@ -0,0 +1,87 @@
+#!/usr/bin/env node
+// ============================================
+// MIGRATE SEGMENTS - Split oversized chat files
+// ============================================
+// Usage: node migrate-segments.js [--dry-run]
+//
+// Splits every chat file over the segment size
+// (config.json storage.segmentBytes, default 900KB)
+// into Chat.md, Chat.part-002.md, ... with a
+// manifest. If the server is running the work is
+// handed to it, so no append can land mid-split.
+// ============================================
+
+const fs = require('fs');
+const http = require('http');
+const path = require('path');
+const { ChatSegments, DEFAULT_SEGMENT_BYTES } = require('./chat-segments.js');
+const { findClaudeConversationsPath } = require('./path-finder-portable.js');
+
+const dryRun = process.argv.includes('--dry-run');
+
+const readConfig = () => {
+    try {
+        return JSON.parse(fs.readFileSync(path.join(__dirname, 'config.json'), 'utf8'));
+    } catch (error) {
+        return {};
+    }
+};
+
+const config = readConfig();
+const PORT = (config.server && config.server.port) || 3737;
+
+// POST to the running server; resolves null if nothing is listening
+const askServer = () => new Promise((resolve, reject) => {
+    const body = JSON.stringify({ dryRun });
+    const req = http.request({
+        host: 'localhost',
+        port: PORT,
+        path: '/api/segments/migrate',
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(body) }
+    }, (res) => {
+        let data = '';
+        res.on('data', chunk => { data += chunk; });
+        res.on('end', () => {
+            try {
+                const result = JSON.parse(data);
+                if (res.statusCode !== 200) return reject(new Error(result.error || `HTTP ${res.statusCode}`));
+                resolve(result.migrated);
+            } catch (error) {
+                reject(error);
+            }
+        });
+    });
+    req.on('error', (error) => {
+        if (error.code === 'ECONNREFUSED') resolve(null);
+        else reject(error);
+    });
+    req.end(body);
+});
+
+const main = async () => {
+    let migrated = await askServer();
+    if (migrated) {
+        console.log(`✅ Server running on port ${PORT} - migrated through the server`);
+    } else {
+        const segments = new ChatSegments({
+            projectsDir: path.join(findClaudeConversationsPath(__dirname), 'Projects'),
+            segmentBytes: (config.storage && config.storage.segmentBytes) || DEFAULT_SEGMENT_BYTES
+        });
+        migrated = await segments.migrateAll({ dryRun });
+        // Indexes notice the changed files (mtime/size) on the server's next reconcile
+    }
+
+    if (migrated.length === 0) {
+        console.log('✅ No chat files over the segment size');
+        return;
+    }
+    migrated.forEach(({ project, file, size, parts }) => {
+        console.log(`${dryRun ? '🔍 Would split' : '📚 Split'} ${project}/${file} (${(size / 1024).toFixed(0)}KB) into ${parts} segments`);
+    });
+};
+
+main().catch(error => {
+    console.error('❌ Migration failed:', error.message);
+    process.exit(1);
+});
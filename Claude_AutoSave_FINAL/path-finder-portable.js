@@ -31,9 +31,8 @@ function findClaudeConversationsPath(startDir) {
     return relativePath;
 }
 
-// Ensure all directories exist
-function ensureDirectories() {
-    const baseDir = findClaudeConversationsPath();
+// Ensure all directories exist (pass the base path if you already have it)
+function ensureDirectories(baseDir = findClaudeConversationsPath()) {
     const dirs = [
         path.join(baseDir, 'Projects'),
         path.join(baseDir, 'Projects', 'General')
@@ -48,8 +47,7 @@ function ensureDirectories() {
 }
 
 // Get path info for debugging
-function getPathInfo() {
-    const baseDir = findClaudeConversationsPath();
+function getPathInfo(baseDir = findClaudeConversationsPath()) {
     const projectsDir = path.join(baseDir, 'Projects');
     
     let projects = [];
@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+
+# ============================================
+# SMART SAVE OFFLINE REINDEX
+# ============================================
+# Rebuilds the indexes claude-server-v5.js keeps
+# next to it from Claude_Conversations/Projects,
+# one file per task in a multiprocessing pool,
+# each file read through mmap:
+# - .metadata-index.json     words, chars, bytes,
+#                            lines, mtime per file
+# - .content-analytics.json  bug / solution / memory
+#                            term counts and people
+# - .search-index/           postings shards, docs and
+#                            line offset files
+# They are written in the formats (and versions)
+# the server saves itself, so on its next start it
+# loads them and rereads nothing.
+#
+# Runs are incremental: a file whose mtime and size
+# still match its entries is kept as it is; --full
+# redoes everything. Archived chats are read from
+# their Project/.archive packs. Reports files/sec
+# and MB/sec; --csv writes per-file statistics.
+#
+# The server must be stopped while this writes (its
+# own index saves would overwrite the results).
+#
+# Usage:
+#   python3 reindex_store.py                  # incremental
+#   python3 reindex_store.py --full --workers 8
+#   python3 reindex_store.py --dry-run --csv stats.csv
+# ============================================
+
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import re
+import struct
+import sys
+import time
+import urllib.request
+import zlib
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.path.join(SCRIPT_DIR, '..', 'Claude_Conversations')   # path-finder-portable.js
+DEFAULT_PORT = 3737
+
+# Versions of the files the server loads (metadata-index.js,
+# content-analytics.js, search-index.js); a mismatch there means rebuild
+METADATA_VERSION = 1
+ANALYTICS_VERSION = 1
+SEARCH_INDEX_VERSION = 2
+ARCHIVE_INDEX_VERSION = 1
+SHARD_COUNT = 32
+ARCHIVE_DIR = '.archive'
+TAIL_LENGTH = 40
+
+# Same terms /api/stats counts (content-analytics.js)
+TERM_GROUPS = {
+    'bugs': ['bug', 'error', 'issue', 'problem', 'broken', 'fail', 'crash', 'exception'],
+    'solutions': ['fix', 'solve', 'solution', 'resolve', 'answer', 'working', 'success'],
+    'memories': ['remember', 'recall', 'conversation', 'discussed', 'mentioned', 'talked'],
+}
+PEOPLE_STOP_WORDS = {'The', 'This', 'That', 'When', 'Where', 'What', 'How'}
+
+# ============================================
+# JAVASCRIPT-COMPATIBLE TEXT MEASURES
+# ============================================
+# The server counts in JavaScript: string lengths
+# and columns are UTF-16 code units and \s is its
+# own whitespace set. Matching that exactly is what
+# lets the server trust these indexes.
+
+JS_WHITESPACE = '\t\n\x0b\x0c\r \xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'
+WORD_RUN = re.compile(f'[^{JS_WHITESPACE}]+')
+ENDS_IN_SPACE = re.compile(f'[{JS_WHITESPACE}]$')
+ASTRAL = re.compile('[\U00010000-\U0010ffff]')             # Two UTF-16 units each
+TOKEN = re.compile(r'\w+')                                 # [\p{L}\p{N}_]+ in search-index.js
+PEOPLE = re.compile(rf'\b[A-Z][a-z]+(?:[{JS_WHITESPACE}]+[A-Z][a-z]+)?\b', re.ASCII)
+NEWLINE = re.compile(b'\n')
+
+
+def utf16_len(text):
+    return len(text) + len(ASTRAL.findall(text))
+
+
+def js_tail(text, length):
+    """text.slice(-length) on a JavaScript string"""
+    if not ASTRAL.search(text[-length:]):
+        return text[-length:]
+    units = text.encode('utf-16-le', 'surrogatepass')[-2 * length:]
+    return units.decode('utf-16-le', 'surrogatepass')
+
+
+def shard_of(term):
+    """search-index.js shardOf: 32-bit string hash over UTF-16 units"""
+    value = 0
+    units = term.encode('utf-16-le', 'surrogatepass')
+    for i in range(0, len(units), 2):
+        value = (value * 31 + (units[i] | units[i + 1] << 8)) & 0xFFFFFFFF
+    if value >= 0x80000000:
+        value -= 0x100000000
+    return abs(value) % SHARD_COUNT
+
+
+def node_mtime_ms(stat):
+    """fs.Stats#mtimeMs, computed the way Node does (sec * 1e3 + nsec / 1e6)"""
+    seconds, nanos = divmod(stat.st_mtime_ns, 1_000_000_000)
+    return float(seconds) * 1e3 + nanos / 1e6
+
+
+def count_overlapping(text, term):
+    count = 0
+    index = text.find(term)
+    while index != -1:
+        count += 1
+        index = text.find(term, index + 1)
+    return count
+
+
+# ============================================
+# READING (runs in the workers)
+# ============================================
+
+def read_raw(source):
+    """File bytes via mmap; archived files from their gzip member in the pack"""
+    kind, file_path = source[0], source[1]
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if kind == 'file':
+                return mapped[:]
+            offset, length, sha1 = source[2], source[3], source[4]
+            raw = zlib.decompress(mapped[offset:offset + length], 31)
+    if hashlib.sha1(raw).hexdigest() != sha1:
+        raise ValueError('archived copy is corrupt')
+    return raw
+
+
+def index_lines(text, raw):
+    """Postings ([count, line, ...] per term) and line offsets exactly as
+    SearchIndex.indexFile builds them"""
+    postings = {}
+    lines = text.split('\n')
+    last = len(lines) - 1
+    if raw is not None:
+        line_offsets = [0] + [match.end() for match in NEWLINE.finditer(raw)]
+    else:
+        line_offsets = [0]
+        offset = 0
+        for line in lines[:-1]:
+            offset += len(line.encode('utf-8')) + 1
+            line_offsets.append(offset)
+
+    tokens = 0
+    last_token = None
+    for line_no, line in enumerate(lines):
+        ascii_line = line.isascii()         # Lowercase the whole line once
+        for match in TOKEN.finditer(line.lower() if ascii_line else line):
+            term = match.group() if ascii_line else match.group().lower()
+            hits = postings.get(term)
+            if hits is None:
+                postings[term] = [1, line_no]
+                owns_line = True
+            else:
+                hits[0] += 1
+                owns_line = hits[-1] != line_no
+                if owns_line:
+                    hits.append(line_no)
+            if line_no == last and match.end() == len(line):
+                last_token = {'term': term, 'line': line_no, 'ownsLine': owns_line}
+            tokens += 1
+
+    return postings, {
+        'tokens': tokens,
+        'lines': len(line_offsets),
+        'lineOffsets': struct.pack(f'<{len(line_offsets)}I', *line_offsets),
+        'lastToken': last_token,
+    }
+
+
+def analyze(task):
+    """One file -> metadata entry, analytics entry, search doc and postings"""
+    project, file, source, mtime_ms = task
+    try:
+        raw = read_raw(source)
+    except (OSError, ValueError, zlib.error) as e:
+        return {'project': project, 'file': file, 'error': str(e)}
+
+    try:
+        text = raw.decode('utf-8')
+        exact = raw                         # Byte offsets can come straight from the file
+    except UnicodeDecodeError:
+        text = raw.decode('utf-8', 'replace')
+        exact = None
+    byte_length = len(raw) if exact is not None else len(text.encode('utf-8'))
+
+    lower = text.lower()
+    counts = {group: sum(count_overlapping(lower, term) for term in terms)
+              for group, terms in TERM_GROUPS.items()}
+    people = list(dict.fromkeys(name for name in PEOPLE.findall(text)
+                                if len(name) > 2 and name not in PEOPLE_STOP_WORDS))
+
+    postings, doc = index_lines(text, exact)
+    return {
+        'project': project,
+        'file': file,
+        'bytesRead': len(raw),
+        'meta': {
+            'words': len(WORD_RUN.findall(text)),
+            'chars': utf16_len(text),
+            'bytes': byte_length,
+            'lines': text.count('\n') + 1 if text else 0,
+            'mtimeMs': mtime_ms,
+            'endsInWord': bool(text) and not ENDS_IN_SPACE.search(text),
+        },
+        'analytics': {
+            'bugs': counts['bugs'],
+            'solutions': counts['solutions'],
+            'memories': counts['memories'],
+            'people': people,
+            'bytes': byte_length,
+            'tail': js_tail(text, TAIL_LENGTH),
+            'day': time.strftime('%Y-%m-%d', time.localtime(mtime_ms / 1000)),
+        },
+        'doc': {
+            'project': project,
+            'file': file,
+            'tokens': doc['tokens'],
+            'bytes': byte_length,
+            'lines': doc['lines'],
+            'lastToken': doc['lastToken'],
+        },
+        'lineOffsets': doc['lineOffsets'],
+        'postings': postings,
+    }
+
+
+# ============================================
+# TREE WALK
+# ============================================
+
+def walk_projects(projects_dir):
+    """{ project: { file: { size, mtimeMs, source } } } - hot .md files plus
+    archived ones (a hot file wins, as in cold-storage.js)"""
+    listing = {}
+    if not os.path.isdir(projects_dir):
+        return listing
+    for project in sorted(os.listdir(projects_dir)):
+        project_dir = os.path.join(projects_dir, project)
+        if not os.path.isdir(project_dir):
+            continue
+        files = {}
+        for file in os.listdir(project_dir):
+            if not file.endswith('.md'):
+                continue
+            try:
+                stat = os.stat(os.path.join(project_dir, file))
+            except OSError:
+                continue                    # Vanished mid-walk
+            files[file] = {'size': stat.st_size, 'mtimeMs': node_mtime_ms(stat),
+                           'source': ('file', os.path.join(project_dir, file))}
+
+        index_path = os.path.join(project_dir, ARCHIVE_DIR, 'index.json')
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    archive = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Archive index for {project} unreadable: {e}", file=sys.stderr)
+                archive = {}
+            if archive.get('version') == ARCHIVE_INDEX_VERSION:
+                for file, entry in archive.get('files', {}).items():
+                    if file in files:
+                        continue
+                    pack = os.path.join(project_dir, ARCHIVE_DIR, entry['pack'])
+                    files[file] = {'size': entry['size'], 'mtimeMs': entry['mtimeMs'], 'archived': True,
+                                   'source': ('archive', pack, entry['offset'], entry['length'], entry['sha1'])}
+        listing[project] = files
+    return listing
+
+
+# ============================================
+# INDEX FILES
+# ============================================
+
+def read_json(file_path, version):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if data.get('version') == version else None
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ {os.path.basename(file_path)} unreadable, rebuilding it: {e}", file=sys.stderr)
+        return None
+
+
+def write_json_atomic(file_path, data):
+    """Temp file + rename, like writeJsonAtomic in async-io.js"""
+    tmp_path = f'{file_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, separators=(',', ':')))   # One C-encoder pass; json.dump streams in Python
+    os.replace(tmp_path, file_path)
+
+
+class StoreIndexes:
+    """The three server indexes, loaded, updated per file and saved"""
+
+    def __init__(self, state_dir):
+        self.metadata_path = os.path.join(state_dir, '.metadata-index.json')
+        self.analytics_path = os.path.join(state_dir, '.content-analytics.json')
+        self.search_dir = os.path.join(state_dir, '.search-index')
+        self.meta = {}              # project -> file -> entry
+        self.analytics = {}         # "project/file" -> entry
+        self.docs = {}              # docId (str) -> doc
+        self.doc_ids = {}           # "project/file" -> docId (str)
+        self.next_id = 1
+        self.postings = {}          # term -> { docId (str): [count, line, ...] }
+        self.line_offsets = {}      # docId (str) -> packed offsets, written on save
+        self.dropped_ids = set()    # docIds whose line offset files go on save
+
+    def load(self):
+        metadata = read_json(self.metadata_path, METADATA_VERSION)
+        if metadata:
+            self.meta = metadata.get('files', {})
+        analytics = read_json(self.analytics_path, ANALYTICS_VERSION)
+        if analytics:
+            self.analytics = analytics.get('files', {})
+        docs = read_json(os.path.join(self.search_dir, 'docs.json'), SEARCH_INDEX_VERSION)
+        if docs:
+            self.docs = docs.get('docs', {})
+            self.next_id = docs.get('nextId', 1)
+            self.doc_ids = {f"{doc['project']}/{doc['file']}": doc_id for doc_id, doc in self.docs.items()}
+            for shard in range(SHARD_COUNT):
+                try:
+                    with open(os.path.join(self.search_dir, f'postings-{shard}.json'), 'r', encoding='utf-8') as f:
+                        self.postings.update(json.load(f))
+                except FileNotFoundError:
+                    continue
+        return self
+
+    def unchanged(self, project, file, stat):
+        """Same test the server uses before trusting an entry"""
+        entry = self.meta.get(project, {}).get(file)
+        key = f'{project}/{file}'
+        doc_id = self.doc_ids.get(key)
+        counters = self.analytics.get(key)
+        return (entry is not None and entry['mtimeMs'] == stat['mtimeMs'] and entry['bytes'] == stat['size']
+                and doc_id is not None and self.docs[doc_id]['bytes'] == stat['size']
+                and self.has_line_offsets(doc_id)
+                and counters is not None and counters['bytes'] == stat['size'])
+
+    def lines_path(self, doc_id):
+        return os.path.join(self.search_dir, 'lines', f'{doc_id}.bin')
+
+    def has_line_offsets(self, doc_id):
+        """A short lines file makes the server rebuild the doc anyway"""
+        try:
+            return os.path.getsize(self.lines_path(doc_id)) >= self.docs[doc_id]['lines'] * 4
+        except OSError:
+            return False
+
+    def drop(self, keys):
+        """Forget files (changed or gone) in all three indexes"""
+        dropped_ids = set()
+        for key in keys:
+            project, file = key.split('/', 1)
+            self.meta.get(project, {}).pop(file, None)
+            self.analytics.pop(key, None)
+            doc_id = self.doc_ids.pop(key, None)
+            if doc_id is not None:
+                self.docs.pop(doc_id, None)
+                self.line_offsets.pop(doc_id, None)
+                dropped_ids.add(doc_id)
+        self.dropped_ids |= dropped_ids
+        if dropped_ids:
+            for term in list(self.postings):
+                by_doc = self.postings[term]
+                for doc_id in dropped_ids.intersection(by_doc):
+                    del by_doc[doc_id]
+                if not by_doc:
+                    del self.postings[term]
+        for project in [name for name, files in self.meta.items() if not files]:
+            del self.meta[project]
+
+    def add(self, result):
+        project, file = result['project'], result['file']
+        key = f'{project}/{file}'
+        self.meta.setdefault(project, {})[file] = result['meta']
+        self.analytics[key] = result['analytics']
+        doc_id = str(self.next_id)
+        self.next_id += 1
+        self.docs[doc_id] = result['doc']
+        self.doc_ids[key] = doc_id
+        self.line_offsets[doc_id] = result['lineOffsets']
+        for term, hits in result['postings'].items():
+            self.postings.setdefault(term, {})[doc_id] = hits
+
+    def save(self):
+        updated = time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime())
+        rollups = {}
+        for project, files in self.meta.items():
+            rollup = rollups[project] = {'files': 0, 'words': 0, 'chars': 0, 'bytes': 0, 'lines': 0}
+            for entry in files.values():
+                rollup['files'] += 1
+                for field in ('words', 'chars', 'bytes', 'lines'):
+                    rollup[field] += entry[field]
+        write_json_atomic(self.metadata_path, {'version': METADATA_VERSION, 'updated': updated,
+                                               'files': self.meta, 'projects': rollups})
+
+        totals = {'bugs': 0, 'solutions': 0, 'memories': 0, 'people': 0}
+        days = {}
+        for entry in self.analytics.values():
+            for field in ('bugs', 'solutions', 'memories'):
+                totals[field] += entry[field]
+            totals['people'] += len(entry['people'])
+            days[entry['day']] = days.get(entry['day'], 0) + 1
+        write_json_atomic(self.analytics_path, {'version': ANALYTICS_VERSION, 'updated': updated,
+                                                'files': self.analytics, 'totals': totals, 'days': days})
+
+        # Line offsets first and docs.json last, as search-index.js saves
+        os.makedirs(os.path.join(self.search_dir, 'lines'), exist_ok=True)
+        for doc_id, offsets in self.line_offsets.items():
+            with open(self.lines_path(doc_id), 'wb') as f:
+                f.write(offsets)
+        self.line_offsets = {}
+
+        # Every shard is rewritten, so none keeps terms of dropped files
+        shards = [{} for _ in range(SHARD_COUNT)]
+        for term, by_doc in self.postings.items():
+            shards[shard_of(term)][term] = by_doc
+        for shard, terms in enumerate(shards):
+            write_json_atomic(os.path.join(self.search_dir, f'postings-{shard}.json'), terms)
+        write_json_atomic(os.path.join(self.search_dir, 'docs.json'),
+                          {'version': SEARCH_INDEX_VERSION, 'nextId': self.next_id, 'docs': self.docs})
+        for doc_id in self.dropped_ids:
+            try:
+                os.remove(self.lines_path(doc_id))
+            except FileNotFoundError:
+                pass
+        self.dropped_ids = set()
+
+
+# ============================================
+# RUN
+# ============================================
+
+def server_running(port):
+    try:
+        with urllib.request.urlopen(f'http://localhost:{port}/api/health', timeout=0.5) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def write_csv(csv_path, indexes, listing):
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['project', 'file', 'archived', 'bytes', 'chars', 'words', 'lines', 'tokens',
+                         'bugs', 'solutions', 'memories', 'people'])
+        for project, files in sorted(listing.items()):
+            for file, stat in sorted(files.items()):
+                key = f'{project}/{file}'
+                entry = indexes.meta.get(project, {}).get(file)
+                counters = indexes.analytics.get(key)
+                doc_id = indexes.doc_ids.get(key)
+                if entry is None or counters is None or doc_id is None:
+                    continue                # Unreadable this run
+                writer.writerow([project, file, int(bool(stat.get('archived'))), entry['bytes'], entry['chars'],
+                                 entry['words'], entry['lines'], indexes.docs[doc_id]['tokens'],
+                                 counters['bugs'], counters['solutions'], counters['memories'],
+                                 len(counters['people'])])
+
+
+def reindex(args):
+    projects_dir = os.path.join(os.path.abspath(args.root), 'Projects')
+    if not os.path.isdir(projects_dir):
+        raise RuntimeError(f'No Projects folder at {projects_dir}')
+    if not args.dry_run and server_running(args.port):
+        raise RuntimeError(f'The server is running on port {args.port} - stop it first '
+                           '(it saves its own indexes over these), or use --dry-run')
+
+    started = time.perf_counter()
+    indexes = StoreIndexes(args.state_dir)
+    if not args.full:
+        indexes.load()
+    loaded = time.perf_counter()
+    listing = walk_projects(projects_dir)
+    walked = time.perf_counter()
+
+    listed_keys = set()
+    tasks = []
+    for project, files in listing.items():
+        for file, stat in files.items():
+            listed_keys.add(f'{project}/{file}')
+            if not indexes.unchanged(project, file, stat):
+                tasks.append((stat['size'], (project, file, stat['source'], stat['mtimeMs'])))
+    known_keys = set(indexes.doc_ids) | set(indexes.analytics) | {
+        f'{project}/{file}' for project, files in indexes.meta.items() for file in files}
+    removed = known_keys - listed_keys
+    indexes.drop(removed | {f'{task[0]}/{task[1]}' for _, task in tasks})
+
+    # Biggest files first so one large chat doesn't finish the run alone;
+    # results come back in this order, so doc ids are the same every run
+    tasks = [task for _, task in sorted(tasks, key=lambda item: (-item[0], item[1][0], item[1][1]))]
+    bytes_read = 0
+    errors = []
+    if tasks:
+        workers = max(1, min(args.workers, len(tasks)))
+        with multiprocessing.Pool(workers) as pool:
+            for done, result in enumerate(pool.imap(analyze, tasks, chunksize=args.chunk), 1):
+                if 'error' in result:
+                    errors.append(f"{result['project']}/{result['file']}: {result['error']}")
+                else:
+                    indexes.add(result)
+                    bytes_read += result['bytesRead']
+                if args.progress and done % args.progress == 0:
+                    print(f"   {done}/{len(tasks)} files", file=sys.stderr, flush=True)
+    indexed = time.perf_counter()
+
+    if not args.dry_run:
+        indexes.save()
+    if args.csv:
+        write_csv(args.csv, indexes, listing)
+    finished = time.perf_counter()
+
+    index_seconds = max(indexed - walked, 1e-9)
+    total_files = sum(len(files) for files in listing.values())
+    return {
+        'root': os.path.abspath(args.root),
+        'mode': 'full' if args.full else 'incremental',
+        'dryRun': args.dry_run,
+        'workers': args.workers,
+        'projects': len(listing),
+        'files': total_files,
+        'archivedFiles': sum(1 for files in listing.values() for stat in files.values() if stat.get('archived')),
+        'reindexed': len(tasks) - len(errors),
+        'unchanged': total_files - len(tasks),
+        'removed': len(removed),
+        'errors': errors,
+        'bytesRead': bytes_read,
+        'seconds': {
+            'load': round(loaded - started, 3),
+            'walk': round(walked - loaded, 3),
+            'index': round(indexed - walked, 3),
+            'write': round(finished - indexed, 3),
+            'total': round(finished - started, 3),
+        },
+        'filesPerSecond': round(len(tasks) / index_seconds, 1) if tasks else 0,
+        'mbPerSecond': round(bytes_read / 1024 / 1024 / index_seconds, 2) if tasks else 0,
+        'terms': len(indexes.postings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the Smart Save server indexes offline')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='Claude_Conversations folder')
+    parser.add_argument('--state-dir', default=SCRIPT_DIR, help='where the server keeps its index files')
+    parser.add_argument('--full', action='store_true', help='ignore existing indexes and reread every file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk', type=int, default=4, help='files handed to a worker at a time')
+    parser.add_argument('--dry-run', action='store_true', help='index and report, write nothing')
+    parser.add_argument('--csv', help='write per-file statistics here')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    parser.add_argument('--progress', type=int, default=0, help='print progress every N files')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='server port to check is stopped')
+    args = parser.parse_args()
+
+    try:
+        report = reindex(args)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"📚 {report['files']} files in {report['projects']} projects "
+              f"({report['archivedFiles']} archived) - {report['mode']}{' dry run' if args.dry_run else ''}")
+        print(f"   Reindexed {report['reindexed']}, unchanged {report['unchanged']}, removed {report['removed']}")
+        print(f"   {report['filesPerSecond']} files/sec, {report['mbPerSecond']} MB/sec "
+              f"({report['bytesRead'] / 1024 / 1024:.1f} MB with {args.workers} workers)")
+        print(f"   Load {report['seconds']['load']}s, walk {report['seconds']['walk']}s, index {report['seconds']['index']}s, "
+              f"write {report['seconds']['write']}s")
+        for error in report['errors']:
+            print(f"⚠️ Could not index {error}")
+    if report['errors']:
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
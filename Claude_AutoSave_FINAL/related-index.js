@@ -0,0 +1,452 @@
+// ============================================
+// RELATED INDEX - Similar chats via MinHash / LSH
+// ============================================
+// Each chat gets a MinHash signature of the words it
+// uses (common words left out): NUM_HASHES minimums,
+// one per hash function. The share of positions where
+// two signatures agree estimates how much vocabulary
+// the two chats share, so paraphrases of a topic still
+// match where substring search misses them.
+//
+// Signatures are cut into BANDS bands; chats with an
+// identical band share a bucket. Looking up a chat (or
+// the text of a new one, for the folder suggestion)
+// only compares it with the chats in its buckets, not
+// with every chat on disk.
+//
+// Appends only fold in the new words (a minimum can
+// only go down), so no file is reread; a file changed
+// outside the server is rehashed from its content.
+// Signatures are kept per segment file and combined
+// per chat. Saves append just the changed files to a
+// journal next to the index file; the index file is
+// only rewritten (and the journal emptied) once the
+// journal passes COMPACT_BYTES.
+// ============================================
+
+const fs = require('fs');
+const { writeJsonAtomic, writeJsonAtomicSync } = require('./async-io.js');
+const { parseSegmentName, segmentFileName } = require('./chat-segments.js');
+
+const RELATED_VERSION = 1;
+const SAVE_DELAY = 2000;              // Batch journal writes (ms)
+const COMPACT_BYTES = 4 * 1024 * 1024; // Journal size that triggers a full rewrite
+const NUM_HASHES = 144;
+const BANDS = 48;                     // 3 rows each: chats ~30% alike usually share a bucket,
+                                      // unrelated ones (~5%) under 1% of the time
+const ROWS = NUM_HASHES / BANDS;
+const MAX_CANDIDATES = 5000;          // Bound on signatures compared per lookup
+const DEFAULT_MIN_SIMILARITY = 0.1;
+const EMPTY = 0xFFFFFFFF;             // Slot no word has lowered yet
+const MIN_WORD_LENGTH = 3;
+const WORD_PATTERN = /[\p{L}\p{N}_]+/gu;
+const TRAILING_WORD = /[\p{L}\p{N}_]+$/u;
+const MAX_PARTIAL = 256;              // Longer "words" are cut there
+
+// Too common to say anything about a topic - plus the words every saved
+// chat has in its separators and segment headers
+const STOP_WORDS = new Set([
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'any', 'can', 'had', 'her', 'was', 'one',
+    'our', 'out', 'has', 'him', 'his', 'how', 'its', 'let', 'may', 'new', 'now', 'see', 'two', 'way',
+    'who', 'did', 'get', 'use', 'that', 'this', 'with', 'have', 'from', 'they', 'will', 'would', 'there',
+    'their', 'what', 'about', 'which', 'when', 'make', 'like', 'just', 'know', 'take', 'into', 'your',
+    'some', 'could', 'them', 'than', 'then', 'also', 'been', 'were', 'said', 'each', 'more', 'other',
+    'these', 'only', 'very', 'here', 'should', 'does', 'want', 'need', 'chat', 'folder', 'full',
+    'capture', 'continuation', 'continued', 'started', 'part'
+]);
+
+// 32-bit string hash (FNV-1a) and integer mixer (murmur3 finalizer)
+const hashString = (text) => {
+    let hash = 0x811C9DC5;
+    for (let i = 0; i < text.length; i++) {
+        hash = Math.imul(hash ^ text.charCodeAt(i), 0x01000193);
+    }
+    return hash >>> 0;
+};
+
+const mix = (value) => {
+    value = Math.imul(value ^ (value >>> 16), 0x85EBCA6B);
+    value = Math.imul(value ^ (value >>> 13), 0xC2B2AE35);
+    return (value ^ (value >>> 16)) >>> 0;
+};
+
+// One seed per hash function, fixed so saved signatures stay comparable
+const SEEDS = Array.from({ length: NUM_HASHES }, (_, i) => mix(0x9E3779B9 + i * 0x632BE5AB));
+
+const emptySignature = () => new Array(NUM_HASHES).fill(EMPTY);
+
+// Lower a signature by every kept word of the text
+function foldWords(signature, text) {
+    const words = new Set(text.toLowerCase().match(WORD_PATTERN));
+    let folded = 0;
+    words.forEach(word => {
+        if (word.length < MIN_WORD_LENGTH || STOP_WORDS.has(word)) return;
+        const hash = hashString(word);
+        for (let i = 0; i < NUM_HASHES; i++) {
+            const value = mix(hash ^ SEEDS[i]);
+            if (value < signature[i]) signature[i] = value;
+        }
+        folded++;
+    });
+    return folded;
+}
+
+// Bucket key per band: band number plus a hash of its rows
+function bandKeys(signature) {
+    const keys = [];
+    for (let band = 0; band < BANDS; band++) {
+        let hash = band;
+        for (let row = band * ROWS; row < (band + 1) * ROWS; row++) {
+            hash = mix(hash ^ signature[row]);
+        }
+        keys.push(band * 0x100000000 + hash);
+    }
+    return keys;
+}
+
+function similarity(a, b) {
+    let same = 0;
+    for (let i = 0; i < NUM_HASHES; i++) {
+        if (a[i] === b[i]) same++;
+    }
+    return same / NUM_HASHES;
+}
+
+// Signatures are saved as base64 of their little-endian 32-bit words
+const encodeSignature = (signature) => {
+    const buffer = Buffer.alloc(NUM_HASHES * 4);
+    signature.forEach((value, i) => buffer.writeUInt32LE(value, i * 4));
+    return buffer.toString('base64');
+};
+
+const decodeSignature = (text) => {
+    const buffer = Buffer.from(text, 'base64');
+    return Array.from({ length: NUM_HASHES }, (_, i) => buffer.readUInt32LE(i * 4));
+};
+
+class RelatedIndex {
+    constructor({ indexPath }) {
+        this.indexPath = indexPath;
+        this.journalPath = `${indexPath}.log`;
+        this.saveTimer = null;
+        this.saving = Promise.resolve();
+        this.reset();
+    }
+
+    reset() {
+        this.files = {};              // "project/file" -> { signature, partial, words, bytes }
+        this.chats = new Map();       // "project/chat" -> { project, chat, files, signature, keys }
+        this.buckets = new Map();     // band key -> Set of "project/chat"
+        this.dirty = new Set();       // File keys changed since the last save
+        this.journalBytes = 0;
+        this.rewrite = true;          // No usable index file yet - write one whole
+    }
+
+    load() {
+        try {
+            if (fs.existsSync(this.indexPath)) {
+                const data = JSON.parse(fs.readFileSync(this.indexPath, 'utf8'));
+                if (data.version === RELATED_VERSION && data.hashes === NUM_HASHES) {
+                    Object.entries(data.files || {}).forEach(([key, entry]) => {
+                        this.files[key] = Object.assign({}, entry, { signature: decodeSignature(entry.signature) });
+                    });
+                    this.replayJournal();
+                    this.rewrite = false;
+                }
+            }
+            // Chats and buckets are not saved; they follow from the signatures
+            Object.keys(this.files).forEach(key => this.chatFor(this.chatKeyOf(key)).files.add(key));
+            [...this.chats.keys()].forEach(chatKey => this.updateChat(chatKey));
+        } catch (error) {
+            console.log(`⚠️ Related index unreadable, rebuilding: ${error.message}`);
+            this.reset();
+        }
+        return this;
+    }
+
+    // Apply the changes saved since the index file was written. A line
+    // cut short by a crash is dropped (and cut off the file)
+    replayJournal() {
+        if (!fs.existsSync(this.journalPath)) return;
+        let content = fs.readFileSync(this.journalPath, 'utf8');
+        const end = content.lastIndexOf('\n') + 1;
+        if (end < content.length) {
+            content = content.slice(0, end);
+            fs.truncateSync(this.journalPath, Buffer.byteLength(content, 'utf8'));
+        }
+        content.split('\n').forEach(line => {
+            if (!line) return;
+            const record = JSON.parse(line);
+            if (record.removed) delete this.files[record.key];
+            else this.files[record.key] = Object.assign({}, record.entry, { signature: decodeSignature(record.entry.signature) });
+        });
+        this.journalBytes = content.length;
+    }
+
+    snapshot() {
+        const files = {};
+        Object.entries(this.files).forEach(([key, entry]) => {
+            files[key] = Object.assign({}, entry, { signature: encodeSignature(entry.signature) });
+        });
+        return {
+            version: RELATED_VERSION,
+            updated: new Date().toISOString(),
+            hashes: NUM_HASHES,
+            files
+        };
+    }
+
+    // Journal lines for the files changed since the last save
+    pendingJournal() {
+        const keys = Array.from(this.dirty);
+        this.dirty.clear();
+        const text = keys.map(key => {
+            const entry = this.files[key];
+            return JSON.stringify(entry
+                ? { key, entry: Object.assign({}, entry, { signature: encodeSignature(entry.signature) }) }
+                : { key, removed: true }) + '\n';
+        }).join('');
+        return { keys, text };
+    }
+
+    async save() {
+        const { keys, text } = this.pendingJournal();
+        if (keys.length === 0) return;
+        try {
+            if (this.rewrite || this.journalBytes + text.length > COMPACT_BYTES) {
+                await writeJsonAtomic(this.indexPath, this.snapshot());
+                await fs.promises.writeFile(this.journalPath, '');
+                this.journalBytes = 0;
+                this.rewrite = false;
+            } else {
+                await fs.promises.appendFile(this.journalPath, text);
+                this.journalBytes += text.length;
+            }
+        } catch (error) {
+            console.error('Related index save error:', error);
+            keys.forEach(key => this.dirty.add(key));
+            this.scheduleSave();
+        }
+    }
+
+    // Write pending changes now (shutdown path, after settle())
+    flush() {
+        if (this.saveTimer) {
+            clearTimeout(this.saveTimer);
+            this.saveTimer = null;
+        }
+        const { keys, text } = this.pendingJournal();
+        if (this.rewrite || this.journalBytes + text.length > COMPACT_BYTES) {
+            writeJsonAtomicSync(this.indexPath, this.snapshot());
+            fs.writeFileSync(this.journalPath, '');
+            this.journalBytes = 0;
+            this.rewrite = false;
+        } else if (keys.length > 0) {
+            fs.appendFileSync(this.journalPath, text);
+            this.journalBytes += text.length;
+        }
+    }
+
+    // Stop the save timer and wait for a save in flight - call before a
+    // shutdown flush(), or an older save could land on top of it
+    async settle() {
+        clearTimeout(this.saveTimer);
+        this.saveTimer = null;
+        await this.saving;
+    }
+
+    scheduleSave() {
+        if (this.saveTimer) return;
+        this.saveTimer = setTimeout(() => {
+            this.saveTimer = null;
+            // One save at a time, so journal lines land in order
+            this.saving = this.saving.then(() => this.save());
+        }, SAVE_DELAY);
+        if (this.saveTimer.unref) this.saveTimer.unref();
+    }
+
+    changed(key) {
+        this.dirty.add(key);
+        this.scheduleSave();
+    }
+
+    // Follow a MetadataIndex so signatures move with every append/rescan
+    attach(metadataIndex) {
+        metadataIndex.on('append', (project, file, text) => this.recordAppend(project, file, text));
+        metadataIndex.on('rescan', (project, file, content) => this.rebuildFile(project, file, content));
+        metadataIndex.on('remove', (project, file) => this.removeFile(project, file));
+        return this;
+    }
+
+    // "Project/Chat.part-002.md" -> "Project/Chat"
+    chatKeyOf(fileKey) {
+        const slash = fileKey.indexOf('/');
+        return `${fileKey.slice(0, slash)}/${parseSegmentName(fileKey.slice(slash + 1)).chat}`;
+    }
+
+    // Fold text into a file's signature. A word cut off at the end of the
+    // text waits for the next append, so it is hashed once and whole
+    addText(entry, text) {
+        const whole = entry.partial + text;
+        const trailing = whole.slice(-MAX_PARTIAL).match(TRAILING_WORD);
+        const cut = whole.length - (trailing ? trailing[0].length : 0);
+        entry.partial = whole.slice(cut);
+        entry.words += foldWords(entry.signature, whole.slice(0, cut));
+        entry.bytes += Buffer.byteLength(text, 'utf8');
+    }
+
+    rebuildFile(project, file, content) {
+        const key = `${project}/${file}`;
+        const entry = { signature: emptySignature(), partial: '', words: 0, bytes: 0 };
+        this.addText(entry, content);
+        this.files[key] = entry;
+        const chatKey = this.chatKeyOf(key);
+        this.chatFor(chatKey).files.add(key);
+        this.updateChat(chatKey);
+        this.changed(key);
+    }
+
+    recordAppend(project, file, text) {
+        const key = `${project}/${file}`;
+        const entry = this.files[key];
+        if (!entry) {
+            // Never hashed - the next reconcile rebuilds it from disk
+            return;
+        }
+        this.addText(entry, text);
+        this.updateChat(this.chatKeyOf(key));
+        this.changed(key);
+    }
+
+    removeFile(project, file) {
+        const key = `${project}/${file}`;
+        if (!this.files[key]) return;
+        delete this.files[key];
+        const chatKey = this.chatKeyOf(key);
+        this.chatFor(chatKey).files.delete(key);
+        this.updateChat(chatKey);
+        this.changed(key);
+    }
+
+    needsRebuild(project, file, meta) {
+        const entry = this.files[`${project}/${file}`];
+        return !entry || entry.bytes !== meta.bytes;
+    }
+
+    // Chat record for a "project/chat" key (created on first use)
+    chatFor(chatKey) {
+        let chat = this.chats.get(chatKey);
+        if (!chat) {
+            const slash = chatKey.indexOf('/');
+            chat = { project: chatKey.slice(0, slash), chat: chatKey.slice(slash + 1), files: new Set(), signature: null, keys: [] };
+            this.chats.set(chatKey, chat);
+        }
+        return chat;
+    }
+
+    // The chat's signature is the minimum over its segment files (the
+    // signature of all their words together); re-bucket it if it moved
+    updateChat(chatKey) {
+        const chat = this.chatFor(chatKey);
+        const signature = emptySignature();
+        let words = 0;
+        chat.files.forEach(key => {
+            const entry = this.files[key];
+            words += entry.words;
+            entry.signature.forEach((value, i) => {
+                if (value < signature[i]) signature[i] = value;
+            });
+        });
+
+        const keys = words > 0 ? bandKeys(signature) : [];
+        chat.keys.forEach((bandKey, band) => {
+            if (keys[band] === bandKey) return;
+            const bucket = this.buckets.get(bandKey);
+            if (!bucket) return;
+            bucket.delete(chatKey);
+            if (bucket.size === 0) this.buckets.delete(bandKey);
+        });
+        keys.forEach((bandKey, band) => {
+            if (chat.keys[band] === bandKey) return;
+            if (!this.buckets.has(bandKey)) this.buckets.set(bandKey, new Set());
+            this.buckets.get(bandKey).add(chatKey);
+        });
+
+        chat.signature = signature;
+        chat.keys = keys;
+        if (chat.files.size === 0) this.chats.delete(chatKey);
+    }
+
+    has(project, chat) {
+        return this.chats.has(`${project}/${chat}`);
+    }
+
+    // Chats sharing a bucket with the signature, best match first
+    match(signature, { exclude = null, limit = 10, minSimilarity = DEFAULT_MIN_SIMILARITY } = {}) {
+        const candidates = new Set();
+        for (const bandKey of bandKeys(signature)) {
+            const bucket = this.buckets.get(bandKey);
+            if (!bucket) continue;
+            for (const chatKey of bucket) {
+                if (chatKey !== exclude) candidates.add(chatKey);
+                if (candidates.size >= MAX_CANDIDATES) break;
+            }
+            if (candidates.size >= MAX_CANDIDATES) break;
+        }
+
+        const matches = [];
+        candidates.forEach(chatKey => {
+            const chat = this.chats.get(chatKey);
+            const score = similarity(signature, chat.signature);
+            if (score >= minSimilarity) {
+                matches.push({
+                    project: chat.project,
+                    chat: chat.chat,
+                    file: segmentFileName(chat.chat, 1),
+                    similarity: Math.round(score * 1000) / 1000
+                });
+            }
+        });
+        matches.sort((a, b) => b.similarity - a.similarity || a.chat.localeCompare(b.chat));
+        return { matches: matches.slice(0, limit), candidates: candidates.size };
+    }
+
+    // Chats like this one (null if the chat isn't indexed)
+    related(project, chat, options = {}) {
+        const entry = this.chats.get(`${project}/${chat}`);
+        if (!entry) return null;
+        return this.match(entry.signature, Object.assign({}, options, { exclude: `${project}/${chat}` }));
+    }
+
+    // Projects whose chats look most like the text of a new chat
+    suggestFolders(text, { limit = 3, minSimilarity = DEFAULT_MIN_SIMILARITY } = {}) {
+        const signature = emptySignature();
+        if (foldWords(signature, text) === 0) return { suggestions: [], candidates: 0 };
+
+        const { matches, candidates } = this.match(signature, { limit: MAX_CANDIDATES, minSimilarity });
+        const projects = new Map();
+        matches.forEach(match => {
+            const project = projects.get(match.project) || { project: match.project, score: 0, chats: [] };
+            project.score = Math.max(project.score, match.similarity);
+            if (project.chats.length < 3) project.chats.push(match.chat);
+            projects.set(match.project, project);
+        });
+        const suggestions = [...projects.values()]
+            .sort((a, b) => b.score - a.score || b.chats.length - a.chats.length)
+            .slice(0, limit);
+        return { suggestions, candidates };
+    }
+
+    stats() {
+        let largestBucket = 0;
+        this.buckets.forEach(bucket => { largestBucket = Math.max(largestBucket, bucket.size); });
+        return {
+            chats: this.chats.size,
+            files: Object.keys(this.files).length,
+            buckets: this.buckets.size,
+            largestBucket
+        };
+    }
+}
+
+module.exports = { RelatedIndex, NUM_HASHES, BANDS };
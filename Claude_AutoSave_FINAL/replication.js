@@ -0,0 +1,178 @@
+// ============================================
+// REPLICATION - Standby save servers that follow
+// the append log
+// ============================================
+// A standby long-polls the primary's
+// /api/replication/log from the seq after the last
+// one it holds, writes each record into its own
+// Claude_Conversations tree and append log (same seq
+// numbers), and asks again. A standby that was down
+// catches up from where its log ends; one that fell
+// behind the primary's oldest retained record is told
+// so (410) and needs a fresh copy of the tree.
+//
+// Standbys answer the read endpoints (stats, search,
+// projects) from their own indexes and refuse saves
+// until promoted.
+// ============================================
+
+const DEFAULT_WAIT_MS = 25 * 1000;        // Long-poll time on the primary
+const DEFAULT_BATCH = 500;                // Records per request
+const RETRY_MIN_MS = 1000;
+const RETRY_MAX_MS = 30 * 1000;
+const FOLLOWER_TIMEOUT = 2 * 60 * 1000;   // Primary forgets followers silent this long
+
+// ---------- primary side ----------
+
+// Followers as seen from their polls (they ask from their next seq)
+class FollowerRegistry {
+    constructor() {
+        this.followers = new Map();     // id -> { address, ackedSeq, lastSeen, polls }
+    }
+
+    seen(id, fromSeq, address) {
+        const follower = this.followers.get(id) || { address, ackedSeq: 0, lastSeen: 0, polls: 0 };
+        follower.address = address;
+        follower.ackedSeq = Math.max(follower.ackedSeq, fromSeq - 1);
+        follower.lastSeen = Date.now();
+        follower.polls++;
+        this.followers.set(id, follower);
+    }
+
+    stats(lastSeq, now = Date.now()) {
+        const followers = {};
+        this.followers.forEach((follower, id) => {
+            if (now - follower.lastSeen > FOLLOWER_TIMEOUT) {
+                this.followers.delete(id);
+                return;
+            }
+            followers[id] = Object.assign({}, follower, { lagSeq: lastSeq - follower.ackedSeq });
+        });
+        return followers;
+    }
+}
+
+// ---------- standby side ----------
+
+class ReplicaFollower {
+    constructor({
+        primary,                        // e.g. http://192.168.1.20:3737
+        appendLog,
+        apply,                          // async (record) => void; writes it locally
+        followerId,
+        waitMs = DEFAULT_WAIT_MS,
+        batch = DEFAULT_BATCH
+    }) {
+        this.primary = primary.replace(/\/+$/, '');
+        this.appendLog = appendLog;
+        this.apply = apply;
+        this.followerId = followerId;
+        this.waitMs = waitMs;
+        this.batch = batch;
+        this.running = false;
+        this.controller = null;
+        this.loop = null;
+        this.primarySeq = null;
+        this.connected = false;
+        this.lastContact = null;
+        this.lastError = null;
+        this.counters = {
+            polls: 0,
+            applied: 0,
+            appliedBytes: 0,
+            failures: 0
+        };
+    }
+
+    start() {
+        if (this.running) return this;
+        this.running = true;
+        this.loop = this.follow();
+        return this;
+    }
+
+    async stop() {
+        this.running = false;
+        if (this.controller) this.controller.abort();
+        if (this.loop) await this.loop;
+    }
+
+    async follow() {
+        let retryMs = RETRY_MIN_MS;
+        while (this.running) {
+            try {
+                await this.pollOnce();
+                retryMs = RETRY_MIN_MS;
+            } catch (error) {
+                if (this.aborted(error)) break;
+                this.connected = false;
+                this.counters.failures++;
+                if (this.lastError !== error.message) {
+                    console.log(`Warning: Replication from ${this.primary} failed: ${error.message}`);
+                }
+                this.lastError = error.message;
+                if (!this.running) break;
+                await new Promise(resolve => setTimeout(resolve, retryMs));
+                retryMs = Math.min(retryMs * 2, RETRY_MAX_MS);
+            }
+        }
+    }
+
+    // stop() cut the request short - not a failure
+    aborted(error) {
+        return !this.running && error.name === 'AbortError';
+    }
+
+    // One long poll: fetch what follows our last seq and apply it in order
+    async pollOnce() {
+        const from = this.appendLog.lastSeq + 1;
+        const url = `${this.primary}/api/replication/log?from=${from}&limit=${this.batch}` +
+            `&wait=${this.waitMs}&follower=${encodeURIComponent(this.followerId)}`;
+        this.controller = new AbortController();
+        const timer = setTimeout(() => this.controller.abort(), this.waitMs + 15 * 1000);
+        let body;
+        try {
+            const response = await fetch(url, { signal: this.controller.signal });
+            body = await response.json();
+            if (response.status === 410) {
+                // Too far behind - the records we need are gone
+                this.running = false;
+                throw new Error(`Primary no longer has seq ${from} (oldest ${body.oldestSeq}); ` +
+                    'copy its Claude_Conversations folder here, set replication.fromSeq to its lastSeq + 1 and restart');
+            }
+            if (!response.ok) throw new Error(body.error || `HTTP ${response.status}`);
+        } finally {
+            clearTimeout(timer);
+            this.controller = null;
+        }
+
+        if (!this.connected) console.log(`🔁 Following ${this.primary} from seq ${from}`);
+        this.connected = true;
+        this.lastError = null;
+        this.lastContact = new Date().toISOString();
+        this.primarySeq = body.lastSeq;
+        this.counters.polls++;
+
+        for (const record of body.records) {
+            if (!this.running) break;
+            await this.apply(record);
+            this.counters.applied++;
+            this.counters.appliedBytes += record.text ? record.text.length : 0;
+        }
+    }
+
+    stats() {
+        return Object.assign({
+            primary: this.primary,
+            followerId: this.followerId,
+            connected: this.connected,
+            appliedSeq: this.appendLog.lastSeq,
+            primarySeq: this.primarySeq,
+            lagSeq: this.primarySeq === null ? null : Math.max(0, this.primarySeq - this.appendLog.lastSeq),
+            lastContact: this.lastContact,
+            lastError: this.lastError
+        }, this.counters);
+    }
+}
+
+module.exports = { FollowerRegistry, ReplicaFollower };
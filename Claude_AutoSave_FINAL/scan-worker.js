@@ -0,0 +1,66 @@
+// ============================================
+// SCAN WORKER - Whole-tree directory walks
+// ============================================
+// Lists every project folder and the size/mtime of
+// each conversation file. Runs inside the worker pool
+// so a slow (iCloud) walk never blocks the append path;
+// in sync I/O mode the server calls walkProjects()
+// directly instead.
+// ============================================
+
+const fs = require('fs');
+const path = require('path');
+const { parentPort, isMainThread } = require('worker_threads');
+
+// { projects: { name: { mtimeMs, files: { file: { size, mtimeMs } } } } }
+function walkProjects(projectsDir) {
+    const listing = { projects: {}, scannedAt: Date.now() };
+    if (!fs.existsSync(projectsDir)) return listing;
+
+    fs.readdirSync(projectsDir).forEach(dir => {
+        const projectPath = path.join(projectsDir, dir);
+        let stat;
+        try {
+            stat = fs.statSync(projectPath);
+        } catch (error) {
+            return;
+        }
+        if (!stat.isDirectory()) return;
+
+        const project = { mtimeMs: stat.mtimeMs, files: {} };
+        try {
+            fs.readdirSync(projectPath).forEach(file => {
+                if (!file.endsWith('.md')) return;
+                try {
+                    const fileStat = fs.statSync(path.join(projectPath, file));
+                    project.files[file] = { size: fileStat.size, mtimeMs: fileStat.mtimeMs };
+                } catch (error) {
+                    // File vanished mid-walk - skip it
+                }
+            });
+        } catch (error) {
+            console.log(`Warning: Could not read project directory ${projectPath}`);
+        }
+        listing.projects[dir] = project;
+    });
+
+    return listing;
+}
+
+const tasks = {
+    walk: ({ projectsDir }) => walkProjects(projectsDir)
+};
+
+if (!isMainThread && parentPort) {
+    parentPort.on('message', (message) => {
+        try {
+            const handler = tasks[message.type];
+            if (!handler) throw new Error(`Unknown scan task: ${message.type}`);
+            parentPort.postMessage({ id: message.id, result: handler(message) });
+        } catch (error) {
+            parentPort.postMessage({ id: message.id, error: error.message });
+        }
+    });
+}
+
+module.exports = { walkProjects };
@@ -0,0 +1,667 @@
+// ============================================
+// SEARCH INDEX - Inverted index behind /api/search
+// ============================================
+// Tokens -> (chat, line) postings with a count per
+// chat, kept up to date from appends. Each of the
+// 32 shards has its own term map and file, so a
+// save rewrites only the shards that changed, with
+// just the changed terms sent to the index worker
+// that merges and writes them off the event loop.
+// Supports terms, "phrase queries" and prefix*
+// queries, BM25 ranking, paging and snippets with
+// highlight offsets. Phrases and highlights are
+// worked out from the line text at query time.
+//
+// On disk (.search-index/):
+//   docs.json           chats: size, tokens, line count
+//   postings-N.json     term -> { docId: [count, line, ...] }
+//   lines/<docId>.bin   line start offsets, uint32 LE;
+//                       only appended to, as doc ids
+//                       are never reused
+// ============================================
+
+const fs = require('fs');
+const path = require('path');
+const { createIo, writeJsonAtomicSync } = require('./async-io.js');
+
+const SEARCH_INDEX_VERSION = 2;
+const SHARD_COUNT = 32;
+const SAVE_DELAY = 5000;        // Batch index writes (ms)
+const MAX_PREFIX_TERMS = 64;    // Cap on terms a prefix* query expands to
+const SNIPPET_LINES = 5;
+const SNIPPET_WIDTH = 160;      // Chars of context around a match
+const BM25_K1 = 1.2;
+const BM25_B = 0.75;
+
+const TOKEN_PATTERN = /[\p{L}\p{N}_]+/gu;
+const WORD_CHAR = /[\p{L}\p{N}_]/u;
+
+// Split text into lowercase tokens with their column in the line
+function tokenizeLine(line) {
+    const tokens = [];
+    TOKEN_PATTERN.lastIndex = 0;
+    let match;
+    while ((match = TOKEN_PATTERN.exec(line)) !== null) {
+        tokens.push({ term: match[0].toLowerCase(), col: match.index, length: match[0].length });
+    }
+    return tokens;
+}
+
+const shardOf = (term) => {
+    let hash = 0;
+    for (let i = 0; i < term.length; i++) {
+        hash = ((hash << 5) - hash + term.charCodeAt(i)) | 0;
+    }
+    return Math.abs(hash) % SHARD_COUNT;
+};
+
+// Parse `foo "exact phrase" pre*` into clauses
+function parseQuery(query) {
+    const clauses = [];
+    const pattern = /"([^"]+)"|(\S+)/g;
+    let match;
+    while ((match = pattern.exec(query || '')) !== null) {
+        if (match[1] !== undefined) {
+            const terms = tokenizeLine(match[1]).map(t => t.term);
+            if (terms.length === 1) clauses.push({ type: 'term', terms });
+            else if (terms.length > 1) clauses.push({ type: 'phrase', terms });
+        } else if (match[2].endsWith('*') && tokenizeLine(match[2]).length === 1) {
+            clauses.push({ type: 'prefix', terms: [tokenizeLine(match[2])[0].term] });
+        } else {
+            // "smart-save" tokenizes to two terms - treat it as a phrase
+            const terms = tokenizeLine(match[2]).map(t => t.term);
+            if (terms.length === 1) clauses.push({ type: 'term', terms });
+            else if (terms.length > 1) clauses.push({ type: 'phrase', terms });
+        }
+    }
+    return clauses;
+}
+
+// Columns a clause covers in one tokenized line
+function clauseRanges(clause, tokens) {
+    const ranges = [];
+    if (clause.type === 'phrase') {
+        const count = clause.terms.length;
+        for (let i = 0; i + count <= tokens.length; i++) {
+            if (!clause.terms.every((term, k) => tokens[i + k].term === term)) continue;
+            const last = tokens[i + count - 1];
+            ranges.push([tokens[i].col, last.col + last.length]);
+        }
+        return ranges;
+    }
+    tokens.forEach(token => {
+        const hit = clause.type === 'prefix'
+            ? token.term.startsWith(clause.terms[0])
+            : token.term === clause.terms[0];
+        if (hit) ranges.push([token.col, token.col + token.length]);
+    });
+    return ranges;
+}
+
+// Lines present in every sorted line list
+function commonLines(lists) {
+    return lists.reduce((lines, list) => {
+        const keep = new Set(list);
+        return lines.filter(line => keep.has(line));
+    });
+}
+
+const linesFile = (indexDir, docId) => path.join(indexDir, 'lines', `${docId}.bin`);
+
+// A shard's term map as it is stored
+function shardObject(terms) {
+    const data = {};
+    terms.forEach((byDoc, term) => {
+        data[term] = Object.fromEntries(byDoc);
+    });
+    return data;
+}
+
+// Write one save's changes. Runs in the index worker, or inline in sync
+// I/O mode and at shutdown. `shards` are whole shards; `changes` are only
+// the terms that changed ([term, postings], null postings = gone), merged
+// into the shard file as it is on disk. Line offsets go first and
+// docs.json last, so the docs table on disk never counts lines its files
+// don't hold yet
+function writeIndexFiles({ indexDir, shards = [], changes = [], lines, removed, docs }) {
+    fs.mkdirSync(path.join(indexDir, 'lines'), { recursive: true });
+
+    lines.forEach(([docId, from, offsets]) => {
+        const buffer = Buffer.alloc(offsets.length * 4);
+        offsets.forEach((offset, i) => buffer.writeUInt32LE(offset, i * 4));
+        // Truncating first drops whatever a failed earlier write left
+        const fd = fs.openSync(linesFile(indexDir, docId), fs.constants.O_WRONLY | fs.constants.O_CREAT);
+        try {
+            fs.ftruncateSync(fd, from * 4);
+            fs.writeSync(fd, buffer, 0, buffer.length, from * 4);
+        } finally {
+            fs.closeSync(fd);
+        }
+    });
+
+    shards.forEach(([shard, terms]) => {
+        writeJsonAtomicSync(path.join(indexDir, `postings-${shard}.json`), shardObject(terms));
+    });
+
+    changes.forEach(([shard, terms]) => {
+        const shardPath = path.join(indexDir, `postings-${shard}.json`);
+        let data = {};
+        try {
+            data = JSON.parse(fs.readFileSync(shardPath, 'utf8'));
+        } catch (error) {
+            if (error.code !== 'ENOENT') throw error;
+        }
+        terms.forEach(([term, postings]) => {
+            if (postings) data[term] = postings;
+            else delete data[term];
+        });
+        writeJsonAtomicSync(shardPath, data);
+    });
+
+    if (docs) writeJsonAtomicSync(path.join(indexDir, 'docs.json'), docs);
+    removed.forEach(docId => fs.rmSync(linesFile(indexDir, docId), { force: true }));
+}
+
+class SearchIndex {
+    constructor({ projectsDir, indexDir, io, pool = null }) {
+        this.projectsDir = projectsDir;
+        this.indexDir = indexDir;
+        this.io = io || createIo();
+        this.pool = pool;            // Index worker pool (async I/O mode)
+        this.reset();
+        this.saveTimer = null;
+        this.saving = Promise.resolve();
+    }
+
+    reset() {
+        this.docs = {};              // docId -> doc state
+        this.docIds = {};            // "project/file" -> docId
+        this.nextId = 1;
+        this.totalTokens = 0;
+        // One term map per shard: term -> Map(docId -> [count, line, line, ...])
+        this.shards = Array.from({ length: SHARD_COUNT }, () => new Map());
+        // Line offsets not in the doc's lines file yet: docId -> { from, offsets }
+        this.pendingLines = new Map();
+        this.removedDocs = new Set();
+        this.dirtyTerms = new Map();     // shard -> Set of terms changed since the last write
+        // Shards whose file doesn't match the index - written whole
+        this.fullShards = new Set(Array.from({ length: SHARD_COUNT }, (_, shard) => shard));
+        this.docsDirty = false;
+    }
+
+    markTerm(shard, term) {
+        if (!this.dirtyTerms.has(shard)) this.dirtyTerms.set(shard, new Set());
+        this.dirtyTerms.get(shard).add(term);
+    }
+
+    postingsFor(term) {
+        return this.shards[shardOf(term)].get(term);
+    }
+
+    // ============================================
+    // Persistence
+    // ============================================
+
+    load() {
+        try {
+            const docsPath = path.join(this.indexDir, 'docs.json');
+            if (!fs.existsSync(docsPath)) return this;
+
+            const data = JSON.parse(fs.readFileSync(docsPath, 'utf8'));
+            if (data.version !== SEARCH_INDEX_VERSION) return this;
+
+            this.docs = data.docs;
+            this.nextId = data.nextId;
+            Object.entries(this.docs).forEach(([id, doc]) => {
+                this.docIds[`${doc.project}/${doc.file}`] = Number(id);
+                this.totalTokens += doc.tokens;
+                // A lines file short of the count can't place snippets -
+                // have the catch-up index the file again
+                let size = -1;
+                try {
+                    size = fs.statSync(linesFile(this.indexDir, id)).size;
+                } catch (error) {
+                    // Missing - same as short
+                }
+                if (size < doc.lines * 4) doc.bytes = -1;
+            });
+
+            for (let shard = 0; shard < SHARD_COUNT; shard++) {
+                const shardPath = path.join(this.indexDir, `postings-${shard}.json`);
+                if (!fs.existsSync(shardPath)) continue;
+                const terms = JSON.parse(fs.readFileSync(shardPath, 'utf8'));
+                Object.entries(terms).forEach(([term, byDoc]) => {
+                    const list = new Map();
+                    Object.entries(byDoc).forEach(([docId, hits]) => list.set(Number(docId), hits));
+                    this.shards[shard].set(term, list);
+                });
+            }
+            this.fullShards.clear();
+        } catch (error) {
+            console.log(`⚠️ Search index unreadable, rebuilding: ${error.message}`);
+            this.reset();
+        }
+        return this;
+    }
+
+    // Collect what changed since the last write: changed terms (or whole
+    // shards, when `whole` or the shard file can't be trusted), new line
+    // offsets, dropped docs and the docs table. Changed postings are
+    // copied, as the worker gets them later
+    pendingWrites({ whole = false } = {}) {
+        const writes = {
+            indexDir: this.indexDir,
+            shards: [],
+            changes: [],
+            lines: [],
+            removed: Array.from(this.removedDocs),
+            docs: null
+        };
+        new Set([...this.fullShards, ...this.dirtyTerms.keys()]).forEach(shard => {
+            if (whole || this.fullShards.has(shard)) {
+                writes.shards.push([shard, this.shards[shard]]);
+                return;
+            }
+            writes.changes.push([shard, Array.from(this.dirtyTerms.get(shard), term => {
+                const byDoc = this.shards[shard].get(term);
+                return [term, byDoc ? Object.fromEntries(Array.from(byDoc, ([docId, hits]) => [docId, hits.slice()])) : null];
+            })]);
+        });
+        this.pendingLines.forEach(({ from, offsets }, docId) => {
+            if (offsets.length > 0) writes.lines.push([docId, from, offsets.slice()]);
+        });
+        if (this.docsDirty) {
+            writes.docs = { version: SEARCH_INDEX_VERSION, nextId: this.nextId, docs: this.docs };
+        }
+        this.dirtyTerms.clear();
+        this.fullShards.clear();
+        this.removedDocs.clear();
+        this.docsDirty = false;
+        return writes;
+    }
+
+    // Offsets now on disk leave the pending lists
+    linesWritten(lines) {
+        lines.forEach(([docId, from, offsets]) => {
+            const pending = this.pendingLines.get(docId);
+            if (!pending) return;
+            const written = Math.min(pending.offsets.length, from + offsets.length - pending.from);
+            if (written <= 0) return;
+            pending.offsets.splice(0, written);
+            pending.from += written;
+            if (pending.offsets.length === 0) this.pendingLines.delete(docId);
+        });
+    }
+
+    async save() {
+        // Inline, the shard maps are right here - no need to merge into the files
+        const writes = this.pendingWrites({ whole: !this.pool });
+        if (writes.shards.length === 0 && writes.changes.length === 0 && writes.lines.length === 0 &&
+            writes.removed.length === 0 && !writes.docs) return;
+        try {
+            if (this.pool) await this.pool.run({ type: 'searchIndex', ...writes });
+            else writeIndexFiles(writes);
+            this.linesWritten(writes.lines);
+        } catch (error) {
+            console.error('Search index save error:', error);
+            // Try again with the next save
+            writes.shards.forEach(([shard]) => this.fullShards.add(shard));
+            writes.changes.forEach(([shard, terms]) => terms.forEach(([term]) => this.markTerm(shard, term)));
+            writes.removed.forEach(docId => this.removedDocs.add(docId));
+            if (writes.docs) this.docsDirty = true;
+            this.scheduleSave();
+        }
+    }
+
+    // Write everything now (shutdown path, after settle())
+    flush() {
+        if (this.saveTimer) {
+            clearTimeout(this.saveTimer);
+            this.saveTimer = null;
+        }
+        const writes = this.pendingWrites({ whole: true });
+        writeIndexFiles(writes);
+        this.linesWritten(writes.lines);
+    }
+
+    // Stop the save timer and wait for a save in flight - call before a
+    // shutdown flush(), or an older save could land on top of it
+    async settle() {
+        clearTimeout(this.saveTimer);
+        this.saveTimer = null;
+        await this.saving;
+    }
+
+    scheduleSave() {
+        if (this.saveTimer) return;
+        this.saveTimer = setTimeout(() => {
+            this.saveTimer = null;
+            // One save at a time, so shard files are never written out of order
+            this.saving = this.saving.then(() => this.save());
+        }, SAVE_DELAY);
+        if (this.saveTimer.unref) this.saveTimer.unref();
+    }
+
+    // ============================================
+    // Updates
+    // ============================================
+
+    // Follow a MetadataIndex so the index moves with every append/rescan
+    attach(metadataIndex) {
+        this.metadataIndex = metadataIndex;
+        metadataIndex.on('append', (project, file, text) => this.appendText(project, file, text));
+        metadataIndex.on('rescan', (project, file, content) => this.indexFile(project, file, content));
+        metadataIndex.on('remove', (project, file) => this.removeDoc(project, file));
+        return this;
+    }
+
+    // Count one occurrence of term on a line; true if the line is new to
+    // the posting (lines only ever grow, so it is the last one)
+    addPosting(term, docId, line) {
+        const shard = shardOf(term);
+        const terms = this.shards[shard];
+        this.markTerm(shard, term);
+
+        let byDoc = terms.get(term);
+        if (!byDoc) {
+            byDoc = new Map();
+            terms.set(term, byDoc);
+        }
+        const hits = byDoc.get(docId);
+        if (!hits) {
+            byDoc.set(docId, [1, line]);
+            return true;
+        }
+        hits[0]++;
+        if (hits[hits.length - 1] === line) return false;
+        hits.push(line);
+        return true;
+    }
+
+    // Take back the doc's most recent occurrence of term
+    removeLastPosting(term, docId, ownsLine) {
+        const shard = shardOf(term);
+        const terms = this.shards[shard];
+        const byDoc = terms.get(term);
+        const hits = byDoc && byDoc.get(docId);
+        if (!hits) return;
+        hits[0]--;
+        if (ownsLine) hits.pop();
+        if (hits[0] === 0) byDoc.delete(docId);
+        if (byDoc.size === 0) terms.delete(term);
+        this.markTerm(shard, term);
+    }
+
+    addLineOffset(docId, offset) {
+        const doc = this.docs[docId];
+        let pending = this.pendingLines.get(docId);
+        if (!pending) {
+            pending = { from: doc.lines, offsets: [] };
+            this.pendingLines.set(docId, pending);
+        }
+        pending.offsets.push(offset);
+        doc.lines++;
+    }
+
+    removeDoc(project, file) {
+        const key = `${project}/${file}`;
+        const docId = this.docIds[key];
+        if (docId === undefined) return;
+
+        this.shards.forEach((terms, shard) => {
+            terms.forEach((byDoc, term) => {
+                if (!byDoc.delete(docId)) return;
+                if (byDoc.size === 0) terms.delete(term);
+                this.markTerm(shard, term);
+            });
+        });
+        this.totalTokens -= this.docs[docId].tokens;
+        delete this.docs[docId];
+        delete this.docIds[key];
+        this.pendingLines.delete(docId);
+        this.removedDocs.add(docId);
+        this.docsDirty = true;
+        this.scheduleSave();
+    }
+
+    // Index a whole file from scratch
+    indexFile(project, file, content) {
+        this.removeDoc(project, file);
+        const docId = this.nextId++;
+        this.docIds[`${project}/${file}`] = docId;
+        this.docs[docId] = {
+            project,
+            file,
+            tokens: 0,
+            bytes: 0,
+            lines: 1,           // Line starts recorded (the first is 0)
+            lastToken: null     // Last token, if the text ends inside it
+        };
+        this.pendingLines.set(docId, { from: 0, offsets: [0] });
+        this.addText(docId, content);
+    }
+
+    // Index text appended to a file
+    appendText(project, file, text) {
+        const docId = this.docIds[`${project}/${file}`];
+        if (docId === undefined) return; // Picked up by the next catch-up
+        this.addText(docId, text);
+    }
+
+    addText(docId, text) {
+        const doc = this.docs[docId];
+        const lines = text.split('\n');
+        let lineNo = doc.lines - 1;
+        let byteOffset = doc.bytes;
+        let tokens = doc.tokens;
+
+        // A token cut in half by the previous append is merged with
+        // the start of this one
+        let carry = null;
+        if (doc.lastToken && text.length > 0 && WORD_CHAR.test(text[0])) {
+            carry = doc.lastToken;
+            this.removeLastPosting(carry.term, docId, carry.ownsLine);
+            tokens--;
+        }
+        doc.lastToken = null;
+
+        lines.forEach((line, i) => {
+            if (i > 0) {
+                lineNo++;
+                this.addLineOffset(docId, byteOffset);
+            }
+
+            tokenizeLine(line).forEach(token => {
+                let term = token.term;
+                if (carry && i === 0 && token.col === 0) {
+                    term = carry.term + term;
+                    carry = null;
+                }
+                const ownsLine = this.addPosting(term, docId, lineNo);
+                if (i === lines.length - 1 && token.col + token.length === line.length) {
+                    doc.lastToken = { term, line: lineNo, ownsLine };
+                }
+                tokens++;
+            });
+
+            byteOffset += Buffer.byteLength(line, 'utf8') + (i < lines.length - 1 ? 1 : 0);
+        });
+
+        this.totalTokens += tokens - doc.tokens;
+        doc.tokens = tokens;
+        doc.bytes = byteOffset;
+        this.docsDirty = true;
+        this.scheduleSave();
+    }
+
+    // Any file the metadata index knows about but we don't (or whose
+    // size differs) - first run, or index lost between restarts
+    needsRebuild(project, file, meta) {
+        const docId = this.docIds[`${project}/${file}`];
+        return docId === undefined || this.docs[docId].bytes !== meta.bytes;
+    }
+
+    // ============================================
+    // Queries
+    // ============================================
+
+    // Resolve one clause to docId -> { count, lines }. Postings only say
+    // which lines hold a term, so phrases are checked on the line text
+    async matchClause(clause, lineCache) {
+        const hitsByDoc = new Map();
+        const collect = (byDoc) => {
+            byDoc.forEach((hits, docId) => {
+                const found = hitsByDoc.get(docId);
+                if (!found) {
+                    hitsByDoc.set(docId, { count: hits[0], lines: hits.slice(1) });
+                    return;
+                }
+                found.count += hits[0];
+                found.lines = found.lines.concat(hits.slice(1));
+            });
+        };
+
+        if (clause.type === 'term') {
+            const byDoc = this.postingsFor(clause.terms[0]);
+            if (byDoc) collect(byDoc);
+        } else if (clause.type === 'prefix') {
+            let expanded = 0;
+            for (const terms of this.shards) {
+                for (const [term, byDoc] of terms) {
+                    if (!term.startsWith(clause.terms[0])) continue;
+                    collect(byDoc);
+                    if (++expanded >= MAX_PREFIX_TERMS) break;
+                }
+                if (expanded >= MAX_PREFIX_TERMS) break;
+            }
+        } else {
+            // Phrase: lines holding every term, then the text decides
+            const lists = clause.terms.map(term => this.postingsFor(term));
+            if (lists.some(list => !list)) return hitsByDoc;
+
+            await Promise.all(Array.from(lists[0].keys()).map(async docId => {
+                if (!lists.every(list => list.has(docId))) return;
+                const candidates = commonLines(lists.map(list => list.get(docId).slice(1)));
+                let count = 0;
+                const lines = [];
+                for (const lineNo of candidates) {
+                    const text = await this.readLine(docId, lineNo, lineCache);
+                    const found = clauseRanges(clause, tokenizeLine(text)).length;
+                    if (found === 0) continue;
+                    count += found;
+                    lines.push(lineNo);
+                }
+                if (count > 0) hitsByDoc.set(docId, { count, lines });
+            }));
+        }
+        return hitsByDoc;
+    }
+
+    // Byte offset a line starts at: pending offsets are in memory, the
+    // rest in the doc's lines file
+    async lineStart(docId, lineNo) {
+        const pending = this.pendingLines.get(docId);
+        if (pending && lineNo >= pending.from) return pending.offsets[lineNo - pending.from];
+        const buffer = await this.io.readRange(linesFile(this.indexDir, docId), lineNo * 4, 4);
+        return buffer.length === 4 ? buffer.readUInt32LE(0) : undefined;
+    }
+
+    // Read one line of a chat straight from disk using the line offsets
+    async readLine(docId, lineNo, lineCache = new Map()) {
+        const key = `${docId}:${lineNo}`;
+        if (!lineCache.has(key)) {
+            lineCache.set(key, (async () => {
+                const doc = this.docs[docId];
+                if (!doc) return '';
+                const start = await this.lineStart(docId, lineNo);
+                const end = lineNo + 1 < doc.lines ? await this.lineStart(docId, lineNo + 1) - 1 : doc.bytes;
+                if (start === undefined || !(end > start)) return '';
+                const buffer = await this.io.readRange(path.join(this.projectsDir, doc.project, doc.file), start, end - start);
+                return buffer.toString('utf8');
+            })());
+        }
+        return lineCache.get(key);
+    }
+
+    async buildSnippets(docId, lines, clauses, lineCache) {
+        return Promise.all(Array.from(new Set(lines))
+            .sort((a, b) => a - b)
+            .slice(0, SNIPPET_LINES)
+            .map(async lineNo => {
+                const text = await this.readLine(docId, lineNo, lineCache);
+                const tokens = tokenizeLine(text);
+                const ranges = clauses
+                    .flatMap(clause => clauseRanges(clause, tokens))
+                    .sort((a, b) => a[0] - b[0]);
+                // Window long lines around the first match
+                const from = ranges.length > 0 ? Math.max(0, ranges[0][0] - SNIPPET_WIDTH / 2) : 0;
+                const to = Math.min(text.length, from + SNIPPET_WIDTH);
+                return {
+                    line: lineNo + 1,
+                    text: text.substring(from, to),
+                    truncated: from > 0 || to < text.length,
+                    highlights: ranges
+                        .filter(([start, end]) => start >= from && end <= to)
+                        .map(([start, end]) => [start - from, end - from])
+                };
+            }));
+    }
+
+    async search(query, { offset = 0, limit = 20 } = {}) {
+        const clauses = parseQuery(query);
+        const docCount = Object.keys(this.docs).length;
+        if (clauses.length === 0 || docCount === 0) {
+            return { results: [], total: 0, totalMatches: 0 };
+        }
+
+        const avgLength = this.totalTokens / docCount || 1;
+        const lineCache = new Map();
+        const clauseHits = await Promise.all(clauses.map(clause => this.matchClause(clause, lineCache)));
+
+        // Every clause has to match (same as the old substring search)
+        let candidates = Array.from(clauseHits[0].keys());
+        clauseHits.slice(1).forEach(hits => {
+            candidates = candidates.filter(docId => hits.has(docId));
+        });
+
+        const scored = candidates.map(docId => {
+            const doc = this.docs[docId];
+            const lengthNorm = 1 - BM25_B + BM25_B * (doc.tokens / avgLength);
+            let score = 0;
+            let occurrences = 0;
+            let lines = [];
+
+            clauseHits.forEach(hits => {
+                const df = hits.size;
+                const tf = hits.get(docId).count;
+                const idf = Math.log(1 + (docCount - df + 0.5) / (df + 0.5));
+                score += idf * (tf * (BM25_K1 + 1)) / (tf + BM25_K1 * lengthNorm);
+                occurrences += tf;
+                lines = lines.concat(hits.get(docId).lines);
+            });
+
+            return { docId, score, occurrences, lines };
+        }).sort((a, b) => b.score - a.score);
+
+        const results = await Promise.all(scored.slice(offset, offset + limit).map(async ({ docId, score, occurrences, lines }) => {
+            const doc = this.docs[docId];
+            const snippets = await this.buildSnippets(docId, lines, clauses, lineCache);
+            return {
+                project: doc.project,
+                file: doc.file,
+                score: Math.round(score * 1000) / 1000,
+                matches: snippets.map(snippet => snippet.text),
+                snippets,
+                totalMatches: occurrences
+            };
+        }));
+
+        return {
+            results,
+            total: scored.length,
+            totalMatches: scored.reduce((sum, r) => sum + r.occurrences, 0)
+        };
+    }
+}
+
+module.exports = { SearchIndex, parseQuery, tokenizeLine, writeIndexFiles };
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+
+# ============================================
+# SMART SAVE SERVER MONITOR
+# ============================================
+# The one monitoring engine behind the menu bar:
+# - Every health call goes through one keep-alive
+#   requests.Session
+# - Stays subscribed to /api/events; the stream
+#   dropping (server died) wakes the monitor at once
+# - Checks the tracked process (Popen.poll or PID)
+#   every second without touching HTTP
+# - Restarts with exponential backoff and gives up
+#   after too many crashes in a short window
+# - Records detection-to-recovery time
+# No rumps here, so it runs (and can be tried) on
+# any platform.
+# ============================================
+
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# States
+UNKNOWN = 'unknown'
+RUNNING = 'running'
+DOWN = 'down'
+RESTARTING = 'restarting'
+CRASH_LOOP = 'crash-loop'
+STOPPED = 'stopped'          # Stopped on purpose - never auto-restarted
+
+
+class ServerMonitor:
+    def __init__(self, port, restart, on_change=None, auto_restart=True, pid_files=(),
+                 health_interval=10, failures_before_down=2, start_timeout=15,
+                 backoff_base=1, backoff_max=60, crash_loop_limit=5, crash_loop_window=300,
+                 stable_after=60, clock=time.monotonic):
+        self.base_url = f'http://localhost:{port}'
+        self.restart = restart                  # () -> Popen or None
+        self.on_change = on_change or (lambda state, message: None)
+        self.auto_restart = auto_restart
+        self.pid_files = list(pid_files)
+        self.health_interval = health_interval
+        self.failures_before_down = failures_before_down
+        self.start_timeout = start_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.crash_loop_limit = crash_loop_limit
+        self.crash_loop_window = crash_loop_window
+        self.stable_after = stable_after
+        self.clock = clock
+
+        # Keep-alive pool: health checks plus the event stream
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount('http://', adapter)
+
+        self.lock = threading.RLock()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.threads = []
+
+        self.state = UNKNOWN
+        self.process = None
+        self.server_version = None
+        self.last_health = None
+        self.last_health_check = 0
+        self.health_failures = 0
+        self.running_since = None
+        self.detected_at = None
+        self.next_restart_at = None
+        self.attempt = 0
+        self.restart_times = deque()
+        self.recoveries = deque(maxlen=20)      # Seconds from detection to healthy
+        self.counters = {'detections': 0, 'restarts': 0, 'failed_restarts': 0, 'crash_loops': 0,
+                         'stream_drops': 0}
+
+    # ---------- process tracking ----------
+
+    def track(self, process):
+        """Watch a server we started (Popen)"""
+        with self.lock:
+            self.process = process
+
+    def tracked_pid(self):
+        for pid_file in self.pid_files:
+            try:
+                with open(pid_file, 'r') as f:
+                    return int(f.read().strip())
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def process_alive(self):
+        """True/False from the tracked process, None when we track nothing"""
+        if self.process is not None:
+            return self.process.poll() is None
+        pid = self.tracked_pid()
+        if pid is None:
+            return None
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    # ---------- HTTP ----------
+
+    def check_health(self, timeout=1):
+        """GET /api/health on the pooled session; the JSON or None"""
+        self.last_health_check = self.clock()
+        try:
+            response = self.session.get(f'{self.base_url}/api/health', timeout=timeout)
+            if response.status_code != 200:
+                return None
+            data = response.json()
+            self.last_health = data
+            self.server_version = data.get('version', 'unknown')
+            return data
+        except (requests.RequestException, ValueError):
+            return None
+
+    def wait_until_healthy(self, timeout=None, interval=0.2):
+        """Poll health until it answers (instead of a fixed sleep)"""
+        deadline = self.clock() + (self.start_timeout if timeout is None else timeout)
+        while self.clock() < deadline and not self.stopping.is_set():
+            if self.process is not None and self.process.poll() is not None:
+                return False        # Exited during startup
+            if self.check_health(timeout=0.5) is not None:
+                return True
+            time.sleep(interval)
+        return False
+
+    def check_ready(self, timeout=1):
+        """GET /api/ready: (ready, status JSON or None). Servers without it count as ready once healthy"""
+        try:
+            response = self.session.get(f'{self.base_url}/api/ready', timeout=timeout)
+            if response.status_code == 404:
+                return self.check_health(timeout) is not None, None
+            return response.status_code == 200, response.json()
+        except (requests.RequestException, ValueError):
+            return False, None
+
+    def wait_until_ready(self, timeout=None, interval=0.2, on_progress=None):
+        """Poll /api/ready until saves are accepted, reporting warm-up progress"""
+        deadline = self.clock() + (self.start_timeout if timeout is None else timeout)
+        last_step = None
+        while self.clock() < deadline and not self.stopping.is_set():
+            if self.process is not None and self.process.poll() is not None:
+                return False        # Exited during startup
+            ready, status = self.check_ready(timeout=0.5)
+            if ready:
+                return True
+            step = status.get('current') if status else None
+            if on_progress and step and step != last_step:
+                on_progress(f"Warming up: {step} ({int(status.get('progress', 0) * 100)}%)")
+                last_step = step
+            time.sleep(interval)
+        return False
+
+    def wait_until_down(self, timeout=5, interval=0.1):
+        deadline = self.clock() + timeout
+        while self.clock() < deadline:
+            if self.process_alive() is not True and self.check_health(timeout=0.3) is None:
+                return True
+            time.sleep(interval)
+        return False
+
+    # ---------- state ----------
+
+    def set_state(self, state, message=''):
+        with self.lock:
+            if state == self.state:
+                return
+            self.state = state
+        print(f"[MONITOR] {state}{': ' + message if message else ''}")
+        self.on_change(state, message)
+
+    def expect_stop(self):
+        """A stop on purpose - don't treat it as a crash"""
+        with self.lock:
+            self.next_restart_at = None
+            self.detected_at = None
+        self.set_state(STOPPED)
+
+    def resume(self):
+        """Back under watch after a manual start (also clears a crash loop)"""
+        with self.lock:
+            self.attempt = 0
+            self.restart_times.clear()
+            self.next_restart_at = None
+            self.health_failures = 0
+            if self.state in (STOPPED, CRASH_LOOP):
+                self.state = UNKNOWN
+        self.wake.set()
+
+    def mark_running(self):
+        with self.lock:
+            now = self.clock()
+            if self.detected_at is not None:
+                self.recoveries.append(round(now - self.detected_at, 2))
+                message = f'recovered in {self.recoveries[-1]}s'
+                self.detected_at = None
+            else:
+                message = ''
+            self.next_restart_at = None
+            self.health_failures = 0
+            if self.state != RUNNING:
+                self.running_since = now
+        self.set_state(RUNNING, message)
+
+    def mark_down(self, reason):
+        with self.lock:
+            if self.state != RUNNING:
+                return
+            self.counters['detections'] += 1
+            self.detected_at = self.clock()
+            self.process = None
+        self.set_state(DOWN, reason)
+        self.schedule_restart()
+
+    def schedule_restart(self):
+        if not self.auto_restart:
+            return
+        with self.lock:
+            now = self.clock()
+            while self.restart_times and now - self.restart_times[0] > self.crash_loop_window:
+                self.restart_times.popleft()
+            if len(self.restart_times) >= self.crash_loop_limit:
+                self.counters['crash_loops'] += 1
+                self.next_restart_at = None
+                loop = True
+            else:
+                delay = min(self.backoff_max, self.backoff_base * (2 ** self.attempt)) if self.attempt else 0
+                self.attempt += 1
+                self.next_restart_at = now + delay
+                loop = False
+        if loop:
+            self.set_state(CRASH_LOOP, f'{self.crash_loop_limit} restarts in {self.crash_loop_window}s - giving up')
+
+    def do_restart(self):
+        with self.lock:
+            self.next_restart_at = None
+            self.restart_times.append(self.clock())
+            self.counters['restarts'] += 1
+        self.set_state(RESTARTING, f'attempt {self.attempt}')
+        try:
+            process = self.restart()
+            if process is not None:
+                self.track(process)
+        except Exception as e:
+            print(f"[MONITOR] Restart failed: {e}")
+        if self.wait_until_healthy():
+            self.mark_running()
+        else:
+            self.counters['failed_restarts'] += 1
+            with self.lock:
+                self.state = DOWN
+            self.schedule_restart()
+
+    # ---------- engine ----------
+
+    def tick(self):
+        # Stopped on purpose: nothing to watch until resume()
+        if self.state == STOPPED:
+            return
+        now = self.clock()
+
+        if self.state == DOWN and self.next_restart_at is not None:
+            if now >= self.next_restart_at:
+                self.do_restart()
+            return
+
+        alive = self.process_alive()
+        due = now - self.last_health_check >= self.health_interval
+        if alive is not False and self.state != UNKNOWN and not due:
+            return
+
+        if self.check_health() is not None:
+            if self.process is not None and alive is False:
+                self.process = None         # Someone else (START.command) runs it now
+            self.mark_running()
+            # Up long enough: the next crash starts from the first backoff step
+            if now - self.running_since >= self.stable_after:
+                self.attempt = 0
+        elif self.state == RUNNING:
+            if alive is False:
+                self.mark_down('process exited')
+            else:
+                self.health_failures += 1
+                if self.health_failures >= self.failures_before_down:
+                    self.mark_down('not answering health checks')
+        elif self.state == UNKNOWN:
+            self.set_state(DOWN, 'not running')
+
+    def run(self):
+        while not self.stopping.is_set():
+            self.wake.wait(1)
+            self.wake.clear()
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[MONITOR] Error: {e}")
+
+    def follow_events(self):
+        """Hold /api/events open; the connection ending means look now"""
+        while not self.stopping.is_set():
+            if self.state != RUNNING:
+                self.stopping.wait(1)
+                continue
+            try:
+                with self.session.get(f'{self.base_url}/api/events', stream=True, timeout=(1, 40)) as response:
+                    for _ in response.iter_lines():
+                        if self.stopping.is_set():
+                            return
+            except requests.RequestException:
+                pass
+            self.counters['stream_drops'] += 1
+            self.last_health_check = 0      # Check right away
+            self.wake.set()
+            self.stopping.wait(0.5)
+
+    def start(self):
+        for target in (self.run, self.follow_events):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.wake.set()
+        self.session.close()
+
+    def metrics(self):
+        recoveries = list(self.recoveries)
+        return dict(self.counters, **{
+            'state': self.state,
+            'recoveries': len(recoveries),
+            'last_recovery_seconds': recoveries[-1] if recoveries else None,
+            'avg_recovery_seconds': round(sum(recoveries) / len(recoveries), 2) if recoveries else None,
+            'max_recovery_seconds': max(recoveries) if recoveries else None,
+        })
@@ -12,9 +12,21 @@ import {
   CallToolRequestSchema,
   ListToolsRequestSchema,
 } from '@modelcontextprotocol/sdk/types.js';
-import fs from 'fs';
 import path from 'path';
 import os from 'os';
+import { MemoryStore, MEMORY_TYPES, DEFAULT_LIMIT, MAX_LIMIT } from './memory-store.js';
+
+// Paging arguments shared by every listing tool
+const PAGING_PROPERTIES = {
+  limit: {
+    type: 'number',
+    description: `Optional: Max results to return (default ${DEFAULT_LIMIT}, max ${MAX_LIMIT})`,
+  },
+  offset: {
+    type: 'number',
+    description: 'Optional: Results to skip, from nextOffset of the previous page',
+  },
+};
 
 class SmartSaveMemoryServer {
   constructor() {
@@ -35,21 +47,27 @@ class SmartSaveMemoryServer {
       '.cache/smart-save-memory/extracted-memories.json'
     );
 
+    this.store = new MemoryStore(this.memoryPath);
     this.setupHandlers();
     this.error = null;
   }
 
+  // Parsed once, then re-indexed only for items that changed on disk
   loadMemories() {
-    try {
-      if (fs.existsSync(this.memoryPath)) {
-        const data = fs.readFileSync(this.memoryPath, 'utf8');
-        return JSON.parse(data);
-      }
-      return null;
-    } catch (error) {
-      this.error = error.message;
-      return null;
-    }
+    this.store.refresh();
+    this.error = this.store.error;
+    return this.store.loaded ? this.store : null;
+  }
+
+  reply(result) {
+    return {
+      content: [
+        {
+          type: 'text',
+          text: JSON.stringify(result, null, 2),
+        },
+      ],
+    };
   }
 
   setupHandlers() {
@@ -69,8 +87,9 @@ class SmartSaveMemoryServer {
               type: {
                 type: 'string',
                 description: 'Optional: Filter by type (people, projects, bugs, solutions, preferences, code)',
-                enum: ['people', 'projects', 'bugs', 'solutions', 'preferences', 'code'],
+                enum: MEMORY_TYPES,
               },
+              ...PAGING_PROPERTIES,
             },
             required: ['query'],
           },
@@ -80,8 +99,80 @@ class SmartSaveMemoryServer {
           description: 'Get all people mentioned in conversations',
           inputSchema: {
             type: 'object',
-            properties: {},
+            properties: {
+              ...PAGING_PROPERTIES,
+            },
+          },
+        },
+        {
+          name: 'get_all_projects',
+          description: 'Get all projects discussed in conversations',
+          inputSchema: {
+            type: 'object',
+            properties: {
+              ...PAGING_PROPERTIES,
+            },
           },
         },
         {
-          name: 'get_all_projects
\ No newline at end of file
+          name: 'get_memory',
+          description: 'Get the memories recorded for one entity by its exact name',
+          inputSchema: {
+            type: 'object',
+            properties: {
+              name: {
+                type: 'string',
+                description: 'Entity name (e.g. a person or project)',
+              },
+              ...PAGING_PROPERTIES,
+            },
+            required: ['name'],
+          },
+        },
+      ],
+    }));
+
+    // Handle tool calls
+    this.server.setRequestHandler(CallToolRequestSchema, async (request) => {
+      const { name, arguments: args = {} } = request.params;
+      const paging = { limit: args.limit, offset: args.offset };
+
+      const store = this.loadMemories();
+      if (!store) {
+        return this.reply({
+          error: this.error || 'No extracted memories yet',
+          memoryPath: this.memoryPath,
+        });
+      }
+
+      switch (name) {
+        case 'search_memories':
+          return this.reply(store.search(args.query, { type: args.type, ...paging }));
+
+        case 'get_all_people':
+          return this.reply(store.list('people', paging));
+
+        case 'get_all_projects':
+          return this.reply(store.list('projects', paging));
+
+        case 'get_memory':
+          return this.reply(store.byEntityName(args.name, paging));
+
+        default:
+          throw new Error(`Unknown tool: ${name}`);
+      }
+    });
+  }
+
+  async run() {
+    // Index up front so the first tool call doesn't pay the parse
+    this.store.refresh(true);
+    const transport = new StdioServerTransport();
+    await this.server.connect(transport);
+    const summary = this.store.summary();
+    console.error(`Smart Save Memory MCP server running (${summary.total} memories indexed)`);
+  }
+}
+
+const server = new SmartSaveMemoryServer();
+server.run().catch(console.error);
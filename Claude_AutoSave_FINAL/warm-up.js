@@ -0,0 +1,136 @@
+// ============================================
+// WARM-UP - Background startup steps and the
+// /api/ready report
+// ============================================
+// The server listens first; loading saved indexes,
+// opening the memory queue and the first tree walk
+// happen afterwards, one step at a time, yielding
+// to the event loop in between so health and ready
+// checks are answered meanwhile. Steps marked gate
+// must finish before saves are accepted (requests
+// that arrive earlier wait for them); the others
+// only report progress. If a gate step fails the
+// gate stays shut: /api/ready stays 503, requests
+// get 503 and the steps after it are skipped.
+// ============================================
+
+const PENDING = 'pending';
+const RUNNING = 'running';
+const DONE = 'done';
+const FAILED = 'failed';
+const SKIPPED = 'skipped';
+
+const elapsedMs = (since) => Math.round(Number(process.hrtime.bigint() - since) / 1e6);
+
+class WarmUp {
+    constructor() {
+        // Process start, so the numbers include module loading
+        this.started = process.hrtime.bigint() - BigInt(Math.round(process.uptime() * 1e9));
+        this.steps = [];            // { name, run, gate, state, ms, error }
+        this.listeningMs = null;
+        this.gateOpenMs = null;
+        this.warmMs = null;
+        this.firstAppendMs = null;
+        this.failedStep = null;     // Gate step that failed - the gate never opens
+        this.gate = new Promise(resolve => { this.settleGate = resolve; });
+        this.finished = new Promise(resolve => { this.finish = resolve; });
+    }
+
+    step(name, run, { gate = false } = {}) {
+        this.steps.push({ name, run, gate, state: PENDING, ms: null, error: null });
+        return this;
+    }
+
+    listening() {
+        this.listeningMs = elapsedMs(this.started);
+    }
+
+    // Run every step in order; a failed step is reported, and only a
+    // failed gate step stops the run
+    async run() {
+        const runStart = process.hrtime.bigint();
+        for (const step of this.steps) {
+            if (this.failedStep) {
+                step.state = SKIPPED;
+                continue;
+            }
+            if (!this.gateOpen() && !this.steps.some(s => s.gate && s.state === PENDING)) this.open();
+            await new Promise(resolve => setImmediate(resolve));
+            step.state = RUNNING;
+            const stepStart = process.hrtime.bigint();
+            try {
+                await step.run();
+                step.state = DONE;
+            } catch (error) {
+                step.state = FAILED;
+                step.error = error.message;
+                console.error(`Warm-up step "${step.name}" failed:`, error);
+                if (step.gate && !this.gateOpen()) this.fail(step);
+            }
+            step.ms = elapsedMs(stepStart);
+        }
+        if (!this.gateOpen() && !this.failedStep) this.open();
+        this.warmMs = elapsedMs(this.started);
+        console.log(`🔥 Warm-up ${this.failedStep ? 'stopped' : 'finished'} in ${elapsedMs(runStart)}ms (${this.warmMs}ms after start)`);
+        this.finish();
+    }
+
+    open() {
+        this.gateOpenMs = elapsedMs(this.started);
+        console.log(`✅ Accepting saves ${this.gateOpenMs}ms after start`);
+        this.settleGate(true);
+    }
+
+    // Half-loaded indexes must never take saves (or be saved over the
+    // good ones at shutdown) - stay shut until restarted
+    fail(step) {
+        this.failedStep = step.name;
+        console.error(`❌ Not accepting saves: warm-up step "${step.name}" failed - fix it and restart the server`);
+        this.settleGate(false);
+    }
+
+    gateOpen() {
+        return this.gateOpenMs !== null;
+    }
+
+    // Express middleware: hold requests until the gate steps are done
+    middleware() {
+        const refuse = (res) => res.status(503).json({
+            success: false,
+            error: `Server not ready: warm-up step "${this.failedStep}" failed`
+        });
+        return (req, res, next) => {
+            if (this.gateOpen()) return next();
+            if (this.failedStep) return refuse(res);
+            this.gate.then(open => (open ? next() : refuse(res)));
+        };
+    }
+
+    // Called after each successful append; only the first one is kept
+    recordAppend() {
+        if (this.firstAppendMs !== null) return;
+        this.firstAppendMs = elapsedMs(this.started);
+        console.log(`⏱️  First append saved ${this.firstAppendMs}ms after start`);
+    }
+
+    status() {
+        const done = this.steps.filter(step => step.state === DONE || step.state === FAILED || step.state === SKIPPED).length;
+        const current = this.steps.find(step => step.state === RUNNING);
+        return {
+            ready: this.gateOpen(),
+            warm: this.warmMs !== null,
+            failed: this.failedStep,
+            progress: this.steps.length > 0 ? Math.round(done / this.steps.length * 100) / 100 : 1,
+            current: current ? current.name : null,
+            steps: this.steps.map(({ name, gate, state, ms, error }) => ({ name, gate, state, ms, error })),
+            timings: {
+                listeningMs: this.listeningMs,
+                readyMs: this.gateOpenMs,
+                warmMs: this.warmMs,
+                firstAppendMs: this.firstAppendMs
+            }
+        };
+    }
+}
+
+module.exports = { WarmUp };
@@ -0,0 +1,106 @@
+// ============================================
+// WORKER POOL FOR SMART SAVE
+// ============================================
+// Small fixed-size worker_threads pool. Each worker
+// script answers { id, ...task } messages with
+// { id, result } or { id, error }. Tasks queue when
+// every worker is busy; a crashed worker fails only
+// its own task and is replaced.
+// ============================================
+
+const { Worker } = require('worker_threads');
+
+class WorkerPool {
+    constructor(script, { size = 2, name = 'worker' } = {}) {
+        this.script = script;
+        this.size = Math.max(1, size);
+        this.name = name;
+        this.workers = [];     // { worker, busy, task }
+        this.queue = [];       // Tasks waiting for a free worker
+        this.nextId = 1;
+        this.closed = false;
+    }
+
+    spawn() {
+        const slot = { worker: new Worker(this.script), busy: false, task: null };
+
+        slot.worker.on('message', (message) => {
+            const task = slot.task;
+            if (!task || message.id !== task.id) return;
+            slot.busy = false;
+            slot.task = null;
+            slot.worker.unref();
+            if (message.error) task.reject(new Error(message.error));
+            else task.resolve(message.result);
+            this.dispatch();
+        });
+
+        slot.worker.on('error', (error) => {
+            console.error(`[${this.name}] Worker error:`, error.message);
+            if (slot.task) slot.task.reject(error);
+            this.replace(slot);
+        });
+
+        slot.worker.on('exit', (code) => {
+            if (this.closed) return;
+            if (slot.task) slot.task.reject(new Error(`${this.name} worker exited with code ${code}`));
+            this.replace(slot);
+        });
+
+        // Only busy workers keep the process alive
+        slot.worker.unref();
+        this.workers.push(slot);
+        return slot;
+    }
+
+    replace(slot) {
+        const index = this.workers.indexOf(slot);
+        if (index !== -1) this.workers.splice(index, 1);
+        slot.busy = false;
+        slot.task = null;
+        if (!this.closed) this.dispatch();
+    }
+
+    dispatch() {
+        while (this.queue.length > 0) {
+            let slot = this.workers.find(w => !w.busy);
+            if (!slot && this.workers.length < this.size) slot = this.spawn();
+            if (!slot) return;
+
+            const task = this.queue.shift();
+            slot.busy = true;
+            slot.task = task;
+            slot.worker.ref();
+            slot.worker.postMessage({ id: task.id, ...task.payload });
+        }
+    }
+
+    run(payload) {
+        if (this.closed) {
+            return Promise.reject(new Error(`${this.name} pool is closed`));
+        }
+        return new Promise((resolve, reject) => {
+            this.queue.push({ id: this.nextId++, payload, resolve, reject });
+            this.dispatch();
+        });
+    }
+
+    stats() {
+        return {
+            size: this.size,
+            workers: this.workers.length,
+            busy: this.workers.filter(w => w.busy).length,
+            queued: this.queue.length
+        };
+    }
+
+    async close() {
+        this.closed = true;
+        this.queue.forEach(task => task.reject(new Error(`${this.name} pool is closed`)));
+        this.queue = [];
+        await Promise.all(this.workers.map(slot => slot.worker.terminate()));
+        this.workers = [];
+    }
+}
+
+module.exports = { WorkerPool };
@@ -0,0 +1,201 @@
+// ============================================
+// WRITE QUEUE - Group commit for chat appends
+// ============================================
+// Appends to the same chat that arrive within a
+// short window (several Claude tabs or windows on
+// one chat, each ticking once a second) are joined
+// into a single write. Inside a batch each session's
+// appends stay together and keep their arrival order,
+// so two tabs no longer interleave tick by tick.
+//
+// durability decides when written text is fsynced:
+//   none     - left to the OS (the old behavior)
+//   batch    - before the batch's appends are answered
+//   interval - chat files written since the last pass
+//              are synced every fsyncIntervalMs
+// close() writes whatever is still queued and syncs,
+// so a SIGTERM stop loses nothing.
+// ============================================
+
+const DURABILITY_MODES = ['none', 'batch', 'interval'];
+const DEFAULT_WINDOW_MS = 10;
+const DEFAULT_MAX_BATCH_BYTES = 1024 * 1024;   // Write at once past this much queued text
+const DEFAULT_FSYNC_INTERVAL_MS = 1000;
+
+// Stable grouping: sessions in order of their first append, each session's
+// appends in arrival order. Appends without a session stay where they are
+function groupBySession(entries) {
+    const groups = new Map();
+    entries.forEach(entry => {
+        const key = entry.session === null ? Symbol('no session') : entry.session;
+        if (!groups.has(key)) groups.set(key, []);
+        groups.get(key).push(entry);
+    });
+    return [].concat(...groups.values());
+}
+
+class WriteQueue {
+    constructor({
+        write,
+        sync,
+        run = (key, task) => task(),
+        windowMs = DEFAULT_WINDOW_MS,
+        maxBatchBytes = DEFAULT_MAX_BATCH_BYTES,
+        durability = 'none',
+        fsyncIntervalMs = DEFAULT_FSYNC_INTERVAL_MS
+    }) {
+        if (!DURABILITY_MODES.includes(durability)) {
+            throw new Error(`Unknown durability "${durability}" (expected ${DURABILITY_MODES.join(', ')})`);
+        }
+        this.write = write;             // (key, text, appends) -> { path, ... }
+        this.sync = sync;               // (path) -> fsync that file
+        this.run = run;                 // (key, task) -> the chat's write chain
+        this.windowMs = windowMs;
+        this.maxBatchBytes = maxBatchBytes;
+        this.durability = durability;
+        this.fsyncIntervalMs = fsyncIntervalMs;
+        this.pending = new Map();       // key -> { entries, bytes, timer }
+        this.inFlight = new Set();      // Batches being written
+        this.dirty = new Set();         // Paths written since the last sync pass
+        this.syncTimer = null;
+        this.syncing = null;
+        this.closed = false;
+        this.counters = {
+            appends: 0,
+            batches: 0,
+            groupedAppends: 0,          // Appends that shared a write with another
+            largestBatch: 0,
+            bytes: 0,
+            syncs: 0,
+            syncErrors: 0,
+            failedBatches: 0
+        };
+    }
+
+    start() {
+        if (this.durability === 'interval' && !this.syncTimer) {
+            this.syncTimer = setInterval(() => this.syncDirty(), this.fsyncIntervalMs);
+            this.syncTimer.unref();
+        }
+        return this;
+    }
+
+    // Queue an append to chat `key`. Either `text` is known now, or
+    // `prepare(scratch)` returns it when the batch is written (inside the
+    // chat's write chain; `scratch` is a Map shared by the batch's appends).
+    // `commit(result)` runs after the write, in order. Resolves with
+    // { result, value, appends }: the batch's write result, what commit
+    // returned and how many appends shared the write
+    append(key, { session = null, text = '', size = text.length, prepare = null, commit = null } = {}) {
+        if (this.closed) return Promise.reject(new Error('Server is shutting down'));
+        return new Promise((resolve, reject) => {
+            let batch = this.pending.get(key);
+            if (!batch) {
+                batch = { entries: [], bytes: 0, timer: null };
+                this.pending.set(key, batch);
+            }
+            batch.entries.push({ session, text, prepare, commit, resolve, reject });
+            batch.bytes += size;
+            this.counters.appends++;
+            if (batch.bytes >= this.maxBatchBytes || this.windowMs <= 0) {
+                this.flush(key);
+            } else if (!batch.timer) {
+                batch.timer = setTimeout(() => this.flush(key), this.windowMs);
+            }
+        });
+    }
+
+    // Write the queued batch for `key` now
+    flush(key) {
+        const batch = this.pending.get(key);
+        if (!batch) return Promise.resolve();
+        this.pending.delete(key);
+        clearTimeout(batch.timer);
+
+        const done = this.run(key, () => this.commitBatch(key, batch.entries)).catch(() => {});
+        this.inFlight.add(done);
+        done.then(() => this.inFlight.delete(done));
+        return done;
+    }
+
+    async commitBatch(key, entries) {
+        const ordered = groupBySession(entries);
+        let result = null;
+        try {
+            const scratch = new Map();
+            const text = ordered.map(entry => {
+                if (entry.prepare) entry.text = entry.prepare(scratch);
+                return entry.text;
+            }).join('');
+
+            if (text.length > 0) {
+                result = await this.write(key, text, ordered.length);
+                await this.written(result.path);
+                this.counters.bytes += Buffer.byteLength(text, 'utf8');
+            }
+            for (const entry of ordered) {
+                entry.value = entry.commit ? await entry.commit(result) : undefined;
+            }
+        } catch (error) {
+            this.counters.failedBatches++;
+            ordered.forEach(entry => entry.reject(error));
+            return;
+        }
+
+        this.counters.batches++;
+        if (ordered.length > 1) this.counters.groupedAppends += ordered.length;
+        this.counters.largestBatch = Math.max(this.counters.largestBatch, ordered.length);
+        ordered.forEach(entry => entry.resolve({ result, value: entry.value, appends: ordered.length }));
+    }
+
+    async written(filePath) {
+        if (this.durability === 'batch') {
+            await this.sync(filePath);
+            this.counters.syncs++;
+        } else if (this.durability === 'interval') {
+            this.dirty.add(filePath);
+        }
+    }
+
+    // Sync every file written since the last pass (one pass at a time)
+    syncDirty() {
+        if (this.syncing) return this.syncing;
+        if (this.dirty.size === 0) return Promise.resolve();
+        const paths = [...this.dirty];
+        this.dirty.clear();
+        this.syncing = Promise.all(paths.map(filePath => this.sync(filePath).then(
+            () => { this.counters.syncs++; },
+            error => {
+                this.counters.syncErrors++;
+                console.log(`Warning: Could not sync ${filePath}: ${error.message}`);
+            }
+        ))).then(() => { this.syncing = null; });
+        return this.syncing;
+    }
+
+    // Stop taking appends, write everything queued and sync it
+    async close() {
+        this.closed = true;
+        clearInterval(this.syncTimer);
+        this.syncTimer = null;
+        [...this.pending.keys()].forEach(key => this.flush(key));
+        await Promise.all([...this.inFlight]);
+        if (this.syncing) await this.syncing;
+        await this.syncDirty();
+    }
+
+    stats() {
+        let queuedAppends = 0;
+        this.pending.forEach(batch => { queuedAppends += batch.entries.length; });
+        return Object.assign({
+            durability: this.durability,
+            windowMs: this.windowMs,
+            queuedChats: this.pending.size,
+            queuedAppends,
+            writing: this.inFlight.size,
+            unsyncedFiles: this.dirty.size
+        }, this.counters);
+    }
+}
+
+module.exports = { WriteQueue, DURABILITY_MODES, groupBySession };
@@ -969,7 +969,8 @@ Press Ctrl+C at any time to cancel
       const configFiles = [
         'Claude_AutoSave_FINAL/config.json',
         'Claude_AutoSave_FINAL/.processed-conversations.json',
-        'Claude_AutoSave_FINAL/.memory-queue.jsonl'
+        'Claude_AutoSave_FINAL/.memory-queue.jsonl',
+        'Claude_AutoSave_FINAL/.memory-queue'
       ];
       
       for (const file of configFiles) {